@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Classifier Benchmark Suite
+Measures every classifier in src/models on synthetic JPEG images of
+several sizes and writes the results as JSON, so runs on different
+commits or machines can be compared.
+
+Each model runs in a fresh Python process, so cold start and peak memory
+are its own:
+
+- cold start: module import, model construction and the first prediction
+- decode latency per image size (JPEG bytes to RGB, as the API does it)
+- single-image predict latency per size: p50/p95/p99 and mean
+- batched throughput (images/sec) for each batch size
+- peak RSS of the process (and its baseline before the model loads)
+
+    python benchmarks/benchmark_classifiers.py
+    python benchmarks/benchmark_classifiers.py --models resnet50 zero-shot --threads 4
+    python benchmarks/benchmark_classifiers.py --compare benchmarks/results/old.json benchmarks/results/new.json
+
+`--models` also accepts ``module:function`` for any factory that returns
+an object with predict() or predict_batch().
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import importlib
+import subprocess
+import tempfile
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+DEFAULT_MODELS = ["prorl", "zero-shot", "resnet50", "efficientnet", "vit", "ensemble"]
+DEFAULT_SIZES = [224, 640, 1920]
+DEFAULT_BATCH_SIZES = [1, 8, 32]
+
+def synthetic_jpeg(size: int, seed: int) -> bytes:
+    """A size x size JPEG with smooth gradients plus noise (compresses like a photo)"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size] / size
+    channels = [np.sin((x * rng.uniform(1, 6) + y * rng.uniform(1, 6)) * np.pi) for _ in range(3)]
+    pixels = (np.stack(channels, axis=-1) * 100 + 128 + rng.normal(0, 12, (size, size, 3))).clip(0, 255)
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+def write_corpus(directory: str, sizes: List[int], images: int):
+    """Synthetic JPEGs shared by every model run (generated once, outside the measured processes)"""
+    for size in sizes:
+        for seed in range(images):
+            with open(os.path.join(directory, f"{size}_{seed}.jpg"), "wb") as f:
+                f.write(synthetic_jpeg(size, seed))
+
+def read_corpus(directory: str, sizes: List[int], images: int) -> Dict[int, List[bytes]]:
+    corpus = {}
+    for size in sizes:
+        corpus[size] = []
+        for seed in range(images):
+            with open(os.path.join(directory, f"{size}_{seed}.jpg"), "rb") as f:
+                corpus[size].append(f.read())
+    return corpus
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean in milliseconds"""
+    if len(samples) < 2:
+        return {"p50_ms": round(samples[0] * 1e3, 3), "p95_ms": round(samples[0] * 1e3, 3),
+                "p99_ms": round(samples[0] * 1e3, 3), "mean_ms": round(samples[0] * 1e3, 3)}
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(quantiles[49] * 1e3, 3),
+        "p95_ms": round(quantiles[94] * 1e3, 3),
+        "p99_ms": round(quantiles[98] * 1e3, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1e3, 3),
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    # VmHWM starts over at exec; ru_maxrss on Linux keeps the peak of the forking parent
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / 1024 / 1024, 1)
+        except (ImportError, AttributeError):
+            return None
+
+def load(spec: str, device: str):
+    """Classifier for a CLI model name or a module:function factory"""
+    if ":" in spec:
+        module, function = spec.split(":", 1)
+        return getattr(importlib.import_module(module), function)()
+    from cli.classifiers import load_classifier
+    return load_classifier(spec, device=device)
+
+def measure(spec: str, args) -> Dict:
+    """Run every measurement for one model (inside its own process)"""
+    from models.image_io import open_image
+    from cli.classifiers import predict_batch
+
+    if args.threads:
+        try:
+            import torch
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass
+
+    jpegs = read_corpus(args.corpus, args.sizes, args.images)
+    result = {"model": spec, "cold_start": {}, "sizes": {}, "throughput": {}, "rss_baseline_mb": peak_rss_mb()}
+
+    start = time.perf_counter()
+    classifier = load(spec, args.device)
+    result["cold_start"]["load_s"] = round(time.perf_counter() - start, 3)
+    result["rss_after_load_mb"] = peak_rss_mb()
+
+    first = open_image(io.BytesIO(jpegs[args.sizes[0]][0])).convert("RGB")
+    start = time.perf_counter()
+    predict_batch(classifier, [first], top_k=5)
+    result["cold_start"]["first_prediction_s"] = round(time.perf_counter() - start, 3)
+    result["cold_start"]["total_s"] = round(result["cold_start"]["load_s"] + result["cold_start"]["first_prediction_s"], 3)
+
+    for size, images in jpegs.items():
+        decode, latency = [], []
+        decoded = []
+        for data in images:
+            t = time.perf_counter()
+            decoded.append(open_image(io.BytesIO(data)).convert("RGB"))
+            decode.append(time.perf_counter() - t)
+
+        for i in range(args.warmup):
+            predict_batch(classifier, [decoded[i % len(decoded)]], top_k=5)
+        for i in range(args.iterations):
+            image = decoded[i % len(decoded)]
+            t = time.perf_counter()
+            predict_batch(classifier, [image], top_k=5)
+            latency.append(time.perf_counter() - t)
+
+        result["sizes"][str(size)] = {"decode": percentiles(decode), "predict": percentiles(latency)}
+
+    # Throughput at the smallest size, i.e. model cost rather than resizing cost
+    images = [open_image(io.BytesIO(data)).convert("RGB") for data in jpegs[args.sizes[0]]]
+    for batch_size in args.batch_sizes:
+        batch = [images[i % len(images)] for i in range(batch_size)]
+        predict_batch(classifier, batch, top_k=5)
+        done, start = 0, time.perf_counter()
+        while done < args.throughput_images or time.perf_counter() - start < args.min_seconds:
+            predict_batch(classifier, batch, top_k=5)
+            done += batch_size
+        elapsed = time.perf_counter() - start
+        result["throughput"][str(batch_size)] = {
+            "images_per_sec": round(done / elapsed, 2),
+            "batch_latency_ms": round(elapsed / (done / batch_size) * 1e3, 3),
+        }
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+def run_model(spec: str, args) -> Dict:
+    """Benchmark one model in a fresh interpreter and return its result"""
+    command = [sys.executable, __file__, "--worker", spec, "--corpus", args.corpus, "--device", args.device,
+               "--sizes", *map(str, args.sizes), "--batch-sizes", *map(str, args.batch_sizes),
+               "--images", str(args.images), "--iterations", str(args.iterations),
+               "--warmup", str(args.warmup), "--throughput-images", str(args.throughput_images),
+               "--min-seconds", str(args.min_seconds)]
+    if args.threads:
+        command += ["--threads", str(args.threads)]
+
+    env = dict(os.environ)
+    if args.threads:
+        env.update({variable: str(args.threads) for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")})
+
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, env=env, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        # run() has already killed the worker; record it like any other failed model
+        return {"model": spec, "error": "timeout"}
+    process_seconds = time.perf_counter() - start
+
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"model": spec, "error": error}
+
+    result = json.loads(lines[-1])
+    result["process_s"] = round(process_seconds, 3)
+    return result
+
+def metadata(args) -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    versions = {}
+    for module in ("torch", "torchvision", "transformers", "numpy", "PIL"):
+        try:
+            versions[module] = importlib.import_module(module).__version__
+        except Exception:
+            versions[module] = None
+
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "threads": args.threads,
+        "device": args.device,
+        "versions": versions,
+        "settings": {"sizes": args.sizes, "batch_sizes": args.batch_sizes, "images": args.images,
+                     "iterations": args.iterations, "warmup": args.warmup},
+    }
+
+def print_result(result: Dict):
+    if "error" in result:
+        print(f"{result['model']}: skipped ({result['error']})")
+        return
+    cold = result["cold_start"]
+    print(f"{result['model']}  cold start {cold['total_s']:.2f}s (load {cold['load_s']:.2f}s, "
+          f"first prediction {cold['first_prediction_s']:.2f}s)  peak RSS {result['peak_rss_mb']} MB")
+    for size, stats in result["sizes"].items():
+        predict, decode = stats["predict"], stats["decode"]
+        print(f"  {size:>5}px  predict p50 {predict['p50_ms']:>8.2f}  p95 {predict['p95_ms']:>8.2f}  "
+              f"p99 {predict['p99_ms']:>8.2f} ms   decode p50 {decode['p50_ms']:>6.2f} ms")
+    print("  batch   " + "  ".join(f"{batch:>4}: {stats['images_per_sec']:>8.1f} img/s"
+                                   for batch, stats in result["throughput"].items()))
+
+def compare(old_path: str, new_path: str):
+    """Print new/old ratios of the headline numbers of two result files"""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"🧠 {old['meta'].get('commit')} → {new['meta'].get('commit')} (new / old; < 1 is faster for latency)")
+    for model, result in new["results"].items():
+        before = old["results"].get(model)
+        if not before or "error" in before or "error" in result:
+            continue
+        print(f"{model}")
+        print(f"  cold start      {result['cold_start']['total_s'] / max(before['cold_start']['total_s'], 1e-9):6.2f}x")
+        for size, stats in result["sizes"].items():
+            if size in before["sizes"]:
+                ratio = stats["predict"]["p50_ms"] / max(before["sizes"][size]["predict"]["p50_ms"], 1e-9)
+                tail = stats["predict"]["p99_ms"] / max(before["sizes"][size]["predict"]["p99_ms"], 1e-9)
+                print(f"  {size:>5}px p50    {ratio:6.2f}x   p99 {tail:6.2f}x")
+        for batch, stats in result["throughput"].items():
+            if batch in before["throughput"]:
+                ratio = stats["images_per_sec"] / max(before["throughput"][batch]["images_per_sec"], 1e-9)
+                print(f"  batch {batch:>4} img/s {ratio:6.2f}x")
+        if result.get("peak_rss_mb") and before.get("peak_rss_mb"):
+            print(f"  peak RSS        {result['peak_rss_mb'] / before['peak_rss_mb']:6.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifier latency/throughput benchmark")
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS, help='CLI model names or module:function factories')
+    parser.add_argument('--device', default='cpu', choices=['cpu', 'cuda'])
+    parser.add_argument('--threads', type=int, help='Torch/OpenMP threads (default: library default)')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='Square image sizes in pixels')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=DEFAULT_BATCH_SIZES)
+    parser.add_argument('--images', type=int, default=8, help='Distinct synthetic images per size')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed single-image predictions per size')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed predictions before timing')
+    parser.add_argument('--throughput-images', type=int, default=128, help='Minimum images per batch-size run')
+    parser.add_argument('--min-seconds', type=float, default=2.0, help='Minimum seconds per batch-size run')
+    parser.add_argument('--timeout', type=float, default=1800, help='Seconds allowed per model')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/classifiers-<commit>-<time>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files and exit')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--corpus', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Child process: print one JSON line for the parent
+        print(json.dumps(measure(args.worker, args)))
+        return
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    print("🧠 VisionAI Pro - Classifier Benchmark")
+    print(f"   sizes {args.sizes}, batch sizes {args.batch_sizes}, {args.iterations} timed predictions per size")
+    print("=" * 72)
+
+    report = {"meta": metadata(args), "results": {}}
+    with tempfile.TemporaryDirectory(prefix="visionai_bench_") as corpus:
+        write_corpus(corpus, args.sizes, args.images)
+        args.corpus = corpus
+        for spec in args.models:
+            result = run_model(spec, args)
+            report["results"][spec] = result
+            print_result(result)
+
+    output = args.output or str(project_root / "benchmarks" / "results" /
+                                f"classifiers-{report['meta']['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+if __name__ == "__main__":
+    main()
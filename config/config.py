@@ -13,9 +13,23 @@ LOGS_DIR = BASE_DIR / "logs"
 STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR = BASE_DIR / "templates"
 
-# Create directories
-for dir_path in [MODELS_DIR, UPLOADS_DIR, LOGS_DIR, STATIC_DIR, TEMPLATES_DIR]:
-    dir_path.mkdir(parents=True, exist_ok=True)
+def ensure_directories():
+    """Create the data, log, static and template directories the servers expect
+
+    Called by the server entry points rather than at import, so importing
+    the configuration (e.g. from the CLI) has no side effects.
+    """
+    for dir_path in [MODELS_DIR, UPLOADS_DIR, LOGS_DIR, STATIC_DIR, TEMPLATES_DIR]:
+        dir_path.mkdir(parents=True, exist_ok=True)
+
+def _parse_rate_limits(value: str) -> dict:
+    """Parse "key:limit,key:limit" into a per-key rate limit mapping"""
+    limits = {}
+    for item in value.split(","):
+        if ":" in item:
+            key, limit = item.rsplit(":", 1)
+            limits[key.strip()] = int(limit)
+    return limits
 
 # Load configuration from environment variables (with defaults)
 class Config:
@@ -28,7 +42,12 @@ class Config:
     ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
     ENABLE_EXTERNAL_ACCESS = os.getenv("ENABLE_EXTERNAL_ACCESS", "false").lower() == "true"
     RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+    API_KEY_RATE_LIMIT_PER_MINUTE = int(os.getenv("API_KEY_RATE_LIMIT_PER_MINUTE", "120"))
+    API_KEY_RATE_LIMITS = _parse_rate_limits(os.getenv("API_KEY_RATE_LIMITS", ""))  # per-key overrides
+    # memory:// (per worker), shm:// (shared by all workers on this host) or redis://host:port/db
+    RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "shm://")
     MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE", "10485760"))  # 10MB
+    SECURITY_LOG_SAMPLE_EVERY = int(os.getenv("SECURITY_LOG_SAMPLE_EVERY", "100"))  # log 1 in N requests
     
     # Server configuration
     HOST = os.getenv("HOST", "0.0.0.0")
@@ -47,12 +66,42 @@ class Config:
     
     # Image configuration
     UPLOAD_DIR = os.getenv("UPLOAD_DIR", str(UPLOADS_DIR))
+    # Keep uploaded images (deduplicated by SHA-256 under UPLOAD_DIR) so stored results can be reprocessed.
+    # Off by default: kept images never expire, so enabling this retains user uploads indefinitely
+    STORE_UPLOADS = os.getenv("STORE_UPLOADS", "false").lower() == "true"
+    # Checked once an upload is spooled; MAX_REQUEST_SIZE bounds the spooled body while it streams
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
     ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+    ALLOWED_IMAGE_FORMATS = os.getenv("ALLOWED_IMAGE_FORMATS", "JPEG,PNG,GIF,BMP,WEBP").split(",")
+    MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "40000000"))  # decompression bomb limit
+    IMAGE_DRAFT_SIZE = int(os.getenv("IMAGE_DRAFT_SIZE", "512"))  # JPEG reduced decode target (0 = off)
     
     # Database configuration
     DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/data/image_categories.db")
     
+    # Storage backend for API keys, usage events and classification results:
+    # "firestore" or a local SQLite database such as "sqlite:///data/visionai.db"
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore")
+    
+    # Firebase write-behind configuration
+    FIREBASE_WRITE_BEHIND = os.getenv("FIREBASE_WRITE_BEHIND", "true").lower() == "true"
+    FIREBASE_JOURNAL_PATH = os.getenv("FIREBASE_JOURNAL_PATH", str(BASE_DIR / "data" / "journal" / "firebase_writes.jsonl"))
+    FIREBASE_WRITE_BATCH_SIZE = int(os.getenv("FIREBASE_WRITE_BATCH_SIZE", "200"))
+    FIREBASE_FLUSH_INTERVAL = float(os.getenv("FIREBASE_FLUSH_INTERVAL", "0.5"))  # seconds
+    FIREBASE_JOURNAL_FSYNC = os.getenv("FIREBASE_JOURNAL_FSYNC", "false").lower() == "true"
+    
+    # Local search index for classification history (SQLite FTS5)
+    CLASSIFICATION_INDEX_PATH = os.getenv("CLASSIFICATION_INDEX_PATH", str(BASE_DIR / "data" / "classification_index.db"))
+    
+    # CLIP image embeddings kept by SHA-256, so category changes can be re-scored without images
+    EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", str(BASE_DIR / "data" / "embeddings"))
+    # Zero-shot server: store each classified image's embedding and serve /api/similar
+    STORE_EMBEDDINGS = os.getenv("STORE_EMBEDDINGS", "false").lower() == "true"
+    SIMILARITY_NPROBE = int(os.getenv("SIMILARITY_NPROBE", "8"))
+    
+    # Raw usage events older than this are rolled into daily aggregates by `main.py retention`
+    USAGE_RETENTION_DAYS = int(os.getenv("USAGE_RETENTION_DAYS", "90"))
+    
     # Logging configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = LOGS_DIR / "app.log"
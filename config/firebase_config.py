@@ -1,29 +1,58 @@
 """
 Firebase Configuration for VisionAI Pro Image Classification System
+
+Nothing is initialized at import time. The Firestore client is created on
+first use in a background thread, so importers never pay for
+firebase_admin or credential discovery, and a slow credential lookup can
+delay requests that need Firestore by at most `connect_timeout` instead of
+blocking startup. Failed connections are retried with exponential backoff,
+and `check_health()` drops a client that stops answering so the next
+caller reconnects.
 """
 
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore
-from typing import Optional
+import time
+import asyncio
 import logging
+import threading
+from typing import Any, Dict, Optional
 
 class FirebaseConfig:
-    """Firebase configuration and initialization"""
-    
-    def __init__(self):
+    """Firebase configuration and lazy initialization"""
+
+    def __init__(self, connect_timeout: float = None, retry_interval: float = 5.0,
+                 max_retry_interval: float = 300.0):
         self.logger = logging.getLogger(__name__)
-        self.db: Optional[firestore.Client] = None
-        self._initialize_firebase()
-    
+        self.connect_timeout = connect_timeout if connect_timeout is not None else float(
+            os.getenv("FIREBASE_CONNECT_TIMEOUT", "10")
+        )
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+        self._db = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._attempt_done = threading.Event()
+        self._backoff = retry_interval
+        self._next_attempt = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def db(self):
+        """Firestore client, or None if not connected yet"""
+        return self._db
+
     def _initialize_firebase(self):
-        """Initialize Firebase Admin SDK"""
+        """Initialize Firebase Admin SDK and return a Firestore client"""
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
         try:
             # Check if Firebase is already initialized
             if not firebase_admin._apps:
                 # Try to load service account key from environment variable
                 service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH")
-                
+
                 if service_account_path and os.path.exists(service_account_path):
                     # Load from service account file
                     cred = credentials.Certificate(service_account_path)
@@ -35,29 +64,95 @@ class FirebaseConfig:
                     self.logger.info("Firebase initialized with default credentials")
             else:
                 self.logger.info("Firebase already initialized")
-            
+
             # Initialize Firestore client
-            self.db = firestore.client()
+            db = firestore.client()
             self.logger.info("Firestore client initialized successfully")
-            
+            return db
+
         except Exception as e:
             self.logger.error(f"Firebase initialization failed: {e}")
             # Try to initialize without credentials (for testing)
-            try:
+            if not firebase_admin._apps:
                 firebase_admin.initialize_app()
-                self.db = firestore.client()
-                self.logger.info("Firebase initialized without credentials (test mode)")
-            except Exception as test_error:
-                self.logger.error(f"Test initialization also failed: {test_error}")
-                self.db = None
-    
-    def get_db(self) -> Optional[firestore.Client]:
-        """Get Firestore database client"""
-        return self.db
-    
+            db = firestore.client()
+            self.logger.info("Firebase initialized without credentials (test mode)")
+            return db
+
+    def _connect(self):
+        """One connection attempt (runs in the background thread)"""
+        try:
+            db = self._initialize_firebase()
+            with self._lock:
+                self._db = db
+                self.last_error = None
+                self._backoff = self.retry_interval
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+                self._next_attempt = time.monotonic() + self._backoff
+                self.logger.error(f"Firebase connection failed, next attempt in {self._backoff:.0f}s: {e}")
+                self._backoff = min(self._backoff * 2, self.max_retry_interval)
+        finally:
+            self._attempt_done.set()
+
+    def start_background_init(self) -> bool:
+        """Start connecting in the background unless connected, connecting or backing off"""
+        with self._lock:
+            if self._db is not None or (self._thread and self._thread.is_alive()):
+                return False
+            if time.monotonic() < self._next_attempt:
+                return False
+
+            self._attempt_done = threading.Event()
+            self._thread = threading.Thread(target=self._connect, name="firebase-connect", daemon=True)
+            self._thread.start()
+            return True
+
+    def get_db(self, timeout: float = None):
+        """Get Firestore database client, waiting up to `timeout` seconds for a connection
+
+        Returns None if Firebase isn't reachable yet; a later call retries
+        once the backoff interval has passed.
+        """
+        if self._db is not None:
+            return self._db
+
+        self.start_background_init()
+        self._attempt_done.wait(self.connect_timeout if timeout is None else timeout)
+        return self._db
+
+    async def get_db_async(self, timeout: float = None):
+        """get_db() without blocking the event loop"""
+        return await asyncio.to_thread(self.get_db, timeout)
+
     def is_connected(self) -> bool:
-        """Check if Firebase is properly connected"""
-        return self.db is not None
+        """Check if a Firestore client is available (never blocks)"""
+        return self._db is not None
+
+    def reset(self):
+        """Drop the current client so the next get_db() reconnects"""
+        with self._lock:
+            self._db = None
+            self._next_attempt = 0.0
+
+    def check_health(self, timeout: float = 2.0) -> Dict[str, Any]:
+        """Probe Firestore with a minimal read; an unresponsive client is dropped"""
+        db = self._db
+        if db is None:
+            self.start_background_init()
+            return {"connected": False, "error": self.last_error}
+
+        start = time.perf_counter()
+        try:
+            db.collection("_health").limit(1).get(timeout=timeout)
+            return {"connected": True, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            self.logger.warning(f"Firestore health probe failed, reconnecting: {e}")
+            self.last_error = str(e)
+            self.reset()
+            self.start_background_init()
+            return {"connected": False, "error": str(e)}
 
-# Global Firebase configuration instance
+# Global Firebase configuration instance (connects lazily on first get_db())
 firebase_config = FirebaseConfig()
@@ -16,7 +16,7 @@ sys.path.insert(0, str(project_root))
 src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
-from config.config import current_config
+from config.config import current_config, ensure_directories
 
 def run_zero_shot_server():
     """Run Zero-shot classification server"""
@@ -96,6 +96,7 @@ def main():
     
     print("🧠 VisionAI Pro Image Classification System")
     print("=" * 50)
+    ensure_directories()
     
     if args.server == "zero-shot":
         run_zero_shot_server()
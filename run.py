@@ -13,7 +13,7 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from config.config import current_config
+from config.config import current_config, ensure_directories
 
 def setup_logging():
     """Setup logging"""
@@ -29,6 +29,7 @@ def setup_logging():
 def main():
     """Main execution function"""
     print("🚀 Starting VisionAI Pro Image Classification System...")
+    ensure_directories()
     
     # Setup logging
     setup_logging()
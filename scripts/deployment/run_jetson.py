@@ -14,7 +14,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from config.config import current_config
+from config.config import current_config, ensure_directories
 
 def check_jetson_environment():
     """Check if running on Jetson and set appropriate environment"""
@@ -72,6 +72,7 @@ def setup_logging():
 def main():
     """Main execution function for Jetson"""
     print("🚀 Starting VisionAI Pro Image Classification System on Jetson...")
+    ensure_directories()
     
     # Check Jetson environment
     is_jetson = check_jetson_environment()
@@ -77,7 +77,7 @@ echo "  - By quality: image_samples/by_quality/"
 echo "  - Test sets: image_samples/test_sets/"
 echo ""
 echo "🧪 To test with samples:"
-echo "  python3 test_with_downloaded_images.py"
+echo "  python3 test_with_downloaded_images.py --image-dir image_samples/by_category --models zero-shot resnet50"
 echo ""
 echo "📖 For more info:"
 echo "  cat image_samples/README.md"
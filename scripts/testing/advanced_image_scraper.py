@@ -2,29 +2,38 @@
 """
 Advanced Image Scraper for VisionAI Pro
 Downloads high-quality images from multiple free sources
+
+Downloads run concurrently with per-host limits and resume from the
+manifest in the output directory (see dataset_downloader.py).
 """
 
 import os
-import requests
+import sys
 import time
 import random
-import json
-from PIL import Image
-import io
-from urllib.parse import urlparse, urljoin
+import argparse
 import logging
 import hashlib
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Add this directory to Python path for the shared downloader
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dataset_downloader import ConcurrentDownloader, DownloadTask
+
 logger = logging.getLogger(__name__)
 
 class AdvancedImageScraper:
-    def __init__(self, output_dir="advanced_test_images"):
+    def __init__(self, output_dir="advanced_test_images", workers=32, per_host_connections=8,
+                 per_host_rate=10.0, seed=0):
         self.output_dir = output_dir
         self.downloaded_count = 0
+        self.duplicate_count = 0
         self.failed_count = 0
-        self.downloaded_urls = set()  # Prevent duplicates
+        self.random = random.Random(seed)
+        # Dedup by URL and content hash, across runs, via the manifest in output_dir
+        self.downloader = ConcurrentDownloader(output_dir, workers=workers,
+                                               per_host_connections=per_host_connections,
+                                               per_host_rate=per_host_rate)
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
@@ -45,64 +54,29 @@ class AdvancedImageScraper:
         
         # Create category directories
         for category, subcategories in self.categories.items():
-            os.makedirs(os.path.join(output_dir, category), exist_ok())
+            os.makedirs(os.path.join(output_dir, category), exist_ok=True)
             for subcategory in subcategories:
-                os.makedirs(os.path.join(output_dir, category, subcategory), exist_ok())
+                os.makedirs(os.path.join(output_dir, category, subcategory), exist_ok=True)
     
     def get_image_hash(self, image_data):
-        """Generate hash for image to prevent duplicates"""
-        return hashlib.md5(image_data).hexdigest()
+        """Generate hash for image to prevent duplicates (as recorded in the manifest)"""
+        return hashlib.sha256(image_data).hexdigest()
+    
+    def download(self, tasks):
+        """Download tasks concurrently and update the counters"""
+        stats = self.downloader.run(tasks)
+        self.downloaded_count += stats["downloaded"]
+        self.duplicate_count += stats["duplicates"]
+        self.failed_count += stats["failed"]
+        return stats
     
     def download_image(self, url, filename, category, subcategory=""):
         """Download a single image with error handling"""
-        try:
-            # Check if URL already downloaded
-            if url in self.downloaded_urls:
-                return False
-            
-            # Download image
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            # Check if it's actually an image
-            if not response.headers.get('content-type', '').startswith('image/'):
-                return False
-            
-            # Generate file path
-            if subcategory:
-                filepath = os.path.join(self.output_dir, category, subcategory, filename)
-            else:
-                filepath = os.path.join(self.output_dir, category, filename)
-            
-            # Save image
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
-            # Verify image is valid
-            try:
-                with Image.open(filepath) as img:
-                    img.verify()
-            except Exception:
-                os.remove(filepath)
-                return False
-            
-            self.downloaded_urls.add(url)
-            self.downloaded_count += 1
-            logger.info(f"Downloaded: {filename}")
-            return True
-            
-        except Exception as e:
-            self.failed_count += 1
-            logger.error(f"Failed to download {filename}: {e}")
-            return False
+        path = os.path.join(category, subcategory, filename) if subcategory else os.path.join(category, filename)
+        return self.download([DownloadTask(url, path, category)])["downloaded"] == 1
     
-    def download_from_unsplash_collections(self, category, count=50):
-        """Download from Unsplash collections"""
-        logger.info(f"Downloading {count} {category} images from Unsplash collections...")
-        
+    def unsplash_tasks(self, category, count=50):
+        """Unsplash collection downloads for a category"""
         # Unsplash collection IDs for different categories
         collections = {
             "people": ["317099", "935777", "139386"],
@@ -114,26 +88,18 @@ class AdvancedImageScraper:
         }
         
         if category not in collections:
-            return
+            return []
         
         collection_ids = collections[category]
-        
+        tasks = []
         for i in range(count):
-            try:
-                collection_id = random.choice(collection_ids)
-                url = f"https://source.unsplash.com/collection/{collection_id}/400x400"
-                
-                filename = f"{category}_unsplash_{i+1:03d}.jpg"
-                if self.download_image(url, filename, category):
-                    time.sleep(0.5)  # Rate limiting
-                
-            except Exception as e:
-                logger.error(f"Unsplash download error: {e}")
+            collection_id = self.random.choice(collection_ids)
+            url = f"https://source.unsplash.com/collection/{collection_id}/400x400?sig={category}-{i}"
+            tasks.append(DownloadTask(url, os.path.join(category, f"{category}_unsplash_{i+1:03d}.jpg"), category))
+        return tasks
     
-    def download_from_picsum_with_categories(self, category, count=50):
-        """Download from Picsum with category-specific seeds"""
-        logger.info(f"Downloading {count} {category} images from Picsum...")
-        
+    def picsum_tasks(self, category, count=50):
+        """Picsum downloads with category-specific seeds"""
         # Use category-specific seeds for more relevant images
         seeds = {
             "people": [1, 2, 3, 4, 5],
@@ -145,70 +111,65 @@ class AdvancedImageScraper:
         }
         
         category_seeds = seeds.get(category, [1, 2, 3, 4, 5])
-        
+        tasks = []
         for i in range(count):
-            try:
-                seed = random.choice(category_seeds) + i
-                url = f"https://picsum.photos/seed/{seed}/400/400"
-                
-                filename = f"{category}_picsum_{i+1:03d}.jpg"
-                if self.download_image(url, filename, category):
-                    time.sleep(0.3)
-                
-            except Exception as e:
-                logger.error(f"Picsum download error: {e}")
+            seed = self.random.choice(category_seeds) + i
+            url = f"https://picsum.photos/seed/{seed}/400/400"
+            tasks.append(DownloadTask(url, os.path.join(category, f"{category}_picsum_{i+1:03d}.jpg"), category))
+        return tasks
     
-    def download_from_placeholder_with_text(self, category, count=30):
-        """Download placeholder images with category-specific text"""
-        logger.info(f"Downloading {count} placeholder images for {category}...")
-        
+    def placeholder_tasks(self, category, count=30):
+        """Placeholder images with category-specific text"""
         colors = ["FF6B6B", "4ECDC4", "45B7D1", "96CEB4", "FFEAA7", "DDA0DD", "98D8C8", "F7DC6F"]
         subcategories = self.categories.get(category, [])
-        
+        tasks = []
         for i in range(count):
-            try:
-                color = random.choice(colors)
-                text = random.choice(subcategories) if subcategories else category.title()
-                url = f"https://via.placeholder.com/400x400/{color}/ffffff?text={text}"
-                
-                filename = f"{category}_placeholder_{i+1:03d}.jpg"
-                if self.download_image(url, filename, category):
-                    time.sleep(0.2)
-                
-            except Exception as e:
-                logger.error(f"Placeholder download error: {e}")
+            color = self.random.choice(colors)
+            text = self.random.choice(subcategories) if subcategories else category.title()
+            url = f"https://via.placeholder.com/400x400/{color}/ffffff?text={text}"
+            tasks.append(DownloadTask(url, os.path.join(category, f"{category}_placeholder_{i+1:03d}.jpg"), category))
+        return tasks
+    
+    def fakeimg_tasks(self, category, count=20):
+        """fakeimg.pl (another placeholder service) downloads"""
+        # The URL is the same for every image of a category, so this yields at most one
+        url = f"https://fakeimg.pl/400x400/282828/EAEAEA/?text={category.title()}&font=bebas"
+        return [DownloadTask(url, os.path.join(category, f"{category}_fakeimg_{i+1:03d}.jpg"), category)
+                for i in range(count)]
+    
+    def download_from_unsplash_collections(self, category, count=50):
+        """Download from Unsplash collections"""
+        logger.info(f"Downloading {count} {category} images from Unsplash collections...")
+        return self.download(self.unsplash_tasks(category, count))
+    
+    def download_from_picsum_with_categories(self, category, count=50):
+        """Download from Picsum with category-specific seeds"""
+        logger.info(f"Downloading {count} {category} images from Picsum...")
+        return self.download(self.picsum_tasks(category, count))
+    
+    def download_from_placeholder_with_text(self, category, count=30):
+        """Download placeholder images with category-specific text"""
+        logger.info(f"Downloading {count} placeholder images for {category}...")
+        return self.download(self.placeholder_tasks(category, count))
     
     def download_from_fakeimg(self, category, count=20):
         """Download from fakeimg.pl (another placeholder service)"""
         logger.info(f"Downloading {count} images from fakeimg.pl for {category}...")
-        
-        for i in range(count):
-            try:
-                url = f"https://fakeimg.pl/400x400/282828/EAEAEA/?text={category.title()}&font=bebas"
-                
-                filename = f"{category}_fakeimg_{i+1:03d}.jpg"
-                if self.download_image(url, filename, category):
-                    time.sleep(0.2)
-                
-            except Exception as e:
-                logger.error(f"Fakeimg download error: {e}")
+        return self.download(self.fakeimg_tasks(category, count))
+    
+    def category_tasks(self, category, total_count=100):
+        """Downloads for a category, distributed across sources"""
+        return (self.unsplash_tasks(category, total_count // 2)
+                + self.picsum_tasks(category, total_count // 3)
+                + self.placeholder_tasks(category, total_count // 6)
+                + self.fakeimg_tasks(category, total_count // 12))
     
     def download_category_images(self, category, total_count=100):
         """Download images for a specific category from multiple sources"""
         logger.info(f"\n=== Downloading {category.upper()} images ===")
-        
-        # Distribute downloads across sources
-        unsplash_count = total_count // 2
-        picsum_count = total_count // 3
-        placeholder_count = total_count // 6
-        fakeimg_count = total_count // 12
-        
-        self.download_from_unsplash_collections(category, unsplash_count)
-        self.download_from_picsum_with_categories(category, picsum_count)
-        self.download_from_placeholder_with_text(category, placeholder_count)
-        self.download_from_fakeimg(category, fakeimg_count)
-        
+        stats = self.download(self.category_tasks(category, total_count))
         logger.info(f"Completed {category} category")
+        return stats
     
     def create_advanced_dataset(self, total_images=1000):
         """Create an advanced balanced dataset"""
@@ -217,18 +178,24 @@ class AdvancedImageScraper:
         logger.info(f"Creating advanced dataset with {total_images} images...")
         logger.info(f"Images per category: {images_per_category}")
         
+        # One concurrent run over every category and source
+        tasks = []
         for category in self.categories.keys():
-            self.download_category_images(category, images_per_category)
-            time.sleep(1)  # Brief pause between categories
+            tasks.extend(self.category_tasks(category, images_per_category))
+        stats = self.download(tasks)
+        logger.info(f"{stats['skipped']} already downloaded, {stats['seconds']}s")
         
         self.print_summary()
     
     def print_summary(self):
         """Print download summary"""
         logger.info(f"\n=== Download Summary ===")
+        attempted = self.downloaded_count + self.duplicate_count + self.failed_count
+        success_rate = (attempted - self.failed_count) / attempted * 100 if attempted else 0.0
         logger.info(f"Total downloaded: {self.downloaded_count}")
+        logger.info(f"Duplicates skipped: {self.duplicate_count}")
         logger.info(f"Failed downloads: {self.failed_count}")
-        logger.info(f"Success rate: {(self.downloaded_count / (self.downloaded_count + self.failed_count) * 100):.1f}%")
+        logger.info(f"Success rate: {success_rate:.1f}%")
         
         # Create detailed summary
         summary_file = os.path.join(self.output_dir, "advanced_download_summary.txt")
@@ -236,8 +203,9 @@ class AdvancedImageScraper:
             f.write(f"Advanced Image Download Summary\n")
             f.write(f"==============================\n")
             f.write(f"Total images: {self.downloaded_count}\n")
+            f.write(f"Duplicates skipped: {self.duplicate_count}\n")
             f.write(f"Failed downloads: {self.failed_count}\n")
-            f.write(f"Success rate: {(self.downloaded_count / (self.downloaded_count + self.failed_count) * 100):.1f}%\n")
+            f.write(f"Success rate: {success_rate:.1f}%\n")
             f.write(f"Categories: {', '.join(self.categories.keys())}\n")
             f.write(f"Download date: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             
@@ -252,24 +220,40 @@ class AdvancedImageScraper:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Download free test images with subcategories")
+    parser.add_argument('--output-dir', default='advanced_test_images')
+    parser.add_argument('--total', type=int, default=1000, help='Images to request across all categories')
+    parser.add_argument('--workers', type=int, default=32, help='Concurrent downloads')
+    parser.add_argument('--per-host-connections', type=int, default=8)
+    parser.add_argument('--per-host-rate', type=float, default=10.0, help='Requests/sec per host (0: unlimited)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for generated URLs (keep it to resume)')
+    args = parser.parse_args()
+
+    # Setup logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
     print("🚀 Advanced Image Scraper for VisionAI Pro")
     print("=" * 50)
     
-    scraper = AdvancedImageScraper()
+    scraper = AdvancedImageScraper(args.output_dir, workers=args.workers,
+                                   per_host_connections=args.per_host_connections,
+                                   per_host_rate=args.per_host_rate or None, seed=args.seed)
     
     try:
         # Download 1000+ images
-        scraper.create_advanced_dataset(1000)
+        scraper.create_advanced_dataset(args.total)
         
         print(f"\n✅ Advanced download completed!")
         print(f"📁 Images saved to: {scraper.output_dir}")
         print(f"📊 Total images: {scraper.downloaded_count}")
         
     except KeyboardInterrupt:
-        print("\n⏹️  Download interrupted by user")
+        print("\n⏹️  Download interrupted by user (rerun to resume)")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         logger.error(f"Advanced download failed: {e}")
+    finally:
+        scraper.downloader.close()
 
 if __name__ == "__main__":
     main()
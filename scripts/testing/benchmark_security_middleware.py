@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Security Middleware Load Benchmark
+Drives a minimal FastAPI app in-process (no sockets) under concurrency and
+compares the per-request overhead of:
+  - no security layer
+  - the previous stack (SlowAPIMiddleware + BaseHTTPMiddleware, INFO log per request)
+  - the pure ASGI SecurityMiddleware
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+from pathlib import Path
+
+# Generous limits and per-process storage so the benchmark measures overhead, not 429s
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("API_KEY_RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("RATE_LIMIT_STORAGE", "memory://")
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from slowapi.middleware import SlowAPIMiddleware
+from config.config import Config
+from middleware import security
+
+# Send log output nowhere, but keep the formatting cost realistic
+logging.basicConfig(level=logging.INFO, handlers=[logging.FileHandler(os.devnull)], force=True)
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return app
+
+async def legacy_security_middleware(request: Request, call_next):
+    """The BaseHTTPMiddleware-based security layer this benchmark replaced"""
+    client_ip = request.client.host
+    if not security.check_rate_limit(client_ip, Config.RATE_LIMIT_PER_MINUTE):
+        return JSONResponse(status_code=429, content={"error": "Rate limit exceeded"})
+    if Config.ENABLE_EXTERNAL_ACCESS:
+        if not security.validate_origin(request, Config.ALLOWED_ORIGINS):
+            return JSONResponse(status_code=403, content={"error": "Forbidden"})
+        if not security.validate_host(request, Config.ALLOWED_HOSTS):
+            return JSONResponse(status_code=403, content={"error": "Forbidden"})
+    if not security.validate_request_size(request, Config.MAX_REQUEST_SIZE):
+        return JSONResponse(status_code=413, content={"error": "Request too large"})
+    security.logger.info(f"Request: {request.method} {request.url} from {client_ip}")
+    response = await call_next(request)
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "DENY"
+    response.headers["X-XSS-Protection"] = "1; mode=block"
+    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    return response
+
+def build_variants():
+    bare = build_app()
+
+    legacy = build_app()
+    legacy.state.limiter = security.limiter
+    legacy.add_middleware(SlowAPIMiddleware)
+    legacy.middleware("http")(legacy_security_middleware)
+
+    asgi = security.setup_security_middleware(build_app())
+
+    return {"bare": bare, "legacy": legacy, "asgi": asgi}
+
+def make_scope(i: int) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"x-api-key", b"bench-key")],
+        "client": (f"10.0.{i // 256 % 256}.{i % 256}", 50000),
+        "server": ("localhost", 8000),
+    }
+
+async def run_load(app, total: int, concurrency: int, clients: int) -> list:
+    """Closed-loop load: `concurrency` workers issue `total` requests; returns latencies"""
+    latencies = []
+    counter = iter(range(total))
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def worker():
+        for i in counter:
+            status = {}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status["code"] = message["status"]
+
+            start = time.perf_counter()
+            await app(make_scope(i % clients), receive, send)
+            latencies.append(time.perf_counter() - start)
+            assert status.get("code") == 200, f"unexpected status {status}"
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Security middleware load benchmark")
+    parser.add_argument('--requests', type=int, default=20000, help='Requests per variant')
+    parser.add_argument('--concurrency', type=int, default=64, help='Concurrent in-flight requests')
+    parser.add_argument('--clients', type=int, default=1000, help='Distinct client IPs')
+    parser.add_argument('--rounds', type=int, default=3, help='Rounds per variant (best is reported)')
+    args = parser.parse_args()
+
+    print("🧠 VisionAI Pro - Security Middleware Benchmark")
+    print(f"   {args.requests} requests, concurrency {args.concurrency}, {args.clients} clients")
+    print("=" * 60)
+
+    results = {}
+    for name, app in build_variants().items():
+        asyncio.run(run_load(app, 500, args.concurrency, args.clients))  # warm up
+        best = None
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            round_latencies = asyncio.run(run_load(app, args.requests, args.concurrency, args.clients))
+            round_elapsed = time.perf_counter() - start
+            if best is None or round_elapsed < best[0]:
+                best = (round_elapsed, round_latencies)
+        elapsed, latencies = best
+
+        per_request = elapsed / args.requests * 1e6
+        results[name] = per_request
+        p99 = statistics.quantiles(latencies, n=100)[98] * 1e6
+        print(f"{name:<7} {args.requests / elapsed:>9.0f} req/s  {per_request:>7.1f} µs/req  p99 {p99:>8.1f} µs")
+
+    print("-" * 60)
+    for name in ("legacy", "asgi"):
+        print(f"{name:<7} overhead vs bare: {results[name] - results['bare']:>7.1f} µs/req")
+
+if __name__ == "__main__":
+    main()
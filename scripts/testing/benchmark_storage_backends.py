@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Storage Backend Benchmark
+Runs the same API workload (key validation, saving results and usage
+events, paging history, usage stats) against each storage backend and
+reports throughput and latency percentiles per operation.
+
+    python scripts/testing/benchmark_storage_backends.py
+    python scripts/testing/benchmark_storage_backends.py --backends sqlite firestore
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from src.models.storage_backend import create_storage_backend
+from src.models.firebase_data_manager import FirebaseDataManager
+from src.auth.firebase_api_key_manager import FirebaseAPIKeyManager
+
+logging.basicConfig(level=logging.WARNING)
+
+def backend_uri(name: str) -> str:
+    if name == "sqlite":
+        return f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='visionai_bench_'), 'visionai.db')}"
+    return name
+
+def timed(latencies: list, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    latencies.append(time.perf_counter() - start)
+    return result
+
+def run_workload(uri: str, operations: int, users: int) -> dict:
+    storage = create_storage_backend(uri)
+    index_path = os.path.join(tempfile.mkdtemp(prefix="visionai_bench_"), "index.db")
+    # Synchronous writes, so the numbers reflect the backend rather than the write-behind queue
+    data_manager = FirebaseDataManager(storage=storage, write_behind=False, index_path=index_path)
+    key_manager = FirebaseAPIKeyManager(secret_key="bench", storage=storage)
+
+    keys = [key_manager.generate_api_key(f"bench_user_{u}", "Benchmark Key") for u in range(users)]
+    latencies = {"validate_key": [], "save_result": [], "save_usage": [], "history_page": [], "usage_stats": []}
+
+    saved_ids = []
+    for i in range(operations):
+        user_id = f"bench_user_{i % users}"
+        timed(latencies["validate_key"], key_manager.validate_api_key, keys[i % users])
+        saved_ids.append(timed(
+            latencies["save_result"], data_manager.save_classification_result,
+            user_id=user_id, api_key=keys[i % users], image_path=f"bench_{i}.jpg",
+            predictions=[{"category": "cat", "confidence": 0.9}],
+            confidence_scores=[0.9], processing_time=0.01
+        ))
+        timed(latencies["save_usage"], data_manager.save_usage_statistics, user_id, keys[i % users], "classify", 0.01)
+        if i % 10 == 0:
+            timed(latencies["history_page"], data_manager.get_user_classifications, user_id, limit=20)
+            timed(latencies["usage_stats"], data_manager.get_user_usage_stats, user_id, days=1)
+
+    # Leave shared backends (Firestore) as we found them
+    for classification_id in saved_ids:
+        data_manager.delete_classification_result(classification_id)
+    for key in keys:
+        key_manager.delete_api_key(key)
+
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage backend benchmark")
+    parser.add_argument('--backends', nargs='+', default=['sqlite'], help='sqlite, firestore or any STORAGE_BACKEND URI')
+    parser.add_argument('--operations', type=int, default=2000, help='Classify requests to simulate per backend')
+    parser.add_argument('--users', type=int, default=20, help='Distinct users')
+    args = parser.parse_args()
+
+    print("🧠 VisionAI Pro - Storage Backend Benchmark")
+    print(f"   {args.operations} simulated requests, {args.users} users")
+    print("=" * 72)
+
+    for name in args.backends:
+        try:
+            latencies = run_workload(backend_uri(name), args.operations, args.users)
+        except Exception as e:
+            print(f"{name}: skipped ({e})")
+            continue
+
+        print(f"{name}")
+        for operation, samples in latencies.items():
+            if len(samples) < 2:
+                continue
+            quantiles = statistics.quantiles(samples, n=100)
+            print(f"  {operation:<13} {len(samples) / sum(samples):>9.0f} ops/s  "
+                  f"p50 {quantiles[49] * 1e3:>7.3f} ms  p95 {quantiles[94] * 1e3:>7.3f} ms  "
+                  f"p99 {quantiles[98] * 1e3:>7.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Concurrent dataset downloader for VisionAI Pro test images
+Shared by download_images.py and advanced_image_scraper.py.
+
+- A thread pool shares one keep-alive requests.Session whose connection
+  pool is sized to the number of workers.
+- Per-host limits: at most `per_host_connections` requests in flight and
+  `per_host_rate` requests/sec to any one host, so many sources can be
+  fetched in parallel without hammering any single one.
+- Transient failures (connection errors, 429, 5xx) are retried with
+  backoff; non-image responses and undecodable images are rejected.
+- Every outcome is appended to a JSONL manifest in the output directory.
+  A rerun skips URLs that already succeeded and retries the ones that
+  failed; an interrupted run loses at most the lines being written.
+- Content is deduplicated by SHA-256 across runs: a URL whose bytes match
+  an image already on disk is recorded as a duplicate of that file and
+  not saved again.
+"""
+
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+@dataclass
+class DownloadTask:
+    url: str
+    path: str  # relative to the output directory, e.g. "animals/animals_picsum_001.jpg"
+    category: str = ""
+
+class HostLimiter:
+    """Per-host cap on concurrent requests and request rate"""
+
+    def __init__(self, connections: int = 4, rate: Optional[float] = None):
+        self.connections = connections
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def acquire(self, host: str):
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.Semaphore(self.connections))
+        semaphore.acquire()
+        if self.interval:
+            # Reserve the next free start time for this host, then wait for it
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot.get(host, now))
+                self._next_slot[host] = slot + self.interval
+            if slot > now:
+                time.sleep(slot - now)
+
+    def release(self, host: str):
+        self._semaphores[host].release()
+
+class DownloadManifest:
+    """Append-only JSONL record of every download outcome"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Dict[str, Dict] = {}  # url -> ok/duplicate entry
+        self.hashes: Dict[str, str] = {}  # sha256 -> saved path
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted run
+                if entry.get("status") in ("ok", "duplicate"):
+                    self.completed[entry["url"]] = entry
+                if entry.get("status") == "ok":
+                    self.hashes[entry["sha256"]] = entry["path"]
+
+    def claim(self, sha256: str, path: str) -> Optional[str]:
+        """Register content for `path`; returns the existing path if the content is already known"""
+        with self._lock:
+            existing = self.hashes.get(sha256)
+            if existing is None:
+                self.hashes[sha256] = path
+            return existing
+
+    def release(self, sha256: str):
+        with self._lock:
+            self.hashes.pop(sha256, None)
+
+    def record(self, entry: Dict):
+        with self._lock:
+            if entry["status"] in ("ok", "duplicate"):
+                self.completed[entry["url"]] = entry
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class ConcurrentDownloader:
+    """Downloads DownloadTasks into output_dir with a thread pool over one session"""
+
+    def __init__(self, output_dir: str, workers: int = 32, per_host_connections: int = 8,
+                 per_host_rate: Optional[float] = 10.0, timeout: float = 15.0, retries: int = 3,
+                 backoff: float = 0.5, manifest_name: str = "manifest.jsonl", verify_images: bool = True):
+        self.output_dir = output_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.verify_images = verify_images
+        self.limiter = HostLimiter(per_host_connections, per_host_rate)
+        self.manifest_path = os.path.join(output_dir, manifest_name)
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _fetch(self, url: str) -> requests.Response:
+        host = urlparse(url).netloc
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(host)
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                # Read the body while holding the host slot
+                response.content
+            except requests.RequestException:
+                if attempt == self.retries:
+                    raise
+                response = None
+            finally:
+                self.limiter.release(host)
+
+            if response is not None and (response.status_code not in RETRY_STATUS or attempt == self.retries):
+                response.raise_for_status()
+                return response
+
+            delay = self.backoff * 2 ** attempt
+            if response is not None and response.headers.get("Retry-After", "").isdigit():
+                delay = max(delay, float(response.headers["Retry-After"]))
+            time.sleep(delay)
+
+    def _download(self, task: DownloadTask, manifest: DownloadManifest) -> Dict:
+        entry = {"url": task.url, "path": task.path, "category": task.category}
+        try:
+            response = self._fetch(task.url)
+            content_type = response.headers.get("content-type", "")
+            if not content_type.startswith("image/"):
+                raise ValueError(f"not an image ({content_type or 'no content-type'})")
+            data = response.content
+            if self.verify_images:
+                with Image.open(io.BytesIO(data)) as image:
+                    image.verify()
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+            return entry
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        entry.update(sha256=sha256, bytes=len(data))
+        existing = manifest.claim(sha256, task.path)
+        if existing is not None:
+            entry.update(status="duplicate", duplicate_of=existing)
+            return entry
+
+        target = os.path.join(self.output_dir, task.path)
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        except OSError as e:
+            manifest.release(sha256)
+            entry.update(status="failed", error=str(e))
+            return entry
+
+        entry["status"] = "ok"
+        return entry
+
+    def run(self, tasks: Iterable[DownloadTask], progress_every: int = 100) -> Dict:
+        """Download all tasks not already completed; returns counts and throughput"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = DownloadManifest(self.manifest_path)
+
+        pending: List[DownloadTask] = []
+        seen_urls = set()
+        skipped = 0
+        for task in tasks:
+            if task.url in seen_urls:
+                continue
+            seen_urls.add(task.url)
+            if task.url in manifest.completed:
+                skipped += 1
+            else:
+                pending.append(task)
+
+        stats = {"downloaded": 0, "duplicates": 0, "failed": 0, "skipped": skipped, "bytes": 0}
+        start = time.perf_counter()
+
+        def work(task):
+            entry = self._download(task, manifest)
+            manifest.record(entry)
+            return entry
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for done, entry in enumerate(pool.map(work, pending), 1):
+                    if entry["status"] == "ok":
+                        stats["downloaded"] += 1
+                        stats["bytes"] += entry["bytes"]
+                    elif entry["status"] == "duplicate":
+                        stats["duplicates"] += 1
+                    else:
+                        stats["failed"] += 1
+                        logger.warning(f"Failed {entry['url']}: {entry['error']}")
+                    if progress_every and done % progress_every == 0:
+                        logger.info(f"{done}/{len(pending)} processed, {stats['downloaded']} saved")
+        finally:
+            manifest.close()
+
+        seconds = time.perf_counter() - start
+        stats["seconds"] = round(seconds, 3)
+        stats["requests_per_sec"] = round(len(pending) / seconds, 2) if seconds and pending else 0.0
+        return stats
+
+    def close(self):
+        self.session.close()
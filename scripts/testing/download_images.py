@@ -2,43 +2,57 @@
 """
 Free Image Downloader for VisionAI Pro Testing
 Downloads 1000+ free images from various sources for testing classification accuracy
+
+Downloads run concurrently with per-host limits (see dataset_downloader.py).
+URLs are generated from a fixed seed, so rerunning the script resumes from
+the manifest in the output directory instead of starting over, and
+content already on disk is never saved twice.
+
+    python download_images.py                        # 1000 images into test_images/
+    python download_images.py --total 10000 --workers 64 --per-host-rate 20
 """
 
 import os
-import requests
+import sys
 import time
 import random
-from PIL import Image
-import io
-from urllib.parse import urlparse
+import argparse
 import logging
+from typing import List
+
+# Add this directory to Python path for the shared downloader
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dataset_downloader import ConcurrentDownloader, DownloadTask
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class ImageDownloader:
-    def __init__(self, output_dir="test_images"):
+    def __init__(self, output_dir="test_images", workers=32, per_host_connections=8,
+                 per_host_rate=10.0, seed=0):
         self.output_dir = output_dir
         self.downloaded_count = 0
+        self.duplicate_count = 0
         self.failed_count = 0
-        
+        self.random = random.Random(seed)
+        self.downloader = ConcurrentDownloader(output_dir, workers=workers,
+                                               per_host_connections=per_host_connections,
+                                               per_host_rate=per_host_rate)
+
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
-        
+
         # Create category subdirectories
         self.categories = [
-            "people", "animals", "vehicles", "buildings", "nature", 
+            "people", "animals", "vehicles", "buildings", "nature",
             "food", "objects", "technology", "art", "sports"
         ]
-        
+
         for category in self.categories:
             os.makedirs(os.path.join(output_dir, category), exist_ok=True)
-    
-    def download_from_unsplash(self, category, count=50):
-        """Download images from Unsplash (free stock photos)"""
-        logger.info(f"Downloading {count} {category} images from Unsplash...")
-        
+
+    def unsplash_tasks(self, category, count=50) -> List[DownloadTask]:
+        """Unsplash (free stock photos) downloads for a category"""
         # Unsplash API endpoints for different categories
         unsplash_urls = {
             "people": [
@@ -84,158 +98,142 @@ class ImageDownloader:
                 "https://images.unsplash.com/photo-1565299507177-b0ac66763828"
             ]
         }
-        
+
         if category not in unsplash_urls:
             logger.warning(f"No Unsplash URLs defined for category: {category}")
-            return
-        
+            return []
+
         base_urls = unsplash_urls[category]
-        
+        tasks = []
+        for i in range(count):
+            # Generate random image URL with different parameters
+            base_url = self.random.choice(base_urls)
+            url = f"{base_url}?w=400&h=400&fit=crop&auto=format&q=80"
+            tasks.append(DownloadTask(url, os.path.join(category, f"{category}_{i+1:03d}.jpg"), category))
+        return tasks
+
+    def picsum_tasks(self, category, count=50) -> List[DownloadTask]:
+        """Random images from Picsum (Lorem Picsum)"""
+        tasks = []
+        for i in range(count):
+            # Picsum provides random images
+            url = f"https://picsum.photos/400/400?random={self.random.randint(1, 10000)}"
+            tasks.append(DownloadTask(url, os.path.join(category, f"{category}_picsum_{i+1:03d}.jpg"), category))
+        return tasks
+
+    def placeholder_tasks(self, category, count=30) -> List[DownloadTask]:
+        """Placeholder images"""
+        colors = ["red", "blue", "green", "yellow", "purple", "orange", "pink", "gray"]
+        tasks = []
         for i in range(count):
-            try:
-                # Generate random image URL with different parameters
-                base_url = random.choice(base_urls)
-                url = f"{base_url}?w=400&h=400&fit=crop&auto=format&q=80"
-                
-                # Download image
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                
-                # Save image
-                filename = f"{category}_{i+1:03d}.jpg"
-                filepath = os.path.join(self.output_dir, category, filename)
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                self.downloaded_count += 1
-                logger.info(f"Downloaded: {filename}")
-                
-                # Rate limiting
-                time.sleep(0.5)
-                
-            except Exception as e:
-                self.failed_count += 1
-                logger.error(f"Failed to download {category} image {i+1}: {e}")
-    
+            color = self.random.choice(colors)
+            url = f"https://via.placeholder.com/400x400/{color}/ffffff?text={category.title()}"
+            tasks.append(DownloadTask(url, os.path.join(category, f"{category}_placeholder_{i+1:03d}.jpg"), category))
+        return tasks
+
+    def download(self, tasks: List[DownloadTask]):
+        """Download tasks concurrently and update the counters"""
+        stats = self.downloader.run(tasks)
+        self.downloaded_count += stats["downloaded"]
+        self.duplicate_count += stats["duplicates"]
+        self.failed_count += stats["failed"]
+        logger.info(f"{stats['downloaded']} saved, {stats['duplicates']} duplicates, {stats['failed']} failed, "
+                    f"{stats['skipped']} already downloaded ({stats['seconds']}s)")
+        return stats
+
+    def download_from_unsplash(self, category, count=50):
+        """Download images from Unsplash (free stock photos)"""
+        logger.info(f"Downloading {count} {category} images from Unsplash...")
+        return self.download(self.unsplash_tasks(category, count))
+
     def download_from_picsum(self, category, count=50):
         """Download random images from Picsum (Lorem Picsum)"""
         logger.info(f"Downloading {count} random images from Picsum...")
-        
-        for i in range(count):
-            try:
-                # Picsum provides random images
-                url = f"https://picsum.photos/400/400?random={random.randint(1, 10000)}"
-                
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                
-                filename = f"{category}_picsum_{i+1:03d}.jpg"
-                filepath = os.path.join(self.output_dir, category, filename)
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                self.downloaded_count += 1
-                logger.info(f"Downloaded: {filename}")
-                
-                time.sleep(0.3)
-                
-            except Exception as e:
-                self.failed_count += 1
-                logger.error(f"Failed to download Picsum image {i+1}: {e}")
-    
+        return self.download(self.picsum_tasks(category, count))
+
     def download_from_placeholder(self, category, count=30):
         """Download placeholder images"""
         logger.info(f"Downloading {count} placeholder images...")
-        
-        colors = ["red", "blue", "green", "yellow", "purple", "orange", "pink", "gray"]
-        
-        for i in range(count):
-            try:
-                color = random.choice(colors)
-                url = f"https://via.placeholder.com/400x400/{color}/ffffff?text={category.title()}"
-                
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                
-                filename = f"{category}_placeholder_{i+1:03d}.jpg"
-                filepath = os.path.join(self.output_dir, category, filename)
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                self.downloaded_count += 1
-                logger.info(f"Downloaded: {filename}")
-                
-                time.sleep(0.2)
-                
-            except Exception as e:
-                self.failed_count += 1
-                logger.error(f"Failed to download placeholder image {i+1}: {e}")
-    
+        return self.download(self.placeholder_tasks(category, count))
+
     def download_all_categories(self, images_per_category=100):
         """Download images for all categories"""
         logger.info(f"Starting download of {len(self.categories)} categories with {images_per_category} images each...")
-        
+
+        # One concurrent run over every category and source
+        tasks = []
         for category in self.categories:
-            logger.info(f"\n=== Downloading {category.upper()} images ===")
-            
-            # Download from multiple sources
-            self.download_from_unsplash(category, images_per_category // 2)
-            self.download_from_picsum(category, images_per_category // 3)
-            self.download_from_placeholder(category, images_per_category // 6)
-            
-            logger.info(f"Completed {category} category")
-            time.sleep(1)  # Brief pause between categories
-    
+            tasks.extend(self.unsplash_tasks(category, images_per_category // 2))
+            tasks.extend(self.picsum_tasks(category, images_per_category // 3))
+            tasks.extend(self.placeholder_tasks(category, images_per_category // 6))
+        return self.download(tasks)
+
     def create_sample_dataset(self, total_images=1000):
         """Create a balanced sample dataset"""
         images_per_category = total_images // len(self.categories)
-        
+
         logger.info(f"Creating sample dataset with {total_images} images...")
         logger.info(f"Images per category: {images_per_category}")
-        
+
         self.download_all_categories(images_per_category)
-        
+
+        attempted = self.downloaded_count + self.duplicate_count + self.failed_count
         logger.info(f"\n=== Download Summary ===")
         logger.info(f"Total downloaded: {self.downloaded_count}")
+        logger.info(f"Duplicates skipped: {self.duplicate_count}")
         logger.info(f"Failed downloads: {self.failed_count}")
-        logger.info(f"Success rate: {(self.downloaded_count / (self.downloaded_count + self.failed_count) * 100):.1f}%")
-        
+        if attempted:
+            logger.info(f"Success rate: {((attempted - self.failed_count) / attempted * 100):.1f}%")
+
         # Create a summary file
         summary_file = os.path.join(self.output_dir, "download_summary.txt")
         with open(summary_file, 'w') as f:
             f.write(f"Image Download Summary\n")
             f.write(f"=====================\n")
             f.write(f"Total images: {self.downloaded_count}\n")
+            f.write(f"Duplicates skipped: {self.duplicate_count}\n")
             f.write(f"Failed downloads: {self.failed_count}\n")
             f.write(f"Categories: {', '.join(self.categories)}\n")
             f.write(f"Images per category: ~{images_per_category}\n")
             f.write(f"Download date: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
+
         logger.info(f"Summary saved to: {summary_file}")
 
 def main():
     """Main function to download images"""
+    parser = argparse.ArgumentParser(description="Download free test images")
+    parser.add_argument('--output-dir', default='test_images')
+    parser.add_argument('--total', type=int, default=1000, help='Images to request across all categories')
+    parser.add_argument('--workers', type=int, default=32, help='Concurrent downloads')
+    parser.add_argument('--per-host-connections', type=int, default=8)
+    parser.add_argument('--per-host-rate', type=float, default=10.0, help='Requests/sec per host (0: unlimited)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for generated URLs (keep it to resume)')
+    args = parser.parse_args()
+
+    # Setup logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
     print("🖼️  VisionAI Pro Image Downloader")
     print("=" * 50)
-    
-    downloader = ImageDownloader()
-    
+
+    downloader = ImageDownloader(args.output_dir, workers=args.workers,
+                                 per_host_connections=args.per_host_connections,
+                                 per_host_rate=args.per_host_rate or None, seed=args.seed)
+
     try:
-        # Download 1000+ images
-        downloader.create_sample_dataset(1000)
-        
+        downloader.create_sample_dataset(args.total)
+
         print(f"\n✅ Download completed!")
         print(f"📁 Images saved to: {downloader.output_dir}")
         print(f"📊 Total images: {downloader.downloaded_count}")
-        
+
     except KeyboardInterrupt:
-        print("\n⏹️  Download interrupted by user")
+        print("\n⏹️  Download interrupted by user (rerun to resume)")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         logger.error(f"Download failed: {e}")
+    finally:
+        downloader.downloader.close()
 
 if __name__ == "__main__":
     main()
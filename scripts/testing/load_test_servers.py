@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - HTTP Load Test Harness
+Drives POST /api/classify of a FastAPI server with an asyncio load
+generator and reports throughput, error rate, latency percentiles and a
+latency histogram (same geometric buckets as the /api/stats counters).
+
+Targets:
+  in-process (default)  the app is called through httpx's ASGI transport
+  --launch              the app runs in a local uvicorn process
+  --url URL             any running server (needs --api-key)
+
+In-process and launched servers get stub authentication (every key is
+valid) and, for the Firebase server, a throwaway SQLite storage backend
+and blob store. The classifier is a cheap stand-in unless --real-model is
+given, so by default the numbers measure the HTTP, upload, decoding,
+middleware, auth and storage path rather than the model. Rate limits are
+raised out of the way unless --keep-rate-limits is given.
+
+Arrival models:
+  closed loop (default)  --concurrency clients, each sends its next request
+                         when the previous one finishes
+  open loop (--rate N)   N requests/sec arrive regardless of completions (at
+                         most --concurrency in flight); latency is measured from
+                         the scheduled arrival, so queueing is not hidden
+
+    python scripts/testing/load_test_servers.py zero-shot --concurrency 32 --duration 20
+    python scripts/testing/load_test_servers.py firebase --launch --rate 200 --duration 30
+    python scripts/testing/load_test_servers.py all --requests 500 --json-out load.json
+    python scripts/testing/load_test_servers.py main --url http://127.0.0.1:8000 --api-key KEY
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import importlib
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from models.usage_counters import BUCKET_BOUNDS, bucket_key
+
+# name -> app module, default port, how the API key is sent, model loaded by --real-model
+SERVERS = {
+    "zero-shot": {"module": "src.api.zero_shot_main", "port": 8002, "auth": "form", "model": "zero-shot"},
+    "advanced": {"module": "src.api.advanced_main", "port": 8001, "auth": "form", "model": "resnet50"},
+    "main": {"module": "src.api.main", "port": 8000, "auth": "header", "model": "prorl"},
+    "firebase": {"module": "src.api.firebase_main", "port": 8003, "auth": "header", "model": "prorl"},
+}
+
+STUB_API_KEY = "load-test-key"
+
+class StubClassifier:
+    """Stand-in model: a small resize plus optional fixed latency"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.categories = ["cat", "dog", "car", "tree", "person"]
+
+    def predict(self, image, top_k: int = 5):
+        return self.predict_batch([image], top_k=top_k)[0]
+
+    def predict_batch(self, images, top_k: int = 5):
+        results = []
+        for image in images:
+            image.convert("RGB").resize((224, 224))
+            if self.latency:
+                time.sleep(self.latency)
+            results.append([{"category": category, "confidence": round(1.0 / (rank + 2), 4)}
+                            for rank, category in enumerate(self.categories[:top_k])])
+        return results
+
+    def predict_with_confidence_threshold(self, image, threshold: float = 0.1):
+        return [p for p in self.predict(image, top_k=len(self.categories)) if p["confidence"] >= threshold]
+
+    def get_categories(self):
+        return self.categories
+
+    def search_categories(self, query: str, top_k: int = 10):
+        return [c for c in self.categories if query in c][:top_k]
+
+    def get_model_info(self):
+        return {"model_type": "stub", "device": "cpu", "categories_count": len(self.categories)}
+
+class StubKeyManager:
+    """Accepts every API key; usage logging is a no-op"""
+
+    def validate_api_key(self, api_key: str):
+        return SimpleNamespace(user_id="load_test_user", name="Load Test", permissions=["read", "classify"],
+                               created_at=datetime.now(), expires_at=None, is_active=True)
+
+    def validate_ip_access(self, api_key: str, client_ip: str) -> bool:
+        return True
+
+    def log_api_usage(self, *args, **kwargs):
+        pass
+
+def build_app(server: str, real_model: bool = False, stub_latency_ms: float = 0.0,
+              keep_rate_limits: bool = False, storage_dir: str = None):
+    """Import a server's app and swap in stub auth, storage and (optionally) classifier"""
+    spec = SERVERS[server]
+    # The apps mount web_apps/ and static/ relative to the working directory
+    os.chdir(project_root)
+    module = importlib.import_module(spec["module"])
+
+    if not keep_rate_limits:
+        from config.config import Config
+        # Read by SecurityMiddleware when the app builds its middleware stack on the first request
+        Config.RATE_LIMIT_PER_MINUTE = 10 ** 9
+        Config.API_KEY_RATE_LIMIT_PER_MINUTE = 10 ** 9
+        Config.API_KEY_RATE_LIMITS = {}
+
+    # Startup handlers would load the real model and storage; everything is set up here instead
+    module.app.router.on_startup.clear()
+
+    if real_model:
+        from cli.classifiers import load_classifier
+        module.classifier = load_classifier(spec["model"])
+    else:
+        module.classifier = StubClassifier(stub_latency_ms)
+    module.api_key_manager = StubKeyManager()
+
+    if server == "firebase":
+        from src.models.storage_backend import create_storage_backend
+        from src.models.firebase_data_manager import FirebaseDataManager
+        from src.models.blob_store import BlobStore
+
+        storage_dir = storage_dir or tempfile.mkdtemp(prefix="visionai_load_")
+        storage = create_storage_backend(f"sqlite:///{os.path.join(storage_dir, 'visionai.db')}")
+        module.data_manager = FirebaseDataManager(storage=storage,
+                                                  index_path=os.path.join(storage_dir, "index.db"))
+        module.blob_store = BlobStore(os.path.join(storage_dir, "uploads"))
+
+    return module.app
+
+def synthetic_corpus(sizes: List[int], per_size: int = 4) -> List[Tuple[str, bytes, str]]:
+    """(filename, bytes, content type) JPEGs with gradients and noise"""
+    import numpy as np
+    from PIL import Image
+
+    corpus = []
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        for i in range(per_size):
+            y, x = np.mgrid[0:size, 0:size] / size
+            pixels = np.stack([np.sin((x * rng.uniform(1, 6) + y * rng.uniform(1, 6)) * np.pi) for _ in range(3)], -1)
+            pixels = (pixels * 100 + 128 + rng.normal(0, 12, pixels.shape)).clip(0, 255).astype(np.uint8)
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+            corpus.append((f"synthetic_{size}_{i}.jpg", buffer.getvalue(), "image/jpeg"))
+    return corpus
+
+def directory_corpus(directory: str, limit: int = 200) -> List[Tuple[str, bytes, str]]:
+    """Up to `limit` images from a directory (e.g. downloaded test images)"""
+    content_types = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png",
+                     ".gif": "image/gif", ".bmp": "image/bmp", ".webp": "image/webp"}
+    corpus = []
+    for path in sorted(Path(directory).rglob("*")):
+        content_type = content_types.get(path.suffix.lower())
+        if content_type and path.is_file():
+            corpus.append((path.name, path.read_bytes(), content_type))
+            if len(corpus) >= limit:
+                break
+    if not corpus:
+        raise ValueError(f"No images found in {directory}")
+    return corpus
+
+class LoadGenerator:
+    """Closed- or open-loop POST /api/classify load against one server"""
+
+    def __init__(self, client: httpx.AsyncClient, auth: str, api_key: str, corpus: List[Tuple[str, bytes, str]],
+                 concurrency: int = 8, rate: float = None, duration: float = 10.0, requests: int = None,
+                 top_k: int = 5, seed: int = 0):
+        self.client = client
+        self.auth = auth
+        self.api_key = api_key
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.requests = requests
+        self.top_k = top_k
+        self.random = random.Random(seed)
+        # (latency seconds, status code or error name)
+        self.samples: List[Tuple[float, object]] = []
+
+    def _request_args(self, index: int) -> Dict:
+        filename, data, content_type = self.corpus[index % len(self.corpus)]
+        form = {"top_k": str(self.top_k)}
+        headers = {}
+        if self.auth == "form":
+            form["api_key"] = self.api_key
+        else:
+            headers["X-API-Key"] = self.api_key
+        return {"files": {"file": (filename, data, content_type)}, "data": form, "headers": headers}
+
+    async def _send(self, index: int, started: float):
+        try:
+            response = await self.client.post("/api/classify", **self._request_args(index))
+            outcome = response.status_code
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        self.samples.append((time.perf_counter() - started, outcome))
+
+    def _more(self, sent: int, start: float) -> bool:
+        if self.requests is not None:
+            return sent < self.requests
+        return time.perf_counter() - start < self.duration
+
+    async def run(self) -> Dict:
+        start = time.perf_counter()
+        if self.rate:
+            await self._open_loop(start)
+        else:
+            await self._closed_loop(start)
+        return summarize(self.samples, time.perf_counter() - start)
+
+    async def _closed_loop(self, start: float):
+        sent = 0
+
+        async def client_loop():
+            nonlocal sent
+            while self._more(sent, start):
+                index = sent
+                sent += 1
+                await self._send(index, time.perf_counter())
+
+        await asyncio.gather(*(client_loop() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, start: float):
+        in_flight = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        sent = 0
+        next_arrival = start
+
+        async def arrival(index: int, scheduled: float):
+            async with in_flight:
+                await self._send(index, scheduled)
+
+        while self._more(sent, start):
+            # Poisson arrivals
+            next_arrival += self.random.expovariate(self.rate)
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(arrival(sent, next_arrival)))
+            sent += 1
+        await asyncio.gather(*tasks)
+
+def summarize(samples: List[Tuple[float, object]], elapsed: float) -> Dict:
+    """Throughput, error rate, latency percentiles and histogram of a run"""
+    outcomes = {}
+    for _, outcome in samples:
+        outcomes[str(outcome)] = outcomes.get(str(outcome), 0) + 1
+    ok = [latency for latency, outcome in samples if outcome == 200]
+    latencies = [latency for latency, _ in samples]
+
+    report = {
+        "requests": len(samples),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "success_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "outcomes": outcomes,
+        "histogram": {},
+    }
+    if len(latencies) >= 2:
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        report["latency_ms"] = {
+            "p50": round(quantiles[49] * 1e3, 2), "p90": round(quantiles[89] * 1e3, 2),
+            "p95": round(quantiles[94] * 1e3, 2), "p99": round(quantiles[98] * 1e3, 2),
+            "mean": round(statistics.fmean(latencies) * 1e3, 2), "max": round(max(latencies) * 1e3, 2),
+        }
+    for latency in latencies:
+        key = bucket_key(latency)
+        report["histogram"][key] = report["histogram"].get(key, 0) + 1
+    report["histogram"] = dict(sorted(report["histogram"].items()))
+    return report
+
+def print_report(name: str, report: Dict):
+    print(f"{name}: {report['requests']} requests in {report['seconds']}s, "
+          f"{report['throughput_rps']} req/s ({report['success_rps']} ok/s), "
+          f"error rate {report['error_rate'] * 100:.2f}%  {report['outcomes']}")
+    latency = report.get("latency_ms")
+    if latency:
+        print(f"  latency ms  p50 {latency['p50']}  p90 {latency['p90']}  p95 {latency['p95']}  "
+              f"p99 {latency['p99']}  max {latency['max']}")
+    peak = max(report["histogram"].values(), default=0)
+    for key, count in report["histogram"].items():
+        upper = BUCKET_BOUNDS[int(key[1:])]
+        label = f"≤{upper * 1e3:8.1f} ms" if upper != float("inf") else "   >  1 min  "
+        print(f"  {label} {count:>7} {'█' * max(1, round(40 * count / peak))}")
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def launch(server: str, args) -> Tuple[subprocess.Popen, str]:
+    """Start the stubbed app in a local uvicorn process and wait for it to answer"""
+    port = args.port or _free_port()
+    command = [sys.executable, __file__, server, "--serve", "--port", str(port),
+               "--stub-latency-ms", str(args.stub_latency_ms)]
+    if args.real_model:
+        command.append("--real-model")
+    if args.keep_rate_limits:
+        command.append("--keep-rate-limits")
+    process = subprocess.Popen(command, cwd=project_root)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} server exited with code {process.returncode}")
+        try:
+            httpx.get(url + "/health", timeout=1)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{server} server did not start within {args.startup_timeout}s")
+
+async def run_against(server: str, args, corpus) -> Dict:
+    """Run the configured load against one server and return its report"""
+    process = None
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits)
+    elif args.launch:
+        process, url = launch(server, args)
+        client = httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+    else:
+        app = build_app(server, real_model=args.real_model, stub_latency_ms=args.stub_latency_ms,
+                        keep_rate_limits=args.keep_rate_limits)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=("127.0.0.1", 5000)),
+                                   base_url="http://localhost", timeout=timeout)
+
+    try:
+        generator = LoadGenerator(client, SERVERS[server]["auth"], args.api_key or STUB_API_KEY, corpus,
+                                  concurrency=args.concurrency, rate=args.rate, duration=args.duration,
+                                  requests=args.requests, top_k=args.top_k)
+        report = await generator.run()
+    finally:
+        await client.aclose()
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report.update({"server": server, "target": args.url or ("launched" if args.launch else "in-process"),
+                   "arrival": f"open {args.rate}/s" if args.rate else "closed",
+                   "concurrency": args.concurrency})
+    return report
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="HTTP load test for the VisionAI Pro servers")
+    parser.add_argument('server', choices=list(SERVERS) + ['all'], help='Server to load')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--launch', action='store_true', help='Run the stubbed server in a local uvicorn process')
+    target.add_argument('--url', help='Load an already running server instead (requires --api-key)')
+    parser.add_argument('--api-key', help='API key for --url targets')
+    parser.add_argument('--port', type=int, help='Port for --launch (default: a free port)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Closed-loop clients / open-loop max in flight')
+    parser.add_argument('--rate', type=float, help='Open-loop arrival rate in requests/sec (default: closed loop)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--requests', type=int, help='Stop after this many requests instead of --duration')
+    parser.add_argument('--images', help='Directory of images to upload (default: synthetic JPEGs)')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[320, 1024], help='Synthetic image sizes')
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--real-model', action='store_true', help='Load the server\'s real classifier')
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='Extra latency of the stub classifier')
+    parser.add_argument('--keep-rate-limits', action='store_true', help='Leave the configured rate limits in place')
+    parser.add_argument('--startup-timeout', type=float, default=120.0, help='Seconds to wait for a launched server')
+    parser.add_argument('--json-out', help='Also write the reports to this JSON file')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.url and not args.api_key:
+        parser.error("--url requires --api-key")
+    if args.url and args.server == "all":
+        parser.error("--url targets a single server")
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    if args.serve:
+        import uvicorn
+        app = build_app(args.server, real_model=args.real_model, stub_latency_ms=args.stub_latency_ms,
+                        keep_rate_limits=args.keep_rate_limits)
+        uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+        return 0
+
+    corpus = directory_corpus(args.images) if args.images else synthetic_corpus(args.sizes)
+    servers = list(SERVERS) if args.server == "all" else [args.server]
+
+    print("🧠 VisionAI Pro - HTTP Load Test")
+    print(f"   {len(corpus)} images, {'open loop ' + str(args.rate) + ' req/s' if args.rate else 'closed loop'}, "
+          f"concurrency {args.concurrency}, {args.requests or str(args.duration) + 's'}")
+    print("=" * 72)
+
+    reports = []
+    for server in servers:
+        try:
+            report = asyncio.run(run_against(server, args, corpus))
+        except Exception as e:
+            print(f"{server}: failed ({e})")
+            continue
+        reports.append(report)
+        print_report(server, report)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n📄 Reports written to {args.json_out}")
+
+    return 0 if reports and all(report["error_rate"] == 0 for report in reports) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,22 +2,63 @@
 """
 VisionAI Pro Sample Manager
 Organizes and manages image samples for testing and validation
+
+The bytes of an image are stored once, in raw/. Everything else is
+metadata: samples.json records each sample's source, category and
+quality, and the by_category/, by_quality/, test_sets/ and organized/
+views are manifests (JSONL) plus directories of hardlinks to the raw
+files (symlinks where hardlinks aren't possible, copies as a last
+resort), so organizing a large corpus costs link operations instead of
+byte copies. Importing is incremental: files already imported are
+skipped.
+
+Near-duplicates (resized or recompressed copies) are found with
+perceptual hashes (perceptual_hash.py); all but the best copy of each
+cluster are marked in samples.json and left out of every view.
 """
 
 import os
-import shutil
 import json
 import time
+import random
+import shutil
 from PIL import Image
 import logging
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from perceptual_hash import cluster_near_duplicates, hash_images
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+
+# Which copy of a near-duplicate cluster to keep: best quality, then largest file
+QUALITY_RANK = {"high_quality": 3, "medium_quality": 2, "low_quality": 1, "placeholder": 0}
+
+def link_file(source: Path, dest: Path, mode: str = "hardlink") -> str:
+    """Make `dest` refer to `source`'s bytes; returns the method actually used
+
+    Hardlinks fall back to symlinks (e.g. across filesystems), symlinks to
+    copies (e.g. where symlinks are not permitted).
+    """
+    if mode == "hardlink":
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            mode = "symlink"
+    if mode == "symlink":
+        try:
+            os.symlink(os.path.abspath(source), dest)
+            return "symlink"
+        except OSError:
+            pass
+    shutil.copy2(source, dest)
+    return "copy"
+
 class SampleManager:
-    def __init__(self, base_dir="image_samples"):
+    def __init__(self, base_dir="image_samples", link_mode="hardlink", seed=None):
         self.base_dir = Path(base_dir)
         self.raw_dir = self.base_dir / "raw"
         self.organized_dir = self.base_dir / "organized"
@@ -25,10 +66,18 @@ class SampleManager:
         self.validation_dir = self.base_dir / "validation"
         self.by_category_dir = self.base_dir / "by_category"
         self.by_quality_dir = self.base_dir / "by_quality"
-        
+        self.manifest_file = self.base_dir / "samples.json"
+        self.link_mode = link_mode
+        self.random = random.Random(seed)
+        self.link_counts: Dict[str, int] = {}
+
         # Create directories
         self._create_directories()
-        
+
+        # Sample manifest: raw file name -> {"source", "bytes", "category", "quality", ...}
+        self.samples: Dict[str, Dict] = {}
+        self._load_manifest()
+
         # Sample metadata
         self.metadata = {
             "total_samples": 0,
@@ -37,7 +86,7 @@ class SampleManager:
             "last_updated": None,
             "sources": []
         }
-    
+
     def _create_directories(self):
         """Create all necessary directories"""
         directories = [
@@ -48,60 +97,173 @@ class SampleManager:
             self.by_category_dir,
             self.by_quality_dir
         ]
-        
+
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
-        
+
         # Create category subdirectories
-        categories = ["people", "animals", "vehicles", "buildings", "nature", 
-                     "food", "objects", "technology", "art", "sports"]
-        
-        for category in categories:
+        self.categories = ["people", "animals", "vehicles", "buildings", "nature",
+                           "food", "objects", "technology", "art", "sports"]
+
+        for category in self.categories:
             (self.by_category_dir / category).mkdir(exist_ok=True)
-        
+
         # Create quality subdirectories
         quality_levels = ["high_quality", "medium_quality", "low_quality", "placeholder"]
         for quality in quality_levels:
             (self.by_quality_dir / quality).mkdir(exist_ok=True)
-    
+
+    def _load_manifest(self):
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r') as f:
+                self.samples = json.load(f).get("samples", {})
+
+    def save_manifest(self):
+        """Write samples.json atomically"""
+        tmp_file = self.manifest_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump({"version": 1, "samples": self.samples}, f, indent=1)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _link(self, name: str, dest: Path):
+        """Place raw/<name> at dest unless dest already refers to it"""
+        source = self.raw_dir / name
+        if dest.exists() or dest.is_symlink():
+            try:
+                if os.path.samefile(source, dest):
+                    return
+            except OSError:
+                pass
+            dest.unlink()
+        method = link_file(source, dest, self.link_mode)
+        self.link_counts[method] = self.link_counts.get(method, 0) + 1
+
+    def _relabel(self, name: str, key: str, value: Optional[str], view_dir: Path):
+        """Set sample[key], removing the sample's link under its previous value"""
+        previous = self.samples[name].get(key)
+        if previous and (previous != value or self.samples[name].get("duplicate_of")):
+            stale = view_dir / previous / name
+            if stale.exists() or stale.is_symlink():
+                stale.unlink()
+        self.samples[name][key] = value
+
+    def _write_view(self, name: str, entries: List[Tuple[str, str]], directory: Path):
+        """Write a view as <directory>.jsonl plus a directory of links
+
+        `entries` are (raw name, file name in the view). Files of a
+        previous version of the view are removed (they are only links).
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        wanted = {view_name for _, view_name in entries}
+        for existing in directory.iterdir():
+            if existing.name not in wanted and (existing.is_file() or existing.is_symlink()):
+                existing.unlink()
+
+        with open(directory.parent / f"{name}.jsonl", 'w') as f:
+            for raw_name, view_name in entries:
+                self._link(raw_name, directory / view_name)
+                sample = self.samples[raw_name]
+                # Paths are relative to the manifest, as classify-manifest expects
+                f.write(json.dumps({"path": os.path.relpath(self.raw_dir / raw_name, directory.parent),
+                                    "file": view_name,
+                                    "category": sample.get("category"), "quality": sample.get("quality")}) + "\n")
+
     def import_from_download(self, source_dir="test_images"):
         """Import images from download directory"""
         logger.info(f"Importing images from {source_dir}...")
-        
+
         source_path = Path(source_dir)
         if not source_path.exists():
             logger.error(f"Source directory {source_dir} does not exist")
             return False
-        
+
+        imported_sources = {sample["source"] for sample in self.samples.values()}
+        used_names = set(self.samples) | {path.name for path in self.raw_dir.iterdir()}
         imported_count = 0
-        
-        # Copy all images to raw directory
+        skipped_count = 0
+
+        # Link all images into the raw directory
         for root, dirs, files in os.walk(source_path):
-            for file in files:
-                if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp')):
-                    source_file = Path(root) / file
-                    dest_file = self.raw_dir / file
-                    
-                    # Avoid duplicates
-                    counter = 1
-                    while dest_file.exists():
-                        name_parts = file.rsplit('.', 1)
-                        if len(name_parts) == 2:
-                            dest_file = self.raw_dir / f"{name_parts[0]}_{counter}.{name_parts[1]}"
-                        else:
-                            dest_file = self.raw_dir / f"{file}_{counter}"
-                        counter += 1
-                    
-                    shutil.copy2(source_file, dest_file)
-                    imported_count += 1
-        
-        logger.info(f"Imported {imported_count} images to raw directory")
+            dirs.sort()
+            for file in sorted(files):
+                if not file.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                source_file = Path(root) / file
+                source_key = str(source_file.resolve())
+                if source_key in imported_sources:
+                    skipped_count += 1
+                    continue
+
+                # Avoid name clashes
+                name = file
+                counter = 1
+                while name in used_names:
+                    stem, ext = os.path.splitext(file)
+                    name = f"{stem}_{counter}{ext}"
+                    counter += 1
+                used_names.add(name)
+
+                method = link_file(source_file, self.raw_dir / name, self.link_mode)
+                self.link_counts[method] = self.link_counts.get(method, 0) + 1
+                folder = Path(root).name
+                self.samples[name] = {
+                    "source": source_key,
+                    "source_dir": str(source_path.resolve()),
+                    "bytes": source_file.stat().st_size,
+                    # The download folder is the label when it is a known category
+                    "label": folder if folder in self.categories else None,
+                }
+                imported_sources.add(source_key)
+                imported_count += 1
+
+        self.save_manifest()
+        logger.info(f"Imported {imported_count} images to raw directory ({skipped_count} already imported)")
         return True
-    
+
+    def drop_near_duplicates(self, method="phash", max_distance=8, workers=8):
+        """Cluster perceptually similar images and keep one copy of each cluster
+
+        Hashes are cached in samples.json, so a rerun only hashes new
+        images. Dropped images stay in raw/ but are marked with
+        "duplicate_of" and excluded from all views; the clusters are
+        written to near_duplicates.json.
+        """
+        logger.info(f"Finding near-duplicates ({method}, distance <= {max_distance})...")
+
+        missing = [name for name, sample in self.samples.items() if method not in sample]
+        hashes = hash_images([self.raw_dir / name for name in missing], method, workers=workers)
+        for name, value in zip(missing, hashes):
+            self.samples[name][method] = None if value is None else f"{value:016x}"
+
+        known = {name: int(sample[method], 16) for name, sample in self.samples.items() if sample.get(method)}
+        clusters = cluster_near_duplicates(known, max_distance)
+
+        def rank(name):
+            # Classified here too: this usually runs before organize_by_quality()
+            return QUALITY_RANK[self._classify_quality(name)], self.samples[name].get("bytes", 0)
+
+        for sample in self.samples.values():
+            sample.pop("duplicate_of", None)
+        report = []
+        for cluster in clusters:
+            keep = max(cluster, key=rank)
+            drop = [name for name in cluster if name != keep]
+            for name in drop:
+                self.samples[name]["duplicate_of"] = keep
+            report.append({"keep": keep, "drop": drop})
+
+        self.save_manifest()
+        with open(self.base_dir / "near_duplicates.json", 'w') as f:
+            json.dump({"method": method, "max_distance": max_distance, "clusters": report}, f, indent=2)
+
+        dropped = sum(len(cluster["drop"]) for cluster in report)
+        logger.info(f"Hashed {len(missing)} images; {len(clusters)} clusters, {dropped} near-duplicates dropped")
+        return dropped
+
     def organize_by_category(self):
-        """Organize images by category based on filename patterns"""
+        """Organize images by category based on download folder or filename patterns"""
         logger.info("Organizing images by category...")
-        
+
         category_patterns = {
             "people": ["person", "human", "man", "woman", "child", "face", "portrait"],
             "animals": ["animal", "dog", "cat", "bird", "fish", "horse", "cow"],
@@ -114,260 +276,234 @@ class SampleManager:
             "art": ["art", "painting", "drawing", "photo", "picture", "design"],
             "sports": ["sport", "game", "football", "basketball", "tennis", "swimming"]
         }
-        
+
         organized_count = 0
-        
-        for image_file in self.raw_dir.glob("*"):
-            if image_file.is_file() and image_file.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                filename_lower = image_file.name.lower()
-                
-                # Find matching category
-                matched_category = None
+        self.metadata["categories"] = {}
+
+        for name, sample in self.samples.items():
+            if not name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                continue
+            filename_lower = name.lower()
+
+            # Find matching category
+            matched_category = sample.get("label")
+            if matched_category is None:
                 for category, patterns in category_patterns.items():
                     if any(pattern in filename_lower for pattern in patterns):
                         matched_category = category
                         break
-                
-                if matched_category:
-                    dest_dir = self.by_category_dir / matched_category
-                    dest_file = dest_dir / image_file.name
-                    
-                    # Avoid duplicates
-                    counter = 1
-                    while dest_file.exists():
-                        name_parts = image_file.stem, image_file.suffix
-                        dest_file = dest_dir / f"{name_parts[0]}_{counter}{name_parts[1]}"
-                        counter += 1
-                    
-                    shutil.copy2(image_file, dest_file)
-                    organized_count += 1
-                    
-                    # Update metadata
-                    if matched_category not in self.metadata["categories"]:
-                        self.metadata["categories"][matched_category] = 0
-                    self.metadata["categories"][matched_category] += 1
-        
+
+            self._relabel(name, "category", matched_category, self.by_category_dir)
+            if matched_category and not sample.get("duplicate_of"):
+                self._link(name, self.by_category_dir / matched_category / name)
+                organized_count += 1
+
+                # Update metadata
+                self.metadata["categories"][matched_category] = self.metadata["categories"].get(matched_category, 0) + 1
+
+        self.save_manifest()
         logger.info(f"Organized {organized_count} images by category")
         return organized_count
-    
+
+    def _classify_quality(self, name: str) -> str:
+        """Quality level of a raw image based on source and characteristics"""
+        filename_lower = name.lower()
+        sample = self.samples[name]
+
+        # Determine quality based on source
+        if "unsplash" in filename_lower:
+            return "high_quality"
+        elif "picsum" in filename_lower:
+            return "medium_quality"
+        elif "placeholder" in filename_lower or "fakeimg" in filename_lower:
+            return "placeholder"
+        elif sample.get("quality"):
+            return sample["quality"]
+
+        # Try to analyze image quality (header only)
+        try:
+            with Image.open(self.raw_dir / name) as img:
+                width, height = img.size
+                if width >= 400 and height >= 400:
+                    return "high_quality"
+                elif width >= 200 and height >= 200:
+                    return "medium_quality"
+                return "low_quality"
+        except Exception:
+            return "low_quality"
+
     def organize_by_quality(self):
         """Organize images by quality based on source and characteristics"""
         logger.info("Organizing images by quality...")
-        
+
         quality_count = 0
-        
-        for image_file in self.raw_dir.glob("*"):
-            if image_file.is_file() and image_file.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                filename_lower = image_file.name.lower()
-                
-                # Determine quality based on source
-                if "unsplash" in filename_lower:
-                    quality = "high_quality"
-                elif "picsum" in filename_lower:
-                    quality = "medium_quality"
-                elif "placeholder" in filename_lower or "fakeimg" in filename_lower:
-                    quality = "placeholder"
-                else:
-                    # Try to analyze image quality
-                    try:
-                        with Image.open(image_file) as img:
-                            width, height = img.size
-                            if width >= 400 and height >= 400:
-                                quality = "high_quality"
-                            elif width >= 200 and height >= 200:
-                                quality = "medium_quality"
-                            else:
-                                quality = "low_quality"
-                    except Exception:
-                        quality = "low_quality"
-                
-                dest_dir = self.by_quality_dir / quality
-                dest_file = dest_dir / image_file.name
-                
-                # Avoid duplicates
-                counter = 1
-                while dest_file.exists():
-                    name_parts = image_file.stem, image_file.suffix
-                    dest_file = dest_dir / f"{name_parts[0]}_{counter}{name_parts[1]}"
-                    counter += 1
-                
-                shutil.copy2(image_file, dest_file)
-                quality_count += 1
-                
-                # Update metadata
-                if quality not in self.metadata["quality_distribution"]:
-                    self.metadata["quality_distribution"][quality] = 0
-                self.metadata["quality_distribution"][quality] += 1
-        
+        self.metadata["quality_distribution"] = {}
+
+        for name, sample in self.samples.items():
+            if not name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                continue
+
+            quality = self._classify_quality(name)
+            self._relabel(name, "quality", quality, self.by_quality_dir)
+            if sample.get("duplicate_of"):
+                continue
+            self._link(name, self.by_quality_dir / quality / name)
+            quality_count += 1
+
+            # Update metadata
+            self.metadata["quality_distribution"][quality] = self.metadata["quality_distribution"].get(quality, 0) + 1
+
+        self.save_manifest()
         logger.info(f"Organized {quality_count} images by quality")
         return quality_count
-    
+
+    def _by_category(self) -> Dict[str, List[str]]:
+        """Categorized raw names grouped by category, each list shuffled"""
+        groups: Dict[str, List[str]] = {}
+        for name, sample in self.samples.items():
+            if sample.get("category") and not sample.get("duplicate_of"):
+                groups.setdefault(sample["category"], []).append(name)
+        for names in groups.values():
+            names.sort()
+            self.random.shuffle(names)
+        return dict(sorted(groups.items()))
+
     def create_test_sets(self, train_ratio=0.7, val_ratio=0.2, test_ratio=0.1):
-        """Create train/validation/test sets"""
+        """Create train/validation/test sets, stratified by category"""
         logger.info("Creating train/validation/test sets...")
-        
-        # Get all organized images
-        all_images = []
-        for category_dir in self.by_category_dir.iterdir():
-            if category_dir.is_dir():
-                for image_file in category_dir.glob("*"):
-                    if image_file.is_file():
-                        all_images.append((image_file, category_dir.name))
-        
-        # Shuffle and split
-        import random
-        random.shuffle(all_images)
-        
-        total_images = len(all_images)
-        train_count = int(total_images * train_ratio)
-        val_count = int(total_images * val_ratio)
-        
-        train_images = all_images[:train_count]
-        val_images = all_images[train_count:train_count + val_count]
-        test_images = all_images[train_count + val_count:]
-        
+
+        train_images, val_images, test_images = [], [], []
+        for category, names in self._by_category().items():
+            train_count = int(len(names) * train_ratio)
+            val_count = int(len(names) * val_ratio)
+            train_images.extend(names[:train_count])
+            val_images.extend(names[train_count:train_count + val_count])
+            test_images.extend(names[train_count + val_count:])
+
         # Create sets
         self._create_set(train_images, "train", self.test_sets_dir)
         self._create_set(val_images, "validation", self.test_sets_dir)
         self._create_set(test_images, "test", self.test_sets_dir)
-        
+
         logger.info(f"Created test sets: Train({len(train_images)}), Val({len(val_images)}), Test({len(test_images)})")
         return len(train_images), len(val_images), len(test_images)
-    
+
     def _create_set(self, images, set_name, base_dir):
         """Create a specific set (train/val/test)"""
-        set_dir = base_dir / set_name
-        set_dir.mkdir(exist_ok=True)
-        
-        for image_file, category in images:
-            dest_file = set_dir / f"{category}_{image_file.name}"
-            shutil.copy2(image_file, dest_file)
-    
+        entries = [(name, f"{self.samples[name]['category']}_{name}") for name in images]
+        self._write_view(set_name, entries, base_dir / set_name)
+
     def create_sample_packages(self):
         """Create organized sample packages"""
         logger.info("Creating sample packages...")
-        
+
         packages = {
             "quick_test": 50,      # Quick test package
             "standard_test": 200,  # Standard test package
             "comprehensive_test": 500,  # Comprehensive test package
             "full_dataset": 1000   # Full dataset package
         }
-        
+
         for package_name, count in packages.items():
-            package_dir = self.organized_dir / package_name
-            package_dir.mkdir(exist_ok=True)
-            
             # Select diverse images
             selected_images = self._select_diverse_images(count)
-            
-            for i, (image_file, category) in enumerate(selected_images):
-                dest_file = package_dir / f"{i+1:03d}_{category}_{image_file.name}"
-                shutil.copy2(image_file, dest_file)
-            
+            entries = [(name, f"{i+1:03d}_{self.samples[name]['category']}_{name}")
+                       for i, name in enumerate(selected_images)]
+            self._write_view(package_name, entries, self.organized_dir / package_name)
+
             logger.info(f"Created {package_name} package with {len(selected_images)} images")
-    
+
     def _select_diverse_images(self, count):
-        """Select diverse images from all categories"""
-        all_images = []
-        for category_dir in self.by_category_dir.iterdir():
-            if category_dir.is_dir():
-                category_images = list(category_dir.glob("*"))
-                for img in category_images:
-                    all_images.append((img, category_dir.name))
-        
-        # Distribute evenly across categories
-        import random
-        random.shuffle(all_images)
-        
-        # Group by category
-        by_category = {}
-        for img, cat in all_images:
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append((img, cat))
-        
+        """Select diverse images from all categories: an even share per category, then random fill (O(n))"""
+        by_category = self._by_category()
+        if not by_category:
+            return []
+
         # Select evenly from each category
+        images_per_category = count // len(by_category)
         selected = []
-        categories = list(by_category.keys())
-        images_per_category = count // len(categories)
-        
-        for category in categories:
-            category_images = by_category[category]
-            random.shuffle(category_images)
-            selected.extend(category_images[:images_per_category])
-        
+        for names in by_category.values():
+            selected.extend(names[:images_per_category])
+
         # Fill remaining slots randomly
         remaining = count - len(selected)
         if remaining > 0:
-            all_remaining = [(img, cat) for img, cat in all_images if (img, cat) not in selected]
-            random.shuffle(all_remaining)
-            selected.extend(all_remaining[:remaining])
-        
+            chosen = set(selected)
+            all_remaining = [name for names in by_category.values() for name in names if name not in chosen]
+            selected.extend(self.random.sample(all_remaining, min(remaining, len(all_remaining))))
+
         return selected[:count]
-    
+
     def generate_metadata(self):
         """Generate comprehensive metadata"""
         logger.info("Generating metadata...")
-        
-        self.metadata["total_samples"] = len(list(self.raw_dir.glob("*")))
+
+        self.metadata["total_samples"] = len(self.samples)
         self.metadata["last_updated"] = time.strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Count by category
-        for category_dir in self.by_category_dir.iterdir():
-            if category_dir.is_dir():
-                count = len(list(category_dir.glob("*")))
-                self.metadata["categories"][category_dir.name] = count
-        
-        # Count by quality
-        for quality_dir in self.by_quality_dir.iterdir():
-            if quality_dir.is_dir():
-                count = len(list(quality_dir.glob("*")))
-                self.metadata["quality_distribution"][quality_dir.name] = count
-        
+        self.metadata["sources"] = sorted({sample["source_dir"] for sample in self.samples.values()})
+        self.metadata["bytes"] = sum(sample.get("bytes", 0) for sample in self.samples.values())
+        self.metadata["links"] = self.link_counts
+        self.metadata["near_duplicates"] = sum(1 for sample in self.samples.values() if sample.get("duplicate_of"))
+
+        # Count by category and quality (without near-duplicates, like the views)
+        categories, qualities = {}, {}
+        for sample in self.samples.values():
+            if sample.get("duplicate_of"):
+                continue
+            if sample.get("category"):
+                categories[sample["category"]] = categories.get(sample["category"], 0) + 1
+            if sample.get("quality"):
+                qualities[sample["quality"]] = qualities.get(sample["quality"], 0) + 1
+        self.metadata["categories"] = categories
+        self.metadata["quality_distribution"] = qualities
+
         # Save metadata
         metadata_file = self.base_dir / "metadata.json"
         with open(metadata_file, 'w') as f:
             json.dump(self.metadata, f, indent=2)
-        
+
         logger.info(f"Metadata saved to {metadata_file}")
         return self.metadata
-    
+
     def print_summary(self):
         """Print sample summary"""
         metadata = self.generate_metadata()
-        
+
         print("\n📊 Sample Manager Summary")
         print("=" * 50)
-        print(f"Total samples: {metadata['total_samples']}")
+        print(f"Total samples: {metadata['total_samples']} ({metadata['bytes'] / 1024 / 1024:.1f} MB stored once)")
+        print(f"Near-duplicates dropped: {metadata['near_duplicates']}")
         print(f"Last updated: {metadata['last_updated']}")
-        
+
         print(f"\n📂 By Category:")
         for category, count in metadata['categories'].items():
             print(f"  {category}: {count} images")
-        
+
         print(f"\n🎨 By Quality:")
         for quality, count in metadata['quality_distribution'].items():
             print(f"  {quality}: {count} images")
-        
+
         print(f"\n📁 Directory Structure:")
         print(f"  Raw: {len(list(self.raw_dir.glob('*')))} images")
-        print(f"  Organized: {len(list(self.organized_dir.glob('*')))} packages")
-        print(f"  Test Sets: {len(list(self.test_sets_dir.glob('*')))} sets")
-    
+        print(f"  Organized: {len([p for p in self.organized_dir.iterdir() if p.is_dir()])} packages")
+        print(f"  Test Sets: {len([p for p in self.test_sets_dir.iterdir() if p.is_dir()])} sets")
+
     def cleanup(self):
         """Clean up temporary files"""
         logger.info("Cleaning up...")
-        # Add cleanup logic if needed
-        pass
+        for tmp_file in self.base_dir.glob("*.tmp"):
+            tmp_file.unlink()
 
 def main():
     """Main function"""
+    # Setup logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
     print("📦 VisionAI Pro Sample Manager")
     print("=" * 40)
-    
+
     manager = SampleManager()
-    
+
     print("\nChoose action:")
     print("1. Import from download directory")
     print("2. Organize by category")
@@ -376,10 +512,11 @@ def main():
     print("5. Create sample packages")
     print("6. Full organization (all steps)")
     print("7. Show summary")
-    
+    print("8. Drop near-duplicates")
+
     try:
-        choice = input("\nEnter choice (1-7): ").strip()
-        
+        choice = input("\nEnter choice (1-8): ").strip()
+
         if choice == "1":
             source = input("Enter source directory (default: test_images): ").strip() or "test_images"
             manager.import_from_download(source)
@@ -394,6 +531,7 @@ def main():
         elif choice == "6":
             print("Running full organization...")
             manager.import_from_download()
+            manager.drop_near_duplicates()
             manager.organize_by_category()
             manager.organize_by_quality()
             manager.create_test_sets()
@@ -401,9 +539,13 @@ def main():
             print("✅ Full organization completed!")
         elif choice == "7":
             manager.print_summary()
+        elif choice == "8":
+            manager.drop_near_duplicates()
+            manager.organize_by_category()
+            manager.organize_by_quality()
         else:
             print("Invalid choice")
-            
+
     except KeyboardInterrupt:
         print("\n⏹️  Operation interrupted by user")
     except Exception as e:
@@ -148,6 +148,36 @@ def test_ensemble():
         logger.error(f"앙상블 테스트 실패: {e}")
         return None
 
+class _FixedMember:
+    """앙상블 구성원 대역 - 고정 결과 또는 예외"""
+    
+    def __init__(self, model_type, predictions=None):
+        self.model_type = model_type
+        self.predictions = predictions
+    
+    def predict_batch(self, images, top_k=5):
+        if self.predictions is None:
+            raise RuntimeError("simulated model failure")
+        return [self.predictions[:top_k] for _ in images]
+
+def test_ensemble_skips_failed_member():
+    """실패한 구성원은 제외하고 결합, 모든 구성원이 실패할 때만 예외"""
+    ensemble = MultiModelEnsemble(models=[])
+    ensemble.models = [
+        _FixedMember("broken"),
+        _FixedMember("ok", [{"category": "cat", "confidence": 0.8}, {"category": "dog", "confidence": 0.2}]),
+    ]
+    results = ensemble.predict_batch([Image.new("RGB", (8, 8))] * 2, top_k=2)
+    assert results == [[{"category": "cat", "confidence": 0.8}, {"category": "dog", "confidence": 0.2}]] * 2
+    
+    ensemble.models = [_FixedMember("broken"), _FixedMember("also_broken")]
+    try:
+        ensemble.predict_batch([Image.new("RGB", (8, 8))])
+        assert False, "expected every member to fail"
+    except RuntimeError as e:
+        assert "simulated model failure" in str(e)
+    logger.info("✅ 앙상블 구성원 실패 처리 테스트 통과")
+
 def compare_models():
     """모델 성능 비교"""
     logger.info("=" * 50)
@@ -217,6 +247,9 @@ if __name__ == "__main__":
     logger.info("🚀 고성능 이미지 분류 모델 테스트 시작")
     
     try:
+        # 앙상블 실패 처리 (모델 다운로드 없음)
+        test_ensemble_skips_failed_member()
+        
         # 개별 모델 테스트
         compare_models()
         
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 VisionAI Pro - All Servers Test Script
+
+    python scripts/testing/test_all_servers.py            # imports, config, dirs, load smoke test
+    python scripts/testing/test_all_servers.py --load ... # full load test (see load_test_servers.py)
 """
 
 import sys
@@ -105,7 +108,45 @@ def test_directories():
     
     return all_exist
 
+def test_load():
+    """Short in-process load run against every server (stub auth and model)"""
+    print("\n⚡ Testing request path under load...")
+
+    try:
+        import asyncio
+        from argparse import Namespace
+        from scripts.testing.load_test_servers import SERVERS, run_against, synthetic_corpus
+
+        args = Namespace(url=None, launch=False, api_key=None, real_model=False, stub_latency_ms=0.0,
+                         keep_rate_limits=False, concurrency=4, rate=None, duration=10.0, requests=20,
+                         top_k=3, timeout=30.0)
+        corpus = synthetic_corpus([256], per_size=2)
+    except Exception as e:
+        print(f"❌ Load harness failed: {e}")
+        return False
+
+    all_ok = True
+    for server in SERVERS:
+        try:
+            report = asyncio.run(run_against(server, args, corpus))
+            if report["error_rate"] == 0:
+                print(f"✅ {server}: {report['throughput_rps']} req/s, p99 {report['latency_ms']['p99']} ms")
+            else:
+                print(f"❌ {server}: errors {report['outcomes']}")
+                all_ok = False
+        except Exception as e:
+            print(f"❌ {server}: {e}")
+            all_ok = False
+
+    return all_ok
+
 def main():
+    if "--load" in sys.argv:
+        from scripts.testing.load_test_servers import main as load_main
+        argv = sys.argv[1:]
+        argv.remove("--load")
+        return load_main(argv)
+
     print("🧠 VisionAI Pro - Server Test Suite")
     print("=" * 50)
     
@@ -117,14 +158,18 @@ def main():
     
     # Test directories
     dirs_ok = test_directories()
+
+    # Test request path
+    load_ok = test_load()
     
     print("\n📊 Test Results:")
     print("=" * 20)
     print(f"Imports: {'✅ PASS' if imports_ok else '❌ FAIL'}")
     print(f"Config:  {'✅ PASS' if config_ok else '❌ FAIL'}")
     print(f"Dirs:    {'✅ PASS' if dirs_ok else '❌ FAIL'}")
+    print(f"Load:    {'✅ PASS' if load_ok else '❌ FAIL'}")
     
-    if imports_ok and config_ok and dirs_ok:
+    if imports_ok and config_ok and dirs_ok and load_ok:
         print("\n🎉 All tests passed! System is ready to run.")
         print("\n🚀 To start servers:")
         print("   python3 main.py zero-shot   # Zero-shot server (port 8002)")
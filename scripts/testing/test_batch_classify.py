@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Batch Classification Test Script
+Runs the classify-dir / classify-manifest pipeline with a stand-in
+classifier: ordered output, unreadable files and images the model fails
+on, CSV/JSONL writers and resuming an interrupted run without gaps or
+duplicates.
+"""
+
+import os
+import sys
+import csv
+import json
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from cli.batch_classify import BatchClassificationJob, iter_directory, iter_manifest, open_result_writer
+
+class ColorClassifier:
+    """Labels an image by its dominant channel; records batch sizes"""
+
+    def __init__(self, fail_after: int = None, reject_color=None):
+        self.batches = []
+        self.fail_after = fail_after
+        self.reject_color = reject_color
+
+    def predict_batch(self, images, top_k=5):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise KeyboardInterrupt("simulated interruption")
+        if any(image.getpixel((0, 0)) == self.reject_color for image in images):
+            raise RuntimeError("simulated inference failure")
+        self.batches.append(len(images))
+        results = []
+        for image in images:
+            r, g, b = image.getpixel((0, 0))
+            ranked = sorted(zip(("red", "green", "blue"), (r, g, b)), key=lambda item: -item[1])
+            results.append([{"category": name, "confidence": value / 255} for name, value in ranked[:top_k]])
+        return results
+
+def _image_tree(count: int = 30) -> str:
+    root = tempfile.mkdtemp(prefix="visionai_batch_")
+    colors = [(200, 10, 10), (10, 200, 10), (10, 10, 200)]
+    for i in range(count):
+        directory = os.path.join(root, f"set_{i % 3}")
+        os.makedirs(directory, exist_ok=True)
+        Image.new("RGB", (16, 16), colors[i % 3]).save(os.path.join(directory, f"img_{i:03d}.png"))
+    with open(os.path.join(root, "set_0", "broken.jpg"), "wb") as f:
+        f.write(b"not an image")
+    with open(os.path.join(root, "notes.txt"), "w") as f:
+        f.write("skipped")
+    return root
+
+def _read_jsonl(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_directory_walk_is_sorted_and_filtered():
+    """Only image extensions are listed, in the same order every time"""
+    root = _image_tree()
+    paths = list(iter_directory(root))
+    assert len(paths) == 31 and not any(path.endswith(".txt") for path in paths)
+    assert paths == list(iter_directory(root))
+    assert paths[0].endswith(os.path.join("set_0", "broken.jpg"))
+
+def test_results_are_batched_and_ordered():
+    """Every image gets a row in input order; unreadable files get an error instead of predictions"""
+    root = _image_tree()
+    output = os.path.join(root, "results.jsonl")
+    classifier = ColorClassifier()
+    writer = open_result_writer(output)
+    stats = BatchClassificationJob(classifier, writer, batch_size=8, workers=4, top_k=2,
+                                   progress=lambda message: None).run(iter_directory(root))
+    writer.close()
+
+    rows = _read_jsonl(output)
+    assert [row["path"] for row in rows] == list(iter_directory(root))
+    assert stats["classified"] == 30 and stats["failed"] == 1 and stats["images_per_sec"] > 0
+    assert "error" in rows[0] and "predictions" not in rows[0]
+    assert all(row["predictions"][0]["category"] == {"set_0": "red", "set_1": "green", "set_2": "blue"}[Path(row["path"]).parent.name]
+               for row in rows[1:])
+    assert max(classifier.batches) == 8 and sum(classifier.batches) == 30
+
+def test_interrupted_run_resumes_without_duplicates():
+    """Rows written after the last checkpoint are discarded and redone on resume"""
+    root = _image_tree()
+    output = os.path.join(root, "results.csv")
+    checkpoint = output + ".checkpoint.json"
+
+    writer = open_result_writer(output, top_k=1)
+    job = BatchClassificationJob(ColorClassifier(fail_after=3), writer, checkpoint_path=checkpoint,
+                                 batch_size=4, workers=2, top_k=1, checkpoint_every=2,
+                                 progress=lambda message: None)
+    try:
+        job.run(iter_directory(root))
+        assert False, "expected the simulated interruption"
+    except KeyboardInterrupt:
+        pass
+    writer.close()
+    with open(checkpoint) as f:
+        assert json.load(f)["done"] == 8
+
+    classifier = ColorClassifier()
+    writer = open_result_writer(output, top_k=1)
+    stats = BatchClassificationJob(classifier, writer, checkpoint_path=checkpoint, batch_size=4,
+                                   workers=2, top_k=1, progress=lambda message: None).run(iter_directory(root))
+    writer.close()
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["path"] for row in rows] == list(iter_directory(root))
+    assert stats["done"] == 31 and sum(classifier.batches) == 23
+    assert rows[5]["category_1"] in ("red", "green", "blue") and rows[0]["error"]
+
+def test_image_that_fails_inference_becomes_an_error_row():
+    """A batch that raises is retried image by image; only the bad image gets an error row"""
+    root = _image_tree(12)
+    Image.new("RGB", (16, 16), (1, 2, 3)).save(os.path.join(root, "set_1", "img_bad.png"))
+    output = os.path.join(root, "results.jsonl")
+    checkpoint = output + ".checkpoint.json"
+
+    classifier = ColorClassifier(reject_color=(1, 2, 3))
+    writer = open_result_writer(output)
+    stats = BatchClassificationJob(classifier, writer, checkpoint_path=checkpoint, batch_size=4, workers=2,
+                                   progress=lambda message: None).run(iter_directory(root))
+    writer.close()
+
+    rows = _read_jsonl(output)
+    assert [row["path"] for row in rows] == list(iter_directory(root))
+    failed = [os.path.basename(row["path"]) for row in rows if "error" in row]
+    assert failed == ["broken.jpg", "img_bad.png"]
+    assert "simulated inference failure" in rows[[row["path"] for row in rows].index(
+        os.path.join(root, "set_1", "img_bad.png"))]["error"]
+    assert stats["classified"] == 12 and stats["failed"] == 2
+    with open(checkpoint) as f:
+        assert json.load(f)["done"] == 14
+
+def test_manifest_formats():
+    """Plain, JSONL and CSV manifests resolve relative paths against their own directory"""
+    root = _image_tree(3)
+    names = ["set_0/img_000.png", "set_1/img_001.png"]
+    expected = [os.path.join(root, name) for name in names]
+
+    with open(os.path.join(root, "paths.txt"), "w") as f:
+        f.write("\n".join(names) + "\n\n")
+    with open(os.path.join(root, "paths.jsonl"), "w") as f:
+        f.writelines(json.dumps({"path": name}) + "\n" for name in names)
+    with open(os.path.join(root, "paths.csv"), "w") as f:
+        f.write("id,path\n" + "".join(f"{i},{name}\n" for i, name in enumerate(names)))
+
+    for manifest in ("paths.txt", "paths.jsonl", "paths.csv"):
+        assert list(iter_manifest(os.path.join(root, manifest))) == expected, manifest
+
+def main():
+    print("🧠 VisionAI Pro - Batch Classification Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_directory_walk_is_sorted_and_filtered,
+        test_results_are_batched_and_ordered,
+        test_interrupted_run_resumes_without_duplicates,
+        test_image_that_fails_inference_becomes_an_error_row,
+        test_manifest_formats,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
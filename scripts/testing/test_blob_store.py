@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Blob Store Test Script
+Checks content addressing, deduplication and concurrent writers of the
+upload blob store using temporary directories.
+"""
+
+import io
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.blob_store import BlobStore
+
+def _store() -> BlobStore:
+    return BlobStore(tempfile.mkdtemp(prefix="visionai_blobs_"))
+
+def test_blobs_are_content_addressed_and_sharded():
+    """A blob lives at ab/cd/<sha256> and reads back byte for byte"""
+    store = _store()
+    data = os.urandom(3 * 1024 * 1024 + 17)
+
+    digest = store.put(io.BytesIO(data))
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert store.path_for(digest) == os.path.join(store.root, digest[:2], digest[2:4], digest)
+    with store.open(digest) as f:
+        assert f.read() == data
+
+def test_identical_uploads_are_stored_once():
+    """The same bytes uploaded twice (from file or bytes) produce one file"""
+    store = _store()
+    data = b"\x89PNG fake image bytes" * 1000
+
+    first = store.put(io.BytesIO(data))
+    second = store.put_bytes(data)
+    third = store.put(tempfile.SpooledTemporaryFile())  # empty upload
+    fourth = store.put(io.BytesIO(data))
+
+    assert first == second == fourth
+    assert sorted(store.iter_digests()) == sorted({first, third})
+    assert os.listdir(store.tmp_dir) == []
+
+def test_concurrent_writers_of_the_same_image():
+    """Racing writers of identical content all succeed and leave one intact blob"""
+    store = _store()
+    data = os.urandom(512 * 1024)
+    digests = []
+
+    def writer():
+        digests.append(store.put(io.BytesIO(data)))
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(digests)) == 1
+    assert list(store.iter_digests()) == [digests[0]]
+    with store.open(digests[0]) as f:
+        assert f.read() == data
+
+def main():
+    print("🧠 VisionAI Pro - Blob Store Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_blobs_are_content_addressed_and_sharded,
+        test_identical_uploads_are_stored_once,
+        test_concurrent_writers_of_the_same_image,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
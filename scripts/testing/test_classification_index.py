@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Classification Search Index Test Script
+Builds a local SQLite index with a large synthetic history and checks that
+search finds results beyond the old 1000-document window, pages correctly
+and answers in milliseconds.
+"""
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from models.classification_index import ClassificationIndex
+
+CATEGORIES = ["cat", "dog", "bobcat", "car", "airplane", "tree"]
+USERS = 10
+RESULTS = 50000
+
+def _document(i: int) -> tuple:
+    return f"doc{i}", {
+        "user_id": f"user_{i % USERS}",
+        "image_path": f"photo_{i}.jpg",
+        "predictions": [{"category": CATEGORIES[i % len(CATEGORIES)], "confidence": 0.9}],
+        "confidence_scores": [0.9],
+        "created_at": f"2026-01-01T00:00:00.{i:06d}",
+    }
+
+_index = None
+
+def _build_index() -> ClassificationIndex:
+    global _index
+    if _index is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="visionai_index_"), "index.db")
+        _index = ClassificationIndex(path)
+        _index.add_many(_document(i) for i in range(RESULTS))
+    return _index
+
+def test_substring_search_matches_categories_and_paths():
+    """'cat' matches cat and bobcat; image path fragments match too"""
+    index = _build_index()
+
+    results = index.search("user_0", "cat", limit=50)
+    categories = {r["predictions"][0]["category"] for r in results}
+    assert categories == {"cat", "bobcat"}, categories
+    assert all(r["user_id"] == "user_0" for r in results)
+
+    assert [r["id"] for r in index.search("user_0", "photo_1230.jpg")] == ["doc1230"]
+    assert index.search("user_1", "photo_1230.jpg") == []
+
+def test_deep_history_is_reachable_with_pagination():
+    """Oldest results are found, and pages neither overlap nor skip"""
+    index = _build_index()
+
+    assert [r["id"] for r in index.search("user_0", "photo_0.jpg")] == ["doc0"]
+
+    seen = []
+    offset = 0
+    while True:
+        page = index.search("user_0", "tree", limit=500, offset=offset)
+        seen.extend(r["id"] for r in page)
+        if len(page) < 500:
+            break
+        offset += len(page)
+
+    expected = [f"doc{i}" for i in range(RESULTS - 1, -1, -1) if i % USERS == 0 and i % len(CATEGORIES) == 5]
+    assert seen == expected, f"{len(seen)} results, expected {len(expected)}"
+
+def test_short_queries_and_removal():
+    """Queries shorter than a trigram still work, and removed results disappear"""
+    index = _build_index()
+
+    assert len(index.search("user_3", "ca", limit=10)) == 10
+    index.remove("doc3")
+    assert index.search("user_3", "photo_3.jpg") == []
+
+def test_search_latency():
+    """A search over the whole history answers in milliseconds"""
+    index = _build_index()
+
+    start = time.perf_counter()
+    for offset in range(0, 2000, 100):
+        index.search("user_4", "cat", limit=20, offset=offset)
+    elapsed_ms = (time.perf_counter() - start) / 20 * 1000
+
+    print(f"   average search: {elapsed_ms:.2f} ms over {RESULTS} results")
+    assert elapsed_ms < 100, f"search took {elapsed_ms:.1f} ms"
+
+def main():
+    print("🧠 VisionAI Pro - Classification Index Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_substring_search_matches_categories_and_paths,
+        test_deep_history_is_reachable_with_pagination,
+        test_short_queries_and_removal,
+        test_search_latency,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Dataset Downloader Test Script
+Runs the concurrent downloader against a local HTTP server (no network):
+content-hash dedup, resuming from the manifest, per-host connection and
+rate limits, retries of transient errors and rejection of non-images.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from PIL import Image
+
+# Add project root, src and this directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dataset_downloader import ConcurrentDownloader, DownloadTask
+from download_images import ImageDownloader
+
+def _jpeg(variant: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (variant * 20 % 256, 80, 160)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+class ImageServer:
+    """Local stand-in for the image hosts
+
+    /img/<n>       JPEG whose content depends on n % 10 (so n and n + 10 are duplicates)
+    /flaky/<n>     503 on the first request, then a JPEG
+    /html/<n>      a text/html page
+    Every request can be slowed with ?delay=<seconds>.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                with server.lock:
+                    server.requests.append(path)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    attempts = server.requests.count(path)
+                try:
+                    if query.startswith("delay="):
+                        time.sleep(float(query[len("delay="):]))
+                    kind, n = path.strip("/").split("/")
+                    if kind == "flaky" and attempts == 1:
+                        self._send(503, b"busy", "text/plain")
+                    elif kind == "html":
+                        self._send(200, b"<html></html>", "text/html")
+                    else:
+                        self._send(200, _jpeg(int(n) % 10), "image/jpeg")
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def _tasks(server, kind, numbers, query=""):
+    return [DownloadTask(f"{server.url}/{kind}/{n}{query}", f"cat/{kind}_{n}.jpg", "cat") for n in numbers]
+
+def _manifest(output_dir):
+    with open(os.path.join(output_dir, "manifest.jsonl")) as f:
+        return [json.loads(line) for line in f]
+
+def test_content_dedup_and_resume_across_runs():
+    server = ImageServer()
+    output_dir = tempfile.mkdtemp(prefix="visionai_download_")
+    try:
+        downloader = ConcurrentDownloader(output_dir, workers=8, per_host_rate=None)
+        stats = downloader.run(_tasks(server, "img", range(15)) + _tasks(server, "img", [3]))
+        assert (stats["downloaded"], stats["duplicates"], stats["failed"]) == (10, 5, 0)
+        assert len(server.requests) == 15  # the repeated URL is fetched once
+        assert len(os.listdir(os.path.join(output_dir, "cat"))) == 10
+
+        # Second run: finished URLs are skipped; new URLs with known content are duplicates
+        stats = downloader.run(_tasks(server, "img", range(25)))
+        assert (stats["skipped"], stats["downloaded"], stats["duplicates"]) == (15, 0, 10)
+        assert len(server.requests) == 25
+        entries = _manifest(output_dir)
+        duplicate = next(entry for entry in entries if entry["url"].endswith("/img/21"))
+        assert duplicate["status"] == "duplicate" and duplicate["duplicate_of"] == "cat/img_1.jpg"
+        downloader.close()
+    finally:
+        server.close()
+
+def test_per_host_connection_and_rate_limits():
+    server = ImageServer()
+    try:
+        downloader = ConcurrentDownloader(tempfile.mkdtemp(prefix="visionai_download_"), workers=8,
+                                          per_host_connections=2, per_host_rate=None)
+        downloader.run(_tasks(server, "img", range(10), "?delay=0.05"))
+        assert server.max_in_flight == 2
+
+        downloader = ConcurrentDownloader(tempfile.mkdtemp(prefix="visionai_download_"), workers=8,
+                                          per_host_connections=8, per_host_rate=20)
+        start = time.perf_counter()
+        downloader.run(_tasks(server, "img", range(100, 110)))
+        # 10 requests at 20/s: the last one starts 9 intervals after the first
+        assert time.perf_counter() - start >= 0.44
+    finally:
+        server.close()
+
+def test_concurrency_beats_serial_latency():
+    server = ImageServer()
+    try:
+        downloader = ConcurrentDownloader(tempfile.mkdtemp(prefix="visionai_download_"), workers=16,
+                                          per_host_connections=16, per_host_rate=None)
+        stats = downloader.run(_tasks(server, "img", range(10), "?delay=0.2"))
+        # Serially this would take 2 s
+        assert stats["downloaded"] == 10 and stats["seconds"] < 1.0
+    finally:
+        server.close()
+
+def test_retries_and_rejects_non_images():
+    server = ImageServer()
+    output_dir = tempfile.mkdtemp(prefix="visionai_download_")
+    try:
+        downloader = ConcurrentDownloader(output_dir, workers=4, per_host_rate=None, backoff=0.01)
+        stats = downloader.run(_tasks(server, "flaky", [1]) + _tasks(server, "html", [2]))
+        assert (stats["downloaded"], stats["failed"]) == (1, 1)
+        assert server.requests.count("/flaky/1") == 2
+        failed = [entry for entry in _manifest(output_dir) if entry["status"] == "failed"]
+        assert "not an image" in failed[0]["error"]
+
+        # Failed URLs are retried by the next run
+        stats = downloader.run(_tasks(server, "flaky", [1]) + _tasks(server, "html", [2]))
+        assert (stats["skipped"], stats["failed"]) == (1, 1)
+    finally:
+        server.close()
+
+def test_image_downloader_urls_are_reproducible():
+    """Seeded URL generation is what lets a rerun resume"""
+    first = ImageDownloader(tempfile.mkdtemp(prefix="visionai_download_"), seed=7)
+    second = ImageDownloader(tempfile.mkdtemp(prefix="visionai_download_"), seed=7)
+    assert [task.url for task in first.picsum_tasks("animals", 20)] == \
+        [task.url for task in second.picsum_tasks("animals", 20)]
+    assert all(task.path.startswith("animals") for task in first.unsplash_tasks("animals", 5))
+
+def main():
+    print("🧠 VisionAI Pro - Dataset Downloader Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_content_dedup_and_resume_across_runs,
+        test_per_host_connection_and_rate_limits,
+        test_concurrency_beats_serial_latency,
+        test_retries_and_rejects_non_images,
+        test_image_downloader_urls_are_reproducible,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Evaluation Test Script
+Checks the accuracy evaluation engine: NumPy metrics against hand-computed
+values, label mapping, and a batched run over a small labelled folder with
+a stand-in classifier (also through the test_with_downloaded_images CLI).
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from cli.evaluation import LabelMapper, compute_metrics, evaluate, load_labelled_folder
+
+COLORS = {"reds": (220, 20, 20), "greens": (20, 220, 20), "blues": (20, 20, 220)}
+NAMES = ["red", "green", "sky"]
+
+class ColorClassifier:
+    """Names the dominant channel; calls blue things "sky" and counts its batches"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_batch(self, images, top_k=5):
+        self.batches.append(len(images))
+        results = []
+        for image in images:
+            channel = int(np.asarray(image).reshape(-1, 3).mean(axis=0).argmax())
+            ranked = sorted(NAMES, key=lambda name: name != NAMES[channel])
+            results.append([{"category": category, "confidence": 1.0 / (rank + 1)}
+                            for rank, category in enumerate(ranked[:top_k])])
+        return results
+
+def make_classifier():
+    return ColorClassifier()
+
+def _folder() -> str:
+    root = tempfile.mkdtemp(prefix="visionai_eval_")
+    for category, color in COLORS.items():
+        os.makedirs(os.path.join(root, category))
+        for i in range(5):
+            Image.new("RGB", (16, 16), color).save(os.path.join(root, category, f"{i}.png"))
+    with open(os.path.join(root, "reds", "broken.jpg"), "wb") as f:
+        f.write(b"not an image")
+    return root
+
+def test_metrics_match_hand_computed_values():
+    categories = ["a", "b"]
+    labels = np.array([0, 0, 0, 1, 1])
+    top_k = np.array([[0, 1], [1, 0], [-1, 0], [1, -1], [0, 1]])
+    metrics = compute_metrics(labels, top_k, categories)
+
+    assert metrics["top1_accuracy"] == 0.4 and metrics["top5_accuracy"] == 1.0
+    assert metrics["confusion"]["matrix"] == [[1, 1, 1], [1, 1, 0]]
+    assert metrics["other_rate"] == 0.2
+    assert metrics["per_category"]["a"] == {"precision": 0.5, "recall": 0.3333, "f1": 0.4, "support": 3}
+    assert metrics["per_category"]["b"]["precision"] == 0.5 and metrics["per_category"]["b"]["recall"] == 0.5
+    assert metrics["macro_f1"] == 0.45
+
+def test_label_mapper_normalizes_names():
+    mapper = LabelMapper(["animals", "sports_cars"], {"Golden Retriever": "animals"})
+    assert mapper("Animal") == 0 and mapper("animals") == 0
+    assert mapper("sports-car") == 1 and mapper("golden_retriever") == 0
+    assert mapper("tree") == -1
+
+def test_batched_evaluation_of_labelled_folder():
+    dataset = load_labelled_folder(_folder(), workers=4)
+    assert dataset.categories == ["blues", "greens", "reds"] and len(dataset) == 15
+    assert len(dataset.failed) == 1
+
+    classifier = ColorClassifier()
+    result = evaluate(classifier, dataset, batch_size=4, top_k=3, label_map={"sky": "blues"})
+    assert classifier.batches == [4, 4, 4, 3]
+    assert result["top1_accuracy"] == 1.0 and result["macro_f1"] == 1.0
+    assert result["confusion"]["matrix"] == [[5, 0, 0, 0], [0, 5, 0, 0], [0, 0, 5, 0]]
+    assert result["images_per_sec"] > 0
+
+    # Without the map, "sky" is not a folder category
+    result = evaluate(ColorClassifier(), dataset, batch_size=8, top_k=3)
+    assert result["top1_accuracy"] == 0.6667 and result["per_category"]["blues"]["recall"] == 0.0
+    assert result["confusion"]["matrix"][0] == [0, 0, 0, 5] and result["other_rate"] == 0.3333
+
+class FailingOnGreenClassifier(ColorClassifier):
+    """Raises for any batch holding a green image, like a model that errors on one input"""
+
+    def predict_batch(self, images, top_k=5):
+        if any(np.asarray(image).reshape(-1, 3).mean(axis=0).argmax() == 1 for image in images):
+            raise RuntimeError("simulated inference failure")
+        return super().predict_batch(images, top_k)
+
+def test_failed_batches_are_retried_per_image_and_counted():
+    dataset = load_labelled_folder(_folder(), workers=4)
+    result = evaluate(FailingOnGreenClassifier(), dataset, batch_size=4, top_k=3, label_map={"sky": "blues"})
+    # Only the green images fail; the rest of their batches are still classified
+    assert result["errors"] == 5
+    assert result["per_category"]["blues"]["recall"] == 1.0 and result["per_category"]["reds"]["recall"] == 1.0
+    assert result["confusion"]["matrix"][1] == [0, 0, 0, 5]
+
+def test_cli_compares_models_side_by_side():
+    root = _folder()
+    output = os.path.join(root, "eval.json")
+    label_map = os.path.join(root, "labels.json")
+    with open(label_map, "w") as f:
+        json.dump({"sky": "blues"}, f)
+
+    factory = "scripts.testing.test_evaluation:make_classifier"
+    result = subprocess.run([sys.executable, "scripts/testing/test_with_downloaded_images.py",
+                             "--image-dir", root, "--models", factory, "--label-map", label_map,
+                             "--top-k", "2", "--confusion", "--json-out", output],
+                            cwd=project_root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    with open(output) as f:
+        report = json.load(f)
+    assert report["images"] == 15 and report["models"][factory]["top1_accuracy"] == 1.0
+    assert "Confusion matrix" in result.stdout
+
+def main():
+    print("🧠 VisionAI Pro - Evaluation Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_metrics_match_hand_computed_values,
+        test_label_mapper_normalizes_names,
+        test_batched_evaluation_of_labelled_folder,
+        test_failed_batches_are_retried_per_image_and_counted,
+        test_cli_compares_models_side_by_side,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,7 +24,8 @@ def test_firebase_connection():
     try:
         from firebase_config import firebase_config
         
-        if firebase_config.is_connected():
+        # The client connects lazily; get_db() waits for the first attempt
+        if firebase_config.get_db() is not None:
             logger.info("✅ Firebase connection successful")
             return True
         else:
@@ -136,6 +137,52 @@ def test_data_manager():
         logger.error(f"❌ Data manager test error: {e}")
         return False
 
+def test_history_pagination():
+    """Test cursor pagination and streaming of classification history"""
+    try:
+        from src.models.firebase_data_manager import FirebaseDataManager
+        
+        manager = FirebaseDataManager(write_behind=False)
+        user_id = f"test_pagination_{int(datetime.now().timestamp())}"
+        
+        saved_ids = []
+        for i in range(5):
+            saved_ids.append(manager.save_classification_result(
+                user_id=user_id,
+                api_key="test_key",
+                image_path=f"test_{i}.jpg",
+                predictions=[{"category": "test", "confidence": 0.5}],
+                confidence_scores=[0.5],
+                processing_time=0.1
+            ))
+        
+        try:
+            # Page through with a cursor, two results at a time
+            paged_ids = []
+            cursor = None
+            while True:
+                page = manager.get_user_classifications(user_id, limit=2, start_after=cursor)
+                paged_ids.extend(result["id"] for result in page)
+                if len(page) < 2:
+                    break
+                cursor = page[-1]["id"]
+            
+            streamed_ids = [result["id"] for result in manager.iter_user_classifications(user_id, page_size=2)]
+            
+            if paged_ids == list(reversed(saved_ids)) and streamed_ids == paged_ids:
+                logger.info("✅ History pagination and streaming returned every result once, newest first")
+                return True
+            else:
+                logger.error(f"❌ History pagination mismatch: paged={paged_ids} streamed={streamed_ids}")
+                return False
+        finally:
+            for classification_id in saved_ids:
+                manager.delete_classification_result(classification_id)
+            
+    except Exception as e:
+        logger.error(f"❌ History pagination test error: {e}")
+        return False
+
 def main():
     """Main test function"""
     logger.info("🚀 Starting Firebase Integration Tests")
@@ -143,7 +190,8 @@ def main():
     tests = [
         ("Firebase Connection", test_firebase_connection),
         ("API Key Manager", test_api_key_manager),
-        ("Data Manager", test_data_manager)
+        ("Data Manager", test_data_manager),
+        ("History Pagination", test_history_pagination)
     ]
     
     passed = 0
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Lazy Firebase Initialization Test Script
+Checks that importing the Firebase config does no work, that slow
+credential discovery never blocks callers beyond their timeout, and the
+reconnect policy. Connection attempts are simulated by overriding
+_initialize_firebase, so no credentials are needed.
+"""
+
+import sys
+import time
+import threading
+import subprocess
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.firebase_config import FirebaseConfig
+
+class SimulatedClient:
+    def __init__(self):
+        self.healthy = True
+
+    def collection(self, name):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def get(self, timeout=None):
+        if not self.healthy:
+            raise ConnectionError("deadline exceeded")
+        return []
+
+class SimulatedFirebaseConfig(FirebaseConfig):
+    """FirebaseConfig whose connection attempts take `delay` seconds and may fail"""
+
+    def __init__(self, delay: float = 0.0, failures: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.failures = failures
+        self.attempts = 0
+
+    def _initialize_firebase(self):
+        self.attempts += 1
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("could not resolve credentials")
+        return SimulatedClient()
+
+def test_import_does_not_initialize_firebase():
+    """Importing the config module neither imports firebase_admin nor connects"""
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from config.firebase_config import firebase_config;"
+        "assert 'firebase_admin' not in sys.modules;"
+        "assert not firebase_config.is_connected()"
+    )
+    subprocess.run([sys.executable, "-c", code, str(project_root)], check=True)
+
+def test_slow_credentials_do_not_block_callers():
+    """get_db returns after its timeout while the connection finishes in the background"""
+    config = SimulatedFirebaseConfig(delay=0.5, connect_timeout=5)
+
+    start = time.perf_counter()
+    assert config.get_db(timeout=0.05) is None
+    assert time.perf_counter() - start < 0.3
+
+    assert config.get_db() is not None
+    assert config.attempts == 1
+
+def test_failed_connections_back_off():
+    """A failed attempt is not retried until the backoff interval has passed"""
+    config = SimulatedFirebaseConfig(failures=1, retry_interval=0.2, connect_timeout=1)
+
+    assert config.get_db() is None
+    assert config.last_error
+    assert config.get_db() is None
+    assert config.attempts == 1
+
+    time.sleep(0.25)
+    assert config.get_db() is not None
+    assert config.attempts == 2
+
+def test_health_probe_reconnects_dead_clients():
+    """An unresponsive client is dropped by the probe and replaced on the next get_db"""
+    config = SimulatedFirebaseConfig(connect_timeout=1)
+    client = config.get_db()
+    assert config.check_health()["connected"]
+
+    client.healthy = False
+    assert not config.check_health()["connected"]
+
+    replacement = config.get_db()
+    assert replacement is not None and replacement is not client
+    assert config.check_health()["connected"]
+
+def main():
+    print("🧠 VisionAI Pro - Lazy Firebase Initialization Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_import_does_not_initialize_firebase,
+        test_slow_credentials_do_not_block_callers,
+        test_failed_connections_back_off,
+        test_health_probe_reconnects_dead_clients,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
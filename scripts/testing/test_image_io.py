@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Image Validation Test Script
+Checks open_image and open_upload_image on in-memory files: the pixel
+budget and format allow-list are enforced from the header alone, corrupt
+files are rejected, JPEGs decode at a reduced draft size, and the API maps
+each rejection to HTTP 400 or 413.
+"""
+
+import io
+import sys
+import zlib
+import struct
+from pathlib import Path
+
+from PIL import Image
+from fastapi import HTTPException, UploadFile
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from config.config import Config
+from models.image_io import open_image, ImageTooLargeError, UnsupportedImageError
+from api.uploads import open_upload_image
+
+def _encode(image: Image.Image, format: str, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format, **kwargs)
+    return buffer.getvalue()
+
+def _png_header(width: int, height: int) -> bytes:
+    """A PNG with only a header claiming the given size (no pixel data to decode)"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IEND", b"")
+
+def _upload(data: bytes, filename: str = "upload.bin") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+def test_pixel_budget_is_checked_from_the_header():
+    """Oversized dimensions are rejected before any pixel is decoded, including decompression bombs"""
+    small = _encode(Image.new("RGB", (1200, 1000)), "PNG")
+    assert open_image(io.BytesIO(small), max_pixels=1_200_000).size == (1200, 1000)
+    try:
+        open_image(io.BytesIO(small), max_pixels=1_000_000)
+        assert False, "expected ImageTooLargeError"
+    except ImageTooLargeError as e:
+        assert "1200x1000" in str(e)
+
+    # Far past Pillow's own bomb limit: never decoded, even with our budget turned off
+    for max_pixels in (40_000_000, None):
+        try:
+            open_image(io.BytesIO(_png_header(100_000, 100_000)), max_pixels=max_pixels)
+            assert False, "expected ImageTooLargeError"
+        except ImageTooLargeError:
+            pass
+
+def test_disallowed_and_corrupt_files_are_unsupported():
+    """TIFF (not in the allow-list), a broken JPEG header and plain text are all UnsupportedImageError"""
+    tiff = _encode(Image.new("RGB", (16, 16)), "TIFF")
+    samples = {
+        "tiff": tiff,
+        "corrupt jpeg": b"\xff\xd8\xff\xe0" + b"\x00" * 64,
+        "text": b"definitely not an image",
+        "empty": b"",
+    }
+    for name, data in samples.items():
+        try:
+            open_image(io.BytesIO(data))
+            assert False, f"expected UnsupportedImageError for {name}"
+        except UnsupportedImageError:
+            pass
+
+    # Allowed once listed
+    assert open_image(io.BytesIO(tiff), formats=["TIFF"]).format == "TIFF"
+
+def test_jpeg_is_drafted_down_to_the_target_size():
+    """Large JPEGs decode at 1/2, 1/4 or 1/8 scale with both sides kept at or above draft_size"""
+    jpeg = _encode(Image.new("RGB", (2048, 1536), (120, 30, 200)), "JPEG", quality=90)
+
+    image = open_image(io.BytesIO(jpeg), draft_size=512)
+    image.load()
+    assert image.size == (1024, 768)
+    assert open_image(io.BytesIO(jpeg), draft_size=256).size == (512, 384)
+    assert open_image(io.BytesIO(jpeg), draft_size=None).size == (2048, 1536)
+
+    # Not a JPEG: decoded at full size
+    png = _encode(Image.new("RGB", (2048, 1536)), "PNG")
+    assert open_image(io.BytesIO(png), draft_size=512).size == (2048, 1536)
+
+def test_upload_rejections_map_to_http_status():
+    """Unsupported or corrupt uploads are 400, images over the pixel budget 413; valid ones open"""
+    cases = [
+        (_encode(Image.new("RGB", (16, 16)), "TIFF"), 400),
+        (b"\x89PNG\r\n\x1a\n" + b"\x00" * 32, 400),
+        (_png_header(100_000, 100_000), 413),
+    ]
+    for data, status in cases:
+        try:
+            open_upload_image(_upload(data))
+            assert False, f"expected HTTP {status}"
+        except HTTPException as e:
+            assert e.status_code == status, (status, e.status_code, e.detail)
+
+    original = Config.MAX_IMAGE_PIXELS
+    Config.MAX_IMAGE_PIXELS = 10_000
+    try:
+        try:
+            open_upload_image(_upload(_encode(Image.new("RGB", (200, 200)), "PNG")))
+            assert False, "expected HTTP 413"
+        except HTTPException as e:
+            assert e.status_code == 413 and "10000 pixels" in e.detail
+    finally:
+        Config.MAX_IMAGE_PIXELS = original
+
+    image = open_upload_image(_upload(_encode(Image.new("RGB", (64, 48)), "JPEG")))
+    assert image.format == "JPEG" and image.size == (64, 48)
+
+def main():
+    print("🧠 VisionAI Pro - Image Validation Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_pixel_budget_is_checked_from_the_header,
+        test_disallowed_and_corrupt_files_are_unsupported,
+        test_jpeg_is_drafted_down_to_the_target_size,
+        test_upload_rejections_map_to_http_status,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Import Time Test Script
+Guards entry point startup cost with `python -X importtime`: the CLI,
+configuration and API modules must not import torch, transformers,
+firebase_admin or redis until a command actually needs them, and stay
+within an import time budget (IMPORT_TIME_BUDGET_MS, default 1500 ms).
+
+Run directly to print the slowest imports of each entry point.
+"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+HEAVY_MODULES = ("torch", "torchvision", "transformers", "firebase_admin", "redis")
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# name -> Python code run in a fresh interpreter from the project root
+ENTRY_POINTS = {
+    "cli keys": "import sys; sys.argv = ['main.py', 'keys', '--help']; sys.path.insert(0, 'src/cli')\n"
+                "import main\n"
+                "try:\n    main.main()\nexcept SystemExit:\n    pass",
+    "cli classify-dir": "import sys; sys.argv = ['main.py', 'classify-dir', '--help']; sys.path.insert(0, 'src/cli')\n"
+                        "import main\n"
+                        "try:\n    main.main()\nexcept SystemExit:\n    pass",
+    "config": "import config.config",
+    "security middleware": "import sys; sys.path.insert(0, 'src'); import middleware.security",
+    "api main": "import src.api.main",
+    "api zero-shot": "import src.api.zero_shot_main",
+    "api advanced": "import src.api.advanced_main",
+    "api firebase": "import src.api.firebase_main",
+}
+
+def importtime(code: str) -> Tuple[Dict[str, int], float]:
+    """Modules imported by `code` with their cumulative microseconds, and the total in ms"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=project_root,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+        # Top-level imports are not indented; their cumulative times add up to the total
+        if not name.startswith("  ", 1):
+            total_us += int(cumulative)
+    return modules, total_us / 1000
+
+def _heavy(modules: Dict[str, int]) -> List[str]:
+    return sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES)
+
+def test_entry_points_skip_heavy_imports():
+    """No entry point imports a model, Firebase or Redis client at startup"""
+    for name, code in ENTRY_POINTS.items():
+        modules, _ = importtime(code)
+        assert not _heavy(modules), f"{name} imports {', '.join(_heavy(modules))}"
+
+def test_entry_points_within_budget():
+    for name, code in ENTRY_POINTS.items():
+        _, total_ms = importtime(code)
+        assert total_ms < BUDGET_MS, f"{name}: {total_ms:.0f} ms > {BUDGET_MS:.0f} ms"
+
+def test_config_import_has_no_side_effects():
+    """Importing the configuration creates no directories"""
+    code = (
+        "import pathlib\n"
+        "calls = []\n"
+        "pathlib.Path.mkdir = lambda self, *args, **kwargs: calls.append(str(self))\n"
+        "import config.config\n"
+        "print(calls)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]", result.stdout
+
+def report():
+    for name, code in ENTRY_POINTS.items():
+        modules, total_ms = importtime(code)
+        slowest = sorted(modules.items(), key=lambda item: -item[1])[:5]
+        print(f"   {name}: {total_ms:.0f} ms, {len(modules)} modules; slowest: "
+              + ", ".join(f"{module} {us / 1000:.0f} ms" for module, us in slowest))
+
+def main():
+    print("🧠 VisionAI Pro - Import Time Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_entry_points_skip_heavy_imports,
+        test_entry_points_within_budget,
+        test_config_import_has_no_side_effects,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    report()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
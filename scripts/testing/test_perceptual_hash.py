@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Perceptual Hash Test Script
+Checks that dHash/pHash keep resized and recompressed copies within a few
+bits while distinct images stay far apart, that multi-index search finds
+exactly the pairs a brute-force scan does, and that clustering links
+near-duplicates transitively.
+"""
+
+import os
+import sys
+import random
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Add project root, src and this directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from perceptual_hash import MultiIndexHash, cluster_near_duplicates, dhash_batch, hamming, hash_images
+
+def photo_like(seed: int) -> Image.Image:
+    """Smooth random blobs: enough structure to tell images apart"""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (30, 40, 3), dtype=np.uint8)
+    return Image.fromarray(noise).resize((400, 300), Image.BICUBIC).filter(ImageFilter.GaussianBlur(3))
+
+def _pairs(count: int = 20):
+    """(original, small recompressed copy) paths"""
+    root = tempfile.mkdtemp(prefix="visionai_phash_")
+    paths = []
+    for i in range(count):
+        image = photo_like(i)
+        original, copy = os.path.join(root, f"{i}.jpg"), os.path.join(root, f"{i}_small.jpg")
+        image.save(original, quality=92)
+        image.resize((160, 120)).save(copy, quality=35)
+        paths.extend([original, copy])
+    return paths
+
+def test_hashes_survive_resize_and_recompression():
+    paths = _pairs()
+    for method in ("dhash", "phash"):
+        hashes = hash_images(paths, method, batch_size=7)
+        same = [hamming(hashes[2 * i], hashes[2 * i + 1]) for i in range(20)]
+        different = [hamming(hashes[2 * i], hashes[2 * j]) for i in range(20) for j in range(i)]
+        assert max(same) <= 8 < min(different), (method, max(same), min(different))
+
+def test_dhash_bits():
+    # Brightness rising left to right in every row: all 64 gradient bits set
+    ramp = np.tile(np.arange(9, dtype=np.float32), (2, 8, 1))
+    ramp[1] = ramp[1, :, ::-1]
+    assert dhash_batch(ramp) == [2 ** 64 - 1, 0]
+
+def test_unreadable_files_hash_to_none():
+    paths = _pairs(2)
+    broken = os.path.join(os.path.dirname(paths[0]), "broken.jpg")
+    with open(broken, "wb") as f:
+        f.write(b"not an image")
+    hashes = hash_images([paths[0], broken, paths[1]])
+    assert hashes[1] is None and hamming(hashes[0], hashes[2]) <= 8
+
+def test_multi_index_search_matches_brute_force():
+    rng = random.Random(3)
+    values = [rng.getrandbits(64) for _ in range(1500)]
+    # Plant values a few bits from the first ones
+    for i in range(100):
+        value = values[i % 10]
+        for _ in range(rng.randrange(1, 11)):
+            value ^= 1 << rng.randrange(64)
+        values.append(value)
+
+    for radius in (0, 1, 4, 8, 10):
+        found = MultiIndexHash(values, radius).pairs().tolist()
+        expected = [[i, j] for i in range(len(values)) for j in range(i + 1, len(values))
+                    if hamming(values[i], values[j]) <= radius]
+        assert found == expected, radius
+
+def test_clusters_are_transitive():
+    hashes = {"a": 0b0, "b": 0b111, "c": 0b111111, "d": 2 ** 64 - 1, "e": 2 ** 64 - 2, "f": 2 ** 40 - 1}
+    # a-b and b-c are within 3 bits, a-c is not: still one cluster
+    assert cluster_near_duplicates(hashes, radius=3) == [["a", "b", "c"], ["d", "e"]]
+    assert cluster_near_duplicates(hashes, radius=0) == []
+
+def main():
+    print("🧠 VisionAI Pro - Perceptual Hash Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_hashes_survive_resize_and_recompression,
+        test_dhash_bits,
+        test_unreadable_files_hash_to_none,
+        test_multi_index_search_matches_brute_force,
+        test_clusters_are_transitive,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
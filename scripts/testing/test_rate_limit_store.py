@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Shared Rate Limit Store Test Script
+Runs entirely locally: several worker processes hammer the same
+shared-memory table and the totals must match a single global limit.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+# Add src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from middleware.rate_limit_store import (
+    MemoryRateLimitStore, RateLimitTableFull, SharedMemoryRateLimitStore,
+    create_rate_limit_store, open_shared_memory_store
+)
+
+WORKERS = 4
+
+def _hit_worker(uri: str, attempts: int, limit: int, results):
+    """Worker process: try `attempts` requests against one shared bucket"""
+    sys.path.insert(0, str(project_root / "src"))
+    store = open_shared_memory_store(uri)
+    allowed = sum(store.hit("ip:203.0.113.7", limit, 3600) for _ in range(attempts))
+    results.put(allowed)
+
+def _incr_worker(uri: str, increments: int):
+    """Worker process: bump a shared counter"""
+    sys.path.insert(0, str(project_root / "src"))
+    store = open_shared_memory_store(uri)
+    for _ in range(increments):
+        store.incr("requests_total")
+
+def _run_workers(target, args_list):
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0, f"worker exited with {process.exitcode}"
+
+def _temp_uri(name: str) -> str:
+    path = os.path.join(tempfile.mkdtemp(prefix="visionai_rl_"), name)
+    return f"shm://{path}?slots=1024"
+
+def test_limit_is_global_across_processes():
+    """N workers sharing one bucket get `limit` requests in total, not N * limit"""
+    uri = _temp_uri("limit")
+    limit = 100
+    results = multiprocessing.get_context("spawn").Queue()
+
+    _run_workers(_hit_worker, [(uri, 60, limit, results) for _ in range(WORKERS)])
+    total_allowed = sum(results.get(timeout=10) for _ in range(WORKERS))
+
+    assert total_allowed == limit, f"allowed {total_allowed}, expected {limit}"
+
+def test_counters_are_atomic_across_processes():
+    """Concurrent increments from several processes are never lost"""
+    uri = _temp_uri("counter")
+    increments = 2000
+
+    _run_workers(_incr_worker, [(uri, increments) for _ in range(WORKERS)])
+    total = open_shared_memory_store(uri).get("requests_total")
+
+    assert total == WORKERS * increments, f"counter is {total}, expected {WORKERS * increments}"
+
+def test_expired_slots_are_reused():
+    """A full table keeps working by recycling idle buckets"""
+    store = open_shared_memory_store(_temp_uri("reuse").replace("slots=1024", "slots=16"))
+
+    for round in range(3):
+        try:
+            for i in range(100):
+                store.hit(f"ip:{round}:{i}", 5, 0.05)
+            raise AssertionError("a 16-slot table took 100 live buckets")
+        except RateLimitTableFull:
+            pass
+        time.sleep(0.06)
+        # The key that was refused fits once the others have expired
+        assert store.hit(f"ip:{round}:{i}", 5, 60)
+        store.clear(f"ip:{round}:{i}")
+
+def test_full_table_never_evicts_live_buckets():
+    """Once every probe slot is live, new keys are refused and existing buckets keep their state"""
+    store = open_shared_memory_store(_temp_uri("full").replace("slots=1024", "slots=16"))
+
+    admitted = []
+    try:
+        for i in range(100):
+            assert store.hit(f"ip:{i}", 1, 60)
+            admitted.append(f"ip:{i}")
+        raise AssertionError("a 16-slot table took 100 live buckets")
+    except RateLimitTableFull:
+        pass
+
+    assert len(admitted) >= SharedMemoryRateLimitStore.PROBES
+    # Every admitted client has used its one request, whichever key was refused
+    assert not any(store.hit(key, 1, 60) for key in admitted)
+
+def test_middleware_falls_back_to_process_buckets_when_table_is_full():
+    """Keys the full table can't hold are limited by in-process token buckets, not refused outright"""
+    from middleware import security
+
+    store = open_shared_memory_store(_temp_uri("middleware").replace("slots=1024", "slots=16"))
+    previous, security.rate_limit_store = security.rate_limit_store, store
+    previous_fallback, security.fallback_store = security.fallback_store, MemoryRateLimitStore()
+    try:
+        assert all(security.check_rate_limit(f"198.51.100.{i}", limit=5) for i in range(100))
+        # Every client, in the table or not, still gets exactly its limit
+        assert sum(security.check_rate_limit("198.51.100.99", limit=5) for _ in range(10)) == 4
+        assert sum(security.check_rate_limit("198.51.100.0", limit=5) for _ in range(10)) == 4
+        assert len(security.fallback_store._limiters[60]) > 0
+    finally:
+        security.rate_limit_store = previous
+        security.fallback_store = previous_fallback
+
+def test_unvalidated_api_keys_get_no_bucket():
+    """Only keys the validator accepts are rate limited (and stored) per key; lookups are cached"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from middleware import security
+
+    class RecordingStore(MemoryRateLimitStore):
+        def __init__(self):
+            super().__init__()
+            self.keys = []
+
+        def hit(self, key, limit, window):
+            self.keys.append(key)
+            return super().hit(key, limit, window)
+
+    lookups = []
+    def validator(key):
+        lookups.append(key)
+        return key == "valid-key"
+
+    app = FastAPI()
+    app.get("/ping")(lambda: {"ok": True})
+    app.add_middleware(security.SecurityMiddleware, key_validator=validator)
+
+    store = RecordingStore()
+    previous, security.rate_limit_store = security.rate_limit_store, store
+    try:
+        with TestClient(app) as client:
+            for i in range(20):
+                assert client.get("/ping", headers={"X-API-Key": f"random-{i}"}).status_code == 200
+            for _ in range(3):
+                client.get("/ping", params={"api_key": "valid-key"})
+    finally:
+        security.rate_limit_store = previous
+
+    assert [key for key in store.keys if key.startswith("key:")] == ["key:valid-key"] * 3
+    assert lookups.count("valid-key") == 1 and len(lookups) == 21
+
+def test_slot_count_mismatch_is_refused():
+    """A second opener with another slot count gets an error; the live table is left alone"""
+    uri = _temp_uri("mismatch")
+    path = uri[len("shm://"):].split("?")[0]
+    store = open_shared_memory_store(uri)
+    assert store.hit("ip:1", 1, 60)
+    size = os.path.getsize(path)
+
+    for opener in (lambda: SharedMemoryRateLimitStore(path, 2048),
+                   lambda: open_shared_memory_store(uri.replace("slots=1024", "slots=2048"))):
+        try:
+            opener()
+            raise AssertionError("mismatched slot count was accepted")
+        except ValueError as e:
+            assert "slots" in str(e)
+
+    assert os.path.getsize(path) == size
+    assert not store.hit("ip:1", 1, 60)
+
+def test_memory_store_and_fallback():
+    """memory:// keeps working in-process and unknown backends fall back to it"""
+    store = create_rate_limit_store("memory://")
+    assert isinstance(store, MemoryRateLimitStore)
+    assert sum(store.hit("ip:1", 3, 60) for _ in range(5)) == 3
+
+    fallback = create_rate_limit_store("redis://127.0.0.1:1/0")
+    assert isinstance(fallback, MemoryRateLimitStore)
+
+def main():
+    print("🧠 VisionAI Pro - Rate Limit Store Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_limit_is_global_across_processes,
+        test_counters_are_atomic_across_processes,
+        test_expired_slots_are_reused,
+        test_full_table_never_evicts_live_buckets,
+        test_middleware_falls_back_to_process_buckets_when_table_is_full,
+        test_slot_count_mismatch_is_refused,
+        test_memory_store_and_fallback,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
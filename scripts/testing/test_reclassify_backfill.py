@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Reclassification Backfill Test Script
+Runs the reclassify job against a temporary SQLite backend, blob store and
+embedding store with a small deterministic classifier standing in for CLIP.
+"""
+
+import io
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add project root and src to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from models.storage_backend import SQLiteStorageBackend
+from models.blob_store import BlobStore
+from models.embedding_store import EmbeddingStore
+from cli.reclassify import ReclassifyJob
+
+COLORS = {"red": (255, 0, 0), "green": (0, 255, 0), "blue": (0, 0, 255)}
+
+class ColorClassifier:
+    """CLIP-shaped classifier whose 'embedding' is the mean RGB colour"""
+
+    model_name = "test-color"
+
+    def __init__(self, categories):
+        self.categories = categories
+        self.category_embeddings = np.array([COLORS[name] for name in categories], dtype=np.float32) / 255
+        self.encoded = 0
+
+    def encode_images(self, images):
+        self.encoded += len(images)
+        features = np.array([np.asarray(image, dtype=np.float32).mean(axis=(0, 1)) for image in images])
+        return features / np.linalg.norm(features, axis=1, keepdims=True)
+
+    def score_embeddings(self, features, top_k=5):
+        similarity = np.asarray(features) @ self.category_embeddings.T
+        results = []
+        for row in similarity:
+            order = np.argsort(-row)[:top_k]
+            results.append([{"category": self.categories[i], "confidence": round(float(row[i]), 4)} for i in order])
+        return results
+
+class PlainClassifier:
+    """Classifier without embeddings: only predict_batch"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_batch(self, images, top_k=5):
+        self.calls.append(len(images))
+        return [[{"category": "plain", "confidence": 1.0}] for _ in images]
+
+def _image_bytes(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _setup(count=20):
+    """Storage with `count` records whose uploads are in a blob store"""
+    root = tempfile.mkdtemp(prefix="visionai_reclassify_")
+    storage = SQLiteStorageBackend(os.path.join(root, "visionai.db"))
+    blobs = BlobStore(os.path.join(root, "blobs"))
+    names = list(COLORS)
+    for i in range(count):
+        color = names[i % 3]
+        digest = blobs.put_bytes(_image_bytes(COLORS[color]))
+        storage.put_classification(f"doc_{i:03d}", {
+            "user_id": "user_1",
+            "image_path": f"{color}_{i}.png",
+            "image_sha256": digest,
+            "predictions": [{"category": "stale", "confidence": 0.5}],
+            "confidence_scores": [0.5],
+            "created_at": f"2025-01-01T00:00:{i:02d}",
+        })
+    return root, storage, blobs
+
+def test_images_then_embeddings_only():
+    """First run classifies images and keeps embeddings; a category change re-scores from them alone"""
+    root, storage, blobs = _setup()
+    embeddings = EmbeddingStore(os.path.join(root, "embeddings"))
+    classifier = ColorClassifier(["red", "green", "blue"])
+
+    job = ReclassifyJob(storage, classifier, os.path.join(root, "ckpt.json"),
+                        blob_store=blobs, embedding_store=embeddings, batch_size=7, workers=2, top_k=1)
+    stats = job.run()
+
+    assert stats["processed"] == 20 and stats["updated"] == 20
+    # Identical images share one digest: once the first page stored the three
+    # embeddings, later pages re-score from the store instead of decoding
+    assert len(embeddings) == 3
+    assert stats["from_images"] == 7 and classifier.encoded == 7
+    assert stats["from_embeddings"] == 13
+    for record in storage.iter_classifications("user_1"):
+        assert record["predictions"][0]["category"] == record["image_path"].split("_")[0]
+        assert record["confidence_scores"] == [record["predictions"][0]["confidence"]]
+        assert "reclassified_at" in record
+
+    # New category set: no images needed
+    os.rename(blobs.root, blobs.root + ".gone")
+    classifier = ColorClassifier(["blue", "red"])
+    job = ReclassifyJob(storage, classifier, os.path.join(root, "ckpt.json"), blob_store=blobs,
+                        embedding_store=embeddings, embeddings_only=True, batch_size=7,
+                        top_k=1, model_version="colors_v2")
+    stats = job.run(restart=True)
+
+    assert stats["from_embeddings"] == 20 and stats["missing"] == 0
+    assert classifier.encoded == 0
+    record = storage.get_classification("doc_001")  # green image
+    assert record["model_version"] == "colors_v2"
+    assert record["predictions"][0]["category"] in ("blue", "red")
+
+def test_resume_from_checkpoint():
+    """A limited run stops mid-way and the next run continues after the last record"""
+    root, storage, blobs = _setup(count=25)
+    checkpoint = os.path.join(root, "ckpt.json")
+    classifier = PlainClassifier()
+
+    first = ReclassifyJob(storage, classifier, checkpoint, blob_store=blobs, batch_size=5).run(limit=10)
+    assert first["processed"] == 10
+    with open(checkpoint, encoding="utf-8") as f:
+        assert json.load(f)["last_id"] == "doc_015"  # newest first
+
+    second = ReclassifyJob(storage, classifier, checkpoint, blob_store=blobs, batch_size=5).run()
+    assert second["processed"] == 25 and second["updated"] == 25
+    assert sum(classifier.calls) == 25
+    assert all(record["predictions"][0]["category"] == "plain" for record in storage.iter_classifications())
+
+def test_missing_images_are_counted_not_written():
+    """Records whose image can't be found keep their old predictions"""
+    root, storage, blobs = _setup(count=6)
+    os.remove(blobs.path_for(storage.get_classification("doc_000")["image_sha256"]))
+
+    stats = ReclassifyJob(storage, PlainClassifier(), None, blob_store=blobs).run()
+
+    # doc_000, doc_003 share the red image
+    assert stats["missing"] == 2 and stats["updated"] == 4
+    assert storage.get_classification("doc_000")["predictions"][0]["category"] == "stale"
+
+def test_images_dir_lookup():
+    """Images are also found through an images directory by stored image_path"""
+    root, storage, blobs = _setup(count=3)
+    images_dir = os.path.join(root, "images")
+    os.makedirs(images_dir)
+    for record in storage.iter_classifications():
+        with open(os.path.join(images_dir, record["image_path"]), "wb") as f:
+            f.write(_image_bytes(COLORS["red"]))
+
+    stats = ReclassifyJob(storage, PlainClassifier(), None, images_dir=images_dir).run()
+    assert stats["from_images"] == 3
+
+def main():
+    print("🧠 VisionAI Pro - Reclassification Backfill Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_images_then_embeddings_only,
+        test_resume_from_checkpoint,
+        test_missing_images_are_counted_not_written,
+        test_images_dir_lookup,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Sample Manager Test Script
+Organizes a small download folder and checks that every view shares the
+raw files' bytes (hardlinks), that manifests resolve, that re-running is
+incremental, that selection is stratified by category and that
+near-duplicates are dropped from the views.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+# Add project root, src and this directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sample_manager import SampleManager, link_file
+from cli.batch_classify import iter_manifest
+
+def _downloads(per_category: int = 12) -> str:
+    """A download_images.py-style folder: animals/, food/, vehicles/"""
+    root = tempfile.mkdtemp(prefix="visionai_downloads_")
+    for c, category in enumerate(["animals", "food", "vehicles"]):
+        os.makedirs(os.path.join(root, category))
+        for i in range(per_category):
+            source = ["picsum", "unsplash", "placeholder"][i % 3]
+            Image.new("RGB", (40, 40), (c * 80, i * 20, 90)).save(
+                os.path.join(root, category, f"{category}_{source}_{i:03d}.jpg"))
+    return root
+
+def _manager(base_dir: str = None) -> SampleManager:
+    return SampleManager(base_dir or tempfile.mkdtemp(prefix="visionai_samples_"), seed=1)
+
+def _organize(manager: SampleManager, downloads: str):
+    manager.import_from_download(downloads)
+    manager.organize_by_category()
+    manager.organize_by_quality()
+    manager.create_test_sets()
+    manager.create_sample_packages()
+
+def test_views_share_bytes_with_raw_files():
+    downloads = _downloads()
+    manager = _manager()
+    _organize(manager, downloads)
+
+    raw_files = sorted(manager.raw_dir.iterdir())
+    assert len(raw_files) == 36 and manager.link_counts.get("copy", 0) == 0
+    for directory in [manager.by_category_dir / "food", manager.by_quality_dir / "placeholder",
+                      manager.test_sets_dir / "train", manager.organized_dir / "quick_test"]:
+        files = list(directory.iterdir())
+        assert files and all(any(os.path.samefile(f, raw) for raw in raw_files) for f in files), directory
+    # raw/ itself links to the downloads
+    assert os.path.samefile(manager.raw_dir / "food_picsum_000.jpg",
+                            os.path.join(downloads, "food", "food_picsum_000.jpg"))
+
+def test_manifests_resolve_and_labels_follow_download_folders():
+    manager = _manager()
+    _organize(manager, _downloads())
+
+    paths = list(iter_manifest(str(manager.test_sets_dir / "test.jsonl")))
+    assert paths and all(os.path.exists(path) for path in paths)
+    with open(manager.organized_dir / "standard_test.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 36  # fewer images than the package size: all of them
+    assert all(os.path.basename(row["path"]).startswith(row["category"]) for row in rows)
+    assert manager.samples["food_unsplash_001.jpg"]["quality"] == "high_quality"
+
+def test_selection_is_stratified():
+    manager = _manager()
+    _organize(manager, _downloads(per_category=12))
+
+    selected = manager._select_diverse_images(10)
+    counts = {}
+    for name in selected:
+        counts[manager.samples[name]["category"]] = counts.get(manager.samples[name]["category"], 0) + 1
+    assert len(selected) == len(set(selected)) == 10
+    assert sorted(counts.values()) == [3, 3, 4]
+
+    train, val, test = manager.create_test_sets(0.5, 0.25, 0.25)
+    assert (train, val, test) == (18, 9, 9)
+    with open(manager.test_sets_dir / "validation.jsonl") as f:
+        categories = [json.loads(line)["category"] for line in f]
+    assert sorted(categories.count(c) for c in set(categories)) == [3, 3, 3]
+
+def test_rerun_is_incremental():
+    downloads = _downloads(per_category=3)
+    base_dir = tempfile.mkdtemp(prefix="visionai_samples_")
+    _organize(_manager(base_dir), downloads)
+
+    Image.new("RGB", (40, 40)).save(os.path.join(downloads, "food", "food_picsum_099.jpg"))
+    manager = _manager(base_dir)
+    manager.import_from_download(downloads)
+    assert len(manager.samples) == 10 and len(list(manager.raw_dir.iterdir())) == 10
+    manager.organize_by_category()
+    assert len(list((manager.by_category_dir / "food").iterdir())) == 4
+    # Only the new image needed a link
+    assert manager.link_counts == {"hardlink": 2}
+
+def test_near_duplicates_are_dropped_from_views():
+    from test_perceptual_hash import photo_like
+
+    downloads = tempfile.mkdtemp(prefix="visionai_downloads_")
+    os.makedirs(os.path.join(downloads, "nature"))
+    for i in range(4):
+        image = photo_like(i)
+        image.save(os.path.join(downloads, "nature", f"nature_unsplash_{i:03d}.jpg"), quality=92)
+        # A small recompressed copy of the first two
+        if i < 2:
+            image.resize((120, 90)).save(os.path.join(downloads, "nature", f"nature_picsum_{i:03d}.jpg"), quality=40)
+
+    manager = _manager()
+    manager.import_from_download(downloads)
+    assert manager.drop_near_duplicates() == 2
+    assert manager.samples["nature_picsum_000.jpg"]["duplicate_of"] == "nature_unsplash_000.jpg"
+    manager.organize_by_category()
+    manager.create_test_sets()
+    assert sorted(p.name for p in (manager.by_category_dir / "nature").iterdir()) == \
+        [f"nature_unsplash_{i:03d}.jpg" for i in range(4)]
+    assert sum(manager.create_test_sets()) == 4
+    assert manager.generate_metadata()["near_duplicates"] == 2
+
+    with open(manager.base_dir / "near_duplicates.json") as f:
+        assert len(json.load(f)["clusters"]) == 2
+    # Hashes are cached: a rerun hashes nothing new
+    assert all(sample.get("phash") for sample in manager.samples.values())
+
+def test_near_duplicates_keep_the_better_source_over_the_bigger_file():
+    """Quality is classified during dedup, before organize_by_quality has run"""
+    from test_perceptual_hash import photo_like
+
+    downloads = tempfile.mkdtemp(prefix="visionai_downloads_")
+    os.makedirs(os.path.join(downloads, "nature"))
+    image = photo_like(5)
+    image.save(os.path.join(downloads, "nature", "nature_unsplash_000.jpg"), quality=60)
+    image.resize((640, 480)).save(os.path.join(downloads, "nature", "nature_picsum_000.jpg"), quality=95)
+
+    manager = _manager()
+    manager.import_from_download(downloads)
+    samples = manager.samples
+    assert samples["nature_picsum_000.jpg"]["bytes"] > samples["nature_unsplash_000.jpg"]["bytes"]
+    assert manager.drop_near_duplicates() == 1
+    assert samples["nature_picsum_000.jpg"]["duplicate_of"] == "nature_unsplash_000.jpg"
+
+def test_link_fallbacks():
+    root = Path(tempfile.mkdtemp(prefix="visionai_links_"))
+    (root / "a.jpg").write_bytes(b"x")
+    assert link_file(root / "a.jpg", root / "b.jpg", "symlink") == "symlink" and (root / "b.jpg").is_symlink()
+    assert link_file(root / "a.jpg", root / "c.jpg", "copy") == "copy"
+
+def main():
+    print("🧠 VisionAI Pro - Sample Manager Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_views_share_bytes_with_raw_files,
+        test_manifests_resolve_and_labels_follow_download_folders,
+        test_selection_is_stratified,
+        test_rerun_is_incremental,
+        test_near_duplicates_are_dropped_from_views,
+        test_near_duplicates_keep_the_better_source_over_the_bigger_file,
+        test_link_fallbacks,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Security Middleware Test Script
+Runs SecurityMiddleware in front of a small in-process app with a private
+in-memory rate limit store: security headers on accepted and rejected
+responses, 429s per IP and per API key (header and query string), origin
+and host checks with external access on, the Content-Length 413 and
+sampled request logging.
+"""
+
+import sys
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from config.config import Config
+from middleware import security
+from middleware.rate_limit_store import MemoryRateLimitStore
+
+SECURITY_HEADERS = {name.decode(): value.decode() for name, value in security.SECURITY_HEADERS}
+
+class MiddlewareConfig(Config):
+    RATE_LIMIT_PER_MINUTE = 1000
+    API_KEY_RATE_LIMIT_PER_MINUTE = 1000
+    API_KEY_RATE_LIMITS = {}
+    MAX_REQUEST_SIZE = 1024
+    ENABLE_EXTERNAL_ACCESS = False
+    ALLOWED_ORIGINS = ["https://app.example.com"]
+    ALLOWED_HOSTS = ["api.example.com"]
+    SECURITY_LOG_SAMPLE_EVERY = 1
+
+@contextmanager
+def _client(config=MiddlewareConfig, log_sample_every: int = None, key_validator=lambda key: True,
+            base_url: str = "http://testserver"):
+    """A client for a fresh app behind SecurityMiddleware, with empty rate limit buckets"""
+    previous = security.rate_limit_store, security.fallback_store
+    security.rate_limit_store = MemoryRateLimitStore()
+    security.fallback_store = MemoryRateLimitStore()
+
+    app = FastAPI()
+    app.get("/ping")(lambda: {"ok": True})
+    app.post("/echo")(lambda: {"ok": True})
+    app.add_middleware(security.SecurityMiddleware, config=config, log_sample_every=log_sample_every,
+                       key_validator=key_validator)
+    try:
+        with TestClient(app, base_url=base_url) as client:
+            yield client
+    finally:
+        security.rate_limit_store, security.fallback_store = previous
+
+def _has_security_headers(response) -> bool:
+    return all(response.headers.get(name) == value for name, value in SECURITY_HEADERS.items())
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def _capture_logs():
+    handler = _Records()
+    security.logger.addHandler(handler)
+    return handler
+
+def test_security_headers_on_accepted_and_rejected_responses():
+    """Headers are appended to app responses and to the middleware's own rejections"""
+    with _client() as client:
+        response = client.get("/ping")
+        assert response.status_code == 200 and response.json() == {"ok": True}
+        assert _has_security_headers(response)
+
+        rejected = client.post("/echo", content=b"x" * 2048)
+        assert rejected.status_code == 413 and _has_security_headers(rejected)
+
+def test_ip_rate_limit():
+    """Each IP gets RATE_LIMIT_PER_MINUTE requests, then 429 with security headers"""
+    class Config5(MiddlewareConfig):
+        RATE_LIMIT_PER_MINUTE = 5
+
+    with _client(Config5) as client:
+        statuses = [client.get("/ping").status_code for _ in range(8)]
+        assert statuses == [200] * 5 + [429] * 3
+        response = client.get("/ping")
+        assert response.json()["error"] == "Rate limit exceeded" and _has_security_headers(response)
+
+        # Another address has its own bucket
+        assert security.check_rate_limit("203.0.113.9", limit=5)
+
+def test_api_key_rate_limit_from_header_and_query():
+    """Header and query-string keys share one bucket per key, with per-key overrides"""
+    # Per-key limits are read from the global Config
+    previous = Config.API_KEY_RATE_LIMIT_PER_MINUTE, Config.API_KEY_RATE_LIMITS
+    Config.API_KEY_RATE_LIMIT_PER_MINUTE, Config.API_KEY_RATE_LIMITS = 3, {"partner": 6}
+    try:
+        with _client() as client:
+            statuses = [client.get("/ping", headers={"X-API-Key": "alpha"}).status_code for _ in range(2)]
+            statuses += [client.get("/ping", params={"api_key": "alpha"}).status_code for _ in range(2)]
+            assert statuses == [200, 200, 200, 429]
+            response = client.get("/ping", params={"api_key": "alpha"})
+            assert response.status_code == 429 and "API key" in response.json()["detail"]
+
+            # Other keys and key-less requests are unaffected
+            assert client.get("/ping", headers={"X-API-Key": "beta"}).status_code == 200
+            assert client.get("/ping").status_code == 200
+
+            partner = [client.get("/ping", headers={"X-API-Key": "partner"}).status_code for _ in range(7)]
+            assert partner == [200] * 6 + [429]
+    finally:
+        Config.API_KEY_RATE_LIMIT_PER_MINUTE, Config.API_KEY_RATE_LIMITS = previous
+
+def test_origin_and_host_checks_with_external_access():
+    """With external access on, unknown origins and hosts are 403; known ones pass"""
+    class ExternalConfig(MiddlewareConfig):
+        ENABLE_EXTERNAL_ACCESS = True
+
+    with _client(ExternalConfig, base_url="http://api.example.com") as client:
+        assert client.get("/ping").status_code == 200
+        assert client.get("/ping", headers={"Origin": "https://app.example.com"}).status_code == 200
+
+        response = client.get("/ping", headers={"Origin": "https://evil.example.net"})
+        assert response.status_code == 403 and response.json()["detail"] == "Origin not allowed"
+        assert _has_security_headers(response)
+
+    with _client(ExternalConfig, base_url="http://other.example.com:8002") as client:
+        response = client.get("/ping")
+        assert response.status_code == 403 and response.json()["detail"] == "Host not allowed"
+
+    # Off: neither is checked
+    with _client(base_url="http://other.example.com") as client:
+        assert client.get("/ping", headers={"Origin": "https://evil.example.net"}).status_code == 200
+
+def test_content_length_over_limit_is_413():
+    """A declared Content-Length over MAX_REQUEST_SIZE is refused before the app runs"""
+    with _client() as client:
+        assert client.post("/echo", content=b"x" * 1024).status_code == 200
+        response = client.post("/echo", content=b"x" * 1025)
+        assert response.status_code == 413
+        assert response.json() == {"error": "Request too large", "detail": "Maximum size: 1024 bytes"}
+
+def test_request_logging_is_sampled():
+    """Only one in every log_sample_every accepted requests is logged; rejections always are"""
+    logs = _capture_logs()
+    level = security.logger.level
+    security.logger.setLevel(logging.INFO)
+    try:
+        with _client(log_sample_every=4) as client:
+            for _ in range(10):
+                client.get("/ping")
+            client.post("/echo", content=b"x" * 2048)
+    finally:
+        security.logger.removeHandler(logs)
+        security.logger.setLevel(level)
+
+    sampled = [message for message in logs.messages if message.startswith("Request: GET /ping")]
+    assert len(sampled) == 2 and "1 in 4 sampled" in sampled[0]
+    assert any(message.startswith("Request too large") for message in logs.messages)
+
+def main():
+    print("🧠 VisionAI Pro - Security Middleware Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_security_headers_on_accepted_and_rejected_responses,
+        test_ip_rate_limit,
+        test_api_key_rate_limit_from_header_and_query,
+        test_origin_and_host_checks_with_external_access,
+        test_content_length_over_limit_is_413,
+        test_request_logging_is_sampled,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
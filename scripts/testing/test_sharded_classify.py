@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Sharded Classification Test Script
+Runs the multi-process runner with a stand-in classifier: ordered merged
+output, per-shard stats, re-queueing of a shard whose worker process
+crashed, error rows for images the model raises on, and resuming from
+finished shards.
+"""
+
+import os
+import sys
+import csv
+import json
+import tempfile
+from functools import partial
+from pathlib import Path
+
+from PIL import Image
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from cli.batch_classify import iter_directory
+from cli.sharded_classify import ShardedClassificationRunner
+
+CRASH_COLOR = (250, 0, 0)
+
+class BrightnessClassifier:
+    """Labels images bright/dark; optionally fails on the red image
+
+    failure="exit" kills the worker process (only the first time if given a
+    marker file, which remembers it across processes), failure="raise"
+    raises every time.
+    """
+
+    def __init__(self, failure: str = None, marker: str = None):
+        self.failure = failure
+        self.marker = marker
+
+    def predict_batch(self, images, top_k=5):
+        if self.failure and any(image.getpixel((0, 0)) == CRASH_COLOR for image in images):
+            if self.failure == "raise":
+                raise RuntimeError("simulated shard failure")
+            if self.marker is None:
+                os._exit(1)
+            if not os.path.exists(self.marker):
+                open(self.marker, "w").close()
+                os._exit(1)
+        return [[{"category": "bright" if image.getpixel((0, 0))[0] > 127 else "dark", "confidence": 1.0}]
+                for image in images]
+
+def make_classifier(failure: str = None, marker: str = None):
+    return BrightnessClassifier(failure, marker)
+
+def _images(count: int = 40) -> str:
+    root = tempfile.mkdtemp(prefix="visionai_sharded_")
+    for i in range(count):
+        value = 250 if i % 2 else 5
+        color = CRASH_COLOR if i == 25 else (value, value, value)
+        Image.new("RGB", (8, 8), color).save(os.path.join(root, f"img_{i:03d}.png"))
+    return root
+
+def _runner(root: str, output: str, factory, processes: int = 2, **kwargs) -> ShardedClassificationRunner:
+    return ShardedClassificationRunner(factory, output=os.path.join(root, output), processes=processes,
+                                       threads_per_process=1, shard_size=7, batch_size=4,
+                                       progress=lambda message: None, **kwargs)
+
+def test_merged_output_is_ordered_with_shard_stats():
+    """Shards from several processes merge back into input order"""
+    root = _images()
+    paths = list(iter_directory(root))
+    report = _runner(root, "results.jsonl", make_classifier).run(paths)
+
+    with open(report["output"]) as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["path"] for row in rows] == paths
+    assert [row["predictions"][0]["category"] for row in rows] == ["dark", "bright"] * 20
+    assert len(report["shards"]) == 6 and report["images"] == 40 and not report["failed_shards"]
+    assert all(stats["threads"] == 1 and stats["images_per_sec"] > 0 for stats in report["shards"])
+    assert len({stats["pid"] for stats in report["shards"]}) <= 2
+
+def test_crashed_worker_shard_is_requeued():
+    """A worker dying mid-shard breaks the pool; the shard reruns on a fresh pool"""
+    root = _images()
+    paths = list(iter_directory(root))
+    factory = partial(make_classifier, "exit", os.path.join(root, "crashed"))
+    report = _runner(root, "results.csv", factory).run(paths)
+
+    assert not report["failed_shards"]
+    assert report["shards"][3]["attempts"] == 2
+    with open(report["output"], newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["path"] for row in rows] == paths and rows[25]["category_1"] == "bright"
+
+def test_inference_error_is_an_error_row_not_a_failed_shard():
+    """An image the model raises on is retried alone and written as an error row"""
+    root = _images()
+    paths = list(iter_directory(root))
+    report = _runner(root, "results.jsonl", partial(make_classifier, "raise")).run(paths)
+
+    assert not report["failed_shards"] and report["failed_images"] == 1
+    with open(report["output"]) as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["path"] for row in rows] == paths
+    assert "simulated shard failure" in rows[25]["error"] and rows[24]["predictions"]
+
+def test_failing_shard_gives_up_after_retries_then_resumes():
+    """A shard whose worker keeps dying is reported; the next run only redoes that shard"""
+    root = _images()
+    paths = list(iter_directory(root))
+    factory = partial(make_classifier, "exit")
+
+    # One process, so only the crashing shard is running when the pool breaks
+    report = _runner(root, "results.jsonl", factory, processes=1, max_retries=1).run(paths)
+    assert list(report["failed_shards"]) == [3] and "output" not in report
+    assert not os.path.exists(os.path.join(root, "results.jsonl"))
+
+    report = _runner(root, "results.jsonl", make_classifier).run(paths)
+    assert [stats.get("attempts") for stats in report["shards"]] == [None, None, None, 1, None, None]
+    with open(report["output"]) as f:
+        assert [json.loads(line)["path"] for line in f] == paths
+
+def main():
+    print("🧠 VisionAI Pro - Sharded Classification Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_merged_output_is_ordered_with_shard_stats,
+        test_crashed_worker_shard_is_requeued,
+        test_inference_error_is_an_error_row_not_a_failed_shard,
+        test_failing_shard_gives_up_after_retries_then_resumes,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
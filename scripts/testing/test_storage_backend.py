@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Storage Backend Test Script
+Runs the API key and data managers against the local SQLite backend, so
+the on-prem storage path is checked without Firebase credentials.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from src.models.storage_backend import SQLiteStorageBackend, create_storage_backend
+from src.models.firebase_data_manager import FirebaseDataManager
+from src.auth.firebase_api_key_manager import FirebaseAPIKeyManager
+
+def _temp_path(name: str) -> str:
+    return os.path.join(tempfile.mkdtemp(prefix="visionai_storage_"), name)
+
+def _managers():
+    storage = create_storage_backend(f"sqlite:///{_temp_path('visionai.db')}")
+    data_manager = FirebaseDataManager(storage=storage, index_path=_temp_path("index.db"))
+    return storage, FirebaseAPIKeyManager(secret_key="test", storage=storage), data_manager
+
+def test_api_key_lifecycle():
+    """Keys can be generated, validated, listed, updated, revoked and deleted"""
+    storage, key_manager, _ = _managers()
+    assert isinstance(storage, SQLiteStorageBackend)
+
+    key = key_manager.generate_api_key("user_1", "Test Key")
+    info = key_manager.validate_api_key(key)
+    assert info and info.user_id == "user_1" and info.permissions == ["read", "classify"]
+    assert [k.key for k in key_manager.get_user_keys("user_1")] == [key]
+
+    assert key_manager.update_api_key(key, {"name": "Renamed", "expires_at": None})
+    info = key_manager.validate_api_key(key)
+    assert info.name == "Renamed" and info.expires_at is None
+
+    assert key_manager.revoke_api_key(key)
+    assert key_manager.validate_api_key(key) is None
+    assert key_manager.delete_api_key(key)
+    assert key_manager.get_user_keys("user_1") == []
+
+def test_classification_history_paging():
+    """Results are saved, paged newest-first with a cursor and streamed without gaps"""
+    _, _, data_manager = _managers()
+
+    saved = [
+        data_manager.save_classification_result(
+            user_id="user_1", api_key="k", image_path=f"img_{i}.jpg",
+            predictions=[{"category": "cat", "confidence": 0.9}],
+            confidence_scores=[0.9], processing_time=0.01
+        )
+        for i in range(7)
+    ]
+    data_manager.save_classification_result("user_2", "k", "other.jpg", [], [], 0.01)
+
+    paged = []
+    cursor = None
+    while True:
+        page = data_manager.get_user_classifications("user_1", limit=3, start_after=cursor)
+        paged.extend(result["id"] for result in page)
+        if len(page) < 3:
+            break
+        cursor = page[-1]["id"]
+
+    assert paged == list(reversed(saved)), paged
+    streamed = [result["id"] for result in data_manager.iter_user_classifications("user_1", page_size=2)]
+    assert streamed == paged
+
+    result = data_manager.get_classification_by_id(saved[0])
+    assert result["image_path"] == "img_0.jpg"
+    assert [r["id"] for r in data_manager.search_classifications("user_1", "img_3")] == [saved[3]]
+
+    assert data_manager.delete_classification_result(saved[0])
+    assert data_manager.get_classification_by_id(saved[0]) is None
+
+    for fetch in (lambda: data_manager.get_user_classifications("user_1", start_after="missing"),
+                  lambda: data_manager.iter_user_classifications("user_1", start_after="missing")):
+        try:
+            fetch()
+            raise AssertionError("unknown cursor was accepted")
+        except ValueError:
+            pass
+
+def test_history_endpoint_rejects_unknown_cursor():
+    """/api/history answers 400 for an unknown cursor in both formats"""
+    from fastapi.testclient import TestClient
+    from scripts.testing.load_test_servers import STUB_API_KEY, build_app
+
+    cwd = os.getcwd()
+    try:
+        app = build_app("firebase", storage_dir=tempfile.mkdtemp(prefix="visionai_storage_"))
+    finally:
+        os.chdir(cwd)
+    from src.api import firebase_main
+
+    saved = firebase_main.data_manager.save_classification_result(
+        "load_test_user", "k", "img.jpg", [{"category": "cat", "confidence": 0.9}], [0.9], 0.01)
+    headers = {"X-API-Key": STUB_API_KEY}
+    with TestClient(app) as client:
+        for format in ("json", "ndjson"):
+            response = client.get("/api/history", params={"format": format, "start_after": "missing"}, headers=headers)
+            assert response.status_code == 400, (format, response.status_code)
+            assert "missing" in response.json()["detail"]
+
+        response = client.get("/api/history", params={"format": "json", "limit": 1}, headers=headers)
+        assert response.status_code == 200 and response.json()["next_cursor"] == saved
+        response = client.get("/api/history", params={"format": "json", "start_after": saved}, headers=headers)
+        assert response.status_code == 200 and response.json()["history"] == []
+
+def test_stats_window_is_bounded():
+    """/api/stats rejects windows outside 1-366 days; the data manager clamps direct callers"""
+    from fastapi.testclient import TestClient
+    from scripts.testing.load_test_servers import STUB_API_KEY, build_app
+
+    cwd = os.getcwd()
+    try:
+        app = build_app("firebase", storage_dir=tempfile.mkdtemp(prefix="visionai_storage_"))
+    finally:
+        os.chdir(cwd)
+    from src.api import firebase_main
+
+    headers = {"X-API-Key": STUB_API_KEY}
+    with TestClient(app) as client:
+        for days, status in ((0, 422), (367, 422), (10 ** 9, 422), (1, 200), (366, 200)):
+            response = client.get("/api/stats", params={"days": days}, headers=headers)
+            assert response.status_code == status, (days, response.status_code)
+
+    storage = firebase_main.data_manager.storage
+    reads = []
+    get_usage_counters = storage.get_usage_counters
+    storage.get_usage_counters = lambda doc_ids: reads.append(len(doc_ids)) or get_usage_counters(doc_ids)
+    try:
+        firebase_main.data_manager.get_user_usage_stats("load_test_user", days=10 ** 9)
+        firebase_main.data_manager.get_user_usage_stats("load_test_user", days=-5)
+    finally:
+        del storage.get_usage_counters
+    assert reads == [366, 1]
+
+def test_profiles_and_usage_stats():
+    """Profiles merge and usage statistics aggregate over the requested window"""
+    _, _, data_manager = _managers()
+
+    assert data_manager.save_user_profile("user_1", {"name": "Test", "plan": "free"})
+    assert data_manager.save_user_profile("user_1", {"plan": "pro"})
+    profile = data_manager.get_user_profile("user_1")
+    assert profile["name"] == "Test" and profile["plan"] == "pro"
+
+    for success in (True, True, False):
+        data_manager.save_usage_statistics("user_1", "k", "classify", 0.5, success=success)
+    stats = data_manager.get_user_usage_stats("user_1", days=1)
+    assert stats["total_requests"] == 3 and stats["failed_requests"] == 1
+    assert abs(stats["average_processing_time"] - 0.5) < 1e-9
+
+def test_concurrent_writers():
+    """Several threads writing at once don't lose or corrupt records"""
+    storage = SQLiteStorageBackend(_temp_path("concurrent.db"))
+
+    def writer(worker: int):
+        for i in range(100):
+            storage.add_usage_event(f"{worker}-{i}", {"user_id": "user_1", "timestamp": f"2026-01-01T00:00:{i:02d}"})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(list(storage.iter_usage_events("user_1", ""))) == 400
+
+def main():
+    print("🧠 VisionAI Pro - Storage Backend Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_api_key_lifecycle,
+        test_classification_history_paging,
+        test_history_endpoint_rejects_unknown_cursor,
+        test_stats_window_is_bounded,
+        test_profiles_and_usage_stats,
+        test_concurrent_writers,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Upload Size Limit Test Script
+Sends uploads through small in-process apps: a chunked body without
+Content-Length is cut off with 413 as soon as it crosses MAX_REQUEST_SIZE
+(by SecurityMiddleware and by RequestSizeLimitMiddleware), and a spooled
+file over MAX_FILE_SIZE is rejected with 413 by open_upload_image.
+"""
+
+import io
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from config.config import Config
+from middleware.security import SecurityMiddleware
+from middleware.request_size import RequestSizeLimitMiddleware
+from api.uploads import open_upload_image
+
+LIMIT = 64 * 1024
+CHUNK = 8 * 1024
+
+class SmallRequestConfig(Config):
+    MAX_REQUEST_SIZE = LIMIT
+    ENABLE_EXTERNAL_ACCESS = False
+
+def _upload_app(max_file_size: int = None):
+    """An app whose endpoint spools the upload and opens it like the API servers do"""
+    app = FastAPI()
+    app.state.handled = 0
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        app.state.handled += 1
+        image = open_upload_image(file, max_size=max_file_size)
+        return {"size": list(image.size)}
+
+    return app
+
+def _post_chunked(app, total: int):
+    """Stream a multipart body of about `total` bytes straight into the ASGI app, CHUNK bytes per
+    message and without Content-Length; returns (status, headers, body bytes the app pulled)"""
+    boundary = b"visionai-boundary"
+    pieces = [b"--" + boundary + b"\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.png\"\r\n"
+              b"Content-Type: image/png\r\n\r\n"]
+    pieces += [b"\x00" * CHUNK] * (total // CHUNK)
+    pieces.append(b"\r\n--" + boundary + b"--\r\n")
+
+    pulled = 0
+    messages = []
+
+    async def receive():
+        nonlocal pulled
+        if not pieces:
+            return {"type": "http.disconnect"}
+        piece = pieces.pop(0)
+        pulled += len(piece)
+        return {"type": "http.request", "body": piece, "more_body": bool(pieces)}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/upload", "raw_path": b"/upload", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"testserver"),
+                    (b"content-type", b"multipart/form-data; boundary=" + boundary),
+                    (b"transfer-encoding", b"chunked")],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+
+    start = next(message for message in messages if message["type"] == "http.response.start")
+    return start["status"], dict(start["headers"]), pulled
+
+def test_chunked_body_is_cut_off_by_security_middleware():
+    """No Content-Length: the streamed body is counted and rejected with 413 before the endpoint runs"""
+    app = _upload_app()
+    app.add_middleware(SecurityMiddleware, config=SmallRequestConfig)
+    status, headers, pulled = _post_chunked(app, total=LIMIT * 4)
+
+    assert status == 413, status
+    assert headers[b"x-content-type-options"] == b"nosniff"
+    assert app.state.handled == 0
+    # Reading stopped right after the limit, not at the end of the body
+    assert pulled <= LIMIT + CHUNK
+
+def test_chunked_body_is_cut_off_without_security_middleware():
+    """Servers without SecurityMiddleware get the same streaming limit from RequestSizeLimitMiddleware"""
+    app = _upload_app()
+    app.add_middleware(RequestSizeLimitMiddleware, max_size=LIMIT)
+    status, headers, pulled = _post_chunked(app, total=LIMIT * 4)
+    assert status == 413 and app.state.handled == 0
+    assert pulled <= LIMIT + CHUNK
+
+    # A Content-Length over the limit is refused before reading anything
+    with TestClient(app) as client:
+        response = client.post("/upload", files={"file": ("big.png", b"\x00" * (LIMIT + 1), "image/png")})
+    assert response.status_code == 413 and app.state.handled == 0
+
+def test_max_file_size_is_checked_on_the_spooled_file():
+    """A file under MAX_REQUEST_SIZE but over MAX_FILE_SIZE is spooled, then rejected with 413"""
+    png = io.BytesIO()
+    Image.effect_noise((96, 96), 64).save(png, "PNG")
+    png = png.getvalue()
+    assert len(png) < LIMIT
+
+    for max_file_size, status in ((len(png) - 1, 413), (len(png), 200)):
+        app = _upload_app(max_file_size=max_file_size)
+        app.add_middleware(RequestSizeLimitMiddleware, max_size=LIMIT)
+        with TestClient(app) as client:
+            response = client.post("/upload", files={"file": ("noise.png", png, "image/png")})
+        assert response.status_code == status and app.state.handled == 1, (max_file_size, response.status_code)
+        if status == 413:
+            assert "Maximum size" in response.json()["detail"]
+        else:
+            assert response.json()["size"] == [96, 96]
+
+    # Size unknown to Starlette: measured by seeking the spooled (here rolled over to disk) file
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+    spooled.write(png)
+    spooled.seek(0)
+    try:
+        open_upload_image(UploadFile(file=spooled, filename="noise.png"), max_size=len(png) - 1)
+        assert False, "expected HTTP 413"
+    except HTTPException as e:
+        assert e.status_code == 413
+
+def main():
+    print("🧠 VisionAI Pro - Upload Size Limit Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_chunked_body_is_cut_off_by_security_middleware,
+        test_chunked_body_is_cut_off_without_security_middleware,
+        test_max_file_size_is_checked_on_the_spooled_file,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Usage Counter Test Script
+Checks the daily counter documents behind /api/stats: histogram
+percentiles, atomic increments in the SQLite backend, and that stats read
+from counters match the raw events they replace.
+"""
+
+import os
+import sys
+import random
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from src.models import usage_counters
+from src.models.storage_backend import SQLiteStorageBackend
+from src.models.firebase_data_manager import FirebaseDataManager
+
+def _temp_path(name: str) -> str:
+    return os.path.join(tempfile.mkdtemp(prefix="visionai_counters_"), name)
+
+def test_histogram_percentiles_track_exact_values():
+    """Percentiles from the histogram stay within one bucket of the exact ones"""
+    rng = random.Random(7)
+    samples = sorted(rng.lognormvariate(-1.5, 0.8) for _ in range(20000))
+    histogram = {}
+    for value in samples:
+        key = usage_counters.bucket_key(value)
+        histogram[key] = histogram.get(key, 0) + 1
+
+    for percentile in (50, 95, 99):
+        exact = samples[int(percentile / 100 * len(samples)) - 1]
+        approx = usage_counters.histogram_percentile(histogram, percentile)
+        assert abs(approx - exact) / exact < usage_counters.BUCKET_GROWTH - 1, (percentile, exact, approx)
+
+def test_sqlite_increments_are_atomic():
+    """Concurrent increments to one day document all land, nested histogram included"""
+    storage = SQLiteStorageBackend(_temp_path("visionai.db"))
+    day = date(2026, 1, 1)
+    doc_id = usage_counters.counter_doc_id("user_1", day)
+
+    def writer(success: bool):
+        for _ in range(50):
+            storage.increment_usage_counters(
+                doc_id, usage_counters.counter_fields("user_1", day),
+                usage_counters.counter_increments(success, 0.2)
+            )
+
+    threads = [threading.Thread(target=writer, args=(n % 2 == 0,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    [doc] = storage.get_usage_counters([doc_id, "user_1_2025-12-31"])
+    assert doc["user_id"] == "user_1" and doc["date"] == "2026-01-01"
+    assert doc["count"] == 200 and doc["successes"] == 100 and doc["failures"] == 100
+    assert abs(doc["processing_time_sum"] - 40.0) < 1e-6
+    assert doc["histogram"] == {usage_counters.bucket_key(0.2): 200}
+
+def test_stats_read_counters_not_events():
+    """get_user_usage_stats reads day documents only, and agrees with a rebuild from events"""
+    storage = SQLiteStorageBackend(_temp_path("visionai.db"))
+    data_manager = FirebaseDataManager(storage=storage, write_behind=False, index_path=_temp_path("index.db"))
+
+    times = [0.05 * (i + 1) for i in range(40)]
+    for i, processing_time in enumerate(times):
+        data_manager.save_usage_statistics("user_1", "k", "classify", processing_time, success=i % 4 != 0)
+
+    # Raw events are no longer consulted
+    storage.iter_usage_events = lambda *args: iter(())
+    stats = data_manager.get_user_usage_stats("user_1", days=7)
+
+    assert stats["total_requests"] == 40
+    assert stats["successful_requests"] == 30 and stats["failed_requests"] == 10
+    assert abs(stats["average_processing_time"] - sum(times) / 40) < 1e-9
+    assert stats["p50_processing_time"] <= stats["p95_processing_time"] <= stats["p99_processing_time"]
+    assert abs(stats["p50_processing_time"] - 1.0) / 1.0 < 0.25
+
+    # An event from before the window doesn't count
+    old_day = datetime.now().date() - timedelta(days=10)
+    storage.increment_usage_counters(
+        usage_counters.counter_doc_id("user_1", old_day), usage_counters.counter_fields("user_1", old_day),
+        usage_counters.counter_increments(True, 1.0)
+    )
+    assert data_manager.get_user_usage_stats("user_1", days=7)["total_requests"] == 40
+    assert data_manager.get_user_usage_stats("user_1", days=30)["total_requests"] == 41
+
+    # Rebuilding from raw events reproduces today's counters
+    del storage.iter_usage_events
+    today_id = usage_counters.counter_doc_id("user_1", datetime.now().date())
+    [before] = storage.get_usage_counters([today_id])
+    assert data_manager.rebuild_usage_counters("user_1", days=1) == 1
+    [after] = storage.get_usage_counters([today_id])
+    assert after["count"] == before["count"] and after["histogram"] == before["histogram"]
+
+def test_counter_doc_ids_cover_the_window():
+    """N days means today and the N-1 days before it: at most N documents"""
+    ids = usage_counters.counter_doc_ids("user_1", 3, today=date(2026, 3, 1))
+    assert ids == ["user_1_2026-03-01", "user_1_2026-02-28", "user_1_2026-02-27"]
+    assert usage_counters.counter_doc_ids("user_1", 1, today=date(2026, 3, 1)) == ["user_1_2026-03-01"]
+
+def main():
+    print("🧠 VisionAI Pro - Usage Counter Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_histogram_percentiles_track_exact_values,
+        test_sqlite_increments_are_atomic,
+        test_stats_read_counters_not_events,
+        test_counter_doc_ids_cover_the_window,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
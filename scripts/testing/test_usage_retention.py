@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Usage Retention Test Script
+Runs the retention job against temporary SQLite databases: old api_usage
+rows and usage_statistics events are rolled up and deleted in batches,
+statistics stay the same, an interrupted run can be rerun without losing
+or double counting events, and freed pages are returned to the filesystem.
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from auth.api_key_manager import APIKeyManager
+from models import usage_counters
+from models.storage_backend import SQLiteStorageBackend
+from cli.retention import UsageRetentionJob
+
+NOW = datetime.now()
+
+def _temp_path(name: str) -> str:
+    return os.path.join(tempfile.mkdtemp(prefix="visionai_retention_"), name)
+
+def _fill_api_usage(db_path: str, old_rows: int = 3000, recent_rows: int = 100):
+    conn = sqlite3.connect(db_path)
+    rows = []
+    for i in range(old_rows):
+        timestamp = NOW - timedelta(days=200 - i // 100, minutes=i % 100)
+        rows.append(("key_1", f"10.0.0.{i % 7}", "/classify", timestamp, 500 if i % 10 == 0 else 200))
+    for i in range(recent_rows):
+        rows.append(("key_1", "10.0.0.99", "/classify", NOW - timedelta(minutes=i), 200))
+    with conn:
+        conn.executemany(
+            "INSERT INTO api_usage (api_key, ip_address, endpoint, timestamp, response_code) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+    conn.close()
+
+def test_api_usage_rollup_keeps_stats():
+    """Old rows become daily aggregates; stats over any window are unchanged and space is reclaimed"""
+    db_path = _temp_path("api_keys.db")
+    manager = APIKeyManager(db_path=db_path)
+    _fill_api_usage(db_path)
+    before = {days: manager.get_usage_stats("key_1", days) for days in (7, 365)}
+
+    report = UsageRetentionJob(retain_days=90, batch_size=500, pause=0, now=NOW).run(api_usage_db=db_path)
+
+    api_usage = report["api_usage"]
+    assert api_usage["rows_rolled_up"] == 3000 and api_usage["batches"] == 6
+    assert api_usage["rows_remaining"] == 100
+    assert api_usage["space"]["auto_vacuum"] == "incremental"
+    assert api_usage["space"]["reclaimed_bytes"] > 0 and api_usage["space"]["free_bytes_remaining"] == 0
+
+    for days, stats in before.items():
+        after = manager.get_usage_stats("key_1", days)
+        for field in ("total_requests", "error_requests", "unique_ips"):
+            assert after[field] == stats[field], (days, field, stats[field], after[field])
+
+def test_old_database_needs_one_full_vacuum():
+    """A database created without auto_vacuum reports its free space until --vacuum converts it"""
+    db_path = _temp_path("api_keys.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE legacy (x)")
+    conn.close()
+    APIKeyManager(db_path=db_path)
+    _fill_api_usage(db_path)
+
+    report = UsageRetentionJob(retain_days=90, pause=0, now=NOW).run(api_usage_db=db_path)
+    assert report["api_usage"]["space"]["auto_vacuum"] == "none"
+    assert report["api_usage"]["space"]["free_bytes_remaining"] > 0
+
+    report = UsageRetentionJob(retain_days=90, pause=0, now=NOW).run(api_usage_db=db_path, full_vacuum=True)
+    assert report["api_usage"]["space"]["auto_vacuum"] == "incremental"
+    assert report["api_usage"]["space"]["reclaimed_bytes"] > 0
+
+def test_usage_statistics_are_rolled_into_counters():
+    """Old events are deleted across several batches; uncounted ones are added to counters, live-counted ones are not"""
+    storage = SQLiteStorageBackend(_temp_path("visionai.db"))
+    old_day = (NOW - timedelta(days=120)).date()
+
+    for i in range(250):
+        user_id = f"user_{i % 2}"
+        timestamp = datetime.combine(old_day, datetime.min.time()) + timedelta(minutes=i)
+        storage.add_usage_event(f"old_{i}", {
+            "user_id": user_id, "timestamp": timestamp.isoformat(),
+            "success": i % 5 != 0, "processing_time": 0.1 * (1 + i % 3),
+            # user_1's events were counted live when they were recorded
+            "counted": user_id == "user_1",
+        })
+    for i in range(10):
+        storage.add_usage_event(f"new_{i}", {"user_id": "user_0", "timestamp": NOW.isoformat(),
+                                             "success": True, "processing_time": 0.1})
+
+    counted_id = usage_counters.counter_doc_id("user_1", old_day)
+    counted = {**usage_counters.counter_fields("user_1", old_day), "count": 125, "successes": 100,
+               "failures": 25, "processing_time_sum": 1.0, "histogram": {}}
+    storage.put_usage_counters(counted_id, counted)
+
+    report = UsageRetentionJob(retain_days=90, batch_size=40, pause=0, now=NOW).run(storage=storage)
+    usage = report["usage_statistics"]
+
+    assert usage["events_deleted"] == 250 and usage["batches"] == 7
+    assert usage["events_rolled_up"] == 125 and usage["counter_docs_updated"] == 1
+    assert len(list(storage.iter_usage_events("user_0", ""))) == 10
+
+    [rolled] = storage.get_usage_counters([usage_counters.counter_doc_id("user_0", old_day)])
+    assert rolled["count"] == 125 and rolled["failures"] == 25
+    assert sum(rolled["histogram"].values()) == 125
+    assert storage.get_usage_counters([counted_id]) == [counted]
+    assert usage["space"]["reclaimed_bytes"] >= 0
+
+class InterruptingStorage(SQLiteStorageBackend):
+    """Dies in the middle of the `fail_on`-th delete, after that page's counters were written"""
+
+    def __init__(self, db_path: str, fail_on: int = None):
+        super().__init__(db_path)
+        self.fail_on = fail_on
+        self.deletes = 0
+
+    def delete_usage_events(self, doc_ids):
+        self.deletes += 1
+        if self.deletes == self.fail_on:
+            raise KeyboardInterrupt("simulated interruption")
+        super().delete_usage_events(doc_ids)
+
+def test_interrupted_rollup_counts_every_event_once():
+    """A run killed between pages is rerun; the deploy day keeps both its live and its older events"""
+    db_path = _temp_path("visionai.db")
+    storage = InterruptingStorage(db_path, fail_on=3)
+    deploy_day = (NOW - timedelta(days=120)).date()
+    start = datetime.combine(deploy_day, datetime.min.time())
+
+    # 300 events before the live counters were deployed that day, then 50 counted live
+    for i in range(350):
+        storage.add_usage_event(f"event_{i:03d}", {
+            "user_id": "user_0", "timestamp": (start + timedelta(minutes=i)).isoformat(),
+            "success": i % 4 != 0, "processing_time": 0.2, "counted": i >= 300,
+        })
+    live_id = usage_counters.counter_doc_id("user_0", deploy_day)
+    storage.put_usage_counters(live_id, {**usage_counters.counter_fields("user_0", deploy_day), "count": 50,
+                                         "successes": 37, "failures": 13, "processing_time_sum": 10.0,
+                                         "histogram": {usage_counters.bucket_key(0.2): 50}})
+
+    job = UsageRetentionJob(retain_days=90, batch_size=60, pause=0, now=NOW)
+    try:
+        job.run(storage=storage)
+        assert False, "expected the simulated interruption"
+    except KeyboardInterrupt:
+        pass
+    # The third page was added to the counters but its events were not deleted
+    assert len(storage.list_usage_events_before(NOW.isoformat(), 1000)) == 350 - 120
+
+    report = job.run(storage=SQLiteStorageBackend(db_path))
+    usage = report["usage_statistics"]
+    assert usage["events_deleted"] == 230 and usage["events_rolled_up"] == 120
+
+    [doc] = storage.get_usage_counters([live_id])
+    assert doc["count"] == 350 and doc["failures"] == 13 + 75 and doc["successes"] == 37 + 225
+    assert sum(doc["histogram"].values()) == 350
+    assert not storage.list_usage_events_before(NOW.isoformat(), 1000)
+
+def main():
+    print("🧠 VisionAI Pro - Usage Retention Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_api_usage_rollup_keeps_stats,
+        test_old_database_needs_one_full_vacuum,
+        test_usage_statistics_are_rolled_into_counters,
+        test_interrupted_rollup_counts_every_event_once,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Similarity Index Test Script
+Checks the IVF index behind /api/similar against exact search on
+synthetic clustered embeddings, plus incremental adds, reloading and
+building in the background without blocking searches.
+"""
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from models.embedding_store import EmbeddingStore
+from models.vector_index import IVFIndex
+
+DIM = 64
+
+def _clustered(n: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors around 200 random directions, like embeddings of similar photos"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(200, DIM))
+    vectors = centers[rng.integers(0, 200, n)] + rng.normal(scale=0.35, size=(n, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def _store(vectors: np.ndarray) -> EmbeddingStore:
+    store = EmbeddingStore(tempfile.mkdtemp(prefix="visionai_vectors_"), dim=DIM)
+    store.add_many([f"{i:064x}" for i in range(len(vectors))], vectors)
+    return store
+
+def test_ivf_recall_against_exact_search():
+    """Probing a few lists finds nearly all of the exact top 10"""
+    vectors = _clustered(40000)
+    index = IVFIndex(_store(vectors), nprobe=8, exact_threshold=10000, background=False)
+    queries = _clustered(50, seed=1)
+
+    index.search(queries[0], k=10)  # first search trains the lists
+    assert index.centroids is not None
+    start = time.perf_counter()
+    approx = [index.search(query, k=10) for query in queries]
+    approx_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    hits = 0
+    for query, result in zip(queries, approx):
+        exact = {f"{i:064x}" for i in np.argsort(-(vectors @ query))[:10]}
+        hits += len(exact & {digest for digest, _ in result})
+    recall = hits / (10 * len(queries))
+
+    print(f"   recall@10 {recall:.3f}, {approx_ms:.2f} ms/query over {len(vectors)} vectors")
+    assert recall >= 0.9
+
+def test_exact_duplicate_is_top_match():
+    """A stored image's own embedding comes back first with similarity 1"""
+    vectors = _clustered(500)
+    index = IVFIndex(_store(vectors))
+
+    [(digest, score), *_] = index.search(vectors[123], k=5)
+    assert digest == f"{123:064x}" and score > 0.999
+
+def test_new_rows_are_searchable_and_index_reloads():
+    """Rows added after training are assigned on the next search; a reload keeps the training"""
+    vectors = _clustered(12000)
+    store = _store(vectors)
+    index = IVFIndex(store, exact_threshold=10000, background=False)
+    index.search(vectors[0], k=1)
+    centroids = index.centroids.copy()
+
+    extra = _clustered(10, seed=5)
+    store.add_many([f"new{i}" for i in range(10)], extra)
+    assert index.search(extra[3], k=1)[0][0] == "new3"
+    assert len(index.assignments) == 12010
+
+    reloaded = IVFIndex(store, exact_threshold=10000, background=False)
+    assert np.array_equal(reloaded.centroids, centroids)
+    assert reloaded.search(extra[7], k=1)[0][0] == "new7"
+
+def test_build_runs_in_background_while_searches_are_served():
+    """Searches answer exactly until the background build lands, then probe the lists"""
+    vectors = _clustered(12000)
+    index = IVFIndex(_store(vectors), exact_threshold=10000)
+
+    assert index.search(vectors[42], k=1)[0][0] == f"{42:064x}"
+    index.wait()
+    assert index.centroids is not None and len(index.assignments) == 12000
+    assert index.search(vectors[43], k=1)[0][0] == f"{43:064x}"
+
+def test_second_worker_loads_instead_of_retraining():
+    """Another index on the same store (another server worker) picks up the saved build"""
+    vectors = _clustered(12000)
+    store = _store(vectors)
+    first = IVFIndex(store, exact_threshold=10000, background=False)
+    first.build()
+
+    second = IVFIndex(store, exact_threshold=10000, seed=7, background=False)
+    second._train = None  # would raise if it trained again
+    second.build()
+    assert np.array_equal(second.centroids, first.centroids)
+
+    # A newer build saved by one worker is picked up by the other
+    store.add_many([f"new{i}" for i in range(5)], _clustered(5, seed=3))
+    first.build()
+    second.search(vectors[0], k=1)
+    assert len(second.assignments) == 12005
+    assert not [name for name in os.listdir(store.root) if name.endswith(".tmp")]
+
+def test_orphan_rows_are_dropped_on_next_add():
+    """A vector written without its digest (crashed writer) is cut off before the next append"""
+    store = EmbeddingStore(tempfile.mkdtemp(prefix="visionai_vectors_"), dim=DIM)
+    vectors = _clustered(3)
+    store.add_many(["a", "b"], vectors[:2])
+    with open(store.vectors_path, "ab") as f:
+        f.write(vectors[2].tobytes() + b"\x00\x01")
+
+    store.add_many(["c"], vectors[2:])
+    assert len(store.vectors()) == 3
+    assert store.digests_by_row() == ["a", "b", "c"]
+
+def test_sources_are_per_user():
+    """Source records resolve a digest only for the user who classified that image"""
+    store = EmbeddingStore(tempfile.mkdtemp(prefix="visionai_vectors_"), dim=DIM)
+    store.add_many(["a", "b"], _clustered(2))
+    store.add_source("a", "alice", "cat.jpg", "order-17", [{"category": "cat", "confidence": 0.9}])
+    store.add_source("b", "bob", "dog.jpg")
+    store.add_source("a", "alice", "cat2.jpg", "order-18")
+
+    sources = store.sources(["a", "b", "missing"], "alice")
+    assert list(sources) == ["a"]
+    assert sources["a"]["filename"] == "cat2.jpg" and sources["a"]["reference"] == "order-18"
+    assert store.sources(["a", "b"], "bob")["b"]["predictions"] is None
+
+def main():
+    print("🧠 VisionAI Pro - Similarity Index Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_ivf_recall_against_exact_search,
+        test_exact_duplicate_is_top_match,
+        test_new_rows_are_searchable_and_index_reloads,
+        test_build_runs_in_background_while_searches_are_served,
+        test_second_worker_loads_instead_of_retraining,
+        test_orphan_rows_are_dropped_on_next_add,
+        test_sources_are_per_user,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
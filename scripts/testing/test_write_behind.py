@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+VisionAI Pro - Write-Behind Queue Test Script
+Runs entirely locally against an in-memory stand-in for Firestore, so
+batching, retries and crash recovery can be checked without credentials.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root and src directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from models.write_behind_queue import WriteBehindQueue
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self.data = data
+
+    def to_dict(self):
+        return self.data
+
+class FakeDocument:
+    def __init__(self, store, collection, doc_id):
+        self.store = store
+        self.path = (collection, doc_id)
+
+    def get(self):
+        self.store.reads += 1
+        return FakeSnapshot(self.store.docs.get(self.path))
+
+class FakeCollection:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def document(self, doc_id):
+        return FakeDocument(self.store, self.name, doc_id)
+
+class FakeBatch:
+    def __init__(self, store):
+        self.store = store
+        self.writes = []
+
+    def set(self, doc_ref, data, merge=False):
+        self.writes.append((doc_ref.path, data, merge))
+
+    def commit(self):
+        if self.store.failures_left:
+            self.store.failures_left -= 1
+            raise ConnectionError("firestore unavailable")
+        self.store.commits.append(len(self.writes))
+        for path, data, merge in self.writes:
+            self.store.docs[path] = _merge(self.store.docs.get(path, {}), data) if merge else data
+        if self.store.lost_acks_left:
+            # Applied server-side, but the client sees an error (e.g. a deadline)
+            self.store.lost_acks_left -= 1
+            raise TimeoutError("deadline exceeded")
+
+class FakeIncrement:
+    def __init__(self, amount):
+        self.amount = amount
+
+def _merge(current, data):
+    """set(merge=True) semantics, applying FakeIncrement transforms"""
+    merged = dict(current)
+    for key, value in data.items():
+        if isinstance(value, dict):
+            merged[key] = _merge(merged.get(key, {}), value)
+        elif isinstance(value, FakeIncrement):
+            merged[key] = merged.get(key, 0) + value.amount
+        else:
+            merged[key] = value
+    return merged
+
+class FakeFirestore:
+    """Just enough of the Firestore client API for WriteBehindQueue"""
+
+    def __init__(self, failures: int = 0, lost_acks: int = 0):
+        self.docs = {}
+        self.commits = []
+        self.reads = 0
+        self.failures_left = failures
+        self.lost_acks_left = lost_acks
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+def _journal_path() -> str:
+    return os.path.join(tempfile.mkdtemp(prefix="visionai_wb_"), "writes.jsonl")
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+def test_enqueue_acknowledges_without_touching_firestore():
+    """enqueue returns before any commit; the data lands once flushed"""
+    db = FakeFirestore()
+    queue = WriteBehindQueue(db, _journal_path())
+
+    doc_id = WriteBehindQueue.new_document_id()
+    queue.enqueue("classification_results", doc_id, {"category": "cat"})
+
+    assert db.commits == []
+    assert queue.get_metrics()["queue_depth"] == 1
+    assert queue.flush() == 1
+    assert db.docs[("classification_results", doc_id)] == {"category": "cat"}
+
+def test_writes_are_committed_in_batches():
+    """The background flusher groups writes into batch_size commits"""
+    db = FakeFirestore()
+    queue = WriteBehindQueue(db, _journal_path(), batch_size=50, flush_interval=0.05)
+    queue.start()
+    for i in range(120):
+        queue.enqueue("usage_statistics", f"doc{i}", {"i": i})
+
+    assert _wait_for(lambda: len(db.docs) == 120)
+    queue.stop()
+
+    assert max(db.commits) <= 50
+    assert len(db.commits) < 120
+    metrics = queue.get_metrics()
+    assert metrics["flushed_total"] == 120 and metrics["queue_depth"] == 0
+
+def test_failed_commits_are_retried():
+    """Transient Firestore errors back off and retry without losing writes"""
+    db = FakeFirestore(failures=2)
+    queue = WriteBehindQueue(db, _journal_path(), flush_interval=0.01, max_backoff=0.05)
+    queue.start()
+    for i in range(10):
+        queue.enqueue("classification_results", f"doc{i}", {"i": i})
+
+    assert _wait_for(lambda: len(db.docs) == 10)
+    queue.stop()
+
+    metrics = queue.get_metrics()
+    assert metrics["failed_flushes"] == 2
+    assert metrics["consecutive_failures"] == 0
+
+def test_writes_are_accepted_before_firestore_connects():
+    """With a lazy client, writes queue up until the connection is ready"""
+    db = FakeFirestore()
+    ready = threading.Event()
+
+    def client():
+        if not ready.is_set():
+            raise RuntimeError("Firebase database not available")
+        return db
+
+    queue = WriteBehindQueue(client, _journal_path(), flush_interval=0.01, max_backoff=0.05)
+    queue.start()
+    queue.enqueue("classification_results", "early", {"i": 0})
+
+    assert _wait_for(lambda: queue.get_metrics()["failed_flushes"] >= 1)
+    ready.set()
+    assert _wait_for(lambda: ("classification_results", "early") in db.docs)
+    queue.stop()
+
+def test_journal_is_replayed_after_crash():
+    """Acknowledged but uncommitted writes survive a restart, committed ones are not replayed"""
+    path = _journal_path()
+    db = FakeFirestore()
+
+    crashed = WriteBehindQueue(db, path, batch_size=3)
+    for i in range(5):
+        crashed.enqueue("classification_results", f"doc{i}", {"i": i})
+    crashed.flush()  # doc0..doc2 committed, doc3/doc4 only journaled
+    # Simulate a crash: no stop(), just drop the lock and a torn final line
+    crashed._journal.write('{"seq": 6, "op": "se')
+    crashed._journal.flush()
+    crashed._lock_file.close()
+
+    recovered_db = FakeFirestore()
+    recovered = WriteBehindQueue(recovered_db, path)
+    assert recovered.journal_path == path
+    assert [e["doc_id"] for e in recovered.pending()] == ["doc3", "doc4"]
+
+    # The torn tail is cut off so new entries start on a fresh line
+    recovered.enqueue("classification_results", "doc5", {"i": 5})
+    with open(path, "r", encoding="utf-8") as f:
+        assert f.read().splitlines()[-1].startswith('{"seq": 6')
+
+    recovered.flush()
+    assert sorted(doc_id for _, doc_id in recovered_db.docs) == ["doc3", "doc4", "doc5"]
+    recovered.stop()
+
+def test_each_worker_claims_its_own_journal():
+    """A second live queue on the same path gets a separate journal file"""
+    path = _journal_path()
+    first = WriteBehindQueue(FakeFirestore(), path)
+    second = WriteBehindQueue(FakeFirestore(), path)
+
+    assert first.journal_path == path
+    assert second.journal_path == path + ".1"
+    first.stop()
+    second.stop()
+
+def test_increments_are_coalesced_per_document():
+    """Increments to one counter document in a batch become a single merged write"""
+    db = FakeFirestore()
+    queue = WriteBehindQueue(db, _journal_path(), increment=FakeIncrement)
+
+    for i in range(10):
+        queue.enqueue("usage_daily", "user_1_2026-01-01", {
+            "fields": {"user_id": "user_1"},
+            "increments": {"count": 1, "processing_time_sum": 0.5, f"histogram.b{i % 2:02d}": 1},
+        }, op="increment")
+    queue.enqueue("usage_daily", "user_2_2026-01-01", {"fields": {}, "increments": {"count": 1}}, op="increment")
+    queue.flush()
+
+    assert db.commits == [2] and db.reads == 0
+    assert db.docs[("usage_daily", "user_1_2026-01-01")] == {
+        "user_id": "user_1", "count": 10, "processing_time_sum": 5.0, "histogram": {"b00": 5, "b01": 5},
+        "applied_seq": {queue.journal_id: 10},
+    }
+
+    # Later batches add to the stored values
+    queue.enqueue("usage_daily", "user_1_2026-01-01", {"fields": {}, "increments": {"count": 2}}, op="increment")
+    queue.flush()
+    assert db.docs[("usage_daily", "user_1_2026-01-01")]["count"] == 12
+    queue.stop()
+
+def _increment(queue, doc_id, count=1):
+    queue.enqueue("usage_daily", doc_id, {"fields": {}, "increments": {"count": count}}, op="increment")
+
+def test_increments_are_not_reapplied_after_lost_ack():
+    """A commit that raised after being applied is retried without counting twice"""
+    db = FakeFirestore(lost_acks=1)
+    queue = WriteBehindQueue(db, _journal_path(), increment=FakeIncrement)
+    for _ in range(3):
+        _increment(queue, "user_1_2026-01-01")
+    queue.enqueue("classification_results", "doc0", {"i": 0})
+
+    try:
+        queue.flush()
+        raise AssertionError("commit error was swallowed")
+    except TimeoutError:
+        pass
+    assert queue.flush() == 4
+    assert db.docs[("usage_daily", "user_1_2026-01-01")]["count"] == 3
+    # Only the retried set was written again
+    assert db.commits == [2, 1]
+
+    # Fresh increments are written blind again
+    reads = db.reads
+    _increment(queue, "user_1_2026-01-01", 2)
+    queue.flush()
+    assert db.docs[("usage_daily", "user_1_2026-01-01")]["count"] == 5 and db.reads == reads
+    queue.stop()
+
+def test_increments_are_not_reapplied_after_crash():
+    """A crash between commit and checkpoint replays the journal without double counting"""
+    path = _journal_path()
+    db = FakeFirestore()
+
+    crashed = WriteBehindQueue(db, path, batch_size=2, increment=FakeIncrement)
+    for doc_id in ("user_1_2026-01-01", "user_2_2026-01-01", "user_1_2026-01-01"):
+        _increment(crashed, doc_id)
+    # Commit the first batch but "crash" before the checkpoint is written
+    crashed._write_checkpoint = lambda seq: None
+    crashed.flush()
+    crashed._lock_file.close()
+    assert db.docs[("usage_daily", "user_1_2026-01-01")]["count"] == 1
+
+    recovered = WriteBehindQueue(db, path, increment=FakeIncrement)
+    assert recovered.journal_id == crashed.journal_id
+    assert len(recovered.pending()) == 3
+    assert recovered.flush() == 3
+    assert db.docs[("usage_daily", "user_1_2026-01-01")]["count"] == 2
+    assert db.docs[("usage_daily", "user_2_2026-01-01")]["count"] == 1
+    recovered.stop()
+
+def main():
+    print("🧠 VisionAI Pro - Write-Behind Queue Test Suite")
+    print("=" * 50)
+
+    tests = [
+        test_enqueue_acknowledges_without_touching_firestore,
+        test_writes_are_committed_in_batches,
+        test_failed_commits_are_retried,
+        test_writes_are_accepted_before_firestore_connects,
+        test_journal_is_replayed_after_crash,
+        test_each_worker_claims_its_own_journal,
+        test_increments_are_coalesced_per_document,
+        test_increments_are_not_reapplied_after_lost_ack,
+        test_increments_are_not_reapplied_after_crash,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ PASS {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL {test.__name__}: {e}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from PIL import Image
-import io
 import time
 import logging
 import os
@@ -29,13 +28,14 @@ models_path = os.path.join(os.path.dirname(__file__), '..', 'models')
 if models_path not in sys.path:
     sys.path.insert(0, models_path)
 
-from advanced_classifier import AdvancedImageClassifier, MultiModelEnsemble
 
 auth_path = os.path.join(os.path.dirname(__file__), '..', 'auth')
 if auth_path not in sys.path:
     sys.path.insert(0, auth_path)
 
 from api_key_manager import APIKeyManager
+from api.uploads import open_upload_image
+from middleware.request_size import RequestSizeLimitMiddleware
 from config.config import *
 
 # 로깅 설정
@@ -58,26 +58,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 업로드 본문 크기 제한 (MAX_REQUEST_SIZE) - 스풀 파일에 쓰는 도중에 초과 시 413
+app.add_middleware(RequestSizeLimitMiddleware)
+
 # 정적 파일 서빙 설정
 app.mount("/web_apps", StaticFiles(directory="web_apps"), name="web_apps")
 
 # 전역 변수
-classifier: Optional[AdvancedImageClassifier] = None
-ensemble_classifier: Optional[MultiModelEnsemble] = None
+# 분류기 모듈(torch, torchvision)은 처음 사용할 때 import
+classifier: Optional["AdvancedImageClassifier"] = None
+ensemble_classifier: Optional["MultiModelEnsemble"] = None
 api_key_manager = APIKeyManager()
 
-def get_classifier() -> AdvancedImageClassifier:
+def get_classifier() -> "AdvancedImageClassifier":
     """분류기 인스턴스 반환"""
     global classifier
     if classifier is None:
+        from advanced_classifier import AdvancedImageClassifier
         model_type = os.getenv("MODEL_TYPE", "resnet50")
         classifier = AdvancedImageClassifier(model_type=model_type)
     return classifier
 
-def get_ensemble_classifier() -> MultiModelEnsemble:
+def get_ensemble_classifier() -> "MultiModelEnsemble":
     """앙상블 분류기 인스턴스 반환"""
     global ensemble_classifier
     if ensemble_classifier is None:
+        from advanced_classifier import MultiModelEnsemble
         models = os.getenv("ENSEMBLE_MODELS", "resnet50,efficientnet").split(",")
         ensemble_classifier = MultiModelEnsemble(models=models)
     return ensemble_classifier
@@ -169,8 +175,7 @@ async def classify_image(
     
     try:
         # 이미지 로드
-        image_data = await file.read()
-        image = Image.open(io.BytesIO(image_data))
+        image = open_upload_image(file)
         
         # 처리 시간 측정
         start_time = time.time()
@@ -199,6 +204,8 @@ async def classify_image(
             "model_info": classifier.get_model_info() if not use_ensemble else {"type": "ensemble"}
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"이미지 분류 실패: {e}")
         logger.error(traceback.format_exc())
@@ -222,11 +229,11 @@ async def advanced_classify(
     
     try:
         # 지정된 모델로 분류기 생성
+        from advanced_classifier import AdvancedImageClassifier
         classifier = AdvancedImageClassifier(model_type=model_type)
         
         # 이미지 로드
-        image_data = await file.read()
-        image = Image.open(io.BytesIO(image_data))
+        image = open_upload_image(file)
         
         # 처리 시간 측정
         start_time = time.time()
@@ -243,6 +250,8 @@ async def advanced_classify(
             "model_info": classifier.get_model_info()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"고급 이미지 분류 실패: {e}")
         raise HTTPException(status_code=500, detail=f"Advanced classification failed: {str(e)}")
@@ -2,8 +2,8 @@
 Firebase-based FastAPI for VisionAI Pro Image Classification System
 """
 
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, Header
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, Header, Query
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,8 +12,8 @@ import os
 import logging
 from typing import Optional, List
 from PIL import Image
-import io
 import json
+import asyncio
 from datetime import datetime
 import time
 
@@ -36,7 +36,6 @@ models_path = os.path.join(os.path.dirname(__file__), '..', 'models')
 if models_path not in sys.path:
     sys.path.insert(0, models_path)
 
-from prorl_classifier import ProRLV2Classifier
 from firebase_data_manager import FirebaseDataManager
 
 auth_path = os.path.join(os.path.dirname(__file__), '..', 'auth')
@@ -44,6 +43,12 @@ if auth_path not in sys.path:
     sys.path.insert(0, auth_path)
 
 from firebase_api_key_manager import FirebaseAPIKeyManager
+from api.uploads import open_upload_image
+from middleware.request_size import RequestSizeLimitMiddleware
+from config.config import Config, ensure_directories
+from src.models.storage_backend import create_storage_backend
+from src.models.blob_store import BlobStore
+from src.models.usage_counters import MAX_STATS_DAYS
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -65,7 +70,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 업로드 본문 크기 제한 (MAX_REQUEST_SIZE) - 스풀 파일에 쓰는 도중에 초과 시 413
+app.add_middleware(RequestSizeLimitMiddleware)
+
 # Static files and templates setup
+ensure_directories()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -73,11 +82,12 @@ templates = Jinja2Templates(directory="templates")
 classifier = None
 api_key_manager = None
 data_manager = None
+blob_store = None
 
 @app.on_event("startup")
 async def startup_event():
     """App initialization on startup"""
-    global classifier, api_key_manager, data_manager
+    global classifier, api_key_manager, data_manager, blob_store
     
     # Load environment variables
     model_path = os.getenv("MODEL_PATH")
@@ -85,14 +95,23 @@ async def startup_event():
     secret_key = os.getenv("API_SECRET_KEY", "default-secret-key")
     
     try:
-        # Initialize classifier
+        # Initialize classifier (torch is imported here, not when this module is imported)
+        from prorl_classifier import ProRLV2Classifier
         classifier = ProRLV2Classifier(model_path=model_path, device=device)
         
-        # Initialize Firebase API key manager
-        api_key_manager = FirebaseAPIKeyManager(secret_key=secret_key)
+        # Storage backend shared by keys, usage events and results (Firestore or local SQLite)
+        storage = create_storage_backend(Config.STORAGE_BACKEND)
+        logger.info(f"Storage backend: {storage.name}")
+        
+        # Initialize API key manager
+        api_key_manager = FirebaseAPIKeyManager(secret_key=secret_key, storage=storage)
+        
+        # Initialize data manager
+        data_manager = FirebaseDataManager(storage=storage)
         
-        # Initialize Firebase data manager
-        data_manager = FirebaseDataManager()
+        # Deduplicated store for uploaded images, linked from classification records
+        if Config.STORE_UPLOADS:
+            blob_store = BlobStore(Config.UPLOAD_DIR)
         
         logger.info("VisionAI Pro Image Classification API (Firebase) started successfully")
         
@@ -100,6 +119,12 @@ async def startup_event():
         logger.error(f"Failed to initialize API: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued Firestore writes on shutdown"""
+    if data_manager:
+        data_manager.close()
+
 def verify_api_key(api_key: str = Header(..., alias="X-API-Key")) -> dict:
     """API key validation dependency"""
     if not api_key_manager:
@@ -161,6 +186,12 @@ async def root():
                 <code>X-API-Key: your-api-key</code>
             </div>
             
+            <div class="endpoint">
+                <h3>GET /api/search?q=cat</h3>
+                <p>Search Classification History</p>
+                <code>X-API-Key: your-api-key</code>
+            </div>
+            
             <div class="endpoint">
                 <h3>POST /api/keys/generate</h3>
                 <p>Generate New API Key</p>
@@ -198,8 +229,7 @@ async def classify_image(
             raise HTTPException(status_code=400, detail="Only image files can be uploaded")
         
         # Read image
-        image_data = await file.read()
-        image = Image.open(io.BytesIO(image_data))
+        image = open_upload_image(file)
         
         # Perform classification
         results = classifier.predict(image, top_k=top_k)
@@ -213,13 +243,19 @@ async def classify_image(
         
         # Save to Firebase
         if data_manager:
+            image_sha256 = None
+            if blob_store:
+                file.file.seek(0)
+                image_sha256 = blob_store.put(file.file)
+            
             classification_id = data_manager.save_classification_result(
                 user_id=api_key_info["user_id"],
                 api_key=api_key_info["key"],
                 image_path=file.filename,
                 predictions=results,
                 confidence_scores=confidence_scores,
-                processing_time=processing_time
+                processing_time=processing_time,
+                image_sha256=image_sha256
             )
             
             # Save usage statistics
@@ -253,6 +289,9 @@ async def classify_image(
                 success=False
             )
         
+        if isinstance(e, HTTPException):
+            raise
+        
         logger.error(f"Image classification failed: {e}")
         raise HTTPException(status_code=500, detail=f"Error occurred during classification: {str(e)}")
 
@@ -273,24 +312,48 @@ async def get_categories(api_key_info: dict = Depends(verify_api_key)):
 @app.get("/api/history")
 async def get_classification_history(
     limit: int = 20,
+    start_after: Optional[str] = None,
+    format: str = "json",
     api_key_info: dict = Depends(verify_api_key)
 ):
-    """Get user's classification history"""
+    """Get user's classification history
+    
+    Pass the previous page's `next_cursor` as `start_after` to page through
+    older results. `format=ndjson` streams the whole history (from
+    `start_after`, if given) as one JSON object per line for exports.
+    """
     try:
         if not data_manager:
             raise HTTPException(status_code=500, detail="Data manager not initialized")
         
+        if format not in ("json", "ndjson"):
+            raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'")
+        
+        if format == "ndjson":
+            results = data_manager.iter_user_classifications(
+                user_id=api_key_info["user_id"],
+                start_after=start_after
+            )
+            lines = (json.dumps(result, default=str) + "\n" for result in results)
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
         history = data_manager.get_user_classifications(
             user_id=api_key_info["user_id"],
-            limit=limit
+            limit=limit,
+            start_after=start_after
         )
         
         return {
             "success": True,
             "history": history,
-            "total_count": len(history)
+            "total_count": len(history),
+            "next_cursor": history[-1]["id"] if len(history) == limit else None
         }
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"History retrieval failed: {e}")
         raise HTTPException(status_code=500, detail="Error occurred while retrieving history")
@@ -325,9 +388,42 @@ async def get_classification_by_id(
         logger.error(f"Classification retrieval failed: {e}")
         raise HTTPException(status_code=500, detail="Error occurred while retrieving classification")
 
+@app.get("/api/search")
+async def search_classification_history(
+    q: str,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    api_key_info: dict = Depends(verify_api_key)
+):
+    """Search user's classification history by category or image name"""
+    try:
+        if not data_manager:
+            raise HTTPException(status_code=500, detail="Data manager not initialized")
+        
+        results = data_manager.search_classifications(
+            user_id=api_key_info["user_id"],
+            query=q,
+            limit=limit,
+            offset=offset
+        )
+        
+        return {
+            "success": True,
+            "query": q,
+            "results": results,
+            "offset": offset,
+            "next_offset": offset + len(results) if len(results) == limit else None
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Classification search failed: {e}")
+        raise HTTPException(status_code=500, detail="Error occurred while searching history")
+
 @app.get("/api/stats")
 async def get_usage_statistics(
-    days: int = 30,
+    days: int = Query(30, ge=1, le=MAX_STATS_DAYS),
     api_key_info: dict = Depends(verify_api_key)
 ):
     """Get user usage statistics"""
@@ -435,12 +531,17 @@ async def revoke_api_key(
 @app.get("/health")
 async def health_check():
     """Health check"""
+    # The storage probe is a blocking Firestore read; keep it off the event loop
+    storage_health = await asyncio.to_thread(data_manager.check_health) if data_manager else None
+    
     return {
         "status": "healthy",
         "classifier_loaded": classifier is not None,
         "api_key_manager_loaded": api_key_manager is not None,
         "data_manager_loaded": data_manager is not None,
         "firebase_connected": data_manager.is_connected() if data_manager else False,
+        "storage": storage_health,
+        "write_behind": data_manager.get_write_metrics() if data_manager else None,
         "timestamp": str(datetime.now()),
         "version": "2.0.0"
     }
@@ -464,6 +565,7 @@ async def debug_info():
             "/api/categories",
             "/api/history",
             "/api/history/{classification_id}",
+            "/api/search",
             "/api/stats",
             "/api/keys/generate",
             "/api/keys/info",
@@ -8,16 +8,17 @@ import os
 import logging
 from typing import Optional, List
 from PIL import Image
-import io
 import json
 from datetime import datetime
 
 # 로컬 모듈 import
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from models.prorl_classifier import ProRLV2Classifier
 from auth.api_key_manager import APIKeyManager
+from api.uploads import open_upload_image
+from config.config import ensure_directories
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +41,7 @@ app.add_middleware(
 )
 
 # Static files and templates setup
+ensure_directories()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -57,7 +59,8 @@ async def startup_event():
     device = os.getenv("DEVICE", "cpu")
     secret_key = os.getenv("API_SECRET_KEY", "default-secret-key")
     
-    # Initialize classifier
+    # Initialize classifier (torch is imported here, not when this module is imported)
+    from models.prorl_classifier import ProRLV2Classifier
     classifier = ProRLV2Classifier(model_path=model_path, device=device)
     
     # Initialize API key manager
@@ -148,8 +151,7 @@ async def classify_image(
             raise HTTPException(status_code=400, detail="Only image files can be uploaded")
         
         # Read image
-        image_data = await file.read()
-        image = Image.open(io.BytesIO(image_data))
+        image = open_upload_image(file)
         
         # Perform classification
         results = classifier.predict(image, top_k=top_k)
@@ -162,6 +164,8 @@ async def classify_image(
             "timestamp": str(api_key_info["created_at"])
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Image classification failed: {e}")
         raise HTTPException(status_code=500, detail=f"Error occurred during classification: {str(e)}")
@@ -0,0 +1,61 @@
+"""
+Upload handling helpers for VisionAI Pro API servers
+
+Starlette's multipart parser already streams each uploaded file into a
+SpooledTemporaryFile (kept in memory up to 1MB, spooled to disk beyond).
+MAX_FILE_SIZE can only be checked here, once the file is fully spooled;
+the bound on how much is spooled is MAX_REQUEST_SIZE, enforced while the
+body streams in by SecurityMiddleware or RequestSizeLimitMiddleware
+(middleware/request_size.py). These helpers enforce MAX_FILE_SIZE on the
+spooled file, validate format and dimensions from the image header, and
+hand the file to Pillow directly instead of copying it into a `bytes`
+object.
+"""
+
+import os
+import hashlib
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from config.config import Config
+from models.image_io import open_image, ImageTooLargeError, ImageValidationError
+
+def get_upload_size(file: UploadFile) -> int:
+    """Return the size of an uploaded file without reading it"""
+    if file.size is not None:
+        return file.size
+
+    position = file.file.tell()
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+def upload_sha256(file: UploadFile) -> str:
+    """SHA-256 of an uploaded file, read in chunks from its spooled buffer"""
+    digest = hashlib.sha256()
+    file.file.seek(0)
+    for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file.file.seek(0)
+    return digest.hexdigest()
+
+def open_upload_image(file: UploadFile, max_size: int = None) -> Image.Image:
+    """Open an uploaded image from its spooled buffer, enforcing size, format and pixel limits"""
+    max_size = max_size or Config.MAX_FILE_SIZE
+
+    if get_upload_size(file) > max_size:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size: {max_size} bytes")
+
+    file.file.seek(0)
+    try:
+        return open_image(
+            file.file,
+            formats=Config.ALLOWED_IMAGE_FORMATS,
+            max_pixels=Config.MAX_IMAGE_PIXELS,
+            draft_size=Config.IMAGE_DRAFT_SIZE
+        )
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ImageValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
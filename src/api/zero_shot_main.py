@@ -3,7 +3,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from PIL import Image
-import io
 import time
 import logging
 import os
@@ -37,52 +36,11 @@ if models_path not in sys.path:
 if auth_path not in sys.path:
     sys.path.insert(0, auth_path)
 
-# Debug: print paths
-print(f"DEBUG: models_path = {models_path}")
-print(f"DEBUG: auth_path = {auth_path}")
-print(f"DEBUG: sys.path = {sys.path[:5]}")
-
-# Check if files exist
-zero_shot_file = os.path.join(models_path, 'zero_shot_classifier.py')
-api_key_file = os.path.join(auth_path, 'api_key_manager.py')
-print(f"DEBUG: zero_shot_file = {zero_shot_file}")
-print(f"DEBUG: api_key_file = {api_key_file}")
-print(f"DEBUG: zero_shot_file exists = {os.path.exists(zero_shot_file)}")
-print(f"DEBUG: api_key_file exists = {os.path.exists(api_key_file)}")
-
-# List files in models directory
-models_files = os.listdir(models_path) if os.path.exists(models_path) else []
-print(f"DEBUG: models directory files = {models_files}")
-
-# Try alternative path construction
-alt_zero_shot_file = os.path.join(os.path.dirname(__file__), '..', 'models', 'zero_shot_classifier.py')
-alt_zero_shot_file = os.path.abspath(alt_zero_shot_file)
-print(f"DEBUG: alt_zero_shot_file = {alt_zero_shot_file}")
-print(f"DEBUG: alt_zero_shot_file exists = {os.path.exists(alt_zero_shot_file)}")
-
-try:
-    from zero_shot_classifier import ZeroShotCustomClassifier
-    print("DEBUG: Successfully imported ZeroShotCustomClassifier")
-except ImportError as e:
-    print(f"DEBUG: Failed to import ZeroShotCustomClassifier: {e}")
-    # Try alternative import
-    import importlib.util
-    spec = importlib.util.spec_from_file_location("zero_shot_classifier", zero_shot_file)
-    zero_shot_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(zero_shot_module)
-    ZeroShotCustomClassifier = zero_shot_module.ZeroShotCustomClassifier
-
-try:
-    from api_key_manager import APIKeyManager
-    print("DEBUG: Successfully imported APIKeyManager")
-except ImportError as e:
-    print(f"DEBUG: Failed to import APIKeyManager: {e}")
-    # Try alternative import
-    import importlib.util
-    spec = importlib.util.spec_from_file_location("api_key_manager", api_key_file)
-    api_key_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(api_key_module)
-    APIKeyManager = api_key_module.APIKeyManager
+# 분류기 모듈(torch, transformers)은 get_classifier()에서 처음 사용할 때 import
+from api_key_manager import APIKeyManager
+from api.uploads import open_upload_image, upload_sha256
+from models.embedding_store import EmbeddingStore
+from models.vector_index import IVFIndex
 from config.config import *
 
 # 로깅 설정
@@ -120,20 +78,24 @@ else:
         allow_headers=["*"],
     )
 
-# 보안 미들웨어 설정
-app = setup_security_middleware(app)
+# 보안 미들웨어 설정 (API 키별 rate limit은 검증된 키에만 적용)
+app = setup_security_middleware(app, key_validator=lambda key: verify_api_key(key))
 
 # 정적 파일 서빙 설정
 app.mount("/web_apps", StaticFiles(directory="web_apps"), name="web_apps")
 
 # 전역 변수
-classifier: Optional[ZeroShotCustomClassifier] = None
+classifier: Optional["ZeroShotCustomClassifier"] = None
 api_key_manager = APIKeyManager()
+# 임베딩 저장소와 유사도 인덱스 (STORE_EMBEDDINGS=true 일 때만)
+embedding_store: Optional[EmbeddingStore] = None
+similarity_index: Optional[IVFIndex] = None
 
-def get_classifier() -> ZeroShotCustomClassifier:
+def get_classifier() -> "ZeroShotCustomClassifier":
     """분류기 인스턴스 반환"""
     global classifier
     if classifier is None:
+        from zero_shot_classifier import ZeroShotCustomClassifier
         base_words_path = os.getenv("BASE_WORDS_PATH", "query/base_words.txt")
         classifier = ZeroShotCustomClassifier(base_words_path=base_words_path)
     return classifier
@@ -147,6 +109,11 @@ def verify_api_key(api_key: str) -> bool:
         logger.error(f"API 키 검증 실패: {e}")
         return False
 
+def get_api_key_user(api_key: str) -> Optional[str]:
+    """API 키 소유자 (user_id) 반환"""
+    key_info = api_key_manager.validate_api_key(api_key)
+    return key_info.user_id if key_info else None
+
 @app.on_event("startup")
 async def startup_event():
     """서버 시작 시 초기화"""
@@ -158,6 +125,16 @@ async def startup_event():
         logger.info("✅ Zero-shot 분류기 초기화 완료")
     except Exception as e:
         logger.error(f"❌ 분류기 초기화 실패: {e}")
+    
+    # 임베딩 저장소 초기화
+    global embedding_store, similarity_index
+    if Config.STORE_EMBEDDINGS:
+        try:
+            embedding_store = EmbeddingStore(Config.EMBEDDINGS_DIR, model_name=get_classifier().model_name)
+            similarity_index = IVFIndex(embedding_store, nprobe=Config.SIMILARITY_NPROBE)
+            logger.info(f"✅ 임베딩 저장소 초기화 완료 ({len(embedding_store)}개 이미지)")
+        except Exception as e:
+            logger.error(f"❌ 임베딩 저장소 초기화 실패: {e}")
 
 @app.get("/")
 async def root():
@@ -172,7 +149,8 @@ async def root():
             "Zero-shot Learning",
             "커스텀 카테고리 추가/제거",
             "카테고리 검색",
-            "실시간 학습"
+            "실시간 학습",
+            "유사 이미지 검색 (/api/similar)"
         ]
     }
 
@@ -230,9 +208,10 @@ async def classify_image(
     file: UploadFile = File(...),
     top_k: int = Form(5),
     api_key: str = Form(...),
+    reference: Optional[str] = Form(None),
     request: Request = None
 ):
-    """Zero-shot 이미지 분류"""
+    """Zero-shot 이미지 분류 (reference: /api/similar 결과에 돌려줄 클라이언트 측 식별자)"""
     client_ip = request.client.host if request else "unknown"
     
     # API 키 검증
@@ -252,15 +231,24 @@ async def classify_image(
     
     try:
         # 이미지 로드
-        image_data = await file.read()
-        image = Image.open(io.BytesIO(image_data))
+        image = open_upload_image(file)
         
         # 처리 시간 측정
         start_time = time.time()
         
         # Zero-shot 분류 실행
         classifier = get_classifier()
-        predictions = classifier.predict(image, top_k=top_k)
+        image_sha256 = upload_sha256(file)
+        if embedding_store is not None:
+            # 임베딩을 한 번만 계산해 분류와 저장에 함께 사용
+            image_features = classifier.encode_images([image.convert("RGB")])
+            predictions = classifier.score_embeddings(image_features, top_k=top_k)[0]
+            embedding_store.add(image_sha256, image_features[0].cpu().numpy())
+            # 유사 검색 결과를 이 사용자의 파일/기록으로 되돌릴 수 있도록 출처 기록
+            embedding_store.add_source(image_sha256, get_api_key_user(api_key), file.filename,
+                                       reference, predictions)
+        else:
+            predictions = classifier.predict(image, top_k=top_k)
         
         processing_time = time.time() - start_time
         
@@ -271,16 +259,90 @@ async def classify_image(
         return {
             "success": True,
             "image_name": file.filename,
+            "image_sha256": image_sha256,
+            "reference": reference,
             "processing_time": round(processing_time, 3),
             "predictions": predictions,
             "model_info": classifier.get_model_info()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"이미지 분류 실패: {e}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
+@app.post("/api/similar")
+async def find_similar_images(
+    file: UploadFile = File(...),
+    top_k: int = Form(10),
+    api_key: str = Form(...),
+    request: Request = None
+):
+    """업로드 이미지와 유사한 기존 이미지 검색 (저장된 CLIP 임베딩, 근사 인덱스)"""
+    client_ip = request.client.host if request else "unknown"
+    
+    # API 키 검증
+    if not verify_api_key(api_key):
+        api_key_manager.log_api_usage(api_key, client_ip, "/similar", 401)
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    
+    # IP 화이트리스트 검증
+    if not api_key_manager.validate_ip_access(api_key, client_ip):
+        api_key_manager.log_api_usage(api_key, client_ip, "/similar", 403)
+        raise HTTPException(status_code=403, detail="IP address not allowed")
+    
+    if similarity_index is None:
+        raise HTTPException(status_code=503, detail="Similarity search is disabled (set STORE_EMBEDDINGS=true)")
+    
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
+    
+    try:
+        image = open_upload_image(file)
+        image_sha256 = upload_sha256(file)
+        
+        start_time = time.time()
+        
+        # 이미 본 이미지는 저장된 임베딩 재사용
+        found, vectors = embedding_store.get_many([image_sha256])
+        if found:
+            query = vectors[0]
+        else:
+            query = get_classifier().encode_images([image.convert("RGB")])[0].cpu().numpy()
+        
+        matches = similarity_index.search(query, k=min(max(top_k, 1), 100))
+        
+        # 호출자 본인이 분류한 이미지만 파일명/reference/예측 결과로 풀어서 반환
+        # (다른 사용자의 이미지는 digest와 유사도만)
+        sources = embedding_store.sources([digest for digest, _ in matches], get_api_key_user(api_key))
+        similar_images = []
+        for digest, score in matches:
+            match = {"image_sha256": digest, "similarity": score, "exact_match": digest == image_sha256,
+                     "owned": digest in sources}
+            match.update(sources.get(digest, {}))
+            similar_images.append(match)
+        
+        processing_time = time.time() - start_time
+        api_key_manager.log_api_usage(api_key, client_ip, "/similar", 200)
+        
+        return {
+            "success": True,
+            "image_name": file.filename,
+            "image_sha256": image_sha256,
+            "similar_images": similar_images,
+            "indexed_images": len(embedding_store),
+            "processing_time": round(processing_time, 3)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"유사 이미지 검색 실패: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Similarity search failed: {str(e)}")
+
 @app.post("/api/categories/add")
 async def add_category(
     category: str = Form(...),
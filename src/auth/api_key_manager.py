@@ -40,6 +40,9 @@ class APIKeyManager:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # New databases release deleted pages incrementally (see cli/retention.py)
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS api_keys (
                     key TEXT PRIMARY KEY,
@@ -67,6 +70,22 @@ class APIKeyManager:
                     FOREIGN KEY (api_key) REFERENCES api_keys (key)
                 )
             ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_api_usage_key_time ON api_usage (api_key, timestamp)
+            ''')
+            
+            # Daily rollup of api_usage rows past the retention window
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS api_usage_daily (
+                    api_key TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    ip_address TEXT NOT NULL,
+                    endpoint TEXT NOT NULL,
+                    response_code INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (api_key, day, ip_address, endpoint, response_code)
+                )
+            ''')
             
             conn.commit()
             conn.close()
@@ -334,17 +353,33 @@ class APIKeyManager:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            # Get usage count for the period
+            # Get usage count for the period (raw rows plus rolled-up days)
             since_date = datetime.now() - timedelta(days=days)
+            since_day = since_date.date().isoformat()
             cursor.execute('''
-                SELECT COUNT(*) as total_requests,
-                       COUNT(CASE WHEN response_code >= 400 THEN 1 END) as error_requests,
-                       COUNT(DISTINCT ip_address) as unique_ips
-                FROM api_usage 
-                WHERE api_key = ? AND timestamp >= ?
-            ''', (api_key, since_date))
+                SELECT SUM(requests), SUM(errors) FROM (
+                    SELECT COUNT(*) AS requests,
+                           COUNT(CASE WHEN response_code >= 400 THEN 1 END) AS errors
+                    FROM api_usage 
+                    WHERE api_key = ? AND timestamp >= ?
+                    UNION ALL
+                    SELECT SUM(count), SUM(CASE WHEN response_code >= 400 THEN count ELSE 0 END)
+                    FROM api_usage_daily
+                    WHERE api_key = ? AND day >= ?
+                )
+            ''', (api_key, since_date, api_key, since_day))
+            
+            totals = cursor.fetchone()
+            
+            cursor.execute('''
+                SELECT COUNT(*) FROM (
+                    SELECT ip_address FROM api_usage WHERE api_key = ? AND timestamp >= ?
+                    UNION
+                    SELECT ip_address FROM api_usage_daily WHERE api_key = ? AND day >= ?
+                )
+            ''', (api_key, since_date, api_key, since_day))
             
-            stats = cursor.fetchone()
+            stats = (totals[0], totals[1], cursor.fetchone()[0])
             
             # Get recent activity
             cursor.execute('''
@@ -12,9 +12,10 @@ from dataclasses import dataclass, asdict
 import sys
 import os
 
-# Add parent directory to path to import firebase_config
+# Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from config.firebase_config import firebase_config
+from config.config import Config
+from src.models.storage_backend import StorageBackend, create_storage_backend
 
 @dataclass
 class APIKey:
@@ -27,16 +28,12 @@ class APIKey:
     is_active: bool
 
 class FirebaseAPIKeyManager:
-    """Firebase Firestore-based API key management and authentication system"""
+    """API key management and authentication system (Firestore or local storage backend)"""
     
-    def __init__(self, secret_key: str = None):
+    def __init__(self, secret_key: str = None, storage: StorageBackend = None):
         self.secret_key = secret_key or os.getenv("API_SECRET_KEY", "default-secret-key")
         self.logger = logging.getLogger(__name__)
-        self.db = firebase_config.get_db()
-        
-        if not self.db:
-            self.logger.error("Firebase database not available")
-            raise RuntimeError("Firebase database not initialized")
+        self.storage = storage or create_storage_backend(Config.STORAGE_BACKEND)
     
     def _convert_datetime_to_timestamp(self, dt: datetime) -> str:
         """Convert datetime to ISO format string for Firestore"""
@@ -72,8 +69,8 @@ class FirebaseAPIKeyManager:
                 "is_active": True
             }
             
-            # Save to Firestore
-            self.db.collection("api_keys").document(api_key).set(doc_data)
+            # Save to storage
+            self.storage.put_api_key(api_key, doc_data)
             
             self.logger.info(f"New API key generated: {name} (User: {user_id})")
             return api_key
@@ -85,15 +82,12 @@ class FirebaseAPIKeyManager:
     def validate_api_key(self, api_key: str) -> Optional[APIKey]:
         """Validate API key"""
         try:
-            # Get document from Firestore
-            doc_ref = self.db.collection("api_keys").document(api_key)
-            doc = doc_ref.get()
+            # Get document from storage
+            data = self.storage.get_api_key(api_key)
             
-            if not doc.exists:
+            if data is None:
                 return None
             
-            data = doc.to_dict()
-            
             # Check inactive key
             if not data.get("is_active", False):
                 return None
@@ -126,9 +120,8 @@ class FirebaseAPIKeyManager:
     def revoke_api_key(self, api_key: str) -> bool:
         """Revoke API key"""
         try:
-            # Update document in Firestore
-            doc_ref = self.db.collection("api_keys").document(api_key)
-            doc_ref.update({"is_active": False})
+            # Update document in storage
+            self.storage.update_api_key(api_key, {"is_active": False})
             
             self.logger.info(f"API key revoked: {api_key}")
             return True
@@ -140,14 +133,9 @@ class FirebaseAPIKeyManager:
     def get_user_keys(self, user_id: str) -> List[APIKey]:
         """Get all API keys for a user"""
         try:
-            # Query Firestore for user's keys
-            query = self.db.collection("api_keys").where("user_id", "==", user_id)
-            docs = query.stream()
-            
+            # Query storage for user's keys
             keys = []
-            for doc in docs:
-                data = doc.to_dict()
-                
+            for data in self.storage.list_api_keys(user_id):
                 created_at = self._convert_timestamp_to_datetime(data.get("created_at"))
                 expires_at_str = data.get("expires_at")
                 expires_at = self._convert_timestamp_to_datetime(expires_at_str) if expires_at_str else None
@@ -194,8 +182,8 @@ class FirebaseAPIKeyManager:
     def delete_api_key(self, api_key: str) -> bool:
         """Permanently delete API key from database"""
         try:
-            # Delete document from Firestore
-            self.db.collection("api_keys").document(api_key).delete()
+            # Delete document from storage
+            self.storage.delete_api_key(api_key)
             
             self.logger.info(f"API key deleted: {api_key}")
             return True
@@ -222,8 +210,8 @@ class FirebaseAPIKeyManager:
             if "is_active" in updates:
                 update_data["is_active"] = updates["is_active"]
             
-            # Update document in Firestore
-            self.db.collection("api_keys").document(api_key).update(update_data)
+            # Update document in storage
+            self.storage.update_api_key(api_key, update_data)
             
             self.logger.info(f"API key updated: {api_key}")
             return True
@@ -0,0 +1,341 @@
+"""
+Offline batch classification for large image archives
+
+Images come from a directory tree (walked in sorted order) or a manifest
+(a text file of paths, or JSONL/CSV with a ``path`` column). A thread pool
+reads and decodes them ahead of the model, keeping a bounded window of
+images in flight so memory stays flat however large the archive is; the
+main thread runs batched inference and writes results in input order to
+JSONL, CSV or Parquet.
+
+Progress is checkpointed every few batches: the number of inputs whose
+results are safely written plus the output writer's position. A resumed
+run truncates anything written after the last checkpoint and continues
+from there, so the output never has gaps or duplicates.
+"""
+
+import os
+import csv
+import json
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from models.image_io import open_image
+from cli.classifiers import predict_batch
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"}
+
+def iter_directory(root: str, extensions: Iterable[str] = IMAGE_EXTENSIONS) -> Iterator[str]:
+    """Image files under `root` in a stable (sorted, depth-first) order"""
+    extensions = {ext.lower() for ext in extensions}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in extensions:
+                yield entry.path
+        stack.extend(reversed(subdirectories))
+
+def iter_manifest(path: str) -> Iterator[str]:
+    """Image paths from a manifest; relative paths are resolved against the manifest's directory"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = (row.get("path") for row in csv.DictReader(f))
+        elif path.endswith(".jsonl"):
+            rows = (json.loads(line).get("path") for line in f if line.strip())
+        else:
+            rows = (line.strip() for line in f)
+
+        for image_path in rows:
+            if image_path:
+                yield os.path.join(base_dir, image_path)
+
+def count_manifest(path: str) -> int:
+    """Number of entries in a manifest (for progress output)"""
+    return sum(1 for _ in iter_manifest(path))
+
+class JsonlResultWriter:
+    """One JSON object per line; resumable by byte offset"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def restore(self, state: Dict):
+        self._file.truncate(state.get("bytes", 0))
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, rows: List[Dict]):
+        self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def state(self) -> Dict:
+        self._file.flush()
+        return {"bytes": self._file.tell()}
+
+    def close(self):
+        self._file.close()
+
+class CsvResultWriter:
+    """path, top-k category/confidence columns and error; resumable by byte offset"""
+
+    def __init__(self, path: str, top_k: int):
+        self.path = path
+        self.top_k = top_k
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._write_header()
+
+    def _write_header(self):
+        header = ["path"]
+        for rank in range(1, self.top_k + 1):
+            header += [f"category_{rank}", f"confidence_{rank}"]
+        self._writer.writerow(header + ["error"])
+
+    def restore(self, state: Dict):
+        self._file.truncate(state.get("bytes", 0))
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            self._write_header()
+
+    def write(self, rows: List[Dict]):
+        for row in rows:
+            values = [row["path"]]
+            predictions = row.get("predictions") or []
+            for rank in range(self.top_k):
+                if rank < len(predictions):
+                    values += [predictions[rank]["category"], predictions[rank]["confidence"]]
+                else:
+                    values += ["", ""]
+            self._writer.writerow(values + [row.get("error", "")])
+
+    def state(self) -> Dict:
+        self._file.flush()
+        return {"bytes": self._file.tell()}
+
+    def close(self):
+        self._file.close()
+
+class ParquetResultWriter:
+    """A directory of Parquet part files, one closed at every checkpoint (needs pyarrow)
+
+    A Parquet file is unreadable until its footer is written, so results are
+    never appended to an open file across checkpoints; resuming deletes the
+    parts written after the last one.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.path = path
+        self.schema = pa.schema([
+            ("path", pa.string()),
+            ("categories", pa.list_(pa.string())),
+            ("confidences", pa.list_(pa.float32())),
+            ("error", pa.string()),
+        ])
+        os.makedirs(path, exist_ok=True)
+        self.parts = len(self._part_files())
+        self._rows: List[Dict] = []
+
+    def _part_files(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.path) if name.startswith("part-") and name.endswith(".parquet"))
+
+    def restore(self, state: Dict):
+        self.parts = state.get("parts", 0)
+        for name in self._part_files()[self.parts:]:
+            os.remove(os.path.join(self.path, name))
+
+    def write(self, rows: List[Dict]):
+        self._rows.extend(rows)
+
+    def state(self) -> Dict:
+        if self._rows:
+            import pyarrow.parquet as pq
+
+            table = self.pa.Table.from_pydict({
+                "path": [row["path"] for row in self._rows],
+                "categories": [[p["category"] for p in row.get("predictions") or []] for row in self._rows],
+                "confidences": [[p["confidence"] for p in row.get("predictions") or []] for row in self._rows],
+                "error": [row.get("error") for row in self._rows],
+            }, schema=self.schema)
+            part_path = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+            pq.write_table(table, part_path + ".tmp")
+            os.replace(part_path + ".tmp", part_path)
+            self.parts += 1
+            self._rows = []
+        return {"parts": self.parts}
+
+    def close(self):
+        self.state()
+
+def open_result_writer(path: str, output_format: str = None, top_k: int = 5):
+    """Writer for `path`; the format defaults to the file extension (a directory or .parquet means Parquet)"""
+    if output_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        output_format = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv"}.get(extension, "parquet")
+
+    if output_format == "jsonl":
+        return JsonlResultWriter(path)
+    if output_format == "csv":
+        return CsvResultWriter(path, top_k)
+    if output_format == "parquet":
+        return ParquetResultWriter(path)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+def _decode(path: str):
+    return open_image(path).convert("RGB")
+
+class BatchClassificationJob:
+    """Prefetching, batched, checkpointed classification of an image stream"""
+
+    def __init__(self, classifier, writer, checkpoint_path: Optional[str] = None,
+                 batch_size: int = 64, workers: int = 8, prefetch_batches: int = 4,
+                 top_k: int = 5, checkpoint_every: int = 20, progress_interval: float = 5.0,
+                 progress=print):
+        self.classifier = classifier
+        self.writer = writer
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.workers = workers
+        self.prefetch = batch_size * prefetch_batches
+        self.top_k = top_k
+        self.checkpoint_every = checkpoint_every
+        self.progress_interval = progress_interval
+        self.progress = progress
+        self.logger = logging.getLogger(__name__)
+
+        self.stats = {"done": 0, "classified": 0, "failed": 0, "seconds": 0.0, "images_per_sec": 0.0}
+
+    def _load_checkpoint(self) -> Dict:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        state = {"done": self.stats["done"], "classified": self.stats["classified"],
+                 "failed": self.stats["failed"], "writer": self.writer.state()}
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _predict(self, images: List) -> List:
+        """Predictions for a batch; if the batch fails, each image is retried alone
+
+        An image that still fails gets its exception in place of predictions,
+        so one bad input becomes an error row instead of stopping the job.
+        """
+        try:
+            return predict_batch(self.classifier, images, top_k=self.top_k)
+        except Exception as e:
+            self.logger.warning(f"Batch of {len(images)} failed ({e}); retrying image by image")
+
+        results = []
+        for image in images:
+            try:
+                results.append(predict_batch(self.classifier, [image], top_k=self.top_k)[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def run(self, paths: Iterable[str], total: int = None, resume: bool = True, limit: int = None) -> Dict:
+        """Classify every path and return counters including images/sec"""
+        skip = 0
+        checkpoint = self._load_checkpoint() if resume else {}
+        if checkpoint:
+            skip = checkpoint["done"]
+            self.stats.update({key: checkpoint[key] for key in ("done", "classified", "failed")})
+            self.progress(f"↩️  Resuming after {skip:,} images")
+        self.writer.restore(checkpoint.get("writer", {}))
+
+        paths = iter(paths)
+        for _ in range(skip):
+            if next(paths, None) is None:
+                break
+
+        start = time.perf_counter()
+        last_report = start
+        processed_this_run = 0
+        batches_since_checkpoint = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            window = deque()
+
+            def refill():
+                while len(window) < self.prefetch:
+                    if limit is not None and processed_this_run + len(window) >= limit:
+                        return
+                    path = next(paths, None)
+                    if path is None:
+                        return
+                    window.append((path, pool.submit(_decode, path)))
+
+            refill()
+            while window:
+                batch = [window.popleft() for _ in range(min(self.batch_size, len(window)))]
+                refill()
+
+                rows = []
+                images = []
+                for path, future in batch:
+                    try:
+                        images.append(future.result())
+                        rows.append({"path": path})
+                    except Exception as e:
+                        rows.append({"path": path, "error": str(e)})
+
+                if images:
+                    results = iter(self._predict(images))
+                    for row in rows:
+                        if "error" not in row:
+                            result = next(results)
+                            if isinstance(result, Exception):
+                                row["error"] = str(result)
+                            else:
+                                row["predictions"] = result
+
+                self.writer.write(rows)
+                failed = sum(1 for row in rows if "error" in row)
+                self.stats["done"] += len(rows)
+                self.stats["classified"] += len(rows) - failed
+                self.stats["failed"] += failed
+                processed_this_run += len(rows)
+
+                batches_since_checkpoint += 1
+                if batches_since_checkpoint >= self.checkpoint_every:
+                    self._save_checkpoint()
+                    batches_since_checkpoint = 0
+
+                now = time.perf_counter()
+                if now - last_report >= self.progress_interval:
+                    self._report(processed_this_run, now - start, total)
+                    last_report = now
+
+        self._save_checkpoint()
+        elapsed = time.perf_counter() - start
+        self.stats["seconds"] = round(elapsed, 2)
+        self.stats["images_per_sec"] = round(processed_this_run / elapsed, 1) if elapsed > 0 else 0.0
+        self._report(processed_this_run, elapsed, total)
+        return dict(self.stats)
+
+    def _report(self, processed: int, elapsed: float, total: int = None):
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        done = f"{self.stats['done']:,}" + (f"/{total:,}" if total else "")
+        eta = ""
+        if total and rate:
+            eta = f" | ETA {max(0, total - self.stats['done']) / rate / 60:.1f} min"
+        self.progress(f"   {done} images | {rate:.1f} img/s | {self.stats['failed']} failed{eta}")
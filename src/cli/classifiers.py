@@ -0,0 +1,55 @@
+"""
+Classifier selection for the VisionAI Pro CLI
+
+Each backend is imported only when it is chosen, so a command never pays
+for the heavy dependencies (torch, torchvision, transformers) of models it
+doesn't use:
+
+- prorl: ProRLV2Classifier (torch)
+- zero-shot: ZeroShotCustomClassifier, CLIP over query/base_words.txt (torch, transformers)
+- resnet50, efficientnet: AdvancedImageClassifier ImageNet models (torch, torchvision)
+- vit: AdvancedImageClassifier with google/vit-base-patch16-224 (adds transformers)
+- ensemble: MultiModelEnsemble averaging several of the above
+"""
+
+import os
+from typing import Dict, List
+
+MODEL_CHOICES = ["prorl", "zero-shot", "resnet50", "efficientnet", "vit", "ensemble"]
+
+# CLI names for AdvancedImageClassifier model types
+ADVANCED_MODEL_TYPES = {"resnet50": "resnet50", "efficientnet": "efficientnet", "vit": "huggingface"}
+
+def load_classifier(name: str, model_path: str = None, device: str = "cpu",
+                    base_words: str = "query/base_words.txt", ensemble_models: List[str] = None):
+    """Instantiate the classifier called `name`
+
+    `ensemble_models` defaults to ENSEMBLE_MODELS (as in the advanced API
+    server), i.e. resnet50 and efficientnet.
+    """
+    if name == "prorl":
+        from models.prorl_classifier import ProRLV2Classifier
+        return ProRLV2Classifier(model_path=model_path, device=device)
+
+    if name == "zero-shot":
+        from models.zero_shot_classifier import ZeroShotCustomClassifier
+        return ZeroShotCustomClassifier(base_words_path=base_words, device=device)
+
+    if name in ADVANCED_MODEL_TYPES:
+        from models.advanced_classifier import AdvancedImageClassifier
+        return AdvancedImageClassifier(model_type=ADVANCED_MODEL_TYPES[name], device=device)
+
+    if name == "ensemble":
+        from models.advanced_classifier import MultiModelEnsemble
+        if not ensemble_models:
+            ensemble_models = os.getenv("ENSEMBLE_MODELS", "resnet50,efficientnet").split(",")
+        models = [ADVANCED_MODEL_TYPES.get(model.strip(), model.strip()) for model in ensemble_models]
+        return MultiModelEnsemble(models=models, device=device)
+
+    raise ValueError(f"Unknown model: {name} (choose from {', '.join(MODEL_CHOICES)})")
+
+def predict_batch(classifier, images: List, top_k: int = 5) -> List[List[Dict]]:
+    """Batched prediction, falling back to one predict() per image for classifiers without predict_batch"""
+    if hasattr(classifier, "predict_batch"):
+        return classifier.predict_batch(images, top_k=top_k)
+    return [classifier.predict(image, top_k=top_k) for image in images]
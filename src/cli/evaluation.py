@@ -0,0 +1,179 @@
+"""
+Accuracy evaluation of classifiers on a labelled image folder
+
+The folder holds one subdirectory per category (the layout written by
+download_images.py). It is read and decoded once, in a thread pool, and
+the decoded images are shared by every classifier being compared, so a
+side-by-side run measures the models and not the disk.
+
+Each classifier sees the images in batches. Its top-k predictions are
+mapped onto the folder's categories by normalized name (case, "_"/"-" and
+a plural "s" are ignored), or through an explicit label map for
+vocabularies that differ from the folder names (e.g. ImageNet classes →
+"animals"). Predictions that map to no folder category count as "other".
+
+Metrics are computed with NumPy from an (images × k) matrix of label
+indices: top-1/top-5 accuracy, a confusion matrix with an extra "other"
+column, per-category precision/recall/F1/support and macro F1. Inference
+throughput is recorded next to them.
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.image_io import open_image
+from cli.batch_classify import iter_directory
+from cli.classifiers import predict_batch
+
+logger = logging.getLogger(__name__)
+
+OTHER = "other"
+
+def normalize_label(label: str) -> str:
+    return " ".join(label.lower().replace("_", " ").replace("-", " ").split())
+
+@dataclass
+class LabelledImages:
+    """Decoded images of a labelled folder with their category indices"""
+    categories: List[str]
+    paths: List[str]
+    images: List
+    labels: np.ndarray
+    decode_seconds: float
+    failed: List[str] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.images)
+
+def load_labelled_folder(root: str, max_per_category: Optional[int] = None, workers: int = 8) -> LabelledImages:
+    """Read and decode every image under root/<category>/ once"""
+    categories = sorted(entry.name for entry in os.scandir(root)
+                        if entry.is_dir() and not entry.name.startswith("."))
+    if not categories:
+        raise ValueError(f"No category folders in {root}")
+
+    paths, labels = [], []
+    for index, category in enumerate(categories):
+        category_paths = list(iter_directory(os.path.join(root, category)))[:max_per_category]
+        paths.extend(category_paths)
+        labels.extend([index] * len(category_paths))
+
+    def decode(path):
+        try:
+            image = open_image(path).convert("RGB")
+            image.load()
+            return image
+        except Exception as e:
+            logger.warning(f"Skipping {path}: {e}")
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        decoded = list(pool.map(decode, paths))
+    decode_seconds = time.perf_counter() - start
+
+    keep = [i for i, image in enumerate(decoded) if image is not None]
+    return LabelledImages(
+        categories=categories,
+        paths=[paths[i] for i in keep],
+        images=[decoded[i] for i in keep],
+        labels=np.array([labels[i] for i in keep], dtype=np.int64),
+        decode_seconds=decode_seconds,
+        failed=[path for path, image in zip(paths, decoded) if image is None],
+    )
+
+class LabelMapper:
+    """Maps predicted category names to folder category indices (-1 for none)"""
+
+    def __init__(self, categories: List[str], label_map: Optional[Dict[str, str]] = None):
+        self.index = {}
+        for i, category in enumerate(categories):
+            name = normalize_label(category)
+            self.index[name] = i
+            self.index.setdefault(name[:-1] if name.endswith("s") else name + "s", i)
+        for predicted, category in (label_map or {}).items():
+            self.index[normalize_label(predicted)] = self.index.get(normalize_label(category), -1)
+        self._cache = {}
+
+    def __call__(self, predicted: str) -> int:
+        if predicted not in self._cache:
+            self._cache[predicted] = self.index.get(normalize_label(predicted), -1)
+        return self._cache[predicted]
+
+def compute_metrics(labels: np.ndarray, top_k: np.ndarray, categories: List[str]) -> Dict:
+    """Accuracy, confusion matrix and per-category metrics from an (N × k) matrix of label indices
+
+    -1 in `top_k` means "no folder category" (or a failed prediction).
+    """
+    n = len(categories)
+    hits = top_k == labels[:, None]
+    predicted = np.where(top_k[:, 0] >= 0, top_k[:, 0], n)
+
+    # Rows: true category; columns: predicted category, last column "other"
+    confusion = np.zeros((n, n + 1), dtype=np.int64)
+    np.add.at(confusion, (labels, predicted), 1)
+
+    true_positives = np.diag(confusion[:, :n]).astype(np.float64)
+    support = confusion.sum(axis=1)
+    predicted_counts = confusion[:, :n].sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted_counts > 0, true_positives / predicted_counts, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    present = support > 0
+    return {
+        "images": int(len(labels)),
+        "top1_accuracy": round(float(hits[:, :1].any(axis=1).mean()), 4) if len(labels) else 0.0,
+        "top5_accuracy": round(float(hits[:, :5].any(axis=1).mean()), 4) if len(labels) else 0.0,
+        "other_rate": round(float((predicted == n).mean()), 4) if len(labels) else 0.0,
+        "macro_f1": round(float(f1[present].mean()), 4) if present.any() else 0.0,
+        "per_category": {
+            category: {"precision": round(float(precision[i]), 4), "recall": round(float(recall[i]), 4),
+                       "f1": round(float(f1[i]), 4), "support": int(support[i])}
+            for i, category in enumerate(categories)
+        },
+        "confusion": {"labels": categories + [OTHER], "matrix": confusion.tolist()},
+    }
+
+def evaluate(classifier, dataset: LabelledImages, batch_size: int = 32, top_k: int = 5,
+             label_map: Optional[Dict[str, str]] = None) -> Dict:
+    """Batched inference over the dataset, then metrics and throughput"""
+    mapper = LabelMapper(dataset.categories, label_map)
+    predictions = np.full((len(dataset), top_k), -1, dtype=np.int64)
+    errors = 0
+
+    start = time.perf_counter()
+    for offset in range(0, len(dataset), batch_size):
+        batch = dataset.images[offset:offset + batch_size]
+        try:
+            results = predict_batch(classifier, batch, top_k=top_k)
+        except Exception as e:
+            logger.warning(f"Batch at {offset} failed ({e}); retrying image by image")
+            results = []
+            for image in batch:
+                try:
+                    results.append(predict_batch(classifier, [image], top_k=top_k)[0])
+                except Exception:
+                    errors += 1
+                    results.append([])
+        for row, result in enumerate(results):
+            indices = [mapper(prediction["category"]) for prediction in result[:top_k]]
+            predictions[offset + row, :len(indices)] = indices
+    seconds = time.perf_counter() - start
+
+    metrics = compute_metrics(dataset.labels, predictions, dataset.categories)
+    metrics.update({
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "images_per_sec": round(len(dataset) / seconds, 2) if seconds else 0.0,
+        "ms_per_image": round(1000 * seconds / len(dataset), 3) if len(dataset) else 0.0,
+        "batch_size": batch_size,
+    })
+    return metrics
@@ -12,9 +12,9 @@ from PIL import Image
 
 # 로컬 모듈 import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from models.prorl_classifier import ProRLV2Classifier
-from auth.api_key_manager import APIKeyManager
+from cli.classifiers import MODEL_CHOICES, load_classifier, predict_batch
 
 def setup_logging(verbose: bool = False):
     """Setup logging"""
@@ -24,14 +24,14 @@ def setup_logging(verbose: bool = False):
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
-def classify_image(classifier: ProRLV2Classifier, image_path: str, top_k: int = 5):
+def classify_image(classifier, image_path: str, top_k: int = 5):
     """Perform image classification"""
     try:
         # Load image
         image = Image.open(image_path)
         
         # Perform classification
-        results = classifier.predict(image, top_k=top_k)
+        results = predict_batch(classifier, [image], top_k=top_k)[0]
         
         print(f"\n📸 Image: {image_path}")
         print(f"🔍 Classification Results (Top {top_k}):")
@@ -47,7 +47,7 @@ def classify_image(classifier: ProRLV2Classifier, image_path: str, top_k: int =
         print(f"❌ Image classification failed: {e}")
         return None
 
-def manage_api_keys(manager: APIKeyManager, action: str, **kwargs):
+def manage_api_keys(manager: "APIKeyManager", action: str, **kwargs):
     """API key management"""
     try:
         if action == "generate":
@@ -102,6 +102,176 @@ def manage_api_keys(manager: APIKeyManager, action: str, **kwargs):
     except Exception as e:
         print(f"❌ API key management failed: {e}")
 
+def create_classifier(args):
+    """Load the classifier selected with --model (only its dependencies are imported)"""
+    ensemble_models = args.ensemble_models.split(",") if args.ensemble_models else None
+    return load_classifier(args.model, model_path=args.model_path, device=args.device,
+                           base_words=args.base_words, ensemble_models=ensemble_models)
+
+def reclassify(args):
+    """Re-score stored classification results against the current model"""
+    from config.config import Config
+    from models.storage_backend import create_storage_backend
+    from models.blob_store import BlobStore
+    from models.embedding_store import EmbeddingStore
+    from models.classification_index import ClassificationIndex
+    from cli.reclassify import ReclassifyJob, load_manifest
+    
+    classifier = create_classifier(args)
+    
+    # Only CLIP embeddings can be re-scored against a new category set
+    embedding_store = None
+    if hasattr(classifier, 'score_embeddings'):
+        embedding_store = EmbeddingStore(args.embeddings or Config.EMBEDDINGS_DIR, model_name=classifier.model_name)
+    
+    job = ReclassifyJob(
+        storage=create_storage_backend(args.storage or Config.STORAGE_BACKEND),
+        classifier=classifier,
+        checkpoint_path=args.checkpoint,
+        images_dir=args.images_dir,
+        manifest=load_manifest(args.manifest) if args.manifest else None,
+        blob_store=BlobStore(args.blobs or Config.UPLOAD_DIR),
+        embedding_store=embedding_store,
+        embeddings_only=args.embeddings_only,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        top_k=args.top_k,
+        model_version=args.model_version,
+        search_index=ClassificationIndex(Config.CLASSIFICATION_INDEX_PATH) if Config.CLASSIFICATION_INDEX_PATH else None
+    )
+    stats = job.run(user_id=args.user_id, limit=args.limit, restart=args.restart)
+    
+    print(f"✅ Reclassified {stats['updated']} of {stats['processed']} records")
+    print(f"   From embeddings: {stats['from_embeddings']}")
+    print(f"   From images: {stats['from_images']}")
+    print(f"   Missing images: {stats['missing']}")
+    print(f"   Failed: {stats['failed']}")
+
+def batch_classify(args):
+    """Classify a directory tree or manifest of images into a results file"""
+    from cli.batch_classify import (BatchClassificationJob, count_manifest, iter_directory,
+                                    iter_manifest, open_result_writer)
+    
+    if args.command == 'classify-dir':
+        if not os.path.isdir(args.directory):
+            print(f"❌ Directory not found: {args.directory}")
+            return
+        paths, total = iter_directory(args.directory), None
+    else:
+        if not os.path.exists(args.manifest):
+            print(f"❌ Manifest not found: {args.manifest}")
+            return
+        paths, total = iter_manifest(args.manifest), count_manifest(args.manifest)
+    
+    checkpoint = args.checkpoint or args.output.rstrip("/\\") + ".checkpoint.json"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    
+    classifier = create_classifier(args)
+    writer = open_result_writer(args.output, args.format, top_k=args.top_k)
+    try:
+        job = BatchClassificationJob(
+            classifier, writer,
+            checkpoint_path=checkpoint,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            top_k=args.top_k,
+            checkpoint_every=args.checkpoint_every
+        )
+        stats = job.run(paths, total=total, limit=args.limit)
+    finally:
+        writer.close()
+    
+    print(f"✅ Classified {stats['classified']} images into {args.output}")
+    print(f"   Failed: {stats['failed']}")
+    print(f"   Throughput: {stats['images_per_sec']} images/sec ({stats['seconds']}s this run)")
+
+def sharded_classify(args):
+    """Classify a manifest or directory with several worker processes"""
+    from cli.batch_classify import iter_directory, iter_manifest
+    from cli.sharded_classify import ShardedClassificationRunner, classifier_factory
+    
+    if os.path.isdir(args.source):
+        paths = list(iter_directory(args.source))
+    elif os.path.exists(args.source):
+        paths = list(iter_manifest(args.source))
+    else:
+        print(f"❌ Manifest or directory not found: {args.source}")
+        return
+    
+    ensemble_models = args.ensemble_models.split(",") if args.ensemble_models else None
+    runner = ShardedClassificationRunner(
+        classifier_factory(args.model, model_path=args.model_path, device=args.device,
+                           base_words=args.base_words, ensemble_models=ensemble_models),
+        output=args.output,
+        output_format=args.format,
+        work_dir=args.work_dir,
+        processes=args.processes,
+        threads_per_process=args.threads,
+        shard_size=args.shard_size,
+        batch_size=args.batch_size,
+        decode_workers=args.workers,
+        top_k=args.top_k,
+        max_retries=args.max_retries
+    )
+    report = runner.run(paths, restart=args.restart)
+    
+    print(f"{'✅' if not report['failed_shards'] else '⚠️ '} Classified {report['images']:,} images "
+          f"in {report['seconds']}s ({report['images_per_sec']} images/sec, "
+          f"{report['processes']} processes x {report['threads_per_process']} threads)")
+    print(f"   Failed images: {report['failed_images']}")
+    print(f"   {'Shard':>6} {'Images':>9} {'img/s':>8} {'Tries':>6} {'PID':>8}")
+    for stats in report["shards"]:
+        print(f"   {stats['shard']:>6} {stats['done']:>9,} {stats['images_per_sec']:>8} "
+              f"{stats.get('attempts', '-'):>6} {stats['pid']:>8}")
+    if report["failed_shards"]:
+        print(f"   Failed shards: {', '.join(str(index) for index in sorted(report['failed_shards']))}")
+    else:
+        print(f"   Output: {report['output']}")
+    
+    if args.json:
+        import json
+        print(json.dumps(report, indent=2))
+
+def run_retention(args):
+    """Roll up and delete old usage events, then reclaim space"""
+    from config.config import Config
+    from models.storage_backend import create_storage_backend
+    from cli.retention import UsageRetentionJob
+    
+    job = UsageRetentionJob(
+        retain_days=args.days if args.days is not None else Config.USAGE_RETENTION_DAYS,
+        batch_size=args.batch_size,
+        pause=args.pause
+    )
+    report = job.run(
+        api_usage_db=None if args.skip_api_usage else args.api_keys_db,
+        storage=None if args.skip_usage_statistics else create_storage_backend(args.storage or Config.STORAGE_BACKEND),
+        full_vacuum=args.vacuum
+    )
+    
+    print(f"🧹 Usage events before {report['cutoff']} ({report['retain_days']} days retained)")
+    if "api_usage" in report:
+        api_usage = report["api_usage"]
+        print(f"   api_usage: {api_usage['rows_rolled_up']} rows rolled up into "
+              f"{api_usage['aggregate_rows']} daily rows, {api_usage['rows_remaining']} raw rows kept")
+    if "usage_statistics" in report:
+        usage = report["usage_statistics"]
+        print(f"   usage_statistics: {usage['events_deleted']} events deleted, "
+              f"{usage['events_rolled_up']} added to {usage['counter_docs_updated']} daily counter documents")
+    for name in ("api_usage", "usage_statistics"):
+        space = report.get(name, {}).get("space")
+        if space:
+            print(f"   {space['path']}: {space['reclaimed_bytes'] / 1024 / 1024:.1f} MB reclaimed "
+                  f"({space['bytes_after'] / 1024 / 1024:.1f} MB now, auto_vacuum={space['auto_vacuum']})")
+            if space["auto_vacuum"] != "incremental" and space["free_bytes_remaining"]:
+                print(f"     {space['free_bytes_remaining'] / 1024 / 1024:.1f} MB free inside the file; "
+                      f"run once with --vacuum to release it")
+    
+    if args.json:
+        import json
+        print(json.dumps(report, indent=2))
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(
@@ -112,6 +282,9 @@ Usage Examples:
   # Image classification
   python main.py classify image.jpg
   
+  # Image classification with a pretrained ImageNet model
+  python main.py classify image.jpg --model efficientnet
+  
   # Generate API key
   python main.py keys generate --name "Test Key"
   
@@ -120,6 +293,21 @@ Usage Examples:
   
   # Revoke API key
   python main.py keys revoke --key "your-api-key"
+  
+  # Classify every image under a directory into JSONL
+  python main.py classify-dir photos/ --output results.jsonl --model resnet50 --batch-size 64
+  
+  # Classify a list of paths into Parquet part files (resumes automatically)
+  python main.py classify-manifest paths.txt --output results.parquet
+  
+  # Classify a large manifest with 8 worker processes of 2 threads each
+  python main.py classify-sharded paths.txt --output results.jsonl --processes 8 --threads 2
+  
+  # Re-score stored results after changing base_words.txt
+  python main.py reclassify --model zero-shot --embeddings data/embeddings
+  
+  # Roll up usage events older than 90 days and reclaim space
+  python main.py retention --days 90
         """
     )
     
@@ -128,11 +316,17 @@ Usage Examples:
     parser.add_argument('--model-path', help='ProRL V2 model path')
     parser.add_argument('--device', default='cpu', choices=['cpu', 'cuda'], help='Device to use')
     
+    # Classifier selection, shared by the classification commands
+    model_options = argparse.ArgumentParser(add_help=False)
+    model_options.add_argument('--model', default='prorl', choices=MODEL_CHOICES, help='Classifier to use')
+    model_options.add_argument('--base-words', default='query/base_words.txt', help='Category file for the zero-shot model')
+    model_options.add_argument('--ensemble-models', help='Comma separated models for --model ensemble (default: ENSEMBLE_MODELS or resnet50,efficientnet)')
+    
     # Subcommands
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # Image classification command
-    classify_parser = subparsers.add_parser('classify', help='Image classification')
+    classify_parser = subparsers.add_parser('classify', parents=[model_options], help='Image classification')
     classify_parser.add_argument('image_path', help='Path to image to classify')
     classify_parser.add_argument('--top-k', type=int, default=5, help='Return top k results')
     
@@ -155,6 +349,69 @@ Usage Examples:
     revoke_parser = keys_subparsers.add_parser('revoke', help='Revoke API key')
     revoke_parser.add_argument('--key', required=True, help='API key to revoke')
     
+    # Offline batch classification commands
+    batch_options = argparse.ArgumentParser(add_help=False)
+    batch_options.add_argument('--output', '-o', required=True, help='Results file (.jsonl, .csv) or Parquet directory (.parquet)')
+    batch_options.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], help='Output format (default: from the --output extension)')
+    batch_options.add_argument('--batch-size', type=int, default=64, help='Images per inference batch')
+    batch_options.add_argument('--workers', type=int, default=8, help='Image read/decode threads')
+    batch_options.add_argument('--top-k', type=int, default=5, help='Predictions kept per image')
+    batch_options.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint.json)')
+    batch_options.add_argument('--checkpoint-every', type=int, default=20, help='Batches between checkpoints')
+    batch_options.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+    batch_options.add_argument('--limit', type=int, help='Stop after this many images')
+    
+    classify_dir_parser = subparsers.add_parser('classify-dir', parents=[model_options, batch_options], help='Classify every image under a directory')
+    classify_dir_parser.add_argument('directory', help='Directory to walk')
+    
+    classify_manifest_parser = subparsers.add_parser('classify-manifest', parents=[model_options, batch_options], help='Classify the images listed in a manifest')
+    classify_manifest_parser.add_argument('manifest', help='Text file of paths, or JSONL/CSV with a path column')
+    
+    # Multi-process sharded classification command
+    sharded_parser = subparsers.add_parser('classify-sharded', parents=[model_options], help='Classify a manifest or directory with several worker processes')
+    sharded_parser.add_argument('source', help='Manifest (text, JSONL or CSV) or directory')
+    sharded_parser.add_argument('--output', '-o', required=True, help='Results file (.jsonl, .csv) or Parquet directory (.parquet)')
+    sharded_parser.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], help='Output format (default: from the --output extension)')
+    sharded_parser.add_argument('--processes', type=int, help='Worker processes (default: CPU count)')
+    sharded_parser.add_argument('--threads', type=int, help='Torch/OpenMP threads per process (default: CPU count / processes)')
+    sharded_parser.add_argument('--shard-size', type=int, help='Images per shard (default: about 4 shards per process)')
+    sharded_parser.add_argument('--batch-size', type=int, default=64, help='Images per inference batch')
+    sharded_parser.add_argument('--workers', type=int, default=2, help='Image decode threads per process')
+    sharded_parser.add_argument('--top-k', type=int, default=5, help='Predictions kept per image')
+    sharded_parser.add_argument('--max-retries', type=int, default=2, help='Times a failed shard is re-queued')
+    sharded_parser.add_argument('--work-dir', help='Shard results directory (default: <output>.shards)')
+    sharded_parser.add_argument('--restart', action='store_true', help='Discard finished shards and start over')
+    sharded_parser.add_argument('--json', action='store_true', help='Also print the full report as JSON')
+    
+    # Reclassification backfill command
+    reclassify_parser = subparsers.add_parser('reclassify', parents=[model_options], help='Re-score stored classification results')
+    reclassify_parser.add_argument('--storage', help='Storage backend URI (default: STORAGE_BACKEND)')
+    reclassify_parser.add_argument('--images-dir', help='Directory holding the images by their stored image_path')
+    reclassify_parser.add_argument('--manifest', help='JSONL/CSV manifest mapping id or sha256 to image path')
+    reclassify_parser.add_argument('--blobs', help='Upload blob store directory (default: UPLOAD_DIR)')
+    reclassify_parser.add_argument('--embeddings', help='Embedding store directory, zero-shot model only (default: EMBEDDINGS_DIR)')
+    reclassify_parser.add_argument('--embeddings-only', action='store_true', help='Only re-score records with stored embeddings')
+    reclassify_parser.add_argument('--batch-size', type=int, default=256, help='Records per batch')
+    reclassify_parser.add_argument('--workers', type=int, default=8, help='Image decode threads')
+    reclassify_parser.add_argument('--top-k', type=int, default=5, help='Predictions kept per record')
+    reclassify_parser.add_argument('--checkpoint', default='data/reclassify_checkpoint.json', help='Checkpoint file')
+    reclassify_parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the newest record')
+    reclassify_parser.add_argument('--user-id', help='Only reclassify this user\'s results')
+    reclassify_parser.add_argument('--limit', type=int, help='Stop after this many records')
+    reclassify_parser.add_argument('--model-version', help='model_version written to updated records')
+    
+    # Usage log retention command
+    retention_parser = subparsers.add_parser('retention', help='Roll up and delete old usage events')
+    retention_parser.add_argument('--days', type=int, help='Days of raw events to keep (default: USAGE_RETENTION_DAYS)')
+    retention_parser.add_argument('--api-keys-db', default='api_keys.db', help='API key database holding api_usage')
+    retention_parser.add_argument('--storage', help='Storage backend URI for usage_statistics (default: STORAGE_BACKEND)')
+    retention_parser.add_argument('--skip-api-usage', action='store_true', help='Leave the api_usage table alone')
+    retention_parser.add_argument('--skip-usage-statistics', action='store_true', help='Leave usage_statistics alone')
+    retention_parser.add_argument('--batch-size', type=int, default=5000, help='Events deleted per transaction')
+    retention_parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+    retention_parser.add_argument('--vacuum', action='store_true', help='Full VACUUM (locks the database; switches it to incremental vacuum)')
+    retention_parser.add_argument('--json', action='store_true', help='Also print the full report as JSON')
+    
     # Parse arguments
     args = parser.parse_args()
     
@@ -168,15 +425,6 @@ Usage Examples:
     logger = logging.getLogger(__name__)
     
     try:
-        # Initialize classifier
-        classifier = ProRLV2Classifier(
-            model_path=args.model_path,
-            device=args.device
-        )
-        
-        # Initialize API key manager
-        api_key_manager = APIKeyManager()
-        
         # Execute commands
         if args.command == 'classify':
             # Validate image path
@@ -184,10 +432,29 @@ Usage Examples:
                 print(f"❌ Image file not found: {args.image_path}")
                 return
             
+            # Initialize classifier (imports only the selected backend)
+            classifier = create_classifier(args)
+            
             # Perform image classification
             classify_image(classifier, args.image_path, args.top_k)
             
+        elif args.command in ('classify-dir', 'classify-manifest'):
+            batch_classify(args)
+            
+        elif args.command == 'classify-sharded':
+            sharded_classify(args)
+            
+        elif args.command == 'reclassify':
+            reclassify(args)
+            
+        elif args.command == 'retention':
+            run_retention(args)
+            
         elif args.command == 'keys':
+            # Initialize API key manager (creates api_keys.db)
+            from auth.api_key_manager import APIKeyManager
+            api_key_manager = APIKeyManager()
+            
             if args.keys_action == 'generate':
                 permissions = [p.strip() for p in args.permissions.split(',')]
                 manage_api_keys(api_key_manager, 'generate',
@@ -0,0 +1,253 @@
+"""
+Reclassification backfill for stored VisionAI Pro results
+
+Streams `classification_results` page by page, re-scores each page in one
+batch against the current model or category set and writes the new
+predictions back with a single bulk update per page.
+
+For every record the job first looks for a stored image embedding (keyed
+by the record's ``image_sha256``); those are re-scored with one matrix
+product against the current category embeddings, without decoding images
+or running the vision model. The remaining records are resolved to image
+files through a manifest, the upload blob store or an images directory,
+decoded in a thread pool and classified in batches. With an embedding
+store and a CLIP classifier the new embeddings are kept, so the next
+category change needs no images at all.
+
+Progress is checkpointed to a JSON file after each page, so an interrupted
+run continues from the last committed record.
+"""
+
+import io
+import os
+import csv
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.image_io import open_image
+
+class ReclassifyCheckpoint:
+    """Resume point and counters of a backfill run, saved atomically"""
+
+    COUNTERS = ("processed", "updated", "from_embeddings", "from_images", "missing", "failed")
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.state = {"last_id": None, "user_id": None}
+        self.state.update({name: 0 for name in self.COUNTERS})
+
+    def load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.state.update(json.load(f))
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+def load_manifest(path: str) -> Dict[str, str]:
+    """Map record IDs and image digests to image paths
+
+    The manifest is JSONL or CSV with an ``id`` and/or ``sha256`` column and
+    a ``path`` column; relative paths are resolved against the manifest's
+    directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    entries = {}
+    for row in rows:
+        image_path = row.get("path")
+        if not image_path:
+            continue
+        image_path = os.path.join(base_dir, image_path)
+        for key in ("id", "sha256"):
+            if row.get(key):
+                entries[row[key]] = image_path
+    return entries
+
+def _decode(path: str) -> Tuple[str, object]:
+    """Read, hash and decode one image (runs in the worker pool)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    image = open_image(io.BytesIO(data)).convert("RGB")
+    return hashlib.sha256(data).hexdigest(), image
+
+class ReclassifyJob:
+    """Checkpointed batch re-scoring of stored classification results"""
+
+    def __init__(self, storage, classifier, checkpoint_path: str = None,
+                 images_dir: str = None, manifest: Dict[str, str] = None, blob_store=None,
+                 embedding_store=None, embeddings_only: bool = False,
+                 batch_size: int = 256, workers: int = 8, top_k: int = 5,
+                 model_version: str = None, search_index=None):
+        self.storage = storage
+        self.classifier = classifier
+        self.checkpoint = ReclassifyCheckpoint(checkpoint_path)
+        self.images_dir = images_dir
+        self.manifest = manifest or {}
+        self.blob_store = blob_store
+        self.embedding_store = embedding_store
+        self.embeddings_only = embeddings_only
+        self.batch_size = batch_size
+        self.workers = workers
+        self.top_k = top_k
+        self.model_version = model_version
+        self.search_index = search_index
+        self.logger = logging.getLogger(__name__)
+
+        self.can_score_embeddings = embedding_store is not None and hasattr(classifier, "score_embeddings")
+        self.can_encode = self.can_score_embeddings and hasattr(classifier, "encode_images")
+        if embeddings_only and not self.can_score_embeddings:
+            raise ValueError("--embeddings-only needs an embedding store and a classifier that scores embeddings")
+
+    def resolve_image(self, record: Dict) -> Optional[str]:
+        """Local image file for a record, or None"""
+        digest = record.get("image_sha256")
+        candidates = [self.manifest.get(record["id"])]
+        if digest:
+            candidates.append(self.manifest.get(digest))
+            if self.blob_store is not None:
+                candidates.append(self.blob_store.path_for(digest))
+        if self.images_dir and record.get("image_path"):
+            candidates.append(os.path.join(self.images_dir, record["image_path"]))
+
+        for path in candidates:
+            if path and os.path.isfile(path):
+                return path
+        return None
+
+    def run(self, user_id: str = None, limit: int = None, restart: bool = False) -> Dict:
+        """Re-score results (of one user, or all) and return the run counters"""
+        if not restart and self.checkpoint.load():
+            if self.checkpoint.state.get("user_id") != user_id:
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint.path} belongs to a run for user "
+                    f"{self.checkpoint.state.get('user_id')!r}; use --restart to start over"
+                )
+            self.logger.info(f"Resuming after {self.checkpoint.state['last_id']} "
+                             f"({self.checkpoint.state['processed']} records done)")
+        self.checkpoint.state["user_id"] = user_id
+
+        records = self.storage.iter_classifications(
+            user_id, start_after=self.checkpoint.state["last_id"], page_size=self.batch_size
+        )
+
+        seen = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            batch = []
+            for record in records:
+                batch.append(record)
+                seen += 1
+                if len(batch) == self.batch_size or (limit and seen >= limit):
+                    self._process_batch(batch, pool)
+                    batch = []
+                if limit and seen >= limit:
+                    break
+            if batch:
+                self._process_batch(batch, pool)
+
+        return {name: self.checkpoint.state[name] for name in ReclassifyCheckpoint.COUNTERS}
+
+    def _process_batch(self, batch: List[Dict], pool: ThreadPoolExecutor):
+        state = self.checkpoint.state
+        predictions = {}
+        digests = {}
+
+        # 1. Records with stored embeddings: re-score without touching images
+        pending = batch
+        if self.can_score_embeddings:
+            wanted = [record["image_sha256"] for record in batch if record.get("image_sha256")]
+            found, vectors = self.embedding_store.get_many(wanted) if wanted else ([], None)
+            if found:
+                scores = dict(zip(found, self.classifier.score_embeddings(vectors, top_k=self.top_k)))
+                for record in batch:
+                    if record.get("image_sha256") in scores:
+                        predictions[record["id"]] = scores[record["image_sha256"]]
+                state["from_embeddings"] += len(predictions)
+            pending = [record for record in batch if record["id"] not in predictions]
+
+        # 2. Remaining records: decode images in the pool and classify in one batch
+        if pending and not self.embeddings_only:
+            paths = {record["id"]: self.resolve_image(record) for record in pending}
+            to_decode = [record for record in pending if paths[record["id"]]]
+            state["missing"] += len(pending) - len(to_decode)
+
+            decoded = []
+            futures = [(record, pool.submit(_decode, paths[record["id"]])) for record in to_decode]
+            for record, future in futures:
+                try:
+                    digest, image = future.result()
+                    decoded.append((record, digest, image))
+                except Exception as e:
+                    self.logger.warning(f"Skipping {record['id']}: {e}")
+                    state["failed"] += 1
+
+            if decoded:
+                images = [image for _, _, image in decoded]
+                if self.can_encode:
+                    features = self.classifier.encode_images(images)
+                    features = features.cpu().numpy() if hasattr(features, "cpu") else np.asarray(features)
+                    self.embedding_store.add_many([digest for _, digest, _ in decoded], features)
+                    results = self.classifier.score_embeddings(features, top_k=self.top_k)
+                else:
+                    results = self.classifier.predict_batch(images, top_k=self.top_k)
+
+                for (record, digest, _), result in zip(decoded, results):
+                    predictions[record["id"]] = result
+                    digests[record["id"]] = digest
+                state["from_images"] += len(decoded)
+        elif pending:
+            state["missing"] += len(pending)
+
+        # 3. One bulk write per page, then move the checkpoint past it
+        reclassified_at = datetime.now().isoformat()
+        updates = []
+        indexed = []
+        for record in batch:
+            result = predictions.get(record["id"])
+            if result is None:
+                continue
+            fields = {
+                "predictions": result,
+                "confidence_scores": [pred["confidence"] for pred in result],
+                "reclassified_at": reclassified_at,
+            }
+            if self.model_version:
+                fields["model_version"] = self.model_version
+            if record["id"] in digests and not record.get("image_sha256"):
+                fields["image_sha256"] = digests[record["id"]]
+            updates.append((record["id"], fields))
+
+            data = {key: value for key, value in record.items() if key != "id"}
+            data.update(fields)
+            indexed.append((record["id"], data))
+
+        if updates:
+            self.storage.update_classifications(updates)
+        if self.search_index is not None and indexed:
+            self.search_index.add_many(indexed)
+
+        state["processed"] += len(batch)
+        state["updated"] += len(updates)
+        state["last_id"] = batch[-1]["id"]
+        self.checkpoint.save()
+        self.logger.info(f"Reclassified {state['updated']}/{state['processed']} records "
+                         f"({state['from_embeddings']} from embeddings, {state['from_images']} from images)")
@@ -0,0 +1,211 @@
+"""
+Retention and compaction for VisionAI Pro usage logs
+
+Two stores grow by one row per request:
+
+- ``api_usage`` in the API key manager's SQLite database. Rows older than
+  the retention window are rolled into ``api_usage_daily`` (one row per key,
+  day, IP, endpoint and response code with a count), which
+  `APIKeyManager.get_usage_stats` reads alongside the raw rows.
+- ``usage_statistics`` in the storage backend (Firestore or SQLite). Events
+  stamped ``counted`` are already in the per-user daily counters; the rest
+  (recorded before counters existed, including the earlier part of the day
+  they were deployed) are added to their day's counter document before
+  they are deleted. Each such write also moves the document's
+  ``rolled_up_through`` watermark past the events it added, in the same
+  write, so an interrupted run can simply be rerun: events at or below a
+  document's watermark are deleted without being added again.
+
+Deletes run in bounded batches, each its own short transaction, with an
+optional pause in between so request handlers are never locked out for
+long. Freed SQLite pages are then returned to the filesystem with
+incremental vacuum; databases created before auto_vacuum was enabled need
+one full ``--vacuum`` to switch over.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from models import usage_counters
+from models.storage_backend import SQLiteStorageBackend
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+def reclaim_sqlite_space(db_path: str, full_vacuum: bool = False, step_pages: int = 1000,
+                         pause: float = 0.0) -> Dict:
+    """Return free pages of a SQLite database to the filesystem and report the bytes reclaimed
+
+    With incremental auto_vacuum the free list is released `step_pages` at a
+    time; `full_vacuum` rebuilds the file once (locking it meanwhile) and
+    switches it to incremental mode for later runs.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+        if full_vacuum:
+            if mode != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        elif mode == 2:
+            while conn.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+                # executescript steps the pragma to completion; execute() frees a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({int(step_pages)});")
+                if pause:
+                    time.sleep(pause)
+
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        pages_after = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return {
+            "path": db_path,
+            "auto_vacuum": AUTO_VACUUM_MODES.get(conn.execute("PRAGMA auto_vacuum").fetchone()[0], "unknown"),
+            "bytes_before": pages_before * page_size,
+            "bytes_after": pages_after * page_size,
+            "reclaimed_bytes": (pages_before - pages_after) * page_size,
+            "free_bytes_remaining": free_after * page_size,
+        }
+    finally:
+        conn.close()
+
+class UsageRetentionJob:
+    """Roll up and delete usage events older than `retain_days`"""
+
+    def __init__(self, retain_days: int = 90, batch_size: int = 5000, pause: float = 0.05,
+                 now: datetime = None):
+        self.retain_days = retain_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.cutoff = (now or datetime.now()) - timedelta(days=retain_days)
+        self.logger = logging.getLogger(__name__)
+
+    def compact_api_usage(self, db_path: str) -> Dict:
+        """Roll old api_usage rows into api_usage_daily and delete them, one id range per transaction"""
+        # Same text format the sqlite3 datetime adapter wrote the timestamps in
+        cutoff = self.cutoff.isoformat(" ")
+        report = {"rows_rolled_up": 0, "batches": 0}
+
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            # One scan to bound the work; ids grow with time, so every old row is at or below this id
+            max_old_id = conn.execute(
+                "SELECT MAX(id) FROM api_usage WHERE timestamp < ?", (cutoff,)
+            ).fetchone()[0]
+            last_id = 0
+
+            while max_old_id is not None and last_id < max_old_id:
+                row = conn.execute(
+                    "SELECT id FROM api_usage WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?",
+                    (last_id, self.batch_size - 1)
+                ).fetchone()
+                upper_id = min(row[0] if row else max_old_id, max_old_id)
+
+                with conn:
+                    conn.execute(
+                        "INSERT INTO api_usage_daily (api_key, day, ip_address, endpoint, response_code, count) "
+                        "SELECT api_key, substr(timestamp, 1, 10), ip_address, endpoint, response_code, COUNT(*) "
+                        "FROM api_usage WHERE id > ? AND id <= ? AND timestamp < ? "
+                        "GROUP BY api_key, substr(timestamp, 1, 10), ip_address, endpoint, response_code "
+                        "ON CONFLICT (api_key, day, ip_address, endpoint, response_code) "
+                        "DO UPDATE SET count = count + excluded.count",
+                        (last_id, upper_id, cutoff)
+                    )
+                    deleted = conn.execute(
+                        "DELETE FROM api_usage WHERE id > ? AND id <= ? AND timestamp < ?",
+                        (last_id, upper_id, cutoff)
+                    ).rowcount
+
+                report["rows_rolled_up"] += deleted
+                report["batches"] += 1
+                last_id = upper_id
+                if self.pause:
+                    time.sleep(self.pause)
+
+            report["aggregate_rows"] = conn.execute("SELECT COUNT(*) FROM api_usage_daily").fetchone()[0]
+            report["rows_remaining"] = conn.execute("SELECT COUNT(*) FROM api_usage").fetchone()[0]
+        finally:
+            conn.close()
+
+        self.logger.info(f"api_usage: rolled up {report['rows_rolled_up']} rows in {report['batches']} batches")
+        return report
+
+    def compact_usage_statistics(self, storage) -> Dict:
+        """Add old events that aren't counted yet to their daily counters, then delete them in batches"""
+        cutoff = self.cutoff.isoformat()
+        report = {"events_deleted": 0, "events_rolled_up": 0, "counter_docs_updated": 0, "batches": 0}
+        updated = set()
+
+        while True:
+            page = storage.list_usage_events_before(cutoff, self.batch_size)
+            if not page:
+                break
+
+            # Events of each counter document, oldest first (the page order)
+            by_doc = {}
+            for event_id, data in page:
+                if data.get(usage_counters.COUNTED_FIELD) or not data.get("timestamp"):
+                    continue
+                user_id = data.get("user_id", "")
+                day = datetime.fromisoformat(str(data["timestamp"])).date()
+                by_doc.setdefault(usage_counters.counter_doc_id(user_id, day), (user_id, day, []))[2].append(
+                    ([str(data["timestamp"]), event_id], data)
+                )
+
+            watermarks = {}
+            if by_doc:
+                for doc in storage.get_usage_counters(list(by_doc)):
+                    if doc.get(usage_counters.WATERMARK_FIELD):
+                        doc_id = usage_counters.counter_doc_id(doc["user_id"], datetime.fromisoformat(doc["date"]).date())
+                        watermarks[doc_id] = doc[usage_counters.WATERMARK_FIELD]
+
+            for doc_id, (user_id, day, events) in by_doc.items():
+                watermark = watermarks.get(doc_id)
+                increments = {}
+                for key, data in events:
+                    # Already added by an earlier, interrupted run
+                    if watermark is not None and key <= list(watermark):
+                        continue
+                    usage_counters.merge_increments(increments, usage_counters.counter_increments(
+                        data.get("success", False), data.get("processing_time", 0) or 0
+                    ))
+                    report["events_rolled_up"] += 1
+                if increments:
+                    fields = {**usage_counters.counter_fields(user_id, day), usage_counters.WATERMARK_FIELD: events[-1][0]}
+                    storage.increment_usage_counters(doc_id, fields, increments)
+                    updated.add(doc_id)
+
+            storage.delete_usage_events([doc_id for doc_id, _ in page])
+            report["events_deleted"] += len(page)
+            report["batches"] += 1
+            if self.pause:
+                time.sleep(self.pause)
+
+        report["counter_docs_updated"] = len(updated)
+        self.logger.info(f"usage_statistics: deleted {report['events_deleted']} events in {report['batches']} batches, "
+                         f"{report['events_rolled_up']} added to daily counters")
+        return report
+
+    def run(self, api_usage_db: Optional[str] = None, storage=None, full_vacuum: bool = False) -> Dict:
+        """Compact the given stores and report what was reclaimed"""
+        report = {"cutoff": self.cutoff.isoformat(), "retain_days": self.retain_days}
+
+        if api_usage_db:
+            if not os.path.exists(api_usage_db):
+                raise FileNotFoundError(f"API key database not found: {api_usage_db}")
+            report["api_usage"] = self.compact_api_usage(api_usage_db)
+            report["api_usage"]["space"] = reclaim_sqlite_space(api_usage_db, full_vacuum, pause=self.pause)
+
+        if storage is not None:
+            report["usage_statistics"] = self.compact_usage_statistics(storage)
+            if isinstance(storage, SQLiteStorageBackend) and storage.db_path != ":memory:":
+                report["usage_statistics"]["space"] = reclaim_sqlite_space(storage.db_path, full_vacuum, pause=self.pause)
+
+        return report
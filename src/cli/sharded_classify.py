@@ -0,0 +1,283 @@
+"""
+Multi-process sharded offline classification
+
+A single process is limited by image decoding and the GIL long before the
+cores run out, so the input list is cut into contiguous shards and fanned
+out over a pool of worker processes. Each worker loads the classifier once
+(in the pool initializer), pins its own torch/OpenMP thread count so the
+processes don't oversubscribe the CPU, and runs the regular
+`BatchClassificationJob` over one shard at a time into its own JSONL file
+with its own checkpoint.
+
+A shard that raises, or whose worker process dies, is re-queued (on a
+fresh pool if the old one broke) up to `max_retries` times and resumes
+from its checkpoint. Once every shard is done they are merged, in order,
+into the requested output file.
+
+Work directory layout (``<output>.shards/`` by default)::
+
+    plan.json                 shard boundaries for this input
+    shard-00000.jsonl         results of shard 0
+    shard-00000.ckpt.json     its checkpoint while running
+    shard-00000.running       present while a worker is on it
+    shard-00000.done.json     its stats once complete
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from cli.batch_classify import BatchClassificationJob, JsonlResultWriter, open_result_writer
+from cli.classifiers import load_classifier
+
+# Set in each worker process by _init_worker
+_worker_classifier = None
+_worker_threads = None
+
+def _set_thread_count(threads: int):
+    """Limit the math libraries of this process to `threads` threads"""
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+def _init_worker(classifier_factory: Callable, threads: int):
+    global _worker_classifier, _worker_threads
+    _set_thread_count(threads)
+    _worker_threads = threads
+    _worker_classifier = classifier_factory()
+
+def _run_shard(index: int, paths: List[str], work_dir: str, options: Dict) -> Dict:
+    """Classify one shard into its JSONL file and mark it done (runs in a worker process)"""
+    prefix = os.path.join(work_dir, f"shard-{index:05d}")
+    # Left behind if this process dies, which tells the parent which shards were running
+    with open(prefix + ".running", "w") as f:
+        f.write(str(os.getpid()))
+
+    writer = JsonlResultWriter(prefix + ".jsonl")
+    try:
+        job = BatchClassificationJob(
+            _worker_classifier, writer,
+            checkpoint_path=prefix + ".ckpt.json",
+            batch_size=options["batch_size"],
+            workers=options["decode_workers"],
+            top_k=options["top_k"],
+            checkpoint_every=options["checkpoint_every"],
+            progress=lambda message: None
+        )
+        stats = job.run(paths)
+    finally:
+        writer.close()
+        os.remove(prefix + ".running")
+
+    stats.update({"shard": index, "pid": os.getpid(), "threads": _worker_threads})
+    with open(prefix + ".done.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+    os.replace(prefix + ".done.json.tmp", prefix + ".done.json")
+    return stats
+
+class ShardedClassificationRunner:
+    """Classify a list of images with `processes` worker processes and merge the results in order"""
+
+    def __init__(self, classifier_factory: Callable, output: str, output_format: str = None,
+                 work_dir: str = None, processes: int = None, threads_per_process: int = None,
+                 shard_size: int = None, batch_size: int = 64, decode_workers: int = 2,
+                 top_k: int = 5, checkpoint_every: int = 20, max_retries: int = 2,
+                 progress=print):
+        self.classifier_factory = classifier_factory
+        self.output = output
+        self.output_format = output_format
+        self.work_dir = work_dir or output.rstrip("/\\") + ".shards"
+        self.processes = processes or os.cpu_count() or 1
+        self.threads_per_process = threads_per_process or max(1, (os.cpu_count() or 1) // self.processes)
+        self.shard_size = shard_size
+        self.max_retries = max_retries
+        self.progress = progress
+        self.options = {
+            "batch_size": batch_size,
+            "decode_workers": decode_workers,
+            "top_k": top_k,
+            "checkpoint_every": checkpoint_every,
+        }
+        self.logger = logging.getLogger(__name__)
+
+    def _plan(self, total: int) -> List[List[int]]:
+        """Shard boundaries, reused from plan.json so an interrupted run resumes the same shards"""
+        plan_path = os.path.join(self.work_dir, "plan.json")
+        if os.path.exists(plan_path):
+            with open(plan_path, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+            if plan["total"] != total:
+                raise ValueError(f"{self.work_dir} was planned for {plan['total']} images, not {total}; "
+                                 f"use --restart to start over")
+            return plan["shards"]
+
+        # Several shards per process keeps the processes busy when shards finish unevenly
+        shard_size = self.shard_size or max(1, -(-total // (self.processes * 4)))
+        shards = [[start, min(start + shard_size, total)] for start in range(0, total, shard_size)]
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(plan_path, "w", encoding="utf-8") as f:
+            json.dump({"total": total, "shards": shards}, f)
+        return shards
+
+    def _load_done(self, index: int) -> Optional[Dict]:
+        path = os.path.join(self.work_dir, f"shard-{index:05d}.done.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def run(self, paths: List[str], restart: bool = False) -> Dict:
+        """Classify `paths` and write the merged output; returns overall and per-shard stats"""
+        if restart and os.path.exists(self.work_dir):
+            shutil.rmtree(self.work_dir)
+        shards = self._plan(len(paths))
+
+        shard_stats = {}
+        for index in range(len(shards)):
+            done = self._load_done(index)
+            if done:
+                shard_stats[index] = done
+        if shard_stats:
+            self.progress(f"↩️  {len(shard_stats)} of {len(shards)} shards already done")
+
+        attempts = {index: 0 for index in range(len(shards)) if index not in shard_stats}
+        failed = {}
+        stalled_pools = 0
+        start = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+
+        # Markers left by a previous run that was killed
+        for index in attempts:
+            self._clear_running(index)
+
+        def submit(pool, index):
+            return pool.submit(_run_shard, index, paths[shards[index][0]:shards[index][1]],
+                               self.work_dir, self.options)
+
+        while attempts:
+            self.progress(f"🚀 {len(attempts)} shards on {self.processes} processes "
+                          f"x {self.threads_per_process} threads")
+            outcomes = 0
+            with ProcessPoolExecutor(max_workers=self.processes, mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(self.classifier_factory, self.threads_per_process)) as pool:
+                futures = {submit(pool, index): index for index in sorted(attempts)}
+                while futures:
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index = futures.pop(future)
+                        try:
+                            stats = future.result()
+                        except BrokenProcessPool as e:
+                            # Only the shards a worker was on when the pool broke are charged a retry;
+                            # the rest run on the next pool
+                            if self._clear_running(index):
+                                outcomes += 1
+                                self._retry_or_fail(index, e, attempts, failed)
+                            continue
+                        except Exception as e:
+                            outcomes += 1
+                            self._clear_running(index)
+                            if self._retry_or_fail(index, e, attempts, failed):
+                                futures[submit(pool, index)] = index
+                            continue
+
+                        outcomes += 1
+                        stats["attempts"] = attempts.pop(index) + 1
+                        shard_stats[index] = stats
+                        self.progress(f"   shard {index + 1}/{len(shards)}: {stats['done']:,} images, "
+                                      f"{stats['failed']} failed, {stats['images_per_sec']} img/s (pid {stats['pid']})")
+
+            # A pool that broke before running anything (e.g. the classifier failed to load in the workers)
+            if attempts and not outcomes:
+                stalled_pools += 1
+                if stalled_pools > self.max_retries:
+                    for index in list(attempts):
+                        failed[index] = "worker processes failed to start"
+                        del attempts[index]
+                    self.progress("❌ Worker processes failed to start; check that the classifier loads")
+
+        elapsed = time.perf_counter() - start
+        report = {
+            "shards": [shard_stats[index] for index in sorted(shard_stats)],
+            "failed_shards": failed,
+            "seconds": round(elapsed, 2),
+            "processes": self.processes,
+            "threads_per_process": self.threads_per_process,
+        }
+        report["images"] = sum(stats["done"] for stats in report["shards"])
+        report["failed_images"] = sum(stats["failed"] for stats in report["shards"])
+        processed = sum(shards[index][1] - shards[index][0] for index in shard_stats
+                        if shard_stats[index].get("attempts"))
+        report["images_per_sec"] = round(processed / elapsed, 1) if elapsed > 0 else 0.0
+
+        if failed:
+            self.progress(f"❌ {len(failed)} shards failed; rerun to retry them (finished shards are kept)")
+            return report
+
+        self.merge(len(shards))
+        report["output"] = self.output
+        return report
+
+    def _clear_running(self, index: int) -> bool:
+        """Remove a shard's running marker; True if there was one"""
+        path = os.path.join(self.work_dir, f"shard-{index:05d}.running")
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    def _retry_or_fail(self, index: int, error: Exception, attempts: Dict, failed: Dict) -> bool:
+        """Count a failed attempt; True if the shard should be re-queued"""
+        message = str(error) or type(error).__name__
+        attempts[index] += 1
+        if attempts[index] > self.max_retries:
+            failed[index] = message
+            del attempts[index]
+            self.progress(f"❌ Shard {index} failed {self.max_retries + 1} times: {message}")
+            return False
+        self.logger.warning(f"Shard {index} failed: {message}")
+        self.progress(f"⚠️  Shard {index} failed ({message}); re-queued")
+        return True
+
+    def merge(self, shard_count: int):
+        """Concatenate the shard files, in order, into the output"""
+        if os.path.exists(self.output):
+            if os.path.isdir(self.output):
+                shutil.rmtree(self.output)
+            else:
+                os.remove(self.output)
+        writer = open_result_writer(self.output, self.output_format, top_k=self.options["top_k"])
+
+        try:
+            if isinstance(writer, JsonlResultWriter):
+                writer.close()
+                with open(self.output, "wb") as out:
+                    for index in range(shard_count):
+                        with open(os.path.join(self.work_dir, f"shard-{index:05d}.jsonl"), "rb") as f:
+                            shutil.copyfileobj(f, out)
+                return
+
+            for index in range(shard_count):
+                with open(os.path.join(self.work_dir, f"shard-{index:05d}.jsonl"), "r", encoding="utf-8") as f:
+                    writer.write([json.loads(line) for line in f])
+                # Parquet writes one part file per shard
+                writer.state()
+        finally:
+            writer.close()
+
+def classifier_factory(name: str, **kwargs) -> Callable:
+    """A picklable callable that builds classifier `name` inside a worker process"""
+    return partial(load_classifier, name, **kwargs)
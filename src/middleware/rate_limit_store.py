@@ -0,0 +1,438 @@
+"""
+Pluggable rate-limit and counter stores for VisionAI Pro API
+
+Stores are selected with a URI (``Config.RATE_LIMIT_STORAGE``):
+
+- ``memory://``            per-process token buckets (single worker only)
+- ``shm:///path?slots=N``  mmap-backed table shared by every worker on a host
+- ``redis://host:port/db`` Redis, shared across hosts
+"""
+
+import os
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from middleware.rate_limiter import TokenBucketLimiter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class RateLimitTableFull(RuntimeError):
+    """Every slot a key may use holds another client's live state"""
+
+class RateLimitStore:
+    """Common interface for token-bucket checks and shared counters"""
+
+    # URI handed to slowapi's Limiter so both layers use the same backend
+    storage_uri = "memory://"
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        """Consume one token from key's bucket, returning False if it is empty"""
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: float = 1, expiry: Optional[float] = None) -> float:
+        """Increment a counter, starting a new one (expiring in `expiry` seconds) if absent"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> float:
+        """Return the current value of a counter (0 if absent or expired)"""
+        raise NotImplementedError
+
+    def get_expiry(self, key: str) -> float:
+        """Return the wall-clock time at which key expires"""
+        raise NotImplementedError
+
+    def clear(self, key: str):
+        """Forget a single key"""
+        raise NotImplementedError
+
+    def reset(self) -> int:
+        """Forget every key, returning how many were live"""
+        raise NotImplementedError
+
+    def check(self) -> bool:
+        """Return True if the backend is reachable"""
+        return True
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Per-process store backed by TokenBucketLimiter"""
+
+    def __init__(self):
+        self._limiters: Dict[float, TokenBucketLimiter] = {}
+        self._counters: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        limiter = self._limiters.get(window)
+        if limiter is None:
+            limiter = self._limiters.setdefault(window, TokenBucketLimiter(limit, window))
+        return limiter.allow(key, limit)
+
+    def incr(self, key: str, amount: float = 1, expiry: Optional[float] = None) -> float:
+        now = time.time()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter[1] <= now:
+                counter = [0, now + expiry if expiry else float("inf")]
+                self._counters[key] = counter
+            counter[0] += amount
+            return counter[0]
+
+    def get(self, key: str) -> float:
+        counter = self._counters.get(key)
+        if counter is None or counter[1] <= time.time():
+            return 0
+        return counter[0]
+
+    def get_expiry(self, key: str) -> float:
+        counter = self._counters.get(key)
+        return counter[1] if counter else time.time()
+
+    def clear(self, key: str):
+        with self._lock:
+            self._counters.pop(key, None)
+            for limiter in self._limiters.values():
+                limiter.reset(key)
+
+    def reset(self) -> int:
+        with self._lock:
+            count = len(self._counters) + sum(len(l) for l in self._limiters.values())
+            self._counters.clear()
+            self._limiters.clear()
+            return count
+
+class SharedMemoryRateLimitStore(RateLimitStore):
+    """Fixed-size hash table in an mmap'd file, shared atomically by all workers on a host
+
+    Every slot holds (key hash, value, last update, expiry). A slot whose
+    expiry has passed is free for reuse, so idle clients cost nothing and
+    the file never grows. Updates are serialized with a POSIX record lock,
+    which works across forked and spawned workers alike.
+
+    Live slots are never evicted: a new key whose probe slots are all live
+    raises RateLimitTableFull. An existing table with a different slot
+    count is refused rather than resized under other workers' mappings.
+    """
+
+    MAGIC = b"VAIRL001"
+    HEADER = struct.Struct("<8sI")
+    HEADER_SIZE = 64
+    SLOT = struct.Struct("<Qddd")
+    PROBES = 8
+
+    def __init__(self, path: str, slots: int = 65536):
+        if fcntl is None:
+            raise RuntimeError("Shared-memory rate limiting requires fcntl (POSIX)")
+
+        self.path = path
+        self.slots = slots
+        self.size = self.HEADER_SIZE + slots * self.SLOT.size
+        self.storage_uri = f"shm://{path}?slots={slots}"
+        self._lock = threading.Lock()
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            self._prepare_file()
+        self._mm = mmap.mmap(self._fd, self.size)
+
+    def _prepare_file(self):
+        """Create the table if the file is new, else check that its layout matches"""
+        header = os.pread(self._fd, self.HEADER.size, 0)
+        # An all-zero header means a creator died before finishing: nobody has it mapped
+        if len(header) == self.HEADER.size and header != bytes(self.HEADER.size):
+            magic, slots = self.HEADER.unpack(header)
+            if magic != self.MAGIC:
+                raise ValueError(f"{self.path} is not a rate limit table")
+            if slots != self.slots or os.fstat(self._fd).st_size != self.size:
+                # Other workers may have it mapped: resizing it would crash them (SIGBUS)
+                raise ValueError(
+                    f"Rate limit table at {self.path} has {slots} slots, not {self.slots}; "
+                    f"use the same slots in every worker or remove the file while no worker is running"
+                )
+            return
+
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self.size)
+        os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, self.slots), 0)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Python's hash() is randomized per process, so use a stable digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def _offset(self, index: int) -> int:
+        return self.HEADER_SIZE + index * self.SLOT.size
+
+    def _find(self, key_hash: int, now: float, create: bool = True) -> Optional[int]:
+        """Return the slot holding key_hash, else a free slot if create"""
+        start = key_hash % self.slots
+        free = None
+
+        for probe in range(self.PROBES):
+            index = (start + probe) % self.slots
+            slot_hash, _, _, expires = self.SLOT.unpack_from(self._mm, self._offset(index))
+            if slot_hash == key_hash:
+                return index
+            if free is None and (slot_hash == 0 or expires <= now):
+                free = index
+
+        if not create:
+            return None
+        if free is None:
+            raise RateLimitTableFull(
+                f"Rate limit table at {self.path} is full around this key; increase slots (now {self.slots})"
+            )
+        return free
+
+    def _read(self, index: int):
+        return self.SLOT.unpack_from(self._mm, self._offset(index))
+
+    def _write(self, index: int, key_hash: int, value: float, updated: float, expires: float):
+        self.SLOT.pack_into(self._mm, self._offset(index), key_hash, value, updated, expires)
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        key_hash = self._hash(key)
+        now = time.time()
+
+        with self._locked():
+            index = self._find(key_hash, now)
+            slot_hash, tokens, last, expires = self._read(index)
+            if slot_hash != key_hash or expires <= now:
+                tokens = float(limit)
+            else:
+                tokens = min(float(limit), tokens + (now - last) * limit / window)
+
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+
+            # A bucket idle for a full window is full again, so it may be reused after that
+            self._write(index, key_hash, tokens, now, now + window)
+            return allowed
+
+    def incr(self, key: str, amount: float = 1, expiry: Optional[float] = None) -> float:
+        key_hash = self._hash(key)
+        now = time.time()
+
+        with self._locked():
+            index = self._find(key_hash, now)
+            slot_hash, value, _, expires = self._read(index)
+            if slot_hash != key_hash or expires <= now:
+                value = 0.0
+                expires = now + expiry if expiry else float("inf")
+
+            value += amount
+            self._write(index, key_hash, value, now, expires)
+            return value
+
+    def get(self, key: str) -> float:
+        now = time.time()
+        with self._locked():
+            index = self._find(self._hash(key), now, create=False)
+            if index is None:
+                return 0
+            _, value, _, expires = self._read(index)
+            return value if expires > now else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        with self._locked():
+            index = self._find(self._hash(key), now, create=False)
+            if index is None:
+                return now
+            return self._read(index)[3]
+
+    def clear(self, key: str):
+        with self._locked():
+            index = self._find(self._hash(key), time.time(), create=False)
+            if index is not None:
+                self._write(index, 0, 0.0, 0.0, 0.0)
+
+    def reset(self) -> int:
+        now = time.time()
+        live = 0
+        with self._locked():
+            for index in range(self.slots):
+                slot_hash, _, _, expires = self._read(index)
+                if slot_hash and expires > now:
+                    live += 1
+            self._mm[self.HEADER_SIZE:self.size] = bytes(self.size - self.HEADER_SIZE)
+        return live
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+class RedisRateLimitStore(RateLimitStore):
+    """Redis-backed store; buckets are updated atomically with a Lua script"""
+
+    PREFIX = "visionai:rl:"
+
+    HIT_SCRIPT = """
+    local limit = tonumber(ARGV[1])
+    local window = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1])
+    if tokens == nil then
+        tokens = limit
+    else
+        tokens = math.min(limit, tokens + (now - tonumber(bucket[2])) * limit / window)
+    end
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(window))
+    return allowed
+    """
+
+    INCR_SCRIPT = """
+    local value = redis.call('INCRBYFLOAT', KEYS[1], ARGV[1])
+    if ARGV[2] ~= '' and redis.call('TTL', KEYS[1]) < 0 then
+        redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2])))
+    end
+    return value
+    """
+
+    def __init__(self, uri: str):
+        import redis
+
+        self.storage_uri = uri
+        self.client = redis.Redis.from_url(uri, decode_responses=True)
+        self._hit = self.client.register_script(self.HIT_SCRIPT)
+        self._incr = self.client.register_script(self.INCR_SCRIPT)
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        return bool(self._hit(keys=[self.PREFIX + key], args=[limit, window, time.time()]))
+
+    def incr(self, key: str, amount: float = 1, expiry: Optional[float] = None) -> float:
+        return float(self._incr(keys=[self.PREFIX + key], args=[amount, expiry or ""]))
+
+    def get(self, key: str) -> float:
+        value = self.client.get(self.PREFIX + key)
+        return float(value) if value is not None else 0
+
+    def get_expiry(self, key: str) -> float:
+        ttl = self.client.ttl(self.PREFIX + key)
+        return time.time() + max(ttl, 0)
+
+    def clear(self, key: str):
+        self.client.delete(self.PREFIX + key)
+
+    def reset(self) -> int:
+        keys = list(self.client.scan_iter(match=self.PREFIX + "*"))
+        if keys:
+            self.client.delete(*keys)
+        return len(keys)
+
+    def check(self) -> bool:
+        try:
+            return bool(self.client.ping())
+        except Exception:
+            return False
+
+def default_shared_memory_path() -> str:
+    """Prefer tmpfs so the table never touches disk"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "visionai_ratelimit")
+
+# One instance per path per process: POSIX record locks are per-process, and
+# closing any second descriptor on the same file would drop them.
+_shared_stores: Dict[str, SharedMemoryRateLimitStore] = {}
+
+def open_shared_memory_store(uri: str) -> SharedMemoryRateLimitStore:
+    """Open (or reuse) the shared-memory store described by a shm:// URI"""
+    parsed = urlparse(uri)
+    path = parsed.path or default_shared_memory_path()
+    slots = int(parse_qs(parsed.query).get("slots", ["65536"])[0])
+
+    store = _shared_stores.get(path)
+    if store is None:
+        store = SharedMemoryRateLimitStore(path, slots)
+        _shared_stores[path] = store
+    elif store.slots != slots:
+        raise ValueError(f"Rate limit table at {path} is already open with {store.slots} slots, not {slots}")
+    return store
+
+def create_rate_limit_store(uri: str) -> RateLimitStore:
+    """Build the store for a storage URI, falling back to per-process memory"""
+    scheme = urlparse(uri).scheme
+
+    try:
+        if scheme == "shm":
+            store = open_shared_memory_store(uri)
+        elif scheme in ("redis", "rediss"):
+            store = RedisRateLimitStore(uri)
+            if not store.check():
+                raise ConnectionError(f"Redis not reachable at {uri}")
+        else:
+            store = MemoryRateLimitStore()
+        logger.info(f"Rate limit storage: {store.storage_uri}")
+        return store
+    except Exception as e:
+        logger.warning(f"Rate limit storage {uri} unavailable ({e}), using in-memory rate limiting")
+        return MemoryRateLimitStore()
+
+# slowapi integration: register shm:// as a `limits` storage scheme so the
+# Limiter's fixed-window counters live in the same shared table.
+try:
+    from limits.storage import Storage as _LimitsStorage
+except ImportError:
+    _LimitsStorage = None
+
+if _LimitsStorage is not None:
+    class SharedMemoryLimitsStorage(_LimitsStorage):
+        """`limits` storage adapter over SharedMemoryRateLimitStore"""
+
+        STORAGE_SCHEME = ["shm"]
+
+        def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+            self.store = open_shared_memory_store(uri)
+            super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+        @property
+        def base_exceptions(self):
+            return (OSError, ValueError, RateLimitTableFull)
+
+        def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+            return int(self.store.incr("limits:" + key, amount, expiry))
+
+        def get(self, key: str) -> int:
+            return int(self.store.get("limits:" + key))
+
+        def get_expiry(self, key: str) -> float:
+            return self.store.get_expiry("limits:" + key)
+
+        def check(self) -> bool:
+            return True
+
+        def reset(self) -> Optional[int]:
+            return self.store.reset()
+
+        def clear(self, key: str) -> None:
+            self.store.clear("limits:" + key)
@@ -0,0 +1,90 @@
+"""
+Token-bucket rate limiter for VisionAI Pro API
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class TokenBucketLimiter:
+    """In-memory token-bucket rate limiter with O(1) checks and idle-client eviction
+
+    Each client key (IP address, API key, ...) owns a bucket holding at most
+    ``limit`` tokens that refills at ``limit / window`` tokens per second.
+    A bucket that has been idle for a full window is indistinguishable from
+    a fresh one, so it is evicted instead of being kept around forever.
+    """
+
+    def __init__(self, default_limit: int = 60, window: float = 60.0,
+                 evict_batch: int = 8, clock: Callable[[], float] = time.monotonic):
+        self.default_limit = default_limit
+        self.window = window
+        self.evict_batch = evict_batch
+        self.clock = clock
+        # key -> [tokens, last_refill]; ordered from least to most recently used
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, limit: Optional[int] = None) -> bool:
+        """Consume one token for key, returning False if the bucket is empty"""
+        limit = limit or self.default_limit
+        now = self.clock()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(limit), now]
+                self._buckets[key] = bucket
+            else:
+                # Refill proportionally to the time elapsed since the last request
+                elapsed = now - bucket[1]
+                bucket[0] = min(float(limit), bucket[0] + elapsed * limit / self.window)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+
+            self._evict_idle(now)
+
+            if bucket[0] < 1.0:
+                return False
+
+            bucket[0] -= 1.0
+            return True
+
+    def _evict_idle(self, now: float):
+        """Drop a bounded number of buckets that have been idle for a full window"""
+        cutoff = now - self.window
+        for _ in range(self.evict_batch):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[1] > cutoff:
+                return
+            del self._buckets[key]
+
+    def sweep(self) -> int:
+        """Evict every idle bucket, returning the number removed"""
+        cutoff = self.clock() - self.window
+        removed = 0
+
+        with self._lock:
+            while self._buckets:
+                key, bucket = next(iter(self._buckets.items()))
+                if bucket[1] > cutoff:
+                    break
+                del self._buckets[key]
+                removed += 1
+
+        return removed
+
+    def reset(self, key: Optional[str] = None):
+        """Forget one client's bucket, or all of them"""
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
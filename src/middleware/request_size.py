@@ -0,0 +1,84 @@
+"""
+Request body size limit for VisionAI Pro API servers
+
+Starlette spools multipart uploads to a temporary file as they arrive, so
+MAX_FILE_SIZE can only be checked on the file once the whole body has been
+written. What bounds the spooled file is this limit: the body is counted
+while it streams in and the request is answered with 413 as soon as it
+crosses MAX_REQUEST_SIZE, whether or not a Content-Length was sent.
+SecurityMiddleware applies the same check; servers without it use
+RequestSizeLimitMiddleware.
+"""
+
+import json
+import logging
+from fastapi import HTTPException
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+class RequestTooLarge(HTTPException):
+    """Raised from the receive channel once a streamed request body exceeds the limit"""
+
+    def __init__(self, max_size: int):
+        super().__init__(status_code=413, detail=f"Request too large. Maximum size: {max_size} bytes")
+
+def limit_receive(receive, max_size: int):
+    """Wrap an ASGI receive channel so it raises RequestTooLarge past `max_size` body bytes"""
+    body_size = 0
+
+    async def receive_limited():
+        nonlocal body_size
+        message = await receive()
+        if message["type"] == "http.request":
+            body_size += len(message.get("body", b""))
+            if body_size > max_size:
+                raise RequestTooLarge(max_size)
+        return message
+
+    return receive_limited
+
+class RequestSizeLimitMiddleware:
+    """Pure ASGI middleware rejecting request bodies over `max_size` bytes with 413"""
+
+    def __init__(self, app, max_size: int = None):
+        self.app = app
+        self.max_size = max_size or Config.MAX_REQUEST_SIZE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and int(content_length) > self.max_size:
+            await self._reject(send)
+            return
+
+        response_started = False
+
+        async def send_tracked(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limit_receive(receive, self.max_size), send_tracked)
+        except RequestTooLarge:
+            if response_started:
+                raise
+            logger.warning("Request body exceeded %d bytes while streaming", self.max_size)
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"error": "Request too large", "detail": f"Maximum size: {self.max_size} bytes"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
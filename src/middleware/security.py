@@ -2,63 +2,61 @@
 Security middleware for VisionAI Pro API
 """
 
+import json
 import time
 import logging
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Callable, List, Optional
+from urllib.parse import parse_qs
 from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-import redis
 from config.config import Config
+from middleware.rate_limit_store import MemoryRateLimitStore, RateLimitTableFull, create_rate_limit_store
+from middleware.request_size import RequestTooLarge, limit_receive
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Redis connection for rate limiting (fallback to in-memory if Redis not available)
-try:
-    redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-    redis_client.ping()
-    logger.info("Redis connected successfully for rate limiting")
-except:
-    redis_client = None
-    logger.warning("Redis not available, using in-memory rate limiting")
+# Rate limit store shared by the middleware and slowapi (memory://, shm://, redis://)
+rate_limit_store = create_rate_limit_store(Config.RATE_LIMIT_STORAGE)
 
 # Rate limiter
 limiter = Limiter(
     key_func=get_remote_address,
-    storage_uri="redis://localhost:6379" if redis_client else "memory://",
+    storage_uri=rate_limit_store.storage_uri,
     default_limits=[f"{Config.RATE_LIMIT_PER_MINUTE}/minute"]
 )
 
-# In-memory rate limiting fallback
-rate_limit_storage: Dict[str, List[float]] = {}
+# Per-process token buckets for keys the shared table has no room for
+fallback_store = MemoryRateLimitStore()
+_table_full_logged_at = 0.0
+
+def _hit(key: str, limit: int, window: int) -> bool:
+    global _table_full_logged_at
+    try:
+        return rate_limit_store.hit(key, limit, window)
+    except RateLimitTableFull as e:
+        # The shared table never evicts a live bucket; limit this key per process instead
+        now = time.monotonic()
+        if now - _table_full_logged_at >= 60:
+            _table_full_logged_at = now
+            logger.error("%s; limiting new keys per process until slots free up", e)
+        return fallback_store.hit(key, limit, window)
 
 def check_rate_limit(client_ip: str, limit: int = 60, window: int = 60) -> bool:
     """Check if client has exceeded rate limit"""
-    if redis_client:
-        return True  # Redis handles this
-    
-    current_time = time.time()
-    if client_ip not in rate_limit_storage:
-        rate_limit_storage[client_ip] = []
-    
-    # Remove old requests outside the window
-    rate_limit_storage[client_ip] = [
-        req_time for req_time in rate_limit_storage[client_ip]
-        if current_time - req_time < window
-    ]
-    
-    # Check if limit exceeded
-    if len(rate_limit_storage[client_ip]) >= limit:
-        return False
-    
-    # Add current request
-    rate_limit_storage[client_ip].append(current_time)
-    return True
+    return _hit(f"ip:{client_ip}", limit, window)
+
+def get_api_key_rate_limit(api_key: str) -> int:
+    """Return the per-minute limit configured for an API key"""
+    return Config.API_KEY_RATE_LIMITS.get(api_key, Config.API_KEY_RATE_LIMIT_PER_MINUTE)
+
+def check_api_key_rate_limit(api_key: str) -> bool:
+    """Check if an API key has exceeded its own rate limit"""
+    return _hit(f"key:{api_key}", get_api_key_rate_limit(api_key), 60)
 
 def validate_origin(request: Request, allowed_origins: List[str]) -> bool:
     """Validate request origin"""
@@ -74,79 +72,180 @@ def validate_host(request: Request, allowed_hosts: List[str]) -> bool:
     return host in allowed_hosts
 
 def validate_request_size(request: Request, max_size: int) -> bool:
-    """Validate request size"""
+    """Validate request size from the Content-Length header (the streamed body is checked by SecurityMiddleware)"""
     content_length = request.headers.get("content-length")
     if content_length and int(content_length) > max_size:
         return False
     return True
 
-async def security_middleware(request: Request, call_next):
-    """Main security middleware"""
-    try:
-        # Get client IP
-        client_ip = get_remote_address(request)
-        
-        # Check rate limit
-        if not check_rate_limit(client_ip, Config.RATE_LIMIT_PER_MINUTE):
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            return JSONResponse(
-                status_code=429,
-                content={"error": "Rate limit exceeded", "detail": "Too many requests"}
-            )
-        
-        # Validate origin if external access is enabled
-        if Config.ENABLE_EXTERNAL_ACCESS:
-            if not validate_origin(request, Config.ALLOWED_ORIGINS):
-                logger.warning(f"Invalid origin: {request.headers.get('origin')} from IP: {client_ip}")
-                return JSONResponse(
-                    status_code=403,
-                    content={"error": "Forbidden", "detail": "Origin not allowed"}
-                )
-            
-            if not validate_host(request, Config.ALLOWED_HOSTS):
-                logger.warning(f"Invalid host: {request.headers.get('host')} from IP: {client_ip}")
-                return JSONResponse(
-                    status_code=403,
-                    content={"error": "Forbidden", "detail": "Host not allowed"}
-                )
-        
-        # Validate request size
-        if not validate_request_size(request, Config.MAX_REQUEST_SIZE):
-            logger.warning(f"Request too large from IP: {client_ip}")
-            return JSONResponse(
-                status_code=413,
-                content={"error": "Request too large", "detail": f"Maximum size: {Config.MAX_REQUEST_SIZE} bytes"}
-            )
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url} from {client_ip}")
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        return response
-        
-    except Exception as e:
-        logger.error(f"Security middleware error: {str(e)}")
-        return JSONResponse(
-            status_code=500,
-            content={"error": "Internal server error", "detail": "Security check failed"}
-        )
-
-def setup_security_middleware(app):
-    """Setup security middleware for FastAPI app"""
-    # Add rate limiting
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+
+class KeyValidationCache:
+    """Remembers, for `ttl` seconds, whether an API key is valid (bounded LRU)"""
+
+    def __init__(self, validator: Callable[[str], bool], ttl: float = 60.0, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.validator = validator
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def is_valid(self, api_key: str) -> bool:
+        now = self.clock()
+        entry = self._entries.get(api_key)
+        if entry is not None and entry[1] > now:
+            self._entries.move_to_end(api_key)
+            return entry[0]
+
+        try:
+            valid = bool(self.validator(api_key))
+        except Exception as e:
+            logger.error("API key validation failed: %s", e)
+            return False
+
+        self._entries[api_key] = (valid, now + self.ttl)
+        self._entries.move_to_end(api_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return valid
+
+class SecurityMiddleware:
+    """Pure ASGI security middleware
+
+    Performs rate limit, origin, host and request size checks straight on
+    the ASGI scope and appends security headers to the response start
+    message, so the response body is passed through untouched. The request
+    body is counted as it streams in, so chunked uploads without a
+    Content-Length header are cut off as soon as they cross the limit.
+    Only one in every ``log_sample_every`` accepted requests is logged.
+
+    API keys get their own rate limit bucket only once `key_validator`
+    accepts them, so random keys can't fill the rate limit table; without
+    a validator only the per-IP limit applies.
+    """
+
+    def __init__(self, app, config=Config, log_sample_every: int = None,
+                 key_validator: Optional[Callable[[str], bool]] = None):
+        self.app = app
+        self.known_keys = KeyValidationCache(key_validator) if key_validator else None
+        self.rate_limit = config.RATE_LIMIT_PER_MINUTE
+        self.max_request_size = config.MAX_REQUEST_SIZE
+        self.external_access = config.ENABLE_EXTERNAL_ACCESS
+        self.allowed_origins = frozenset(o.strip() for o in config.ALLOWED_ORIGINS)
+        self.allowed_hosts = frozenset(h.strip() for h in config.ALLOWED_HOSTS)
+        self.log_sample_every = max(1, log_sample_every or config.SECURITY_LOG_SAMPLE_EVERY)
+        self._request_count = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            rejection = self._check(scope)
+        except Exception as e:
+            logger.error("Security middleware error: %s", e)
+            rejection = (500, {"error": "Internal server error", "detail": "Security check failed"})
+
+        if rejection is not None:
+            await self._reject(send, *rejection)
+            return
+
+        response_started = False
+
+        async def send_with_headers(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                message["headers"] = list(message.get("headers", [])) + SECURITY_HEADERS
+            await send(message)
+
+        try:
+            await self.app(scope, limit_receive(receive, self.max_request_size), send_with_headers)
+        except RequestTooLarge:
+            if response_started:
+                raise
+            logger.warning("Request body exceeded %d bytes while streaming", self.max_request_size)
+            await self._reject(send, 413, {"error": "Request too large", "detail": f"Maximum size: {self.max_request_size} bytes"})
+
+    def _check(self, scope):
+        """Return (status, body) for a rejected request, or None if it may proceed"""
+        headers = dict(scope["headers"])
+        client = scope.get("client")
+        client_ip = client[0] if client else "127.0.0.1"
+
+        # Rate limits: per IP, then per API key (header or query string)
+        if not check_rate_limit(client_ip, self.rate_limit):
+            logger.warning("Rate limit exceeded for IP: %s", client_ip)
+            return 429, {"error": "Rate limit exceeded", "detail": "Too many requests"}
+
+        api_key = headers.get(b"x-api-key")
+        if api_key is None and b"api_key=" in scope.get("query_string", b""):
+            values = parse_qs(scope["query_string"].decode("latin-1")).get("api_key")
+            api_key = values[0] if values else None
+        elif api_key is not None:
+            api_key = api_key.decode("latin-1")
+
+        # Only validated keys get a bucket; others are rejected by the app and count against the IP
+        known_key = bool(api_key) and self.known_keys is not None and self.known_keys.is_valid(api_key)
+        if known_key and not check_api_key_rate_limit(api_key):
+            logger.warning("Rate limit exceeded for API key: %s... from IP: %s", api_key[:8], client_ip)
+            return 429, {"error": "Rate limit exceeded", "detail": "Too many requests for this API key"}
+
+        # Origin and host checks if external access is enabled
+        if self.external_access:
+            origin = headers.get(b"origin")
+            if origin is not None and origin.decode("latin-1") not in self.allowed_origins:
+                logger.warning("Invalid origin: %s from IP: %s", origin, client_ip)
+                return 403, {"error": "Forbidden", "detail": "Origin not allowed"}
+
+            host = headers.get(b"host", b"").decode("latin-1").split(":")[0]
+            if host not in self.allowed_hosts:
+                logger.warning("Invalid host: %s from IP: %s", host, client_ip)
+                return 403, {"error": "Forbidden", "detail": "Host not allowed"}
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and int(content_length) > self.max_request_size:
+            logger.warning("Request too large from IP: %s", client_ip)
+            return 413, {"error": "Request too large", "detail": f"Maximum size: {self.max_request_size} bytes"}
+
+        # Sampled request logging
+        self._request_count += 1
+        if self._request_count % self.log_sample_every == 0 and logger.isEnabledFor(logging.INFO):
+            logger.info("Request: %s %s from %s (1 in %d sampled)",
+                        scope["method"], scope["path"], client_ip, self.log_sample_every)
+
+        return None
+
+    async def _reject(self, send, status_code: int, content: dict):
+        body = json.dumps(content).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ] + SECURITY_HEADERS,
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def setup_security_middleware(app, key_validator: Optional[Callable[[str], bool]] = None):
+    """Setup security middleware for FastAPI app
+
+    `key_validator(api_key) -> bool` enables the per-API-key rate limit.
+    """
+    # Expose the slowapi limiter for per-route @limiter.limit decorators.
+    # Global limits are enforced once, by SecurityMiddleware.
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
     
     # Add custom security middleware
-    app.middleware("http")(security_middleware)
+    app.add_middleware(SecurityMiddleware, key_validator=key_validator)
     
     return app
@@ -2,7 +2,6 @@ import torch
 import torch.nn as nn
 import torchvision.transforms as transforms
 from torchvision.models import resnet50, ResNet50_Weights, efficientnet_b3, EfficientNet_B3_Weights
-from transformers import AutoImageProcessor, AutoModelForImageClassification
 from PIL import Image
 import numpy as np
 from typing import List, Dict, Tuple, Optional
@@ -82,6 +81,9 @@ class AdvancedImageClassifier:
     def _setup_huggingface_model(self):
         """Hugging Face 모델 설정"""
         try:
+            # transformers는 ViT를 쓸 때만 로드
+            from transformers import AutoImageProcessor, AutoModelForImageClassification
+            
             # Google의 Vision Transformer 모델 사용
             model_name = "google/vit-base-patch16-224"
             self.processor = AutoImageProcessor.from_pretrained(model_name)
@@ -96,6 +98,7 @@ class AdvancedImageClassifier:
             
         except Exception as e:
             self.logger.error(f"Hugging Face 모델 로드 실패: {e}")
+            self.model_type = "resnet50"  # 전처리도 ResNet50 기준으로
             self._setup_resnet50()  # 폴백
     
     def _load_imagenet_categories(self) -> List[str]:
@@ -138,40 +141,37 @@ class AdvancedImageClassifier:
     def predict(self, image: Image.Image, top_k: int = 5) -> List[Dict[str, float]]:
         """이미지 분류 예측"""
         try:
-            # 이미지 전처리
-            if self.model_type == "huggingface":
-                inputs = self.preprocess_image(image)
-                
-                # 예측
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    probabilities = torch.softmax(outputs.logits, dim=1)
-            else:
-                input_tensor = self.preprocess_image(image)
-                
-                # 예측
-                with torch.no_grad():
-                    outputs = self.model(input_tensor)
-                    probabilities = torch.softmax(outputs, dim=1)
-            
-            # 상위 k개 결과 반환
-            top_probs, top_indices = torch.topk(probabilities, min(top_k, len(self.categories)))
-            
-            results = []
-            for prob, idx in zip(top_probs[0], top_indices[0]):
-                category = self.categories[idx.item()]
-                confidence = prob.item()
-                results.append({
-                    "category": category,
-                    "confidence": round(confidence, 4)
-                })
-            
-            return results
+            return self.predict_batch([image], top_k=top_k)[0]
             
         except Exception as e:
             self.logger.error(f"예측 중 오류 발생: {e}")
             return [{"category": "Error", "confidence": 0.0}]
     
+    def predict_batch(self, images: List[Image.Image], top_k: int = 5) -> List[List[Dict[str, float]]]:
+        """여러 이미지를 한 번의 forward pass로 분류 (실패 시 예외 발생)"""
+        images = [image if image.mode == 'RGB' else image.convert('RGB') for image in images]
+        
+        # 예측
+        with torch.no_grad():
+            if self.model_type == "huggingface":
+                inputs = self.processor(images=images, return_tensors="pt").to(self.device)
+                logits = self.model(**inputs).logits
+            else:
+                batch = torch.stack([self.transform(image) for image in images]).to(self.device)
+                logits = self.model(batch)
+            probabilities = torch.softmax(logits, dim=1)
+        
+        # 이미지별 상위 k개 결과 반환
+        top_probs, top_indices = torch.topk(probabilities, min(top_k, len(self.categories)), dim=1)
+        
+        return [
+            [
+                {"category": self.categories[idx], "confidence": round(prob, 4)}
+                for prob, idx in zip(probs, indices)
+            ]
+            for probs, indices in zip(top_probs.tolist(), top_indices.tolist())
+        ]
+    
     def predict_with_confidence_threshold(self, image: Image.Image, threshold: float = 0.1) -> List[Dict[str, float]]:
         """신뢰도 임계값을 적용한 예측"""
         predictions = self.predict(image, top_k=20)
@@ -193,7 +193,7 @@ class AdvancedImageClassifier:
 class MultiModelEnsemble:
     """여러 모델을 조합한 앙상블 분류기"""
     
-    def __init__(self, models: List[str] = None):
+    def __init__(self, models: List[str] = None, device: str = "cpu"):
         self.models = []
         self.logger = logging.getLogger(__name__)
         
@@ -202,7 +202,7 @@ class MultiModelEnsemble:
         
         for model_type in models:
             try:
-                classifier = AdvancedImageClassifier(model_type)
+                classifier = AdvancedImageClassifier(model_type, device=device)
                 self.models.append(classifier)
                 self.logger.info(f"{model_type} 모델 추가됨")
             except Exception as e:
@@ -210,17 +210,36 @@ class MultiModelEnsemble:
     
     def predict_ensemble(self, image: Image.Image, top_k: int = 5) -> List[Dict[str, float]]:
         """앙상블 예측"""
-        all_predictions = []
+        try:
+            return self.predict_batch([image], top_k=top_k)[0]
+            
+        except Exception as e:
+            self.logger.error(f"모델 예측 실패: {e}")
+            return [{"category": "Error", "confidence": 0.0}]
+    
+    def predict_batch(self, images: List[Image.Image], top_k: int = 5) -> List[List[Dict[str, float]]]:
+        """이미지 배치 앙상블 예측 - 모델마다 한 번의 forward pass (모든 모델 실패 시 예외 발생)"""
+        all_predictions = [[] for _ in images]
+        failures = []
         
-        # 각 모델에서 예측
+        # 각 모델에서 예측 - 실패한 모델은 건너뛰고 나머지 모델로 결합
         for model in self.models:
             try:
-                predictions = model.predict(image, top_k=top_k)
-                all_predictions.extend(predictions)
+                batch_predictions = model.predict_batch(images, top_k=top_k)
             except Exception as e:
-                self.logger.error(f"모델 예측 실패: {e}")
+                self.logger.error(f"{model.model_type} 모델 예측 실패, 앙상블에서 제외: {e}")
+                failures.append(e)
+                continue
+            for predictions, model_predictions in zip(all_predictions, batch_predictions):
+                predictions.extend(model_predictions)
         
-        # 카테고리별 평균 신뢰도 계산
+        if self.models and len(failures) == len(self.models):
+            raise RuntimeError(f"앙상블의 모든 모델 예측 실패: {failures[-1]}") from failures[-1]
+        
+        return [self._combine(predictions, top_k) for predictions in all_predictions]
+    
+    def _combine(self, all_predictions: List[Dict[str, float]], top_k: int) -> List[Dict[str, float]]:
+        """카테고리별 평균 신뢰도로 결합"""
         category_scores = {}
         for pred in all_predictions:
             category = pred["category"]
@@ -0,0 +1,105 @@
+"""
+Content-addressed blob store for VisionAI Pro uploads
+
+Each upload is stored once under the SHA-256 of its bytes, in sharded
+directories (``ab/cd/abcd...``) so no directory grows too large. The file
+is hashed while it is copied to a temporary file, then linked into place;
+if the blob already exists the copy is discarded, so identical images
+share one file however many records point at them. Classification records
+keep the digest, and reprocessing jobs read images back with `path_for`.
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+from typing import BinaryIO, Iterator
+
+CHUNK_SIZE = 1024 * 1024
+
+class BlobStore:
+    """SHA-256 content-addressed file store with sharded directories"""
+
+    def __init__(self, root: str, shard_depth: int = 2):
+        self.root = os.path.abspath(root)
+        self.shard_depth = shard_depth
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        """Filesystem path of a blob (whether or not it exists)"""
+        shards = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        return os.path.join(self.root, *shards, digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest))
+
+    def put(self, fp: BinaryIO) -> str:
+        """Store the rest of a file object and return its SHA-256 hex digest"""
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            hex_digest = digest.hexdigest()
+            self._commit(tmp_path, hex_digest)
+            return hex_digest
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def put_bytes(self, data: bytes) -> str:
+        """Store a bytes object and return its SHA-256 hex digest"""
+        hex_digest = hashlib.sha256(data).hexdigest()
+        if self.exists(hex_digest):
+            return hex_digest
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            self._commit(tmp_path, hex_digest)
+            return hex_digest
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _commit(self, tmp_path: str, hex_digest: str):
+        """Move a finished temp file into place unless the blob already exists"""
+        final_path = self.path_for(hex_digest)
+        if os.path.exists(final_path):
+            return
+
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        try:
+            # link() never overwrites, so concurrent writers of the same content keep the first copy
+            os.link(tmp_path, final_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Filesystems without hard links; replacing with identical bytes is harmless
+            os.replace(tmp_path, final_path)
+
+    def open(self, digest: str) -> BinaryIO:
+        """Open a stored blob for reading"""
+        return open(self.path_for(digest), "rb")
+
+    def delete(self, digest: str) -> bool:
+        try:
+            os.unlink(self.path_for(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def iter_digests(self) -> Iterator[str]:
+        """All stored digests, walking the shard directories"""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == self.root and "tmp" in dirnames:
+                dirnames.remove("tmp")
+            for filename in filenames:
+                if len(filename) == 64:
+                    yield filename
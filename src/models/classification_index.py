@@ -0,0 +1,161 @@
+"""
+Local search index for VisionAI Pro classification history
+
+Firestore has no full-text search, so every saved classification is also
+written to a local SQLite database: one row per result keyed by
+(user_id, created_at) plus an FTS5 trigram index over the predicted
+categories and the image path. Trigram tokens keep the old substring
+semantics ("cat" matches "bobcat.jpg") while the lookup itself is an index
+probe, so searching stays fast however much history a user has.
+
+The database runs in WAL mode so several API workers can share one file.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Trigram tokens need at least three characters; shorter queries use LIKE
+MIN_FTS_QUERY_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+    rowid INTEGER PRIMARY KEY,
+    doc_id TEXT UNIQUE NOT NULL,
+    user_id TEXT NOT NULL,
+    created_at TEXT,
+    categories TEXT,
+    image_path TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classifications_user_created
+    ON classifications (user_id, created_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS classification_terms USING fts5(
+    user_id, categories, image_path,
+    content='classifications', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS classifications_ai AFTER INSERT ON classifications BEGIN
+    INSERT INTO classification_terms (rowid, user_id, categories, image_path)
+    VALUES (new.rowid, new.user_id, new.categories, new.image_path);
+END;
+CREATE TRIGGER IF NOT EXISTS classifications_ad AFTER DELETE ON classifications BEGIN
+    INSERT INTO classification_terms (classification_terms, rowid, user_id, categories, image_path)
+    VALUES ('delete', old.rowid, old.user_id, old.categories, old.image_path);
+END;
+"""
+
+def _fts_phrase(text: str) -> str:
+    """Quote text as a single FTS5 phrase"""
+    return '"' + text.replace('"', '""') + '"'
+
+def _prediction_terms(predictions: Iterable) -> str:
+    """Searchable text for a prediction list (category names and other string fields)"""
+    terms = []
+    for pred in predictions or []:
+        if isinstance(pred, dict):
+            terms.extend(str(value) for value in pred.values() if isinstance(value, str))
+        else:
+            terms.append(str(pred))
+    return " ".join(terms)
+
+class ClassificationIndex:
+    """SQLite FTS5 index of classification results, searchable per user"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; FastAPI runs sync work in a thread pool
+
+        Note that each thread gets its own database when db_path is ":memory:".
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, doc_id: str, data: Dict):
+        """Index (or re-index) one classification result"""
+        self.add_many([(doc_id, data)])
+
+    def add_many(self, documents: Iterable[tuple]) -> int:
+        """Index (doc_id, data) pairs in one transaction, returning how many were indexed"""
+        count = 0
+        conn = self._conn()
+        with conn:
+            for doc_id, data in documents:
+                conn.execute("DELETE FROM classifications WHERE doc_id = ?", (doc_id,))
+                conn.execute(
+                    "INSERT INTO classifications (doc_id, user_id, created_at, categories, image_path, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        doc_id,
+                        data.get("user_id", ""),
+                        data.get("created_at"),
+                        _prediction_terms(data.get("predictions")),
+                        data.get("image_path") or "",
+                        json.dumps(data, default=str),
+                    )
+                )
+                count += 1
+        return count
+
+    def remove(self, doc_id: str):
+        """Drop a classification result from the index"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM classifications WHERE doc_id = ?", (doc_id,))
+
+    def search(self, user_id: str, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Newest-first results of `user_id` whose categories or image path contain `query`"""
+        query = query.strip()
+        if not query:
+            return []
+
+        if len(query) >= MIN_FTS_QUERY_LENGTH:
+            match = f"{{categories image_path}}:{_fts_phrase(query)}"
+            if len(user_id) >= MIN_FTS_QUERY_LENGTH:
+                match = f"user_id:{_fts_phrase(user_id)} AND {match}"
+            # IN (subquery) runs the FTS query once; a JOIN makes SQLite re-run it per user row
+            rows = self._conn().execute(
+                "SELECT doc_id, data FROM classifications "
+                "WHERE user_id = ? AND rowid IN "
+                "(SELECT rowid FROM classification_terms WHERE classification_terms MATCH ?) "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (user_id, match, limit, offset)
+            )
+        else:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self._conn().execute(
+                "SELECT doc_id, data FROM classifications "
+                "WHERE user_id = ? AND (categories LIKE ? ESCAPE '\\' OR image_path LIKE ? ESCAPE '\\') "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (user_id, pattern, pattern, limit, offset)
+            )
+
+        results = []
+        for doc_id, data in rows:
+            result = json.loads(data)
+            result["id"] = doc_id
+            results.append(result)
+        return results
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        """Number of indexed results, optionally for one user"""
+        if user_id is None:
+            return self._conn().execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM classifications WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
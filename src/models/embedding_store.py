@@ -0,0 +1,228 @@
+"""
+Local embedding store for VisionAI Pro images
+
+Image embeddings (CLIP features from ZeroShotCustomClassifier) are kept
+keyed by the image's SHA-256, the same key the upload blob store and
+classification records use. Vectors are appended as raw float32 rows to a
+single file that is memory-mapped for reads, and a small SQLite table maps
+each digest to its row, so millions of embeddings can be re-scored against
+a new category set in large matrix batches without touching the images.
+
+A digest alone means nothing to a client of a server without a blob store,
+so each classification also records where the image came from for the
+user who sent it (file name, the caller's own reference, the predictions):
+similarity results can then be mapped back to that user's records.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+class EmbeddingStore:
+    """Append-only float32 embedding matrix keyed by image SHA-256"""
+
+    def __init__(self, root: str, dim: int = None, model_name: str = None):
+        self.root = os.path.abspath(root)
+        self.vectors_path = os.path.join(self.root, "vectors.f32")
+        self.meta_path = os.path.join(self.root, "meta.json")
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._mmap = None
+        os.makedirs(self.root, exist_ok=True)
+
+        meta = self._read_meta()
+        if meta:
+            if dim and dim != meta["dim"]:
+                raise ValueError(f"Embedding store {root} holds {meta['dim']}-d vectors, not {dim}-d")
+            if model_name and meta.get("model_name") and model_name != meta["model_name"]:
+                raise ValueError(f"Embedding store {root} holds {meta['model_name']} embeddings, not {model_name}")
+            self.dim = meta["dim"]
+            self.model_name = meta.get("model_name")
+        else:
+            self.dim = dim
+            self.model_name = model_name
+            if dim:
+                self._write_meta()
+
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (digest TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+        )
+        self._conn().execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                digest TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                filename TEXT,
+                reference TEXT,
+                predictions TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (digest, user_id)
+            )"""
+        )
+        self._conn().commit()
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "model_name": self.model_name, "dtype": "float32"}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __contains__(self, digest: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM embeddings WHERE digest = ?", (digest,)
+        ).fetchone() is not None
+
+    def add(self, digest: str, vector: np.ndarray) -> bool:
+        return self.add_many([digest], np.asarray(vector)[None, :]) == 1
+
+    def add_many(self, digests: Sequence[str], vectors: np.ndarray) -> int:
+        """Append embeddings for digests not stored yet, returning how many were added"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(digests):
+            raise ValueError("vectors must be a (len(digests), dim) matrix")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._write_meta()
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d vectors, got {vectors.shape[1]}-d")
+
+        with self._write_lock, open(self.vectors_path, "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # Skip digests already stored and repeats within the batch
+                seen = self._existing(digests)
+                keep = []
+                for i, digest in enumerate(digests):
+                    if digest not in seen:
+                        seen.add(digest)
+                        keep.append(i)
+                if not keep:
+                    return 0
+
+                # Rows past the last committed one were left by a crashed writer; cut them off
+                conn = self._conn()
+                first_row = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM embeddings").fetchone()[0]
+                if f.seek(0, os.SEEK_END) > first_row * self.dim * 4:
+                    f.truncate(first_row * self.dim * 4)
+
+                f.write(vectors[keep].tobytes())
+                f.flush()
+
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO embeddings (digest, row) VALUES (?, ?)",
+                        [(digests[i], first_row + n) for n, i in enumerate(keep)]
+                    )
+                return len(keep)
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _existing(self, digests: Iterable[str]) -> set:
+        found = set()
+        digests = list(digests)
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(row[0] for row in self._conn().execute(
+                f"SELECT digest FROM embeddings WHERE digest IN ({placeholders})", chunk
+            ))
+        return found
+
+    def _rows(self, digests: Sequence[str]) -> dict:
+        rows = {}
+        for start in range(0, len(digests), 500):
+            chunk = list(digests[start:start + 500])
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(self._conn().execute(
+                f"SELECT digest, row FROM embeddings WHERE digest IN ({placeholders})", chunk
+            ))
+        return rows
+
+    def vectors(self) -> np.ndarray:
+        """All stored vectors as a read-only (n, dim) memory map, in row order"""
+        if self.dim is None or not os.path.exists(self.vectors_path):
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        if rows == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self._mmap is None or len(self._mmap) != rows:
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._mmap
+
+    def get_many(self, digests: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """Stored embeddings for the given digests; returns (found digests, matrix)"""
+        rows = self._rows(digests)
+        found = [digest for digest in digests if digest in rows]
+        if not found:
+            return [], np.zeros((0, self.dim or 0), dtype=np.float32)
+        return found, np.asarray(self.vectors()[[rows[digest] for digest in found]])
+
+    def digests_by_row(self, start: int = 0) -> List[Optional[str]]:
+        """Digest of every row of vectors() from `start` on (None for rows not committed yet)"""
+        digests = [None] * max(0, len(self.vectors()) - start)
+        for digest, row in self._conn().execute("SELECT digest, row FROM embeddings WHERE row >= ?", (start,)):
+            if row - start < len(digests):
+                digests[row - start] = digest
+        return digests
+
+    def add_source(self, digest: str, user_id: str, filename: str = None, reference: str = None,
+                   predictions: list = None):
+        """Record (or refresh) what `user_id` knows image `digest` as"""
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sources (digest, user_id, filename, reference, predictions, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, user_id, filename, reference,
+                 json.dumps(predictions) if predictions is not None else None, time.time())
+            )
+
+    def sources(self, digests: Sequence[str], user_id: str) -> Dict[str, dict]:
+        """Source records of `user_id` for the given digests; other users' records are never returned"""
+        found = {}
+        for start in range(0, len(digests), 500):
+            chunk = list(digests[start:start + 500])
+            placeholders = ",".join("?" * len(chunk))
+            for digest, filename, reference, predictions, created_at in self._conn().execute(
+                f"SELECT digest, filename, reference, predictions, created_at FROM sources "
+                f"WHERE user_id = ? AND digest IN ({placeholders})", [user_id] + chunk
+            ):
+                found[digest] = {
+                    "filename": filename,
+                    "reference": reference,
+                    "predictions": json.loads(predictions) if predictions else None,
+                    "classified_at": created_at,
+                }
+        return found
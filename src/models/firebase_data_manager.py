@@ -5,24 +5,100 @@ Firebase Data Manager for VisionAI Pro Image Classification System
 import os
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 import logging
 import json
 
-# Add parent directory to path to import firebase_config
+# Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from config.firebase_config import firebase_config
+from config.config import Config
+from src.models.write_behind_queue import WriteBehindQueue
+from src.models.classification_index import ClassificationIndex
+from src.models.storage_backend import StorageBackend, FirestoreStorageBackend, create_storage_backend
+from src.models import usage_counters
 
 class FirebaseDataManager:
-    """Firebase Firestore-based data management for image classification results"""
+    """Data management for image classification results (Firestore or local storage backend)"""
     
-    def __init__(self):
+    def __init__(self, db=None, write_behind: bool = None, index_path: str = None,
+                 storage: StorageBackend = None):
         self.logger = logging.getLogger(__name__)
-        self.db = firebase_config.get_db()
         
-        if not self.db:
-            self.logger.error("Firebase database not available")
-            raise RuntimeError("Firebase database not initialized")
+        if storage is None:
+            storage = FirestoreStorageBackend(db) if db else create_storage_backend(Config.STORAGE_BACKEND)
+        self.storage = storage
+        
+        # Write-behind queue: results are journaled locally and flushed to Firestore in batches
+        self.write_queue = None
+        if write_behind is None:
+            write_behind = Config.FIREBASE_WRITE_BEHIND
+        if write_behind and self.storage.supports_write_behind:
+            self.write_queue = WriteBehindQueue(
+                lambda: self.storage.db,
+                journal_path=Config.FIREBASE_JOURNAL_PATH,
+                batch_size=Config.FIREBASE_WRITE_BATCH_SIZE,
+                flush_interval=Config.FIREBASE_FLUSH_INTERVAL,
+                fsync=Config.FIREBASE_JOURNAL_FSYNC
+            )
+            self.write_queue.start()
+        
+        # Local inverted index serving search_classifications
+        self.search_index = ClassificationIndex(index_path or Config.CLASSIFICATION_INDEX_PATH)
+    
+    def is_connected(self) -> bool:
+        """Check if the storage backend is available"""
+        return self.storage.is_connected()
+    
+    def check_health(self) -> Dict:
+        """Probe the storage backend (a minimal read for Firestore)"""
+        return self.storage.check_health()
+    
+    def close(self):
+        """Flush pending writes and stop the write-behind queue"""
+        if self.write_queue:
+            self.write_queue.stop()
+    
+    def get_write_metrics(self) -> Dict:
+        """Write-behind queue depth, lag and flush counters"""
+        if not self.write_queue:
+            return {"enabled": False}
+        return {"enabled": True, **self.write_queue.get_metrics()}
+    
+    def _add_document(self, collection: str, doc_data: Dict, put) -> str:
+        """Add a document with a new ID, through the write-behind queue when enabled"""
+        doc_id = WriteBehindQueue.new_document_id()
+        if self.write_queue:
+            self.write_queue.enqueue(collection, doc_id, doc_data)
+        else:
+            put(doc_id, doc_data)
+        return doc_id
+    
+    def _index_classification(self, doc_id: str, doc_data: Dict):
+        """Add a result to the local search index; the storage write has already succeeded"""
+        try:
+            self.search_index.add(doc_id, doc_data)
+        except Exception as e:
+            self.logger.error(f"Failed to index classification {doc_id}: {e}")
+    
+    def rebuild_search_index(self, user_id: str = None, batch_size: int = 500) -> int:
+        """Backfill the local search index from storage, returning how many results were indexed"""
+        try:
+            indexed = 0
+            batch = []
+            for result in self.storage.iter_classifications(user_id, page_size=batch_size):
+                batch.append((result.pop("id"), result))
+                if len(batch) >= batch_size:
+                    indexed += self.search_index.add_many(batch)
+                    batch = []
+            if batch:
+                indexed += self.search_index.add_many(batch)
+            
+            self.logger.info(f"Search index rebuilt: {indexed} classifications")
+            return indexed
+            
+        except Exception as e:
+            self.logger.error(f"Failed to rebuild search index: {e}")
+            return 0
     
     def _convert_datetime_to_timestamp(self, dt: datetime) -> str:
         """Convert datetime to ISO format string for Firestore"""
@@ -39,8 +115,12 @@ class FirebaseDataManager:
                                  predictions: List[Dict],
                                  confidence_scores: List[float],
                                  processing_time: float,
-                                 model_version: str = "prorl_v2") -> str:
-        """Save image classification result to Firestore"""
+                                 model_version: str = "prorl_v2",
+                                 image_sha256: str = None) -> str:
+        """Save image classification result to storage
+        
+        `image_sha256` links the record to the uploaded image in the blob store.
+        """
         try:
             # Create document data
             doc_data = {
@@ -54,48 +134,64 @@ class FirebaseDataManager:
                 "created_at": self._convert_datetime_to_timestamp(datetime.now()),
                 "status": "completed"
             }
+            if image_sha256:
+                doc_data["image_sha256"] = image_sha256
             
-            # Save to Firestore
-            doc_ref = self.db.collection("classification_results").add(doc_data)
+            # Save to storage
+            doc_id = self._add_document("classification_results", doc_data, self.storage.put_classification)
+            self._index_classification(doc_id, doc_data)
             
-            self.logger.info(f"Classification result saved: {doc_ref[1].id}")
-            return doc_ref[1].id
+            self.logger.info(f"Classification result saved: {doc_id}")
+            return doc_id
             
         except Exception as e:
             self.logger.error(f"Failed to save classification result: {e}")
             return None
     
-    def get_user_classifications(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Get classification results for a specific user"""
+    def _classification_with_datetime(self, data: Dict) -> Dict:
+        data["created_at"] = self._convert_timestamp_to_datetime(data.get("created_at"))
+        return data
+    
+    def get_user_classifications(self, user_id: str, limit: int = 50, start_after: str = None) -> List[Dict]:
+        """Get classification results for a specific user
+        
+        `start_after` is the ID of the last result of the previous page;
+        raises ValueError if it doesn't exist.
+        """
         try:
-            # Query Firestore for user's classifications
-            query = self.db.collection("classification_results").where("user_id", "==", user_id).order_by("created_at", direction="DESCENDING").limit(limit)
-            docs = query.stream()
-            
-            results = []
-            for doc in docs:
-                data = doc.to_dict()
-                data["id"] = doc.id
-                data["created_at"] = self._convert_timestamp_to_datetime(data.get("created_at"))
-                results.append(data)
-            
-            return results
+            results = self.storage.list_classifications(user_id, limit, start_after)
+            return [self._classification_with_datetime(result) for result in results]
             
+        except ValueError:
+            # An unknown cursor is a client error (400), not an empty page
+            raise
         except Exception as e:
             self.logger.error(f"Failed to get user classifications: {e}")
             return []
     
+    def iter_user_classifications(self, user_id: str, start_after: str = None, page_size: int = 500) -> Iterator[Dict]:
+        """Stream all of a user's classification results, newest first
+        
+        Results are fetched `page_size` at a time using the last result of
+        each page as the cursor, so memory use doesn't grow with history size.
+        Raises ValueError up front if `start_after` doesn't exist.
+        """
+        results = self.storage.iter_classifications(user_id, start_after=start_after, page_size=page_size)
+        return (self._classification_with_datetime(result) for result in results)
+    
     def get_classification_by_id(self, classification_id: str) -> Optional[Dict]:
         """Get specific classification result by ID"""
         try:
-            doc_ref = self.db.collection("classification_results").document(classification_id)
-            doc = doc_ref.get()
+            # Results still waiting in the write-behind queue are served from it
+            data = self.write_queue.get_pending("classification_results", classification_id) if self.write_queue else None
             
-            if not doc.exists:
-                return None
+            if data is None:
+                data = self.storage.get_classification(classification_id)
+                
+                if data is None:
+                    return None
             
-            data = doc.to_dict()
-            data["id"] = doc.id
+            data["id"] = classification_id
             data["created_at"] = self._convert_timestamp_to_datetime(data.get("created_at"))
             
             return data
@@ -110,8 +206,8 @@ class FirebaseDataManager:
             # Add timestamp
             profile_data["updated_at"] = self._convert_datetime_to_timestamp(datetime.now())
             
-            # Save to Firestore
-            self.db.collection("user_profiles").document(user_id).set(profile_data, merge=True)
+            # Save to storage
+            self.storage.merge_user_profile(user_id, profile_data)
             
             self.logger.info(f"User profile saved: {user_id}")
             return True
@@ -123,13 +219,11 @@ class FirebaseDataManager:
     def get_user_profile(self, user_id: str) -> Optional[Dict]:
         """Get user profile"""
         try:
-            doc_ref = self.db.collection("user_profiles").document(user_id)
-            doc = doc_ref.get()
+            data = self.storage.get_user_profile(user_id)
             
-            if not doc.exists:
+            if data is None:
                 return None
             
-            data = doc.to_dict()
             if "updated_at" in data:
                 data["updated_at"] = self._convert_timestamp_to_datetime(data["updated_at"])
             
@@ -142,8 +236,10 @@ class FirebaseDataManager:
     def save_usage_statistics(self, user_id: str, api_key: str, 
                              request_type: str, processing_time: float,
                              success: bool = True) -> bool:
-        """Save usage statistics for analytics"""
+        """Save usage statistics for analytics (raw event plus today's counters)"""
         try:
+            now = datetime.now()
+            
             # Create document data
             doc_data = {
                 "user_id": user_id,
@@ -151,11 +247,13 @@ class FirebaseDataManager:
                 "request_type": request_type,
                 "processing_time": processing_time,
                 "success": success,
-                "timestamp": self._convert_datetime_to_timestamp(datetime.now())
+                "timestamp": self._convert_datetime_to_timestamp(now),
+                usage_counters.COUNTED_FIELD: True
             }
             
-            # Save to Firestore
-            self.db.collection("usage_statistics").add(doc_data)
+            # Save to storage
+            self._add_document("usage_statistics", doc_data, self.storage.add_usage_event)
+            self._increment_usage_counters(user_id, now.date(), success, processing_time)
             
             return True
             
@@ -163,55 +261,64 @@ class FirebaseDataManager:
             self.logger.error(f"Failed to save usage statistics: {e}")
             return False
     
+    def _increment_usage_counters(self, user_id: str, day, success: bool, processing_time: float):
+        """Add one event to the user's counters for `day`"""
+        doc_id = usage_counters.counter_doc_id(user_id, day)
+        fields = usage_counters.counter_fields(user_id, day)
+        increments = usage_counters.counter_increments(success, processing_time)
+        
+        if self.write_queue:
+            self.write_queue.enqueue(usage_counters.COUNTERS_COLLECTION, doc_id,
+                                     {"fields": fields, "increments": increments}, op="increment")
+        else:
+            self.storage.increment_usage_counters(doc_id, fields, increments)
+    
     def get_user_usage_stats(self, user_id: str, days: int = 30) -> Dict:
-        """Get usage statistics for a user"""
+        """Get usage statistics for a user over the last `days` days (1-366), today included
+        
+        Reads one daily counter document per day, however many requests the
+        user made; percentiles come from the counters' latency histograms.
+        """
         try:
-            from datetime import timedelta
-            
-            # Calculate date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
+            # Bounded: every day in the window is one document read
+            days = max(1, min(days, usage_counters.MAX_STATS_DAYS))
+            doc_ids = usage_counters.counter_doc_ids(user_id, days)
+            return usage_counters.summarize(self.storage.get_usage_counters(doc_ids))
             
-            # Query Firestore for user's usage statistics
-            query = self.db.collection("usage_statistics").where("user_id", "==", user_id).where("timestamp", ">=", self._convert_datetime_to_timestamp(start_date))
-            docs = query.stream()
-            
-            stats = {
-                "total_requests": 0,
-                "successful_requests": 0,
-                "failed_requests": 0,
-                "average_processing_time": 0,
-                "total_processing_time": 0
-            }
-            
-            processing_times = []
+        except Exception as e:
+            self.logger.error(f"Failed to get user usage stats: {e}")
+            return {}
+    
+    def rebuild_usage_counters(self, user_id: str, days: int = 30) -> int:
+        """Recompute a user's daily counters from raw usage events (for data recorded before counters existed)
+        
+        Replaces the counter documents, so run it while the user is idle.
+        Returns the number of day documents written.
+        """
+        try:
+            from datetime import timedelta
             
-            for doc in docs:
-                data = doc.to_dict()
-                stats["total_requests"] += 1
-                
-                if data.get("success", False):
-                    stats["successful_requests"] += 1
-                else:
-                    stats["failed_requests"] += 1
-                
-                processing_time = data.get("processing_time", 0)
-                stats["total_processing_time"] += processing_time
-                processing_times.append(processing_time)
+            start_date = (datetime.now() - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            events = self.storage.iter_usage_events(user_id, self._convert_datetime_to_timestamp(start_date))
             
-            if processing_times:
-                stats["average_processing_time"] = stats["total_processing_time"] / len(processing_times)
+            docs = usage_counters.aggregate_events(user_id, events)
+            # Every event up to now is in the rebuilt documents; the retention job must not add them again
+            watermark = [self._convert_datetime_to_timestamp(datetime.now()), ""]
+            for doc_id, data in docs.items():
+                self.storage.put_usage_counters(doc_id, {**data, usage_counters.WATERMARK_FIELD: watermark})
             
-            return stats
+            self.logger.info(f"Rebuilt {len(docs)} usage counter documents for {user_id}")
+            return len(docs)
             
         except Exception as e:
-            self.logger.error(f"Failed to get user usage stats: {e}")
-            return {}
+            self.logger.error(f"Failed to rebuild usage counters: {e}")
+            return 0
     
     def delete_classification_result(self, classification_id: str) -> bool:
         """Delete classification result"""
         try:
-            self.db.collection("classification_results").document(classification_id).delete()
+            self.storage.delete_classification(classification_id)
+            self.search_index.remove(classification_id)
             
             self.logger.info(f"Classification result deleted: {classification_id}")
             return True
@@ -220,30 +327,15 @@ class FirebaseDataManager:
             self.logger.error(f"Failed to delete classification result: {e}")
             return False
     
-    def search_classifications(self, user_id: str, query: str, limit: int = 20) -> List[Dict]:
+    def search_classifications(self, user_id: str, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
         """Search classifications by image path or predictions"""
         try:
-            # Get all user classifications and filter locally
-            # Note: Firestore doesn't support full-text search, so we filter in Python
-            all_results = self.get_user_classifications(user_id, limit=1000)
-            
-            filtered_results = []
-            query_lower = query.lower()
-            
-            for result in all_results:
-                # Search in image path
-                if query_lower in result.get("image_path", "").lower():
-                    filtered_results.append(result)
-                    continue
-                
-                # Search in predictions
-                predictions = result.get("predictions", [])
-                for pred in predictions:
-                    if query_lower in str(pred).lower():
-                        filtered_results.append(result)
-                        break
-            
-            return filtered_results[:limit]
+            # Served from the local index: Firestore doesn't support full-text search
+            results = self.search_index.search(user_id, query, limit=limit, offset=offset)
+            for result in results:
+                result["created_at"] = self._convert_timestamp_to_datetime(result.get("created_at"))
+            
+            return results
             
         except Exception as e:
             self.logger.error(f"Failed to search classifications: {e}")
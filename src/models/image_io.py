@@ -0,0 +1,63 @@
+"""
+Safe image opening for VisionAI Pro classifiers
+
+Pillow's Image.open only parses the file header, so format and dimensions
+are known before any pixel data is decoded. That is where we reject
+unsupported formats and decompression bombs, and where JPEG decoding is
+switched to a reduced (DCT-scaled) draft close to the size the models use.
+"""
+
+import warnings
+from typing import BinaryIO, Iterable, Optional, Union
+
+from PIL import Image, UnidentifiedImageError
+
+DEFAULT_FORMATS = ("JPEG", "PNG", "GIF", "BMP", "WEBP")
+DEFAULT_MAX_PIXELS = 40_000_000
+DEFAULT_DRAFT_SIZE = 512
+
+class ImageValidationError(ValueError):
+    """Image rejected before decoding"""
+
+class UnsupportedImageError(ImageValidationError):
+    """Unknown, disallowed or corrupt image format"""
+
+class ImageTooLargeError(ImageValidationError):
+    """Image dimensions exceed the pixel budget"""
+
+def open_image(fp: Union[str, BinaryIO],
+               formats: Optional[Iterable[str]] = DEFAULT_FORMATS,
+               max_pixels: Optional[int] = DEFAULT_MAX_PIXELS,
+               draft_size: Optional[int] = DEFAULT_DRAFT_SIZE) -> Image.Image:
+    """Open an image lazily, validating format and dimensions from the header only
+
+    The returned image has not been decoded yet. For JPEGs a draft is
+    requested so the decoder scales down by 1/2, 1/4 or 1/8 while keeping
+    both sides at least `draft_size` pixels; other formats decode at full
+    size, which the pixel budget keeps bounded.
+    """
+    formats = list(formats) if formats else None
+    try:
+        with warnings.catch_warnings():
+            # Our own pixel budget below is the limit that matters
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            image = Image.open(fp, formats=formats)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(str(e)) from e
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        allowed = ", ".join(formats) if formats else "any"
+        raise UnsupportedImageError(f"Unsupported or corrupt image (allowed formats: {allowed})") from e
+
+    width, height = image.size
+    if width <= 0 or height <= 0:
+        raise UnsupportedImageError(f"Invalid image dimensions: {width}x{height}")
+
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} ({width * height} pixels), limit is {max_pixels} pixels"
+        )
+
+    if draft_size and image.format == "JPEG":
+        image.draft(None, (draft_size, draft_size))
+
+    return image
@@ -76,30 +76,31 @@ class ProRLV2Classifier:
             image = image.convert('RGB')
         return self.transform(image).unsqueeze(0).to(self.device)
     
+    def predict_batch(self, images: List[Image.Image], top_k: int = 5) -> List[List[Dict[str, float]]]:
+        """Predict categories for a batch of images in one forward pass"""
+        # Image preprocessing
+        input_tensor = torch.cat([self.preprocess_image(image) for image in images])
+        
+        # Prediction
+        with torch.no_grad():
+            outputs = self.model(input_tensor)
+            probabilities = torch.softmax(outputs, dim=1)
+        
+        # Return top k results per image
+        top_probs, top_indices = torch.topk(probabilities, top_k, dim=1)
+        
+        return [
+            [
+                {"category": self.categories[idx], "confidence": round(prob, 4)}
+                for prob, idx in zip(probs, indices)
+            ]
+            for probs, indices in zip(top_probs.tolist(), top_indices.tolist())
+        ]
+    
     def predict(self, image: Image.Image, top_k: int = 5) -> List[Dict[str, float]]:
         """Predict image categories"""
         try:
-            # Image preprocessing
-            input_tensor = self.preprocess_image(image)
-            
-            # Prediction
-            with torch.no_grad():
-                outputs = self.model(input_tensor)
-                probabilities = torch.softmax(outputs, dim=1)
-            
-            # Return top k results
-            top_probs, top_indices = torch.topk(probabilities, top_k)
-            
-            results = []
-            for prob, idx in zip(top_probs[0], top_indices[0]):
-                category = self.categories[idx.item()]
-                confidence = prob.item()
-                results.append({
-                    "category": category,
-                    "confidence": round(confidence, 4)
-                })
-            
-            return results
+            return self.predict_batch([image], top_k=top_k)[0]
             
         except Exception as e:
             self.logger.error(f"Error during prediction: {e}")
@@ -0,0 +1,503 @@
+"""
+Storage backends for VisionAI Pro API keys, usage events and classification results
+
+The Firebase managers talk to a StorageBackend instead of a Firestore
+client, so the same API can run against:
+
+- ``firestore``: Cloud Firestore through the Firebase Admin SDK
+- ``sqlite:///path/to/visionai.db``: a local SQLite database in WAL mode,
+  one table per collection with the queried fields pulled out into indexed
+  columns and the full document kept as JSON
+
+Documents are plain dicts with ISO-format timestamp strings in both
+backends, so records move between them unchanged.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .usage_counters import COUNTERS_COLLECTION, nest_paths
+
+class StorageBackend:
+    """Document storage used by the API key and data managers"""
+
+    name = "base"
+    # Whether writes can go through WriteBehindQueue (needs a Firestore-style client in `db`)
+    supports_write_behind = False
+
+    def is_connected(self) -> bool:
+        return True
+
+    def check_health(self) -> Dict:
+        """Probe the backend; returns at least {"connected": bool}"""
+        return {"connected": self.is_connected()}
+
+    # API keys
+    def get_api_key(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def put_api_key(self, key: str, data: Dict):
+        raise NotImplementedError
+
+    def update_api_key(self, key: str, updates: Dict):
+        raise NotImplementedError
+
+    def delete_api_key(self, key: str):
+        raise NotImplementedError
+
+    def list_api_keys(self, user_id: str) -> List[Dict]:
+        raise NotImplementedError
+
+    # User profiles
+    def get_user_profile(self, user_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def merge_user_profile(self, user_id: str, data: Dict):
+        raise NotImplementedError
+
+    # Classification results
+    def put_classification(self, doc_id: str, data: Dict):
+        raise NotImplementedError
+
+    def get_classification(self, doc_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def delete_classification(self, doc_id: str):
+        raise NotImplementedError
+
+    def update_classifications(self, updates: Sequence[Tuple[str, Dict]]):
+        """Merge `fields` into each (doc_id, fields) result, in as few round trips as possible"""
+        raise NotImplementedError
+
+    def list_classifications(self, user_id: str, limit: int, start_after: str = None) -> List[Dict]:
+        """Newest-first page of a user's results, each with its document ID under "id"
+
+        `start_after` is the ID of the last result of the previous page;
+        raises ValueError if it doesn't exist.
+        """
+        raise NotImplementedError
+
+    def iter_classifications(self, user_id: str = None, start_after: str = None,
+                             page_size: int = 500) -> Iterator[Dict]:
+        """Stream results (all users when `user_id` is None) newest first, one page at a time
+
+        The first page is fetched eagerly so an unknown cursor raises here.
+        """
+        page = self.list_classifications(user_id, page_size, start_after)
+        return self._iter_pages(user_id, page, page_size)
+
+    def _iter_pages(self, user_id: str, page: List[Dict], page_size: int) -> Iterator[Dict]:
+        while True:
+            yield from page
+            if len(page) < page_size:
+                return
+            page = self.list_classifications(user_id, page_size, page[-1]["id"])
+
+    # Usage events
+    def add_usage_event(self, doc_id: str, data: Dict):
+        raise NotImplementedError
+
+    def iter_usage_events(self, user_id: str, since: str) -> Iterator[Dict]:
+        """A user's usage events with timestamp >= `since` (ISO format)"""
+        raise NotImplementedError
+
+    def list_usage_events_before(self, before: str, limit: int) -> List[Tuple[str, Dict]]:
+        """Up to `limit` (doc_id, data) usage events of any user with timestamp < `before`, oldest first
+
+        Ties on timestamp are ordered by doc_id.
+        """
+        raise NotImplementedError
+
+    def delete_usage_events(self, doc_ids: Sequence[str]):
+        raise NotImplementedError
+
+    # Daily usage counters (see usage_counters)
+    def increment_usage_counters(self, doc_id: str, fields: Dict, increments: Dict[str, float]):
+        """Atomically add dotted-path `increments` to a counter document and set `fields` on it"""
+        raise NotImplementedError
+
+    def put_usage_counters(self, doc_id: str, data: Dict):
+        """Replace a counter document"""
+        raise NotImplementedError
+
+    def get_usage_counters(self, doc_ids: Sequence[str]) -> List[Dict]:
+        """The counter documents that exist among `doc_ids`, in one round trip"""
+        raise NotImplementedError
+
+class FirestoreStorageBackend(StorageBackend):
+    """Cloud Firestore backend
+
+    Takes either a Firestore client or a FirebaseConfig; with the latter the
+    client is resolved on each use, so the backend can be created before
+    Firebase has connected and picks up reconnections.
+    """
+
+    name = "firestore"
+    supports_write_behind = True
+
+    def __init__(self, db=None, config=None):
+        if db is None and config is None:
+            raise RuntimeError("Firebase database not initialized")
+        self._db = db
+        self._config = config
+
+    @property
+    def db(self):
+        db = self._db if self._db is not None else self._config.get_db()
+        if db is None:
+            raise RuntimeError("Firebase database not available")
+        return db
+
+    def is_connected(self) -> bool:
+        return self._db is not None or self._config.is_connected()
+
+    def check_health(self) -> Dict:
+        if self._config is not None:
+            return self._config.check_health()
+        return super().check_health()
+
+    def _get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        doc = self.db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_api_key(self, key: str) -> Optional[Dict]:
+        return self._get("api_keys", key)
+
+    def put_api_key(self, key: str, data: Dict):
+        self.db.collection("api_keys").document(key).set(data)
+
+    def update_api_key(self, key: str, updates: Dict):
+        self.db.collection("api_keys").document(key).update(updates)
+
+    def delete_api_key(self, key: str):
+        self.db.collection("api_keys").document(key).delete()
+
+    def list_api_keys(self, user_id: str) -> List[Dict]:
+        query = self.db.collection("api_keys").where("user_id", "==", user_id)
+        return [doc.to_dict() for doc in query.stream()]
+
+    def get_user_profile(self, user_id: str) -> Optional[Dict]:
+        return self._get("user_profiles", user_id)
+
+    def merge_user_profile(self, user_id: str, data: Dict):
+        self.db.collection("user_profiles").document(user_id).set(data, merge=True)
+
+    def put_classification(self, doc_id: str, data: Dict):
+        self.db.collection("classification_results").document(doc_id).set(data)
+
+    def get_classification(self, doc_id: str) -> Optional[Dict]:
+        return self._get("classification_results", doc_id)
+
+    def delete_classification(self, doc_id: str):
+        self.db.collection("classification_results").document(doc_id).delete()
+
+    def update_classifications(self, updates: Sequence[Tuple[str, Dict]]):
+        collection = self.db.collection("classification_results")
+        # Firestore batches are limited to 500 writes
+        for start in range(0, len(updates), 500):
+            batch = self.db.batch()
+            for doc_id, fields in updates[start:start + 500]:
+                batch.update(collection.document(doc_id), fields)
+            batch.commit()
+
+    def _classifications_query(self, user_id: str = None):
+        query = self.db.collection("classification_results")
+        if user_id:
+            query = query.where("user_id", "==", user_id)
+        return query.order_by("created_at", direction="DESCENDING")
+
+    def _cursor(self, doc_id: str):
+        cursor = self.db.collection("classification_results").document(doc_id).get()
+        if not cursor.exists:
+            raise ValueError(f"Unknown history cursor: {doc_id}")
+        return cursor
+
+    @staticmethod
+    def _with_id(doc) -> Dict:
+        data = doc.to_dict()
+        data["id"] = doc.id
+        return data
+
+    def list_classifications(self, user_id: str, limit: int, start_after: str = None) -> List[Dict]:
+        query = self._classifications_query(user_id)
+        if start_after:
+            query = query.start_after(self._cursor(start_after))
+        return [self._with_id(doc) for doc in query.limit(limit).stream()]
+
+    def iter_classifications(self, user_id: str = None, start_after: str = None,
+                             page_size: int = 500) -> Iterator[Dict]:
+        # Resume each page from the last snapshot instead of re-reading the cursor document
+        query = self._classifications_query(user_id)
+        cursor = self._cursor(start_after) if start_after else None
+        return self._iter_snapshot_pages(query, cursor, page_size)
+
+    def _iter_snapshot_pages(self, query, cursor, page_size: int) -> Iterator[Dict]:
+        while True:
+            page = query.start_after(cursor) if cursor else query
+            count = 0
+            for doc in page.limit(page_size).stream():
+                count += 1
+                cursor = doc
+                yield self._with_id(doc)
+
+            if count < page_size:
+                return
+
+    def add_usage_event(self, doc_id: str, data: Dict):
+        self.db.collection("usage_statistics").document(doc_id).set(data)
+
+    def iter_usage_events(self, user_id: str, since: str) -> Iterator[Dict]:
+        query = self.db.collection("usage_statistics").where("user_id", "==", user_id).where("timestamp", ">=", since)
+        return (doc.to_dict() for doc in query.stream())
+
+    def list_usage_events_before(self, before: str, limit: int) -> List[Tuple[str, Dict]]:
+        # Firestore breaks ties on the document ID implicitly
+        query = self.db.collection("usage_statistics").where("timestamp", "<", before).order_by("timestamp")
+        return [(doc.id, doc.to_dict()) for doc in query.limit(limit).stream()]
+
+    def delete_usage_events(self, doc_ids: Sequence[str]):
+        collection = self.db.collection("usage_statistics")
+        # Firestore batches are limited to 500 writes
+        for start in range(0, len(doc_ids), 500):
+            batch = self.db.batch()
+            for doc_id in doc_ids[start:start + 500]:
+                batch.delete(collection.document(doc_id))
+            batch.commit()
+
+    def increment_usage_counters(self, doc_id: str, fields: Dict, increments: Dict[str, float]):
+        from firebase_admin import firestore
+        data = {**fields, **nest_paths({path: firestore.Increment(amount) for path, amount in increments.items()})}
+        self.db.collection(COUNTERS_COLLECTION).document(doc_id).set(data, merge=True)
+
+    def put_usage_counters(self, doc_id: str, data: Dict):
+        self.db.collection(COUNTERS_COLLECTION).document(doc_id).set(data)
+
+    def get_usage_counters(self, doc_ids: Sequence[str]) -> List[Dict]:
+        collection = self.db.collection(COUNTERS_COLLECTION)
+        docs = self.db.get_all([collection.document(doc_id) for doc_id in doc_ids])
+        return [doc.to_dict() for doc in docs if doc.exists]
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_keys (
+    key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_api_keys_user ON api_keys (user_id);
+
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS classification_results (
+    doc_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classification_results_user_created
+    ON classification_results (user_id, created_at DESC, doc_id DESC);
+CREATE INDEX IF NOT EXISTS idx_classification_results_created
+    ON classification_results (created_at DESC, doc_id DESC);
+
+CREATE TABLE IF NOT EXISTS usage_statistics (
+    doc_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_statistics_user_time
+    ON usage_statistics (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_usage_statistics_time
+    ON usage_statistics (timestamp);
+
+CREATE TABLE IF NOT EXISTS usage_daily (
+    doc_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+class SQLiteStorageBackend(StorageBackend):
+    """Local SQLite backend (WAL mode, shared by all workers on the host)"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn().executescript(SQLITE_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (each thread gets its own database for ":memory:")"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            # Only takes effect on a new database; lets the retention job release freed pages
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, sql: str, args: tuple) -> Optional[Dict]:
+        row = self._conn().execute(sql, args).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, sql: str, args: tuple):
+        conn = self._conn()
+        with conn:
+            conn.execute(sql, args)
+
+    def get_api_key(self, key: str) -> Optional[Dict]:
+        return self._get("SELECT data FROM api_keys WHERE key = ?", (key,))
+
+    def put_api_key(self, key: str, data: Dict):
+        self._write(
+            "INSERT OR REPLACE INTO api_keys (key, user_id, data) VALUES (?, ?, ?)",
+            (key, data.get("user_id", ""), json.dumps(data))
+        )
+
+    def update_api_key(self, key: str, updates: Dict):
+        # json_patch drops fields set to None, which reads back the same as None
+        self._write(
+            "UPDATE api_keys SET data = json_patch(data, ?) WHERE key = ?",
+            (json.dumps(updates), key)
+        )
+
+    def delete_api_key(self, key: str):
+        self._write("DELETE FROM api_keys WHERE key = ?", (key,))
+
+    def list_api_keys(self, user_id: str) -> List[Dict]:
+        rows = self._conn().execute("SELECT data FROM api_keys WHERE user_id = ?", (user_id,))
+        return [json.loads(row[0]) for row in rows]
+
+    def get_user_profile(self, user_id: str) -> Optional[Dict]:
+        return self._get("SELECT data FROM user_profiles WHERE user_id = ?", (user_id,))
+
+    def merge_user_profile(self, user_id: str, data: Dict):
+        self._write(
+            "INSERT INTO user_profiles (user_id, data) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET data = json_patch(data, excluded.data)",
+            (user_id, json.dumps(data))
+        )
+
+    def put_classification(self, doc_id: str, data: Dict):
+        self._write(
+            "INSERT OR REPLACE INTO classification_results (doc_id, user_id, created_at, data) VALUES (?, ?, ?, ?)",
+            (doc_id, data.get("user_id", ""), data.get("created_at") or "", json.dumps(data, default=str))
+        )
+
+    def get_classification(self, doc_id: str) -> Optional[Dict]:
+        return self._get("SELECT data FROM classification_results WHERE doc_id = ?", (doc_id,))
+
+    def delete_classification(self, doc_id: str):
+        self._write("DELETE FROM classification_results WHERE doc_id = ?", (doc_id,))
+
+    def update_classifications(self, updates: Sequence[Tuple[str, Dict]]):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "UPDATE classification_results SET data = json_patch(data, ?) WHERE doc_id = ?",
+                [(json.dumps(fields, default=str), doc_id) for doc_id, fields in updates]
+            )
+
+    def list_classifications(self, user_id: str, limit: int, start_after: str = None) -> List[Dict]:
+        conditions = []
+        args = []
+        if user_id:
+            conditions.append("user_id = ?")
+            args.append(user_id)
+        if start_after:
+            row = self._conn().execute(
+                "SELECT created_at FROM classification_results WHERE doc_id = ?", (start_after,)
+            ).fetchone()
+            if not row:
+                raise ValueError(f"Unknown history cursor: {start_after}")
+            # Keyset pagination: (created_at, doc_id) strictly before the cursor
+            conditions.append("(created_at, doc_id) < (?, ?)")
+            args.extend([row[0], start_after])
+
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self._conn().execute(
+            f"SELECT doc_id, data FROM classification_results {where}"
+            "ORDER BY created_at DESC, doc_id DESC LIMIT ?",
+            (*args, limit)
+        )
+
+        results = []
+        for doc_id, data in rows:
+            result = json.loads(data)
+            result["id"] = doc_id
+            results.append(result)
+        return results
+
+    def add_usage_event(self, doc_id: str, data: Dict):
+        self._write(
+            "INSERT OR REPLACE INTO usage_statistics (doc_id, user_id, timestamp, data) VALUES (?, ?, ?, ?)",
+            (doc_id, data.get("user_id", ""), data.get("timestamp") or "", json.dumps(data))
+        )
+
+    def iter_usage_events(self, user_id: str, since: str) -> Iterator[Dict]:
+        rows = self._conn().execute(
+            "SELECT data FROM usage_statistics WHERE user_id = ? AND timestamp >= ?", (user_id, since)
+        )
+        return (json.loads(row[0]) for row in rows)
+
+    def list_usage_events_before(self, before: str, limit: int) -> List[Tuple[str, Dict]]:
+        rows = self._conn().execute(
+            "SELECT doc_id, data FROM usage_statistics WHERE timestamp < ? ORDER BY timestamp, doc_id LIMIT ?", (before, limit)
+        )
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+    def delete_usage_events(self, doc_ids: Sequence[str]):
+        conn = self._conn()
+        with conn:
+            conn.executemany("DELETE FROM usage_statistics WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+
+    def increment_usage_counters(self, doc_id: str, fields: Dict, increments: Dict[str, float]):
+        # json_patch first adds any missing parent objects ("histogram") so json_set can create the leaves
+        parents = nest_paths({path: 0 for path in increments if "." in path})
+        skeleton = json.dumps({key: {} for key in parents})
+        if not all(re.fullmatch(r"\w+(\.\w+)*", path) for path in increments):
+            raise ValueError(f"Invalid counter paths: {list(increments)}")
+        paths = ["$." + path for path in increments]
+        assignments = ", ".join(f"'{path}', coalesce(json_extract(data, '{path}'), 0) + ?" for path in paths)
+        # `fields` are set on every write, as with Firestore's merge
+        self._write(
+            "INSERT INTO usage_daily (doc_id, data) VALUES (?, ?) "
+            f"ON CONFLICT (doc_id) DO UPDATE SET data = json_set(json_patch(json_patch(?, data), ?), {assignments})",
+            (doc_id, json.dumps({**fields, **nest_paths(increments)}), skeleton, json.dumps(fields),
+             *increments.values())
+        )
+
+    def put_usage_counters(self, doc_id: str, data: Dict):
+        self._write("INSERT OR REPLACE INTO usage_daily (doc_id, data) VALUES (?, ?)", (doc_id, json.dumps(data)))
+
+    def get_usage_counters(self, doc_ids: Sequence[str]) -> List[Dict]:
+        placeholders = ",".join("?" * len(doc_ids))
+        rows = self._conn().execute(f"SELECT data FROM usage_daily WHERE doc_id IN ({placeholders})", list(doc_ids))
+        return [json.loads(row[0]) for row in rows]
+
+def create_storage_backend(uri: str) -> StorageBackend:
+    """Create a backend from a URI: "firestore" or "sqlite:///path/to/file.db" """
+    if uri.startswith("sqlite://"):
+        path = uri[len("sqlite:///"):] if uri.startswith("sqlite:///") else uri[len("sqlite://"):]
+        return SQLiteStorageBackend(path or ":memory:")
+
+    if uri in ("firestore", "firebase"):
+        # Connects in the background; requests wait for it only when they need Firestore
+        from config.firebase_config import firebase_config
+        firebase_config.start_background_init()
+        return FirestoreStorageBackend(config=firebase_config)
+
+    raise ValueError(f"Unknown storage backend: {uri}")
@@ -0,0 +1,158 @@
+"""
+Per-user daily usage counters for VisionAI Pro
+
+Every usage event also increments one aggregate document per user and day
+(``usage_daily/<user_id>_<YYYY-MM-DD>``) holding the request count,
+successes, failures, the sum of processing times and a processing-time
+histogram. Usage statistics for N days (today and the N-1 before it)
+then read at most N small documents instead of every event in the
+window, and latency percentiles come from the merged histograms.
+
+Events recorded this way are stamped ``counted``. The retention job rolls
+any older, unstamped events into the counters before deleting them, and
+records on each counter document the last event it rolled in
+(``rolled_up_through``), so a rerun after an interruption never counts an
+event twice.
+
+Histogram buckets grow geometrically by 25% from 1 ms to about a minute,
+so a percentile read from them is within half a bucket (~12%) of the
+exact value.
+"""
+
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+BUCKET_BASE = 0.001  # seconds
+BUCKET_GROWTH = 1.25
+BUCKET_COUNT = 50
+# Upper bound of each bucket in seconds; the last bucket is open-ended
+BUCKET_BOUNDS = [BUCKET_BASE * BUCKET_GROWTH ** i for i in range(BUCKET_COUNT)] + [math.inf]
+
+PERCENTILES = (50, 95, 99)
+
+COUNTERS_COLLECTION = "usage_daily"
+
+# Longest statistics window, in days (one counter document read per day)
+MAX_STATS_DAYS = 366
+
+# Usage event field: its counters were incremented when it was recorded
+COUNTED_FIELD = "counted"
+# Counter document field: [timestamp, doc_id] of the last event the retention job rolled into it
+WATERMARK_FIELD = "rolled_up_through"
+
+def bucket_key(processing_time: float) -> str:
+    """Histogram field for a processing time in seconds"""
+    if processing_time <= BUCKET_BASE:
+        index = 0
+    else:
+        index = min(BUCKET_COUNT, math.ceil(math.log(processing_time / BUCKET_BASE, BUCKET_GROWTH) - 1e-9))
+    return f"b{index:02d}"
+
+def day_key(day: date) -> str:
+    return day.isoformat()
+
+def counter_doc_id(user_id: str, day: date) -> str:
+    """Document ID of a user's counters for one day"""
+    return f"{user_id}_{day_key(day)}"
+
+def counter_doc_ids(user_id: str, days: int, today: date = None) -> List[str]:
+    """Counter documents for today and the `days` - 1 days before it, newest first"""
+    today = today or datetime.now().date()
+    return [counter_doc_id(user_id, today - timedelta(days=offset)) for offset in range(days)]
+
+def counter_fields(user_id: str, day: date) -> Dict:
+    """Fields set (not incremented) on a counter document"""
+    return {"user_id": user_id, "date": day_key(day)}
+
+def counter_increments(success: bool, processing_time: float) -> Dict[str, float]:
+    """Increments for one usage event, keyed by dotted field path"""
+    return {
+        "count": 1,
+        "successes": 1 if success else 0,
+        "failures": 0 if success else 1,
+        "processing_time_sum": processing_time,
+        f"histogram.{bucket_key(processing_time)}": 1,
+    }
+
+def merge_increments(target: Dict[str, float], increments: Dict[str, float]) -> Dict[str, float]:
+    """Add dotted-path increments into `target` (used to coalesce queued writes)"""
+    for path, amount in increments.items():
+        target[path] = target.get(path, 0) + amount
+    return target
+
+def nest_paths(flat: Dict[str, object]) -> Dict:
+    """{"histogram.b07": x} -> {"histogram": {"b07": x}}"""
+    nested = {}
+    for path, value in flat.items():
+        node = nested
+        *parents, leaf = path.split(".")
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[leaf] = value
+    return nested
+
+def aggregate_events(user_id: str, events: Iterable[Dict]) -> Dict[str, Dict]:
+    """Counter documents (by ID) rebuilt from raw usage events"""
+    by_day = {}
+    for event in events:
+        timestamp = event.get("timestamp")
+        if not timestamp:
+            continue
+        day = datetime.fromisoformat(str(timestamp)).date()
+        merge_increments(
+            by_day.setdefault(day, {}),
+            counter_increments(event.get("success", False), event.get("processing_time", 0) or 0)
+        )
+
+    return {
+        counter_doc_id(user_id, day): {**counter_fields(user_id, day), **nest_paths(flat)}
+        for day, flat in by_day.items()
+    }
+
+def histogram_percentile(histogram: Dict[str, int], percentile: float) -> Optional[float]:
+    """Approximate percentile (seconds) by interpolating inside the bucket that holds it"""
+    counts = [histogram.get(f"b{index:02d}", 0) for index in range(BUCKET_COUNT + 1)]
+    total = sum(counts)
+    if not total:
+        return None
+
+    rank = percentile / 100 * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+            upper = BUCKET_BOUNDS[index]
+            if math.isinf(upper):
+                return lower
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+    return BUCKET_BOUNDS[-2]
+
+def summarize(day_docs: Iterable[Dict]) -> Dict:
+    """Usage statistics from a set of daily counter documents"""
+    stats = {
+        "total_requests": 0,
+        "successful_requests": 0,
+        "failed_requests": 0,
+        "average_processing_time": 0,
+        "total_processing_time": 0
+    }
+    histogram = {}
+
+    for doc in day_docs:
+        stats["total_requests"] += doc.get("count", 0)
+        stats["successful_requests"] += doc.get("successes", 0)
+        stats["failed_requests"] += doc.get("failures", 0)
+        stats["total_processing_time"] += doc.get("processing_time_sum", 0)
+        for key, count in (doc.get("histogram") or {}).items():
+            histogram[key] = histogram.get(key, 0) + count
+
+    if stats["total_requests"]:
+        stats["average_processing_time"] = stats["total_processing_time"] / stats["total_requests"]
+
+    for percentile in PERCENTILES:
+        value = histogram_percentile(histogram, percentile)
+        stats[f"p{percentile}_processing_time"] = round(value, 4) if value is not None else None
+
+    return stats
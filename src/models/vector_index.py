@@ -0,0 +1,232 @@
+"""
+Approximate nearest-neighbour search over stored image embeddings
+
+`IVFIndex` is an inverted-file index on top of an EmbeddingStore: a
+spherical k-means over a sample of the vectors gives about sqrt(n)
+centroids, every row is assigned to its closest centroid, and a query is
+compared exactly only against the rows of its `nprobe` closest centroids.
+Small stores (below `exact_threshold` rows) are scanned exhaustively, which
+is faster than probing at that size.
+
+Centroids and row assignments are saved together next to the store
+(``ivf_index.npz``). Building the index - loading a newer saved copy,
+assigning rows added since, or retraining once the store has grown
+fourfold - happens in a background thread, never in `search()`, so a
+request never waits for k-means. Until a build finishes, the last built
+index keeps serving and rows it doesn't cover yet are scanned exactly.
+
+Builds take a file lock shared by every process using the store, so of
+several server workers only one trains at a time; the others wait and then
+load its result instead of training again.
+"""
+
+import os
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+class IVFIndex:
+    """Inverted-file (IVF-flat) cosine similarity index over an EmbeddingStore
+
+    With `background=False`, searches build the index inline (for scripts
+    and tests); `build()` can also be called directly, e.g. offline.
+    """
+
+    def __init__(self, store, nprobe: int = 8, exact_threshold: int = 20000,
+                 kmeans_iterations: int = 10, seed: int = 0, background: bool = True):
+        self.store = store
+        self.nprobe = nprobe
+        self.exact_threshold = exact_threshold
+        self.kmeans_iterations = kmeans_iterations
+        self.background = background
+        self.rng = np.random.default_rng(seed)
+        self.logger = logging.getLogger(__name__)
+        self.index_path = os.path.join(store.root, "ivf_index.npz")
+        self.lock_path = os.path.join(store.root, "ivf_index.lock")
+
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+        self._digests: List[Optional[str]] = []
+        # (centroids, assignments): replaced together so a search never mixes two builds
+        self._lists: Tuple[Optional[np.ndarray], np.ndarray] = (None, np.zeros(0, dtype=np.int32))
+        self.trained_rows = 0
+        self._loaded_mtime = None
+        self._load()
+
+    @property
+    def centroids(self) -> Optional[np.ndarray]:
+        return self._lists[0]
+
+    @property
+    def assignments(self) -> np.ndarray:
+        return self._lists[1]
+
+    def _saved_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        mtime = self._saved_mtime()
+        if mtime is None:
+            return
+        try:
+            with np.load(self.index_path) as saved:
+                lists = (saved["centroids"], saved["assignments"])
+                trained_rows = int(saved["trained_rows"])
+            self._lists, self.trained_rows = lists, trained_rows
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable IVF index, it will be retrained: {e}")
+        self._loaded_mtime = mtime
+
+    def _save(self):
+        centroids, assignments = self._lists
+        # Unique per process and thread: other workers may be saving the same index
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, centroids=centroids, assignments=assignments, trained_rows=self.trained_rows)
+        os.replace(tmp_path, self.index_path)
+        self._loaded_mtime = self._saved_mtime()
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Closest centroid of each row"""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            block = np.asarray(vectors[start:start + chunk])
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def _train(self, vectors: np.ndarray):
+        """Spherical k-means on a sample, then assign every row"""
+        n = len(vectors)
+        nlist = max(1, int(np.sqrt(n)))
+        sample_rows = np.sort(self.rng.choice(n, size=min(n, nlist * 64), replace=False))
+        sample = np.asarray(vectors[sample_rows])
+
+        centroids = sample[self.rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            # Empty clusters restart from a random sample point
+            empty = counts == 0
+            sums[empty] = sample[self.rng.choice(len(sample), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        centroids = centroids.astype(np.float32)
+        self._lists = (centroids, self._assign(vectors, centroids))
+        self.trained_rows = n
+        self.logger.info(f"Trained IVF index: {nlist} lists over {n} embeddings")
+
+    def _needs_build(self, n: int) -> bool:
+        if self._saved_mtime() != self._loaded_mtime:
+            return True
+        if n < self.exact_threshold:
+            return False
+        centroids, assignments = self._lists
+        return centroids is None or n > 4 * self.trained_rows or len(assignments) != n
+
+    def build(self):
+        """Bring the index up to date with the store (blocking; one builder across processes)"""
+        with self._build_lock, open(self.lock_path, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another worker may have built it while this one waited for the lock
+                if self._saved_mtime() != self._loaded_mtime:
+                    self._load()
+
+                vectors = self.store.vectors()
+                n = len(vectors)
+                if n < self.exact_threshold:
+                    return
+                centroids, assignments = self._lists
+                if centroids is None or n > 4 * self.trained_rows or len(assignments) > n:
+                    self._train(vectors)
+                elif len(assignments) < n:
+                    new_labels = self._assign(vectors[len(assignments):n], centroids)
+                    self._lists = (centroids, np.concatenate([assignments, new_labels]))
+                else:
+                    return
+                self._save()
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _build_quietly(self):
+        try:
+            self.build()
+        except Exception as e:
+            self.logger.error(f"IVF index build failed: {e}")
+
+    def refresh(self):
+        """Pick up rows added to the store since the last call, and start a build if one is due"""
+        with self._lock:
+            vectors = self.store.vectors()
+            n = len(vectors)
+            if len(self._digests) < n:
+                new = self.store.digests_by_row(start=len(self._digests))[:n - len(self._digests)]
+                if None in new:
+                    # A writer is between appending the vector and committing its digest
+                    new = new[:new.index(None)]
+                self._digests.extend(new)
+
+            if not self._needs_build(n):
+                return
+            if not self.background:
+                self.build()
+            elif self._builder is None or not self._builder.is_alive():
+                self._builder = threading.Thread(target=self._build_quietly, name="ivf-index-build", daemon=True)
+                self._builder.start()
+
+    def wait(self, timeout: float = None):
+        """Wait for a background build to finish"""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """The `k` stored embeddings most similar to `query`, as (digest, cosine similarity)"""
+        self.refresh()
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        vectors = self.store.vectors()
+        n = min(len(vectors), len(self._digests))
+        if n == 0:
+            return []
+
+        centroids, assignments = self._lists
+        if centroids is None or n < self.exact_threshold:
+            rows = np.arange(n)
+        else:
+            probe = np.argsort(-(centroids @ query))[:self.nprobe]
+            in_probe = np.zeros(len(centroids), dtype=bool)
+            in_probe[probe] = True
+            assigned = min(len(assignments), n)
+            # Rows the last build doesn't cover yet are scanned exactly
+            rows = np.concatenate([np.flatnonzero(in_probe[assignments[:assigned]]), np.arange(assigned, n)])
+
+        scores = np.asarray(vectors[rows]) @ query
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            (self._digests[rows[i]], round(float(scores[i]), 4))
+            for i in top if self._digests[rows[i]] is not None
+        ]
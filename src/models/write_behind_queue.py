@@ -0,0 +1,363 @@
+"""
+Write-behind queue with a durable local journal for VisionAI Pro Firestore writes
+
+Writes are appended to an append-only JSONL journal and acknowledged
+immediately; a background thread drains them to Firestore in batched
+commits, backing off exponentially while Firestore is unavailable.
+Document IDs are assigned up front, so replaying a ``set`` after a crash
+re-sets the same document instead of creating a duplicate.
+
+Each worker process locks its own journal (``path``, ``path.1``, ...), and a
+journal left behind by a crashed worker is picked up by the next process
+that claims it.
+
+Besides plain ``set`` writes the queue carries ``increment`` writes for
+counter documents; increments to the same document within one batch are
+summed into a single merge with Firestore Increment transforms. Replaying
+an increment would count it twice, so each counter document also records,
+in the same batch, the last journal sequence number applied to it
+(``applied_seq.<journal id>``). Entries that may already have been applied
+(recovered from the journal, or in a batch whose commit raised) are checked
+against it and skipped when at or below it.
+"""
+
+import os
+import json
+import time
+import random
+import secrets
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from .usage_counters import merge_increments, nest_paths
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+class WriteBehindQueue:
+    """Journal-backed write-behind queue that batches writes to a Firestore-like client
+
+    `db` is the client itself or a zero-argument callable returning it, so
+    writes can be accepted before the client has connected. `increment`
+    builds the increment transform (firestore.Increment by default).
+    """
+
+    FIRESTORE_BATCH_LIMIT = 500
+
+    def __init__(self, db, journal_path: str, batch_size: int = 200,
+                 flush_interval: float = 0.5, max_backoff: float = 30.0,
+                 fsync: bool = False, compact_bytes: int = 1024 * 1024, increment=None):
+        self.db = db
+        self.increment = increment
+        self.batch_size = min(batch_size, self.FIRESTORE_BATCH_LIMIT)
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self.logger = logging.getLogger(__name__)
+
+        self._pending: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self._metrics = {
+            "enqueued_total": 0,
+            "flushed_total": 0,
+            "failed_flushes": 0,
+            "consecutive_failures": 0,
+            "current_backoff": 0.0,
+            "last_flush_at": None,
+            "last_error": None,
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(journal_path)), exist_ok=True)
+        self._lock_file = None
+        self.journal_path = self._claim_journal(journal_path)
+        self.checkpoint_path = self.journal_path + ".ckpt"
+        self.journal_id = self._read_journal_id()
+        self._committed_seq = self._read_checkpoint()
+        self._seq = self._committed_seq
+        self._recover()
+        # Entries up to this sequence number may already be in Firestore
+        self._uncertain_seq = self._seq
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    @staticmethod
+    def new_document_id() -> str:
+        """Generate a 20-character document ID like Firestore's auto IDs"""
+        return secrets.token_urlsafe(15)
+
+    def _claim_journal(self, base_path: str) -> str:
+        """Lock the first journal not owned by another live worker"""
+        if fcntl is None:
+            return base_path
+
+        for index in range(1024):
+            path = base_path if index == 0 else f"{base_path}.{index}"
+            lock_file = open(path + ".lock", "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self._lock_file = lock_file
+            return path
+
+        raise RuntimeError(f"No free write-behind journal slot under {base_path}")
+
+    def _read_journal_id(self) -> str:
+        """Stable ID of this journal's sequence numbers, kept next to the journal"""
+        id_path = self.journal_path + ".id"
+        try:
+            with open(id_path, "r", encoding="utf-8") as f:
+                journal_id = f.read().strip()
+            if journal_id:
+                return journal_id
+        except FileNotFoundError:
+            pass
+
+        journal_id = secrets.token_hex(8)
+        tmp_path = id_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(journal_id)
+        os.replace(tmp_path, id_path)
+        return journal_id
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_checkpoint(self, seq: int):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(seq))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _recover(self):
+        """Re-queue journal entries that were acknowledged but never committed"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        recovered = 0
+        valid_bytes = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append was never acknowledged
+                    self.logger.warning("Dropping torn journal tail")
+                    break
+                valid_bytes += len(line)
+                self._seq = max(self._seq, entry["seq"])
+                if entry["seq"] > self._committed_seq:
+                    self._pending.append(entry)
+                    recovered += 1
+
+        if valid_bytes < os.path.getsize(self.journal_path):
+            os.truncate(self.journal_path, valid_bytes)
+
+        if recovered:
+            self.logger.info(f"Recovered {recovered} pending writes from journal")
+
+    def enqueue(self, collection: str, doc_id: str, data: Dict, op: str = "set") -> int:
+        """Durably journal a write and queue it for Firestore, returning its sequence number"""
+        with self._lock:
+            self._seq += 1
+            entry = {
+                "seq": self._seq,
+                "op": op,
+                "collection": collection,
+                "doc_id": doc_id,
+                "data": data,
+                "enqueued_at": time.time(),
+            }
+            self._journal.write(json.dumps(entry, default=str) + "\n")
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+
+            self._pending.append(entry)
+            self._metrics["enqueued_total"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.notify()
+            return entry["seq"]
+
+    def _client(self):
+        return self.db() if callable(self.db) else self.db
+
+    def _apply(self, db, batch, entry: Dict):
+        doc_ref = db.collection(entry["collection"]).document(entry["doc_id"])
+        if entry["op"] == "set":
+            batch.set(doc_ref, entry["data"])
+        elif entry["op"] == "increment":
+            if self.increment is None:
+                from firebase_admin import firestore
+                self.increment = firestore.Increment
+            transforms = {path: self.increment(amount) for path, amount in entry["data"]["increments"].items()}
+            transforms[f"applied_seq.{self.journal_id}"] = entry["seq"]
+            batch.set(doc_ref, {**entry["data"]["fields"], **nest_paths(transforms)}, merge=True)
+        else:
+            raise ValueError(f"Unknown write-behind operation: {entry['op']}")
+
+    @staticmethod
+    def _coalesce(entries: List[Dict]) -> List[Dict]:
+        """Sum increments to the same document so each is written once per batch"""
+        writes = []
+        counters = {}
+        for entry in entries:
+            if entry["op"] != "increment":
+                writes.append(entry)
+                continue
+            key = (entry["collection"], entry["doc_id"])
+            if key not in counters:
+                counters[key] = {**entry, "data": {"fields": entry["data"]["fields"], "increments": {}}}
+                writes.append(counters[key])
+            counters[key]["seq"] = entry["seq"]
+            merge_increments(counters[key]["data"]["increments"], entry["data"]["increments"])
+        return writes
+
+    def _unapplied(self, db, entries: List[Dict]) -> List[Dict]:
+        """Drop increments that an earlier commit of this journal already applied
+
+        Only this process writes ``applied_seq.<journal id>``, so reading it
+        before the commit can't race with another writer.
+        """
+        applied = {}
+        kept = []
+        for entry in entries:
+            if entry["op"] != "increment" or entry["seq"] > self._uncertain_seq:
+                kept.append(entry)
+                continue
+            key = (entry["collection"], entry["doc_id"])
+            if key not in applied:
+                snapshot = db.collection(entry["collection"]).document(entry["doc_id"]).get()
+                data = snapshot.to_dict() or {}
+                applied[key] = (data.get("applied_seq") or {}).get(self.journal_id, 0)
+            if entry["seq"] > applied[key]:
+                kept.append(entry)
+        return kept
+
+    def flush(self) -> int:
+        """Commit one batch of pending writes, returning how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                entries = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+            if not entries:
+                return 0
+
+            db = self._client()
+            writes = self._coalesce(self._unapplied(db, entries))
+            if writes:
+                batch = db.batch()
+                for entry in writes:
+                    self._apply(db, batch, entry)
+                try:
+                    batch.commit()
+                except Exception:
+                    # The commit may still have been applied (e.g. a deadline error)
+                    self._uncertain_seq = max(self._uncertain_seq, entries[-1]["seq"])
+                    raise
+
+            with self._lock:
+                for _ in entries:
+                    self._pending.popleft()
+                self._committed_seq = entries[-1]["seq"]
+                self._metrics["flushed_total"] += len(entries)
+                self._metrics["last_flush_at"] = time.time()
+                self._write_checkpoint(self._committed_seq)
+                self._maybe_compact()
+
+            return len(entries)
+
+    def _maybe_compact(self):
+        """Truncate the journal once everything in it has been committed (lock held)"""
+        if self._pending or self._journal.tell() < self.compact_bytes:
+            return
+        self._journal.seek(0)
+        self._journal.truncate()
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._lock:
+                if not self._pending and not self._stopping:
+                    self._wakeup.wait(self.flush_interval)
+                if self._stopping and not self._pending:
+                    return
+                if self._stopping and backoff:
+                    # Shutting down while Firestore is failing: leave the rest in the journal
+                    return
+
+            try:
+                while self.flush():
+                    pass
+                backoff = 0.0
+                self._metrics["consecutive_failures"] = 0
+            except Exception as e:
+                self._metrics["failed_flushes"] += 1
+                self._metrics["consecutive_failures"] += 1
+                self._metrics["last_error"] = str(e)
+                backoff = min(self.max_backoff, max(self.flush_interval, backoff * 2))
+                self.logger.error(f"Write-behind flush failed, retrying in {backoff:.1f}s: {e}")
+
+            self._metrics["current_backoff"] = backoff
+            if backoff:
+                # Jitter keeps many workers from retrying in lockstep
+                time.sleep(random.uniform(backoff / 2, backoff))
+
+    def start(self):
+        """Start the background flusher"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what can be flushed and stop; anything left stays in the journal"""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._lock:
+            self._journal.close()
+        if self._lock_file:
+            self._lock_file.close()
+
+    def get_metrics(self) -> Dict:
+        """Queue depth, flush lag and counters"""
+        with self._lock:
+            oldest = self._pending[0]["enqueued_at"] if self._pending else None
+            metrics = dict(self._metrics)
+            metrics["queue_depth"] = len(self._pending)
+            metrics["lag_seconds"] = round(time.time() - oldest, 3) if oldest else 0.0
+            metrics["committed_seq"] = self._committed_seq
+            metrics["journal_bytes"] = self._journal.tell() if not self._journal.closed else 0
+        return metrics
+
+    def get_pending(self, collection: str, doc_id: str) -> Optional[Dict]:
+        """Latest queued data for a document that has not been committed yet"""
+        with self._lock:
+            for entry in reversed(self._pending):
+                if entry["collection"] == collection and entry["doc_id"] == doc_id:
+                    return dict(entry["data"])
+        return None
+
+    def pending(self) -> List[Dict]:
+        """Snapshot of entries not yet committed"""
+        with self._lock:
+            return list(self._pending)
@@ -16,6 +16,7 @@ class ZeroShotCustomClassifier:
     def __init__(self, base_words_path: str = "query/base_words.txt", device: str = "cpu"):
         self.device = torch.device(device if torch.cuda.is_available() else "cpu")
         self.base_words_path = base_words_path
+        self.model_name = "openai/clip-vit-base-patch32"
         self.model = None
         self.processor = None
         self.categories = []
@@ -100,9 +101,8 @@ class ZeroShotCustomClassifier:
             self.logger.info("CLIP 모델을 초기화합니다...")
             
             # CLIP 모델 로드
-            model_name = "openai/clip-vit-base-patch32"
-            self.model = CLIPModel.from_pretrained(model_name)
-            self.processor = CLIPProcessor.from_pretrained(model_name)
+            self.model = CLIPModel.from_pretrained(self.model_name)
+            self.processor = CLIPProcessor.from_pretrained(self.model_name)
             
             self.model.to(self.device)
             self.model.eval()
@@ -142,41 +142,53 @@ class ZeroShotCustomClassifier:
             self.logger.error(f"카테고리 임베딩 계산 실패: {e}")
             self.category_embeddings = None
     
+    def encode_images(self, images: List[Image.Image]) -> torch.Tensor:
+        """이미지 배치의 정규화된 CLIP 임베딩 계산"""
+        # 이미지 전처리
+        image_inputs = self.processor(
+            images=images,
+            return_tensors="pt"
+        ).to(self.device)
+        
+        # 이미지 임베딩 계산
+        with torch.no_grad():
+            image_features = self.model.get_image_features(**image_inputs)
+            image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+        
+        return image_features
+    
+    def score_embeddings(self, image_features, top_k: int = 5) -> List[List[Dict[str, float]]]:
+        """저장된 이미지 임베딩을 현재 카테고리로 재평가 (비전 모델 실행 없음)"""
+        if self.category_embeddings is None:
+            raise ValueError("카테고리 임베딩이 초기화되지 않았습니다")
+        
+        if isinstance(image_features, np.ndarray):
+            image_features = torch.from_numpy(image_features)
+        image_features = image_features.to(self.device, dtype=self.category_embeddings.dtype)
+        
+        # 유사도 계산 (배치 전체를 한 번의 행렬 곱으로)
+        similarity = torch.matmul(image_features, self.category_embeddings.T)
+        
+        # 상위 k개 결과 반환
+        top_scores, top_indices = torch.topk(similarity, min(top_k, len(self.categories)), dim=1)
+        confidences = torch.sigmoid(top_scores)  # 0-1 범위로 정규화
+        
+        return [
+            [
+                {"category": self.categories[idx], "confidence": round(confidence, 4)}
+                for confidence, idx in zip(row_confidences, row_indices)
+            ]
+            for row_confidences, row_indices in zip(confidences.tolist(), top_indices.tolist())
+        ]
+    
+    def predict_batch(self, images: List[Image.Image], top_k: int = 5) -> List[List[Dict[str, float]]]:
+        """이미지 배치 Zero-shot 분류 예측"""
+        return self.score_embeddings(self.encode_images(images), top_k=top_k)
+    
     def predict(self, image: Image.Image, top_k: int = 5) -> List[Dict[str, float]]:
         """Zero-shot 이미지 분류 예측"""
         try:
-            if self.category_embeddings is None:
-                raise ValueError("카테고리 임베딩이 초기화되지 않았습니다")
-            
-            # 이미지 전처리
-            image_inputs = self.processor(
-                images=image,
-                return_tensors="pt"
-            ).to(self.device)
-            
-            # 이미지 임베딩 계산
-            with torch.no_grad():
-                image_features = self.model.get_image_features(**image_inputs)
-                image_features = image_features / image_features.norm(dim=-1, keepdim=True)
-            
-            # 유사도 계산
-            similarity = torch.matmul(image_features, self.category_embeddings.T)
-            similarity = similarity.squeeze(0)
-            
-            # 상위 k개 결과 반환
-            top_indices = torch.topk(similarity, min(top_k, len(self.categories))).indices
-            top_scores = torch.topk(similarity, min(top_k, len(self.categories))).values
-            
-            results = []
-            for score, idx in zip(top_scores, top_indices):
-                category = self.categories[idx.item()]
-                confidence = torch.sigmoid(score).item()  # 0-1 범위로 정규화
-                results.append({
-                    "category": category,
-                    "confidence": round(confidence, 4)
-                })
-            
-            return results
+            return self.predict_batch([image], top_k=top_k)[0]
             
         except Exception as e:
             self.logger.error(f"예측 중 오류 발생: {e}")